@@ -0,0 +1,273 @@
+# /benchmarks/bench_backtest.py
+# Backtest engine (src/advanced/backtest.py) on a generated year of 1-minute
+# bars and a day of aggregated trades, both in the data.binance.vision layout.
+#   python benchmarks/bench_backtest.py [--days 365] [--workers N]
+#
+# Checks:
+#   - CSVs are converted once to a .npy that is memory-mapped, not read;
+#     a second open reuses it and a touched CSV rebuilds it; trade files
+#     become one row per trade
+#   - vectorized TWAP and OCO runs match a per-run Python loop exactly
+#     (fill prices, outcome and exit row of every run)
+#   - the OCO model agrees with the real execute_oco_order: its legs are
+#     placed on the mock exchange and the bars are replayed through the
+#     feed, and the leg that fills is the one the backtest picked
+#   - simulated orders/s of the vectorized engine vs the per-run loop
+#     (at least 10x), and a sweep on a process pool vs one process (only
+#     reported as a speedup when there is more than one core)
+
+import argparse
+import bisect
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.chdir(WORKDIR)   # any other state file lands in the temp dir
+
+from src import logger  # noqa: E402
+from src.advanced import backtest  # noqa: E402
+from src.advanced.backtest import (  # noqa: E402
+    Market, data_path, simulate_oco, simulate_twap, sweep, TAKE_PROFIT, STOP_LOSS, EXPIRED,
+)
+from src.advanced.oco import execute_oco_order  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+
+SYMBOL, TICK = "BTCUSDT", 0.1
+KLINE_FMT = ["%d", "%.1f", "%.1f", "%.1f", "%.1f", "%.3f", "%d", "%.4f", "%d", "%.3f", "%.4f", "%d"]
+
+
+def write_klines(days, directory, seed=2):
+    rng = np.random.default_rng(seed)
+    n = days * 1440
+    open_time = 1704067200000 + np.arange(n) * 60000   # 2024-01-01
+    close = np.round(40000 * np.exp(np.cumsum(rng.normal(0, 6e-4, n))), 1)
+    open_ = np.concatenate(([40000.0], close[:-1]))
+    wick = np.abs(rng.normal(0, 3e-4, (2, n))) * close
+    high = np.round(np.maximum(open_, close) + wick[0], 1)
+    low = np.round(np.minimum(open_, close) - wick[1], 1)
+    volume = np.round(rng.lognormal(0, 0.5, n) * 10, 3)
+    per_file = 31 * 1440
+    for k, i in enumerate(range(0, n, per_file)):
+        sl = slice(i, i + per_file)
+        m = open_time[sl].size
+        table = np.column_stack([open_time[sl], open_[sl], high[sl], low[sl], close[sl], volume[sl],
+                                 open_time[sl] + 59999, volume[sl] * close[sl], np.full(m, 100),
+                                 volume[sl] / 2, volume[sl] * close[sl] / 2, np.zeros(m)])
+        path = os.path.join(directory, f"{SYMBOL}-1m-part{k:02d}.csv")
+        with open(path, "w") as f:
+            if k == 0:
+                f.write("open_time,open,high,low,close,volume,close_time,quote_volume,count,"
+                        "taker_buy_volume,taker_buy_quote_volume,ignore\n")
+            np.savetxt(f, table, delimiter=",", fmt=KLINE_FMT)
+    return n
+
+
+def write_trades(directory, seed=3, n=200_000):
+    rng = np.random.default_rng(seed)
+    ts = 1704067200000 + np.sort(rng.integers(0, 86_400_000, n))
+    price = np.round(40000 * np.exp(np.cumsum(rng.normal(0, 2e-5, n))), 1)
+    qty = np.round(rng.lognormal(-4, 1, n), 3) + 0.001
+    ids = np.arange(n)
+    table = np.column_stack([ids, price, qty, ids, ids, ts * 1000, rng.integers(0, 2, n)])   # us timestamps
+    np.savetxt(os.path.join(directory, f"{SYMBOL}-aggTrades-2024-01-01.csv"), table, delimiter=",",
+               fmt=["%d", "%.1f", "%.3f", "%d", "%d", "%d", "%d"])
+    return ts, price, qty
+
+
+def check_data(days):
+    directory = os.path.join(WORKDIR, "data")
+    os.makedirs(directory)
+    rows = write_klines(days, directory)
+    ts, price, qty = write_trades(directory)
+
+    start = time.perf_counter()
+    path = data_path(directory, SYMBOL)
+    convert_s = time.perf_counter() - start
+    mtime = os.stat(path).st_mtime_ns
+    start = time.perf_counter()
+    market = Market.open_path(data_path(directory, SYMBOL))
+    open_s = time.perf_counter() - start
+    reused = os.stat(path).st_mtime_ns == mtime
+    mapped = isinstance(market.data, np.memmap) and market.rows == rows and bool(np.all(np.diff(market.time) > 0))
+
+    os.utime(os.path.join(directory, f"{SYMBOL}-1m-part00.csv"), ns=(0, mtime + 10 ** 9))
+    rebuilt = os.stat(data_path(directory, SYMBOL)).st_mtime_ns != mtime
+
+    trades = Market.open_path(data_path(directory, SYMBOL, "aggTrades"))
+    trades_ok = (np.array_equal(trades.time, ts) and np.array_equal(trades.high, price)
+                 and np.allclose(trades.volume, qty))
+
+    ok = mapped and reused and rebuilt and trades_ok
+    print(f"data: {rows:,} bars converted in {convert_s * 1000:.0f} ms, mapped in {open_s * 1000:.1f} ms "
+          f"(memmap {mapped}, reused {reused}, rebuilt on change {rebuilt}), {trades.rows:,} trades ok {trades_ok} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return market, trades, 0 if ok else 1
+
+
+def loop_twap(market, side, quantity, intervals, delay, start):
+    """
+    One TWAP run, slice by slice, with bisect over plain lists.
+    """
+    t, o, v = market._lists
+    sign = 1 if side == "BUY" else -1
+    qty = quantity / intervals
+    cost = 0.0
+    for i in range(intervals):
+        due = start + i * delay * 1000
+        row = bisect.bisect_left(t, due)
+        end = max(bisect.bisect_left(t, due + delay * 1000), row + 1)
+        if end > len(t):
+            return None
+        window = sum(v[row:end])
+        share = qty / window if window > 0 else 1.0
+        cost += qty * o[row] * (1 + sign * (backtest.SPREAD_BPS / 2 + backtest.IMPACT_BPS * share) / 1e4)
+    return cost / quantity
+
+
+def loop_oco(market, side, tp, sl, start, horizon):
+    """
+    (outcome, exit row) of one OCO run, scanning bar by bar.
+    """
+    t, o, h, lo = market.time, market.open, market.high, market.low
+    k = bisect.bisect_left(t, start)
+    end = max(bisect.bisect_left(t, t[k] + horizon * 1000), k + 1)
+    for j in range(k, end):
+        up, down = h[j] >= (tp if side == "BUY" else sl), lo[j] <= (sl if side == "BUY" else tp)
+        hit_tp, hit_sl = (up, down) if side == "BUY" else (down, up)
+        if hit_tp and (not hit_sl or (o[j] >= tp if side == "BUY" else o[j] <= tp)):
+            return TAKE_PROFIT, j
+        if hit_sl:
+            return STOP_LOSS, j
+    return EXPIRED, end - 1
+
+
+def check_against_loops(market):
+    failures = 0
+    market._lists = (market.time.tolist(), market.open.tolist(), market.volume.tolist())
+    starts = market.start_times(3600 * 7, 3600)[:300]
+    for side, intervals, delay in (("BUY", 10, 60), ("SELL", 6, 300), ("BUY", 1, 0)):
+        result = simulate_twap(market, side, 1.0, intervals, delay, starts)
+        expected = [loop_twap(market, side, 1.0, intervals, delay, s) for s in starts.tolist()]
+        expected = np.array([x for x in expected if x is not None])
+        ok = result["runs"] == expected.size and np.allclose(result["fill_price"], expected, rtol=1e-12)
+        failures += 0 if ok else 1
+        print(f"twap {side} {intervals}x{delay}s: {result['runs']} runs match the loop, "
+              f"slippage {result['slippage_bps'].mean():.2f} bps -> {'ok' if ok else 'FAIL'}")
+
+    lists = Market.__new__(Market)
+    lists.time, lists.open, lists.high, lists.low = (market.time.tolist(), market.open.tolist(),
+                                                     market.high.tolist(), market.low.tolist())
+    for side, tp_bps, sl_bps, horizon in (("BUY", 50, 50, 86400), ("SELL", 30, 80, 6 * 3600), ("BUY", 400, 400, 3600)):
+        result = simulate_oco(market, side, 0.01, tp_bps, sl_bps, horizon, starts, TICK)
+        expected = [loop_oco(lists, side, tp, sl, s, horizon)
+                    for tp, sl, s in zip(result["take_profit"].tolist(), result["stop_loss"].tolist(), starts.tolist())]
+        outcomes = np.array([e[0] for e in expected])
+        rows = np.array([e[1] for e in expected])
+        ok = np.array_equal(result["outcome"], outcomes) and np.array_equal(result["exit_row"], rows)
+        failures += 0 if ok else 1
+        counts = np.bincount(result["outcome"], minlength=3)
+        print(f"oco {side} tp {tp_bps} / sl {sl_bps} bps, {horizon // 3600}h: {result['runs']} runs match the loop "
+              f"(TP {counts[0]}, SL {counts[1]}, expired {counts[2]}) -> {'ok' if ok else 'FAIL'}")
+    return failures
+
+
+def replay_on_mock(market, side, quantity, tp, sl, k, end):
+    """
+    Place the legs with execute_oco_order and push each bar through the mock
+    feed (open, the stop side's extreme, the other extreme, close). Returns
+    the leg that filled and the row it filled on.
+    """
+    exchange = MockExchange(spread_bps=0, rate_limits=None)
+    exchange.set_price(SYMBOL, float(market.open[k]))
+    group = execute_oco_order(exchange, SYMBOL, side, quantity, tp, sl)["group_id"]
+    for j in range(k, end):
+        bar = [market.open[j]] if j > k else []
+        bar += [market.low[j], market.high[j]] if side == "BUY" else [market.high[j], market.low[j]]
+        for price in bar + [market.close[j]]:
+            exchange.set_price(SYMBOL, float(price))
+            for outcome, leg in ((TAKE_PROFIT, "TP"), (STOP_LOSS, "SL")):
+                order = exchange.futures_get_order(symbol=SYMBOL, origClientOrderId=f"{leg}-{group}")
+                if order["status"] == "FILLED":
+                    return outcome, j
+    return EXPIRED, end - 1
+
+
+def check_executor_replay(market, runs=24):
+    starts = market.start_times(86400 * 5, 86400)[:runs]
+    failures = 0
+    for side in ("BUY", "SELL"):
+        result = simulate_oco(market, side, 0.01, 40, 40, 6 * 3600, starts, TICK)
+        agree = 0
+        for i, k in enumerate(np.searchsorted(market.time, result["start"]).tolist()):
+            got = replay_on_mock(market, side, 0.01, float(result["take_profit"][i]), float(result["stop_loss"][i]),
+                                 k, int(result["exit_row"][i]) + 1)
+            agree += got == (int(result["outcome"][i]), int(result["exit_row"][i]))
+        ok = agree == result["runs"]
+        failures += 0 if ok else 1
+        print(f"execute_oco_order replayed on the mock ({side}): {agree}/{result['runs']} runs fill the leg "
+              f"the backtest picked, on the same bar -> {'ok' if ok else 'FAIL'}")
+    return failures
+
+
+def check_throughput(market, path, workers):
+    starts = market.start_times(900, 3600)
+    start = time.perf_counter()
+    result = simulate_twap(market, "BUY", 1.0, 10, 60, starts)
+    vector_rate = result["orders"] / (time.perf_counter() - start)
+    sample = starts[:500].tolist()
+    start = time.perf_counter()
+    for s in sample:
+        loop_twap(market, "BUY", 1.0, 10, 60, s)
+    loop_rate = 10 * len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    result = simulate_oco(market, "BUY", 0.01, 100, 100, 86400, market.start_times(900))
+    oco_rate = result["orders"] / (time.perf_counter() - start)
+
+    ok = vector_rate > 10 * loop_rate
+    print(f"vectorized: twap {vector_rate:,.0f} orders/s ({vector_rate / loop_rate:.0f}x a per-run loop at "
+          f"{loop_rate:,.0f}), oco {oco_rate:,.0f} orders/s -> {'ok' if ok else 'FAIL'}")
+
+    grid = {"tp_bps": [25, 50, 100, 200], "sl_bps": [25, 50, 100, 200]}
+    fixed = {"side": "BUY", "quantity": 0.01, "horizon": 86400}
+    serial, serial_stats = sweep(path, "oco", grid, fixed, every=900, workers=1)
+    parallel, parallel_stats = sweep(path, "oco", grid, fixed, every=900, workers=workers)
+    same = [r["pnl_total"] for r in serial] == [r["pnl_total"] for r in parallel]
+    speedup = parallel_stats["orders_per_s"] / serial_stats["orders_per_s"]
+    cores = os.cpu_count() or 1
+    scaled = speedup > 1.2 if cores > 1 and parallel_stats["workers"] > 1 else True
+    best = max(serial, key=lambda r: r["pnl_mean"])
+    sweep_ok = same and scaled and serial_stats["combinations"] == 16
+    print(f"sweep {serial_stats['combinations']} tp/sl combinations: 1 process {serial_stats['orders_per_s']:,.0f} "
+          f"orders/s, {parallel_stats['workers']} processes {parallel_stats['orders_per_s']:,.0f} orders/s "
+          f"({speedup:.1f}x{'' if cores > 1 else ', 1 core: not checked'}), same results {same}; best "
+          f"tp {best['params']['tp_bps']} / sl {best['params']['sl_bps']} bps -> {'ok' if sweep_ok else 'FAIL'}")
+    return (0 if ok else 1) + (0 if sweep_ok else 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    market, trades, failures = check_data(args.days)
+    failures += check_against_loops(market)
+    failures += check_executor_replay(market)
+    failures += check_throughput(market, data_path(os.path.join(WORKDIR, "data"), SYMBOL), max(args.workers, 2))
+    logger.flush()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# /benchmarks/bench_batch_orders.py
+# Batch vs one-by-one order submission against the mock exchange
+# (src/mock_exchange.py) with a fixed round-trip time per REST call.
+#   python benchmarks/bench_batch_orders.py [rtt_ms]
+#
+# Also checks result mapping (per-item rejections), the single-call
+# fallback, OCO rollback when one leg is rejected and what happens to the
+# legs when the batch reply is lost.
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+
+from src.batch_orders import submit_orders, MAX_BATCH_SIZE  # noqa: E402
+from src.advanced.oco import execute_oco_order  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+
+
+class APIError(Exception):
+    def __init__(self, code, msg):
+        super().__init__(msg)
+        self.code = code
+
+
+class LatencyClient:
+    """
+    Every REST call costs `rtt` seconds. Orders with quantity <= 0 or a
+    "reject" flag in newClientOrderId are rejected with code -4003.
+    """
+
+    def __init__(self, rtt=0.02):
+        self.rtt = rtt
+        self.calls = 0
+        self.open = {}
+        self.next_id = 1
+        self._lock = threading.Lock()
+
+    def _place(self, p):
+        if float(p["quantity"]) <= 0 or "reject" in p.get("newClientOrderId", ""):
+            return {"code": -4003, "msg": "Quantity less than or equal to zero."}
+        with self._lock:
+            order = {"orderId": self.next_id, "status": "NEW", "clientOrderId": p.get("newClientOrderId"), **p}
+            self.next_id += 1
+            self.open[order["clientOrderId"]] = order
+        return order
+
+    def futures_create_order(self, **p):
+        self.calls += 1
+        time.sleep(self.rtt)
+        result = self._place(p)
+        if "code" in result:
+            raise APIError(result["code"], result["msg"])
+        return result
+
+    def futures_place_batch_order(self, batchOrders):
+        self.calls += 1
+        time.sleep(self.rtt)
+        return [self._place(p) for p in batchOrders]
+
+    def futures_cancel_order(self, symbol, origClientOrderId):
+        self.calls += 1
+        time.sleep(self.rtt)
+        if origClientOrderId not in self.open:
+            raise APIError(-2011, "Unknown order sent.")
+        return self.open.pop(origClientOrderId)
+
+    def futures_get_order(self, symbol, origClientOrderId):
+        self.calls += 1
+        time.sleep(self.rtt)
+        if origClientOrderId not in self.open:
+            raise APIError(-2013, "Order does not exist.")
+        return self.open[origClientOrderId]
+
+
+class LostReply(LatencyClient):
+    """
+    The batch reaches the exchange (only its first `placed` orders are
+    accepted) but the reply is lost; lookups fail too if `lookups_fail`.
+    """
+
+    def __init__(self, placed=2, lookups_fail=False):
+        super().__init__(rtt=0)
+        self.placed = placed
+        self.lookups_fail = lookups_fail
+
+    def futures_place_batch_order(self, batchOrders):
+        super().futures_place_batch_order(batchOrders[:self.placed])
+        raise ConnectionError("Read timed out.")
+
+    def futures_get_order(self, symbol, origClientOrderId):
+        if self.lookups_fail:
+            self.calls += 1
+            raise ConnectionError("Connection reset by peer.")
+        return super().futures_get_order(symbol, origClientOrderId)
+
+
+def check_lost_reply():
+    failures = 0
+    # Both legs placed: looked up and tracked, not rolled back
+    client = LostReply(placed=2)
+    try:
+        out = execute_oco_order(client, "BTCUSDT", "BUY", 0.01, 90000, 80000)
+        if client.calls != 3 or len(client.open) != 2 or not out["stop_loss_order"]["clientOrderId"].startswith("SL-"):
+            failures += 1
+            print("MISMATCH lost reply, both placed:", client.calls, list(client.open))
+    except RuntimeError as e:
+        failures += 1
+        print("MISMATCH lost reply, both placed: raised", e)
+
+    # Only the take-profit made it: it is cancelled
+    client = LostReply(placed=1)
+    try:
+        execute_oco_order(client, "BTCUSDT", "BUY", 0.01, 90000, 80000)
+        failures += 1
+        print("MISMATCH lost reply, one placed: no error raised")
+    except RuntimeError:
+        pass
+    if client.open:
+        failures += 1
+        print("MISMATCH lost reply, one placed: naked legs left", list(client.open))
+
+    # Nothing can be confirmed: every leg is cancelled by client order id
+    client = LostReply(placed=2, lookups_fail=True)
+    results = submit_orders(client, [{"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01}] * 2)
+    if [r["unknown"] for r in results] != [True, True]:
+        failures += 1
+        print("MISMATCH lost reply, lookups failing:", results)
+    try:
+        execute_oco_order(client, "BTCUSDT", "BUY", 0.01, 90000, 80000)
+        failures += 1
+        print("MISMATCH lost reply, lookups failing: no error raised")
+    except RuntimeError:
+        pass
+    if any(k.startswith(("TP-", "SL-")) for k in client.open):
+        failures += 1
+        print("MISMATCH lost reply, lookups failing: naked legs left", list(client.open))
+
+    print(f"lost reply: {'ok' if not failures else f'{failures} failed'}")
+    return failures
+
+
+def check():
+    failures = 0
+    client = LatencyClient(rtt=0)
+    orders = [{"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": q}
+              for q in (0.01, 0.02, 0, 0.04, 0.05, 0.06, 0)]
+    results = submit_orders(client, orders)
+    ok = [r["ok"] for r in results]
+    if ok != [True, True, False, True, True, True, False] or client.calls != 2:
+        failures += 1
+        print("MISMATCH batch mapping:", ok, "calls", client.calls)
+    if results[2]["code"] != -4003 or results[0]["response"]["quantity"] != "0.01":
+        failures += 1
+        print("MISMATCH batch error / item:", results[2], results[0]["response"])
+
+    class NoBatch(LatencyClient):
+        def __getattribute__(self, name):
+            if name == "futures_place_batch_order":
+                raise AttributeError(name)
+            return super().__getattribute__(name)
+
+    single = NoBatch(rtt=0)
+    results = submit_orders(single, orders[:3])
+    if [r["ok"] for r in results] != [True, True, False] or single.calls != 3:
+        failures += 1
+        print("MISMATCH single fallback:", results)
+
+    client = LatencyClient(rtt=0)
+    out = execute_oco_order(client, "BTCUSDT", "BUY", 0.01, 90000, 80000)
+    if client.calls != 1 or len(client.open) != 2 or not out["take_profit_order"]["clientOrderId"].startswith("TP-"):
+        failures += 1
+        print("MISMATCH oco batch:", client.calls, out)
+
+    import src.advanced.oco as oco
+    client = LatencyClient(rtt=0)
+    orig = oco.uuid.uuid4
+    oco.uuid.uuid4 = lambda: "reject-group"
+    try:
+        execute_oco_order(client, "BTCUSDT", "BUY", 0.01, 90000, 80000)
+        failures += 1
+        print("MISMATCH oco rollback: no error raised")
+    except RuntimeError:
+        pass
+    finally:
+        oco.uuid.uuid4 = orig
+    if client.open:
+        failures += 1
+        print("MISMATCH oco rollback: naked legs left", list(client.open))
+
+    print(f"checks: {'ok' if not failures else f'{failures} failed'}")
+    return failures
+
+
+def timed(fn, runs=5):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    rtt = (float(sys.argv[1]) if len(sys.argv) > 1 else 20) / 1000
+    failures = check() + check_lost_reply()
+
+    client = MockExchange(latency=rtt, rate_limits=None)
+    legs = [{"symbol": "BTCUSDT", "side": "SELL", "type": "TAKE_PROFIT", "quantity": 0.01,
+             "price": 90000, "stopPrice": 90000, "timeInForce": "GTC"},
+            {"symbol": "BTCUSDT", "side": "SELL", "type": "STOP_MARKET", "quantity": 0.01, "stopPrice": 80000}]
+    seq = timed(lambda: submit_orders(client, legs, batch=False))
+    bat = timed(lambda: submit_orders(client, legs))
+    print(f"OCO legs (rtt {rtt * 1000:.0f} ms): sequential {seq:.1f} ms, batch {bat:.1f} ms "
+          f"({seq / bat:.1f}x)")
+
+    many = [{"symbol": "ETHUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01}] * 50
+    seq = timed(lambda: submit_orders(client, many, batch=False), runs=2)
+    bat = timed(lambda: submit_orders(client, many), runs=2)
+    print(f"{len(many)} orders: sequential {seq:.1f} ms, batch of {MAX_BATCH_SIZE} {bat:.1f} ms "
+          f"({seq / bat:.1f}x)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# /benchmarks/bench_bulk.py
+# Bulk command-file mode (src/bulk_commands.py) against the mock exchange
+# and the mock LLM.
+#   python benchmarks/bench_bulk.py [--n 2000] [--rtt-ms 5] [--workers 8]
+#
+# The file mixes market and resting limit orders on four symbols, a few
+# phrasings only the (mock) model understands and a few invalid lines.
+# Checks:
+#   - one JSONL result per command, failures reported at the right stage
+#   - within a symbol, orders reach the exchange in file order
+#   - with a fixed round-trip time, --workers 8 beats --workers 1 by
+#     close to the number of symbols; --unordered goes further
+# Every run goes through the rate limiter (in-process state, roomy limits).
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_PARSE_CACHE_FILE"] = os.path.join(WORKDIR, "parse_cache.db")
+os.environ.setdefault("HF_API_KEY", "mock")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.chdir(WORKDIR)   # any other state file lands in the temp dir
+
+from benchmarks import mock_llm  # noqa: E402
+from benchmarks.mock_llm import MockLLMServer  # noqa: E402
+from src.bulk_commands import read_commands, run_bulk, format_summary  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+from src.rate_limiter import RateLimiter, RateLimitedClient  # noqa: E402
+from graph import build_bot_graph  # noqa: E402
+from llm_parser import LLMParser  # noqa: E402
+
+LIMITS = [
+    {"rateLimitType": "REQUEST_WEIGHT", "interval": "MINUTE", "intervalNum": 1, "limit": 1000000},
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 1000000},
+]
+
+ASSETS = {"btc": ("BTCUSDT", 0.01, 90000), "eth": ("ETHUSDT", 0.1, 3400),
+          "sol": ("SOLUSDT", 1, 150), "bnb": ("BNBUSDT", 0.1, 650)}
+
+
+def make_commands(n):
+    """
+    Returns the command file text and the number of lines expected to
+    fail validation.
+    """
+    lines, invalid = ["# generated by bench_bulk.py"], 0
+    names = list(ASSETS)
+    for i in range(n):
+        asset = names[i % len(names)]
+        symbol, qty, above = ASSETS[asset]
+        if i % 50 == 7:
+            text = f"kindly acquire {qty} units of {asset} for me, number {i}"
+            mock_llm.ANSWERS[text] = {"order_type": "market", "symbol": symbol, "side": "BUY", "quantity": qty}
+        elif i % 50 == 13:
+            text, invalid = f"buy 0 {asset}", invalid + 1
+        elif i % 2:
+            text = f"sell {qty} {asset} limit at {above + i % 7}"
+        else:
+            text = f"buy {qty} {asset}"
+        lines.append(text)
+    return "\n".join(lines) + "\n", invalid
+
+
+def run(text, parser, graph, workers, rtt, ordered=True):
+    exchange = MockExchange(latency=rtt, rate_limits=None)
+    client = RateLimitedClient(exchange, RateLimiter(LIMITS, path=None))
+    out = io.StringIO()
+    summary = run_bulk(read_commands(io.StringIO(text)), out, lambda: parser, lambda: graph, lambda: client,
+                       workers=workers, ordered=ordered)
+    return summary, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def check_results(n, invalid, summary, records):
+    ok = (len(records) == n and sorted(r["line"] for r in records) == list(range(2, n + 2))
+          and summary["failed"] == {"parse": 0, "validate": invalid, "execute": 0}
+          and summary["ok"] == n - invalid and summary["parse_paths"]["llm"] == len(range(7, n, 50)))
+    print(f"results: {len(records)} JSONL records for {n} commands, {summary['ok']} ok, "
+          f"{summary['failed']['validate']} invalid, {summary['parse_paths']['llm']} parsed by the model "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_order(records):
+    # the mock numbers orders in arrival order
+    last, out_of_order = {}, 0
+    for r in sorted((r for r in records if r["ok"]), key=lambda r: r["line"]):
+        order_id = r["result"]["orderId"]
+        if order_id < last.get(r["symbol"], 0):
+            out_of_order += 1
+        last[r["symbol"]] = order_id
+    ok = out_of_order == 0
+    print(f"ordering: {out_of_order} order(s) reached the exchange ahead of an earlier line on their symbol "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--rtt-ms", type=float, default=5.0)
+    ap.add_argument("--workers", type=int, default=8)
+    args = ap.parse_args()
+
+    text, invalid = make_commands(args.n)
+    server = MockLLMServer().start()
+    try:
+        parser = LLMParser(cache=False, url=server.url())
+        graph = build_bot_graph()
+        rtt = args.rtt_ms / 1000
+
+        summary, records = run(text, parser, graph, args.workers, rtt)
+        failures = check_results(args.n, invalid, summary, records)
+        failures += check_order(records)
+        print(format_summary(summary))
+
+        serial, _ = run(text, parser, graph, 1, rtt)
+        unordered, _ = run(text, parser, graph, args.workers, rtt, ordered=False)
+    finally:
+        server.shutdown()
+
+    speedup = serial["submit_s"] / summary["submit_s"]
+    ok = speedup > 0.6 * min(args.workers, len(ASSETS))
+    print(f"submission ({args.rtt_ms:g} ms rtt): 1 worker {serial['orders_per_s']:,.0f} orders/s, "
+          f"{args.workers} workers {summary['orders_per_s']:,.0f} orders/s ({speedup:.1f}x, "
+          f"{summary['lanes']} symbol lanes), --unordered {unordered['orders_per_s']:,.0f} orders/s "
+          f"-> {'ok' if ok else 'FAIL'}")
+    failures += 0 if ok else 1
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# /benchmarks/bench_daemon.py
+# Cold CLI vs warm daemon per-command latency, with a fake exchange client
+# and fast-path commands (no network, no LLM).
+#   python benchmarks/bench_daemon.py [commands]
+#
+# cold   : fresh interpreter -> import bot, build parser + graph -> one command
+# warm   : commands over one persistent connection to an in-process CommandServer
+# send   : `python bot.py send ...` subprocess against the warm server
+# Also checks that a one-shot TWAP through execute_command reports its
+# slices as a success (the graph returns a list for TWAP / VWAP).
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ.setdefault("HF_API_KEY", "mock")
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_PARSE_CACHE_FILE"] = os.path.join(WORKDIR, "parse_cache.db")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_TWAP_STATE_DIR"] = os.path.join(WORKDIR, "twap_state")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.chdir(WORKDIR)
+
+COMMANDS = ["buy 2 btc", "sell 1 eth limit at 3200", "sell 0.5 eth oco for 2700 stop_price 3200"]
+
+COLD_SNIPPET = """
+import time, sys
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+import bot
+bot.get_parser(); bot.get_graph()
+class C:
+    def futures_create_order(self, **p): return {{"orderId": 1, **p}}
+t1 = time.perf_counter()
+out = bot.execute_command({cmd!r}, C(), suggest=False)
+t2 = time.perf_counter()
+assert out["ok"], out
+print((t1 - t0) * 1000, (t2 - t1) * 1000)
+"""
+
+
+class FakeClient:
+    def futures_create_order(self, **payload):
+        return {"orderId": 1, **payload}
+
+
+def check_twap_command():
+    import bot
+    from src.mock_exchange import MockExchange
+
+    out = bot.execute_command("twap buy 0.005 btc 5 intervals every 0 s", MockExchange(rate_limits=None),
+                              suggest=False)
+    ok = out["ok"] and isinstance(out["result"], list) and len(out["result"]) == 5
+    print(f"one-shot TWAP: ok {out['ok']}, {len(out.get('result') or [])} slice responses"
+          f"{' (' + out['error'] + ')' if 'error' in out else ''} -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    failures = check_twap_command()
+
+    # Cold CLI
+    cold = []
+    for cmd in COMMANDS * 2:
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", COLD_SNIPPET.format(root=ROOT, cmd=cmd)],
+                             capture_output=True, text=True, check=True).stdout.split()
+        cold.append(((time.perf_counter() - start) * 1000, float(out[0]), float(out[1])))
+    wall, startup, command = (statistics.median(x) for x in zip(*cold))
+    print(f"cold CLI   : {wall:8.1f} ms/command wall (imports+init {startup:.1f} ms, command {command:.2f} ms)")
+
+    # Warm daemon
+    import bot
+    from src.daemon import CommandServer, CommandClient
+
+    sock = os.path.join(WORKDIR, "bot.sock")
+    server = CommandServer(lambda text: bot.execute_command(text, FakeClient(), suggest=False), sock)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = CommandClient(sock)
+    rtt, server_ms, execute_ms = [], [], []
+    for i in range(n):
+        start = time.perf_counter()
+        reply = client.run(COMMANDS[i % len(COMMANDS)])
+        rtt.append((time.perf_counter() - start) * 1000)
+        server_ms.append(reply["timings"]["server_ms"])
+        execute_ms.append(reply["timings"]["total_ms"])
+    client.close()
+    overhead = [r - e for r, e in zip(rtt, execute_ms)]
+    print(f"warm daemon: {statistics.median(rtt):8.3f} ms/command round trip "
+          f"(command {statistics.median(execute_ms):.3f} ms, "
+          f"socket+dispatch overhead {statistics.median(overhead):.3f} ms)")
+
+    sends = []
+    for cmd in COMMANDS:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(ROOT, "bot.py"), "send", "--socket", sock, cmd],
+                       capture_output=True, check=True)
+        sends.append((time.perf_counter() - start) * 1000)
+    print(f"bot.py send: {statistics.median(sends):8.1f} ms/command wall (interpreter start + round trip)")
+    print("server stats:", server.stats.summary())
+
+    server.shutdown()
+    server.server_close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
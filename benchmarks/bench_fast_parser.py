@@ -0,0 +1,81 @@
+# /benchmarks/bench_fast_parser.py
+# Corpus check + benchmark for the deterministic fast-path parser.
+#   python benchmarks/bench_fast_parser.py [path/to/bot.log]
+#
+# - Expected corpus: the examples from the LLMParser system prompt and README.
+#   Every entry must parse locally to exactly the expected dict.
+# - Log corpus: every command recorded in bot.log ("START: Command recieved"
+#   and "input" fields of errors). Reports fast-path hit rate and latency.
+
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.fast_parser import fast_parse  # noqa: E402
+from benchmarks.corpus import EXPECTED, MUST_FALL_BACK  # noqa: E402
+
+
+def load_log_inputs(path):
+    inputs = []
+    if not os.path.exists(path):
+        return inputs
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            text = (entry.get("data") or {}).get("input")
+            if isinstance(text, str):
+                inputs.append(text)
+    return inputs
+
+
+def bench(inputs, rounds=200):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in inputs:
+            fast_parse(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(inputs)) * 1e6
+
+
+def main():
+    log_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, "bot.log")
+    failures = 0
+
+    for text, expected in EXPECTED:
+        got = fast_parse(text)
+        if got != expected:
+            failures += 1
+            print(f"MISMATCH  {text!r}\n  expected {expected}\n  got      {got}")
+
+    for text in MUST_FALL_BACK:
+        got = fast_parse(text)
+        if got is not None:
+            failures += 1
+            print(f"UNEXPECTED FAST PARSE  {text!r} -> {got}")
+
+    print(f"corpus: {len(EXPECTED) + len(MUST_FALL_BACK) - failures}/"
+          f"{len(EXPECTED) + len(MUST_FALL_BACK)} cases ok")
+
+    log_inputs = load_log_inputs(log_path)
+    if log_inputs:
+        unique = sorted(set(log_inputs))
+        hits = sum(1 for t in log_inputs if fast_parse(t) is not None)
+        unique_hits = sum(1 for t in unique if fast_parse(t) is not None)
+        print(f"bot.log: {hits}/{len(log_inputs)} commands resolved locally "
+              f"({hits / len(log_inputs):.0%}), {unique_hits}/{len(unique)} unique")
+        print(f"latency: {bench(unique):.1f} us/command (log corpus)")
+
+    print(f"latency: {bench([t for t, _ in EXPECTED]):.1f} us/command (prompt examples)")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
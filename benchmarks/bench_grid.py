@@ -0,0 +1,166 @@
+# /benchmarks/bench_grid.py
+# Grid engine (src/advanced/grid_strategy.py) against the mock exchange.
+#   python benchmarks/bench_grid.py [--levels 5000] [--steps 2000] [--rtt-ms 2]
+#
+# Checks:
+#   - ladders of 1k-100k levels, arithmetic and geometric: increasing, on
+#     the tick, right end points, constant step / ratio before snapping
+#   - the initial ladder is placed in full, and PLACE_WORKERS batches in
+#     flight beat one at a time by at least 2x with a fixed round-trip time
+#   - a random walk through the BUY grid: every fill re-arms the other side of
+#     its slot, the engine's index and the exchange's open orders stay the
+#     same set, and each armed slot keeps exactly one order
+#   - re-arm latency does not grow with the grid (--levels vs --levels / 5)
+#     and is far below re-reading the open orders once per fill
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+
+from src import logger  # noqa: E402
+from src.advanced.grid_strategy import GridEngine, build_ladder, grid_ladder, PLACE_WORKERS  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+from src.symbol_filters import SymbolFilterCache  # noqa: E402
+
+SYMBOL, TICK, QTY = "BTCUSDT", 0.1, 0.005
+
+
+def filters_for(exchange):
+    cache = SymbolFilterCache(path=None)
+    cache.load_exchange_info(exchange.futures_exchange_info())
+    return cache
+
+
+def check_ladders(filters):
+    failures = 0
+    for levels in (1000, 10000, 100000):
+        for mode in ("arithmetic", "geometric"):
+            start = time.perf_counter()
+            raw = build_ladder(20000, 200000, levels, mode)
+            raw_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            prices, qty = grid_ladder(SYMBOL, "BUY", QTY, 20000, 200000, levels, mode, filters=filters)
+            checked_ms = (time.perf_counter() - start) * 1000
+
+            steps = np.diff(raw) if mode == "arithmetic" else raw[1:] / raw[:-1]
+            on_tick = np.abs(prices / TICK - np.round(prices / TICK)) < 1e-6
+            ok = (len(prices) == levels and bool(np.all(np.diff(prices) > 0)) and bool(on_tick.all())
+                  and prices[0] == 20000 and prices[-1] == 200000 and qty == QTY
+                  and float(np.ptp(steps) / steps.mean()) < 1e-9)
+            failures += 0 if ok else 1
+            print(f"ladder {levels:6d} {mode:10s}: build {raw_ms:7.3f} ms, snapped + checked {checked_ms:7.2f} ms "
+                  f"-> {'ok' if ok else 'FAIL'}")
+    return failures
+
+
+def check_placement(levels, rtt):
+    results = {}
+    for workers in (1, PLACE_WORKERS):
+        exchange = MockExchange(latency=rtt, rate_limits=None)
+        engine = GridEngine()
+        start = time.perf_counter()
+        grid = engine.open(exchange, SYMBOL, "BUY", QTY, 76000, 96000, levels, filters=filters_for(exchange),
+                           workers=workers)
+        elapsed = time.perf_counter() - start
+        armed = len(grid.armed_slots())
+        resting = [o for o in exchange.futures_get_open_orders(symbol=SYMBOL)]
+        prices = set(grid.prices[:-1][grid.armed_slots()].tolist())
+        placed_ok = (len(resting) == armed == len(engine.index) and grid.failed == 0
+                     and all(float(o["price"]) in prices and o["side"] == "BUY" for o in resting))
+        results[workers] = (elapsed, armed, placed_ok)
+
+    serial, parallel = results[1], results[PLACE_WORKERS]
+    speedup = serial[0] / parallel[0]
+    ok = serial[2] and parallel[2] and speedup >= 2
+    print(f"placement ({levels} levels, {parallel[1]} armed, {rtt * 1000:g} ms rtt): 1 batch in flight "
+          f"{serial[1] / serial[0]:,.0f} orders/s, {PLACE_WORKERS} in flight {parallel[1] / parallel[0]:,.0f} "
+          f"orders/s ({speedup:.1f}x) -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def run_walk(levels, steps, seed=0, span=100):
+    """
+    Random walk over the mid-points between levels, one level per step, so
+    every step fills at most one grid order. It is kept within `span`
+    levels below the start, where a BUY grid has its orders. Returns
+    (engine, grid, exchange).
+    """
+    exchange = MockExchange(spread_bps=0.1, rate_limits=None)
+    engine = GridEngine()
+    exchange.subscribe(engine.on_event)
+    grid = engine.open(exchange, SYMBOL, "BUY", QTY, 76000, 96000, levels, filters=filters_for(exchange))
+    prices = grid.prices
+    mid = (prices[:-1] + prices[1:]) / 2
+    top = int(np.searchsorted(mid, exchange.price(SYMBOL)))
+    position, bottom = top, max(top - span, 0)
+    rng = np.random.default_rng(seed)
+    for move in rng.choice((-1, 1), steps):
+        position = min(max(position + int(move), bottom), top)
+        exchange.set_price(SYMBOL, float(mid[position]))
+        engine.drain()
+    return engine, grid, exchange
+
+
+def check_rearm(levels, steps):
+    failures = 0
+    p50 = {}
+    for n in (levels // 5, levels):
+        engine, grid, exchange = run_walk(n, steps)
+        armed = len(grid.armed_slots())
+        resting = {o["clientOrderId"] for o in exchange.futures_get_open_orders(symbol=SYMBOL)}
+        exits_open = sum(1 for slot, c in enumerate(grid.orders) if c is not None and not grid.entry[slot])
+        ok = (resting == set(engine.index) and len(resting) == armed and grid.failed == 0
+              and grid.round_trips > 0 and grid.entries_filled - grid.round_trips == exits_open
+              and len(engine.rearm_ms) == engine.events)
+        failures += 0 if ok else 1
+        lat = sorted(engine.rearm_ms)
+        p50[n] = statistics.median(lat)
+        print(f"re-arm ({n} levels, {steps} steps): {engine.events} fills, {grid.round_trips} round trips, "
+              f"profit {grid.profit:.2f} USDT, {len(resting)}/{armed} slots resting, p50 {p50[n] * 1000:.0f} us, "
+              f"p99 {lat[int(0.99 * (len(lat) - 1))] * 1000:.0f} us -> {'ok' if ok else 'FAIL'}")
+
+        if n == levels:
+            # what one "list open orders, find the gap" pass would cost per fill
+            rescans = []
+            for _ in range(20):
+                start = time.perf_counter()
+                {o["clientOrderId"]: o for o in exchange.futures_get_open_orders(symbol=SYMBOL)}
+                rescans.append((time.perf_counter() - start) * 1000)
+            rescan = statistics.median(rescans)
+
+    small, big = p50[levels // 5], p50[levels]
+    ok = big < 2.5 * small and big * 5 < rescan
+    print(f"re-arm scaling: p50 {small * 1000:.0f} us at {levels // 5} levels, {big * 1000:.0f} us at {levels} "
+          f"levels; one open-orders rescan at {levels} levels {rescan * 1000:.0f} us (without network) "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return failures + (0 if ok else 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--levels", type=int, default=5000)
+    ap.add_argument("--steps", type=int, default=2000)
+    ap.add_argument("--rtt-ms", type=float, default=2.0)
+    args = ap.parse_args()
+
+    failures = check_ladders(filters_for(MockExchange(rate_limits=None)))
+    failures += check_placement(2000, args.rtt_ms / 1000)
+    failures += check_rearm(args.levels, args.steps)
+    logger.flush()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
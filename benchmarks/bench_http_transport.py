@@ -0,0 +1,95 @@
+# /benchmarks/bench_http_transport.py
+# Exercises src/http_transport.py against a local stand-in server:
+#   - bare requests.post (one connection per call) vs pooled keep-alive
+#   - read timeout on a slow endpoint
+#   - retries on 503 and 429
+#   python benchmarks/bench_http_transport.py
+
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ["BOT_LOG_FILE"] = os.path.join(tempfile.mkdtemp(), "bot.log")
+
+from benchmarks.mock_llm import MockLLMServer  # noqa: E402
+from src.http_transport import HttpTransport  # noqa: E402
+
+PAYLOAD = {
+    "model": "mock",
+    "messages": [{"role": "user", "content": "Command: buy 2 btc\nReturn ONLY JSON."}],
+}
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main(n=200):
+    server = MockLLMServer().start()
+    failures = 0
+    try:
+        url = server.url()
+
+        peers = len(server.peers)
+        bare = timed(lambda: requests.post(url, json=PAYLOAD).json(), n)
+        bare_conns = len(server.peers) - peers
+
+        transport = HttpTransport(backoff_base=0.01)
+        peers = len(server.peers)
+        pooled = timed(lambda: transport.post_json(url, PAYLOAD), n)
+        pooled_conns = len(server.peers) - peers
+
+        print(f"bare requests.post : {bare:.3f} ms/call, {bare_conns} connections for {n} calls")
+        print(f"pooled transport   : {pooled:.3f} ms/call, {pooled_conns} connections for {n} calls")
+
+        # Slow endpoint -> read timeout, no hang
+        slow = HttpTransport(read_timeout=0.2, max_retries=1, backoff_base=0.01)
+        start = time.perf_counter()
+        try:
+            slow.post_json(server.url("/slow/2000"), PAYLOAD)
+            failures += 1
+            print("slow endpoint: expected timeout")
+        except requests.Timeout:
+            print(f"slow endpoint: timed out after {time.perf_counter() - start:.2f}s (2 attempts)")
+
+        # 503 twice then success
+        t = HttpTransport(max_retries=3, backoff_base=0.01)
+        data = t.post_json(server.url("/fail/2"), PAYLOAD)
+        ok = "choices" in data and t.retries == 2
+        failures += not ok
+        print(f"503 x2 then ok: {'ok' if ok else 'FAILED'}, retries={t.retries}")
+
+        # 429 with Retry-After
+        t = HttpTransport(max_retries=3, backoff_base=0.01)
+        data = t.post_json(server.url("/ratelimit/1"), PAYLOAD)
+        ok = "choices" in data and t.retries == 1
+        failures += not ok
+        print(f"429 then ok: {'ok' if ok else 'FAILED'}, retries={t.retries}")
+
+        # Retries exhausted -> error surfaces
+        t = HttpTransport(max_retries=2, backoff_base=0.01)
+        try:
+            t.post_json(server.url("/fail/10"), PAYLOAD)
+            failures += 1
+            print("503 x10: expected HTTPError")
+        except requests.HTTPError:
+            print(f"503 x10: gave up after {t.retries} retries")
+
+        print("metrics:", transport.metrics())
+    finally:
+        server.stop()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# /benchmarks/bench_ledger.py
+# Order ledger (src/ledger.py) on a million rows, plus the executors and
+# reconcile against the in-process MockExchange.
+#   python benchmarks/bench_ledger.py [--rows 1000000]
+#
+# Checks:
+#   - record_order throughput through the batched writer vs one committed
+#     INSERT per order
+#   - query latency at --rows rows (one order, open orders of a symbol, open
+#     OCO groups, a TWAP job's fills), each answered from an index
+#   - orders placed by the executors (market, limit, stop-limit, OCO, TWAP,
+#     grid) with the user stream attached end up with the exchange's status
+#     and fills; a late NEW reply does not reopen a filled order
+#   - reconcile brings a ledger that missed the stream back in line with
+#     the exchange in a handful of requests
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+
+from src import logger, ledger  # noqa: E402
+from src.ledger import Ledger  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT", "BNBUSDT")
+
+
+def synthetic_orders(n):
+    """
+    REST replies in the mix the bot produces: single orders, OCO pairs,
+    TWAP slices and grid levels. One in 1249 stays open: about 200 per
+    symbol at a million rows, the exchange's cap on open orders per symbol.
+    """
+    ts = 1704067200000
+    for i in range(n):
+        kind = i % 10
+        symbol = SYMBOLS[i % 4]
+        if kind < 4:
+            client_id, label = f"mock_{i}", "MARKET" if kind < 2 else "LIMIT"
+        elif kind < 6:
+            client_id, label = f"{'TP' if kind == 4 else 'SL'}-g{i // 10:07d}", "OCO"
+        elif kind < 9:
+            client_id, label = f"TWAP-p{i // 1000:05d}-{i % 1000}", "TWAP"
+        else:
+            client_id, label = f"GRID-g{i // 5000:04d}-{i % 50}-{i}", "GRID"
+        if i % 1249 == 0:
+            status, executed = "NEW", "0"
+        elif kind == 5:
+            status, executed = "CANCELED", "0"
+        else:
+            status, executed = "FILLED", "0.010"
+        yield label, {
+            "orderId": i + 1, "symbol": symbol, "status": status, "clientOrderId": client_id,
+            "price": "0", "avgPrice": "86000.5" if executed != "0" else "0", "origQty": "0.010",
+            "executedQty": executed, "type": "MARKET", "origType": "MARKET", "side": "BUY",
+            "stopPrice": "0", "time": ts + i, "updateTime": ts + i,
+        }
+
+
+def check_inserts(rows):
+    failures = 0
+    # one committed INSERT per order, the way a naive ledger would write
+    naive = sqlite3.connect(os.path.join(WORKDIR, "naive.db"))
+    naive.execute("CREATE TABLE orders (client_order_id TEXT PRIMARY KEY, symbol TEXT, status TEXT, body TEXT)")
+    n_naive = 2000
+    start = time.perf_counter()
+    for label, o in synthetic_orders(n_naive):
+        naive.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?)",
+                      (o["clientOrderId"], o["symbol"], o["status"], repr(o)))
+        naive.commit()
+    naive_rate = n_naive / (time.perf_counter() - start)
+    naive.close()
+
+    book = ledger.get_ledger()
+    start = time.perf_counter()
+    for label, o in synthetic_orders(rows):
+        book.record_order(label, o)
+    queued = time.perf_counter() - start
+    book.flush(timeout=600)
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed
+    count = book.stats()["orders"]
+    ok = count == rows and rate >= 10 * naive_rate
+    failures += 0 if ok else 1
+    print(f"insert {rows:,} orders: {rate:,.0f} rows/s in {book.batches:,} batches "
+          f"(queueing {queued:.1f} s of {elapsed:.1f} s), one commit per row {naive_rate:,.0f} rows/s, "
+          f"{rate / naive_rate:.0f}x, {count:,} rows stored -> {'ok' if ok else 'FAIL'}")
+    return book, failures
+
+
+def _p50_ms(fn, repeat=200):
+    lat = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        lat.append(time.perf_counter() - start)
+    return statistics.median(lat) * 1000
+
+
+def _plan(book, sql, params=()):
+    return " / ".join(r[3] for r in book._reader.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+
+def check_queries(book, rows):
+    failures = 0
+    open_sql = "status IN ('NEW', 'PARTIALLY_FILLED')"
+    twap = f"p{rows // 2000:05d}"
+    queries = [
+        ("one order by clientOrderId", lambda: book.order(f"mock_{rows // 2 // 10 * 10}"),
+         "SELECT * FROM orders WHERE client_order_id = ?", ("mock_0",)),
+        ("open orders of a symbol", lambda: book.orders(symbol="ETHUSDT", open_only=True),
+         f"SELECT * FROM orders WHERE symbol = ? AND {open_sql} ORDER BY created_at DESC LIMIT 100", ("ETHUSDT",)),
+        ("open OCO groups", lambda: book.open_groups("oco"),
+         f"SELECT group_id, symbol, COUNT(*), GROUP_CONCAT(client_order_id) FROM orders"
+         f" WHERE {open_sql} AND strategy = ? GROUP BY group_id", ("oco",)),
+        ("TWAP job fills", lambda: book.group(twap),
+         "SELECT * FROM orders WHERE group_id = ?", (twap,)),
+    ]
+    for name, fn, sql, params in queries:
+        p50 = _p50_ms(fn)
+        plan = _plan(book, sql, params)
+        indexed = "USING" in plan and "SCAN orders" not in plan.replace("USING INDEX", "")
+        ok = indexed and p50 < 5.0
+        failures += 0 if ok else 1
+        print(f"query at {rows:,} rows, {name}: p50 {p50:.3f} ms, plan [{plan}] -> {'ok' if ok else 'FAIL'}")
+
+    expected = sum(1 for i in range(rows) if i % 1249 == 0 and i % 10 in (4, 5))
+    groups = book.open_groups("oco")
+    job = book.group(twap)
+    start = time.perf_counter()
+    scanned = book._reader.execute(f"SELECT COUNT(*) FROM orders NOT INDEXED WHERE {open_sql}").fetchone()[0]
+    scan_ms = (time.perf_counter() - start) * 1000
+    ok = sum(g["open_orders"] for g in groups) == expected and job["orders"] == 300 \
+        and abs(job["executed_qty"] - 0.01 * sum(1 for o in job["order_list"] if o["status"] == "FILLED")) < 1e-9
+    failures += 0 if ok else 1
+    print(f"answers: {len(groups):,} open OCO groups ({expected:,} open legs expected), TWAP job {twap} "
+          f"{job['orders']} slices filled {job['executed_qty']:.2f} @ {job['avg_price']}, "
+          f"full scan for the open orders {scan_ms:.0f} ms ({scanned:,} rows) -> {'ok' if ok else 'FAIL'}")
+    return failures
+
+
+def check_executors():
+    from src.market_orders import execute_market_order
+    from src.limit_orders import execute_limit_order
+    from src.stop_limit import execute_stop_limit_order
+    from src.advanced.oco import execute_oco_order
+    from src.advanced.twap_scheduler import TwapScheduler
+    from src.advanced.grid_strategy import GridEngine
+
+    ledger.configure(path=os.path.join(WORKDIR, "executors.db"))
+    book = ledger.get_ledger()
+    ex = MockExchange(rate_limits=None)
+    ex.subscribe(ledger.record_event)
+    grids = GridEngine()
+    ex.subscribe(grids.on_event)
+    price = ex.price("BTCUSDT")
+
+    execute_market_order(ex, "BTCUSDT", "BUY", 0.01)
+    execute_limit_order(ex, "BTCUSDT", "BUY", 0.01, round(price * 0.97, 1))
+    execute_stop_limit_order(ex, "BTCUSDT", "SELL", 0.01, round(price * 0.95, 1), round(price * 0.949, 1))
+    filled = execute_oco_order(ex, "BTCUSDT", "BUY", 0.01, round(price * 1.01, 1), round(price * 0.96, 1))
+    open_group = execute_oco_order(ex, "ETHUSDT", "BUY", 0.1, round(ex.price("ETHUSDT") * 1.05, 2),
+                                   round(ex.price("ETHUSDT") * 0.95, 2))
+    scheduler = TwapScheduler(path=None)
+    plan = scheduler.wait(scheduler.submit(ex, "SOLUSDT", "BUY", 10, intervals=5, delay=0).plan_id, 10)
+    grid = grids.open(ex, "BNBUSDT", "BUY", 0.1, ex.price("BNBUSDT") * 0.9, ex.price("BNBUSDT") * 1.1, 8)
+    # TP of the first group fills; the sibling is cancelled as the watcher would
+    ex.set_price("BTCUSDT", price * 1.015)
+    ex.futures_cancel_order(symbol="BTCUSDT", origClientOrderId=f"SL-{filled['group_id']}")
+    ex.set_price("BNBUSDT", ex.price("BNBUSDT") * 0.97)
+    grids.drain(5)
+
+    exchange = {o.client_id: o.to_dict() for o in ex._orders.values()}
+    rows = {o["client_order_id"]: o for o in book.orders(limit=10000)}
+    same = set(exchange) == set(rows) and all(
+        rows[c]["status"] == o["status"] and abs(rows[c]["executed_qty"] - float(o["executedQty"])) < 1e-9
+        for c, o in exchange.items())
+    groups = [g["group_id"] for g in book.open_groups("oco")]
+    job = book.group(plan.plan_id, fills=True)
+    grid_rows = book.group(grid.grid_id)
+    ok = (same and groups == [open_group["group_id"]] and abs(job["executed_qty"] - plan.filled) < 1e-9
+          and len(job["fills"]) == plan.intervals and grid_rows["orders"] > grid_rows["open_orders"] > 0)
+    strategies = sorted({r["strategy"] for r in rows.values()})
+
+    # a create reply that lands after the stream's FILLED event
+    tp = book.order(f"TP-{filled['group_id']}")
+    book.record_order("OCO", {**{"clientOrderId": tp["client_order_id"], "symbol": "BTCUSDT"},
+                              "status": "NEW", "executedQty": "0"})
+    late = book.order(tp["client_order_id"])
+    ok &= late["status"] == "FILLED" and late["executed_qty"] == tp["executed_qty"]
+    print(f"executors: {len(rows)} orders ({', '.join(strategies)}) match the exchange {same}, open OCO groups "
+          f"{len(groups)}, TWAP {plan.plan_id} filled {job['executed_qty']:g} in {len(job['fills'])} fills, "
+          f"grid {grid_rows['orders']} orders, late NEW ignored {late['status'] == 'FILLED'} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    scheduler.stop()
+    return ex, 0 if ok else 1
+
+
+def check_reconcile():
+    ex = MockExchange(rate_limits=None)
+    stale = Ledger(os.path.join(WORKDIR, "reconcile.db"))
+    placed = []
+    for i in range(400):
+        symbol = SYMBOLS[i % 4]
+        price = ex.price(symbol)
+        step = 0.001 if symbol in ("BTCUSDT", "ETHUSDT") else 1 if symbol == "SOLUSDT" else 0.01
+        tick = 0.1 if symbol == "BTCUSDT" else 0.01
+        limit = round(round(price * (1 - 0.0001 * (1 + i % 50)) / tick) * tick, 2)
+        order = ex.futures_create_order(symbol=symbol, side="BUY", type="LIMIT", quantity=round(step * 10, 3),
+                                        price=limit, timeInForce="GTC")
+        stale.record_order("LIMIT", order)
+        placed.append(order)
+    # while nobody listens: half the ladder fills, some orders are cancelled
+    for symbol in SYMBOLS:
+        ex.set_price(symbol, ex.price(symbol) * 0.9975)
+    for order in placed[::7]:
+        try:
+            ex.futures_cancel_order(symbol=order["symbol"], orderId=order["orderId"])
+        except Exception:
+            pass
+    calls = ex.calls
+    summary = stale.reconcile(ex)
+    requests = ex.calls - calls
+    truth = {o["clientOrderId"]: ex.futures_get_order(orderId=o["orderId"]) for o in placed}
+    rows = {o["client_order_id"]: o for o in stale.orders(limit=1000)}
+    same = all(rows[c]["status"] == o["status"] and abs(rows[c]["executed_qty"] - float(o["executedQty"])) < 1e-9
+               for c, o in truth.items())
+    changed = sum(1 for o in truth.values() if o["status"] != "NEW")
+    ok = same and changed > 100 and requests <= 1 + 2 * len(SYMBOLS) and summary["requests"] == requests
+    print(f"reconcile: {len(placed)} orders, {changed} filled / cancelled while offline, ledger matches the "
+          f"exchange {same} after {requests} requests ({summary['ms']} ms) -> {'ok' if ok else 'FAIL'}")
+    stale.close()
+    return 0 if ok else 1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    book, failures = check_inserts(args.rows)
+    failures += check_queries(book, args.rows)
+    _, executor_failures = check_executors()
+    failures += executor_failures
+    failures += check_reconcile()
+    logger.flush()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# /benchmarks/bench_llm_stream.py
+# Blocking vs streaming LLM parse against the local mock router.
+# The mock emits one token every --token-ms and keeps talking for
+# --trailing tokens after the JSON, like a real model hitting max_tokens.
+#   python benchmarks/bench_llm_stream.py [--token-ms 5] [--trailing 200]
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HF_API_KEY", "mock")
+
+from benchmarks.mock_llm import MockLLMServer  # noqa: E402
+from llm_parser import LLMParser  # noqa: E402
+from src import logger  # noqa: E402
+
+COMMANDS = [
+    "buy 2 btc",
+    "sell 1 eth limit at 3200",
+    "sell 0.5 eth oco for 2700 stop_price 3200",
+    "btc stop limit order buy 0.1 price is 86500 stop price is 86900",
+]
+
+
+def run(parser, rounds):
+    ttft, done = [], []
+    for _ in range(rounds):
+        for cmd in COMMANDS:
+            parser.parse(cmd)
+            ttft.append(parser.last_timings["ttft_ms"])
+            done.append(parser.last_timings["json_ms"])
+    return statistics.median(ttft), statistics.median(done)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--token-ms", type=float, default=5.0)
+    ap.add_argument("--trailing", type=int, default=200)
+    ap.add_argument("--rounds", type=int, default=3)
+    args = ap.parse_args()
+
+    logger.LOG_FILE = os.path.join(tempfile.mkdtemp(), "bench.log")
+    server = MockLLMServer(token_delay=args.token_ms / 1000, trailing_tokens=args.trailing).start()
+    try:
+        for stream in (False, True):
+            parser = LLMParser(fast_path=False, cache=False, url=server.url(), stream=stream)
+            ttft, done = run(parser, args.rounds)
+            label = "streaming" if stream else "blocking "
+            print(f"{label}: time-to-first-token {ttft:8.1f} ms   time-to-complete-JSON {done:8.1f} ms")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
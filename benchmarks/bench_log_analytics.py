@@ -0,0 +1,127 @@
+# /benchmarks/bench_log_analytics.py
+# Streams a synthetic bot.log through src/log_analytics.analyze and reports
+# throughput and peak memory.
+#   python benchmarks/bench_log_analytics.py [size_mb] [--keep]
+#
+# First checks request/response pairing on a small interleaved log:
+# concurrent calls pair by client order id or endpoint label, and only
+# exchange errors close a pending request.
+
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.log_analytics import analyze  # noqa: E402
+
+LLM_ERRORS = ["'choices'", "Extra data: line 7 column 1 (char 96)", "No JSON object found in model output."]
+
+
+def generate(path, size_mb):
+    rng = random.Random(7)
+    ts = datetime(2025, 11, 1)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w") as f:
+        while written < target:
+            batch = []
+            for _ in range(1000):
+                ts += timedelta(milliseconds=rng.randint(5, 400))
+                r = rng.random()
+                if r < 0.1:
+                    entry = {"type": "ERROR", "message": "LLM parsing failed",
+                             "data": {"error": rng.choice(LLM_ERRORS), "input": "buy 0.5 btc at market"}}
+                elif r < 0.4:
+                    entry = {"type": "INFO", "message": "Command parsed",
+                             "data": {"path": rng.choice(["fast", "fast", "cache", "llm"]),
+                                      "input": "buy 2 btc", "json_ms": rng.uniform(200, 900)}}
+                else:
+                    request = {"type": "API_REQUEST", "endpoint": "futures_create_order",
+                               "payload": {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.01},
+                               "timestamp": ts.isoformat()}
+                    batch.append(json.dumps(request))
+                    ts += timedelta(milliseconds=rng.randint(20, 300))
+                    entry = {"type": "API_RESPONSE", "endpoint": "futures_create_order",
+                             "response": {"orderId": rng.randint(1, 10**9), "status": "NEW"}}
+                entry["timestamp"] = ts.isoformat()
+                batch.append(json.dumps(entry))
+            chunk = "\n".join(batch) + "\n"
+            f.write(chunk)
+            written += len(chunk)
+
+
+def check_pairing():
+    t0 = datetime(2025, 11, 1)
+    entries = [
+        (0, {"type": "API_REQUEST", "endpoint": "TWAP chunk 1/2",
+             "payload": {"symbol": "BTCUSDT", "newClientOrderId": "TWAP-x-0"}}),
+        (1, {"type": "API_REQUEST", "endpoint": "Placing LIMIT order", "payload": {"symbol": "ETHUSDT"}}),
+        (2, {"type": "ERROR", "message": "LLM parsing failed", "data": {"error": "'choices'"}}),
+        (3, {"type": "API_REQUEST", "endpoint": "futures_create_order",
+             "payload": {"symbol": "SOLUSDT", "newClientOrderId": "c2"}}),
+        (10, {"type": "API_RESPONSE", "endpoint": "futures_create_order",
+              "response": {"orderId": 3, "clientOrderId": "c2"}}),
+        (12, {"type": "API_REQUEST", "endpoint": "futures_create_order",
+              "payload": {"symbol": "BTCUSDT", "newClientOrderId": "d1"}}),
+        (15, {"type": "ERROR", "message": "BULK order failed",
+              "data": {"error": "APIError(code=-2019): Margin is insufficient.",
+                       "request": {"newClientOrderId": "d1"}}}),
+        (20, {"type": "API_RESPONSE", "endpoint": "LIMIT order executed",
+              "response": {"orderId": 2, "clientOrderId": "web_abc"}}),
+        (40, {"type": "API_RESPONSE", "endpoint": "TWAP MARKET order executed",
+              "response": {"orderId": 1, "clientOrderId": "TWAP-x-0"}}),
+    ]
+    path = os.path.join(tempfile.mkdtemp(), "pairing.log")
+    with open(path, "w") as f:
+        for ms, entry in entries:
+            entry["timestamp"] = (t0 + timedelta(milliseconds=ms)).isoformat()
+            f.write(json.dumps(entry) + "\n")
+    report = analyze(path)
+    latency = report["api_latency"]
+    ok = (latency["count"] == 3 and abs(latency["mean_ms"] - (7 + 19 + 40) / 3) < 0.01
+          and report["api_unanswered"] == 1)
+    print(f"pairing: {latency['count']} calls, mean {latency['mean_ms']} ms (expected 22.0), "
+          f"{report['api_unanswered']} unanswered -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def main():
+    failures = check_pairing()
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 200
+    path = os.path.join(tempfile.mkdtemp(), "bot.log")
+    generate(path, size_mb)
+    size = os.path.getsize(path)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    full = analyze(path)
+    first = datetime.fromisoformat(full["first_timestamp"])
+    last = datetime.fromisoformat(full["last_timestamp"])
+    since = (last - (last - first) / 10).isoformat()
+
+    for label, kwargs in (("full scan", {}),
+                          ("--type ERROR --message LLM", {"types": ["ERROR"], "message": "LLM"}),
+                          ("--since (last 10%)", {"since": since})):
+        start = time.perf_counter()
+        report = analyze(path, **kwargs)
+        elapsed = time.perf_counter() - start
+        print(f"{label:28s}: {report['scanned']} records, {size / elapsed / 1e6:6.1f} MB/s, {elapsed:.2f}s, "
+              f"matched {report['matched']}")
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"log size {size / 1e6:.0f} MB, peak RSS growth during analysis {(rss_after - rss_before) / 1024:.1f} MB")
+    print("LLM failure rate:", full["parsing"]["llm_failure_rate"], "LLM latency:", full["parsing"]["llm_latency"])
+    print("API latency:", full["api_latency"])
+
+    if "--keep" not in sys.argv:
+        os.remove(path)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
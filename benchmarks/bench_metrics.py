@@ -0,0 +1,173 @@
+# /benchmarks/bench_metrics.py
+# Overhead and output checks for the per-node metrics (src/metrics.py).
+#   python benchmarks/bench_metrics.py [calls] [--budget-us 3]
+#
+# Checks:
+#   - a timed() node costs less than --budget-us over the bare function
+#   - failing nodes are recorded with outcome="error" and still raise
+#   - the Prometheus text is well formed (cumulative buckets, +Inf == count)
+#   - the /metrics endpoint serves it
+# Also reports graph.invoke with metrics on vs off against the mock exchange.
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.chdir(WORKDIR)
+
+from src import metrics  # noqa: E402
+from src.metrics import NodeMetrics, timed, serve_metrics  # noqa: E402
+
+LINE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+
+
+def per_call_us(fn, arg, calls, repeat=5):
+    best = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(arg)
+        best.append((time.perf_counter() - start) / calls * 1e6)
+    return min(best)
+
+
+def check_overhead(calls, budget_us):
+    state = {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01}
+
+    def node(s):
+        return s
+
+    m = NodeMetrics()
+    wrapped = timed("route_node", node, m)
+    bare = per_call_us(node, state, calls)
+    on = per_call_us(wrapped, state, calls)
+    metrics.configure(enabled=False)
+    off = per_call_us(wrapped, state, calls)
+    metrics.configure(enabled=True)
+    overhead = on - bare
+    ok = overhead < budget_us
+    print(f"overhead: {overhead:.2f} us per node call (disabled {off - bare:.2f} us), "
+          f"budget {budget_us} us -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_errors():
+    m = NodeMetrics()
+
+    def boom(s):
+        raise ValueError("rejected")
+
+    wrapped = timed("validate_node", boom, m)
+    raised = False
+    try:
+        wrapped({"order_type": "limit", "symbol": "ETHUSDT"})
+    except ValueError:
+        raised = True
+    s = m.summary(("node", "outcome"))
+    ok = raised and s.get("validate_node/error", {}).get("count") == 1
+    print(f"errors: recorded as outcome=error and re-raised -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_format(text):
+    series = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = LINE.match(line)
+        if not match:
+            print("bad line:", line)
+            return False
+        name, labels, value = match.groups()
+        labels = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', labels))
+        le = labels.pop("le", None)
+        key = tuple(sorted(labels.items()))
+        entry = series.setdefault(key, {"buckets": [], "count": None})
+        if name.endswith("_bucket"):
+            entry["buckets"].append((le, float(value)))
+        elif name.endswith("_count"):
+            entry["count"] = float(value)
+    for entry in series.values():
+        values = [v for _, v in entry["buckets"]]
+        if values != sorted(values) or entry["buckets"][-1] != ("+Inf", entry["count"]):
+            return False
+    return bool(series)
+
+
+def check_exposition():
+    m = NodeMetrics()
+    for i in range(1000):
+        m.observe("market_node", "market", ["BTCUSDT", 'we"ird'][i % 2], "ok" if i % 10 else "error",
+                  (i % 50) / 10000)
+    text = m.render()
+    ok = check_format(text)
+    server = serve_metrics(0, metrics=m)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as r:
+            ok = ok and r.read().decode() == text and r.headers["Content-Type"].startswith("text/plain")
+    finally:
+        server.shutdown()
+    start = time.perf_counter()
+    for _ in range(100):
+        m.render()
+    render_ms = (time.perf_counter() - start) * 10
+    print(f"exposition: {len(text.splitlines())} lines, render {render_ms:.2f} ms, served on /metrics "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def graph_overhead(runs):
+    from graph import build_bot_graph
+    from src.mock_exchange import MockExchange
+
+    graph = build_bot_graph()
+    state = {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01,
+             "client": MockExchange(rate_limits=None)}
+
+    def sample():
+        out = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            graph.invoke(dict(state))
+            out.append((time.perf_counter() - start) * 1e6)
+        return statistics.median(out)
+
+    sample()
+    on, off = [], []
+    for _ in range(3):   # interleaved, the graph itself is noisy
+        on.append(sample())
+        metrics.configure(enabled=False)
+        off.append(sample())
+        metrics.configure(enabled=True)
+    on, off = min(on), min(off)
+    print(f"graph.invoke (market, mock exchange): {on:.0f} us with metrics, {off:.0f} us without")
+    print("nodes:", metrics.get_metrics().format_summary())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("calls", nargs="?", type=int, default=200000)
+    ap.add_argument("--budget-us", type=float, default=3.0)
+    args = ap.parse_args()
+
+    failures = check_overhead(args.calls, args.budget_us)
+    failures += check_errors()
+    failures += check_exposition()
+    graph_overhead(200)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
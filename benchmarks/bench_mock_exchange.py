@@ -0,0 +1,224 @@
+# /benchmarks/bench_mock_exchange.py
+# Checks + throughput of the offline mock exchange (src/mock_exchange.py).
+#   python benchmarks/bench_mock_exchange.py [orders]
+#
+# Checks the matching rules (price-time priority, feed liquidity, stop and
+# take-profit triggers, time in force), the exchange-side rejections, rate
+# limits, latency injection, and a full OCO round trip through the bot's
+# executor and the OCO watcher on the mock's user-data stream.
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+
+from src.mock_exchange import MockExchange, MockAPIError  # noqa: E402
+
+FAILURES = []
+
+
+def expect(name, cond, detail=""):
+    print(f"  {name}: {'ok' if cond else 'FAIL'} {detail}".rstrip())
+    if not cond:
+        FAILURES.append(name)
+
+
+def error_code(fn, **params):
+    try:
+        fn(**params)
+    except MockAPIError as e:
+        return e.code
+    return None
+
+
+def wait_for(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+def check_matching():
+    print("matching:")
+    ex = MockExchange(spread_bps=20, rate_limits=None)   # BTC quoted 85914 / 86086
+    o = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.01)
+    expect("market fills at the feed", o["status"] == "FILLED" and o["avgPrice"] == "86086")
+
+    a = ex.futures_create_order(symbol="BTCUSDT", side="SELL", type="LIMIT", quantity=0.01, price=86050,
+                                timeInForce="GTC")
+    b = ex.futures_create_order(symbol="BTCUSDT", side="SELL", type="LIMIT", quantity=0.01, price=86050,
+                                timeInForce="GTC")
+    c = ex.futures_create_order(symbol="BTCUSDT", side="SELL", type="LIMIT", quantity=0.01, price=86000,
+                                timeInForce="GTC")
+    expect("limit inside the spread rests", a["status"] == "NEW" and c["status"] == "NEW")
+    t = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=0.015, price=86100,
+                                timeInForce="IOC")
+    get = lambda x: ex.futures_get_order(symbol="BTCUSDT", orderId=x["orderId"])  # noqa: E731
+    expect("best price first, then time priority",
+           get(c)["status"] == "FILLED" and get(a)["executedQty"] == "0.005" and get(b)["status"] == "NEW")
+    expect("taker pays maker prices", t["status"] == "FILLED"
+           and abs(float(t["avgPrice"]) - (0.01 * 86000 + 0.005 * 86050) / 0.015) < 1e-6, f"avg {t['avgPrice']}")
+
+    m = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.03)
+    expect("market sweeps the book before the feed", abs(float(m["avgPrice"]) - (
+        0.005 * 86050 + 0.01 * 86050 + 0.015 * 86086) / 0.03) < 1e-6, f"avg {m['avgPrice']}")
+
+    d = ex.futures_create_order(symbol="BTCUSDT", side="SELL", type="LIMIT", quantity=0.01, price=86050,
+                                timeInForce="GTC")
+    ex.set_price("BTCUSDT", 86200)
+    expect("feed move fills resting orders", get(d)["status"] == "FILLED" and get(d)["avgPrice"] == "86050")
+
+    fok = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=0.01, price=86100,
+                                  timeInForce="FOK")
+    gtx = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=0.01, price=86400,
+                                  timeInForce="GTX")
+    expect("FOK / post-only expire", fok["status"] == "EXPIRED" and gtx["status"] == "EXPIRED")
+
+
+def check_triggers():
+    print("triggers:")
+    ex = MockExchange(spread_bps=0, rate_limits=None)
+    sl = ex.futures_create_order(symbol="ETHUSDT", side="SELL", type="STOP_MARKET", quantity=1, stopPrice=3100)
+    tp = ex.futures_create_order(symbol="ETHUSDT", side="SELL", type="TAKE_PROFIT", quantity=1, price=3300,
+                                 stopPrice=3300, timeInForce="GTC")
+    ex.set_price("ETHUSDT", 3150)
+    expect("nothing fires above the stop", ex.futures_get_order(symbol="ETHUSDT", orderId=sl["orderId"])
+           ["status"] == "NEW")
+    ex.set_price("ETHUSDT", 3099)
+    o = ex.futures_get_order(symbol="ETHUSDT", orderId=sl["orderId"])
+    expect("stop-market fires", o["status"] == "FILLED" and o["avgPrice"] == "3099" and o["type"] == "STOP_MARKET")
+    ex.set_price("ETHUSDT", 3300)
+    o = ex.futures_get_order(symbol="ETHUSDT", orderId=tp["orderId"])
+    expect("take-profit fires as a limit", o["status"] == "FILLED" and o["avgPrice"] == "3300")
+    expect("immediate trigger rejected", error_code(
+        ex.futures_create_order, symbol="ETHUSDT", side="BUY", type="STOP_MARKET", quantity=1,
+        stopPrice=3000) == -2021)
+
+
+def check_rejections():
+    print("rejections:")
+    ex = MockExchange(rate_limits=None)
+    expect("precision", error_code(ex.futures_create_order, symbol="BTCUSDT", side="BUY", type="MARKET",
+                                   quantity=0.0015) == -1111)
+    expect("min notional", error_code(ex.futures_create_order, symbol="BTCUSDT", side="BUY", type="LIMIT",
+                                      quantity=0.001, price=50000, timeInForce="GTC") == -4164)
+    expect("unknown symbol", error_code(ex.futures_create_order, symbol="FOOUSDT", side="BUY", type="MARKET",
+                                        quantity=1) == -1121)
+    o = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=0.01, price=80000,
+                                timeInForce="GTC", newClientOrderId="x-1")
+    expect("duplicate client id", error_code(ex.futures_create_order, symbol="BTCUSDT", side="BUY",
+                                             type="MARKET", quantity=0.01, newClientOrderId="x-1") == -4116)
+    ex.futures_cancel_order(symbol="BTCUSDT", origClientOrderId="x-1")
+    expect("cancel twice", error_code(ex.futures_cancel_order, symbol="BTCUSDT", orderId=o["orderId"]) == -2011)
+    results = ex.futures_place_batch_order(batchOrders=[
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "0.01"},
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "0"},
+    ])
+    expect("batch maps per-item errors", results[0]["status"] == "FILLED" and results[1]["code"] == -4003)
+
+
+def check_limits():
+    print("rate limits / latency:")
+    now = [0.0]
+    ex = MockExchange(clock=lambda: now[0])
+    for _ in range(300):
+        ex.futures_create_order(symbol="SOLUSDT", side="BUY", type="MARKET", quantity=1)
+    try:
+        ex.futures_create_order(symbol="SOLUSDT", side="BUY", type="MARKET", quantity=1)
+        expect("300 orders / 10 s", False)
+    except MockAPIError as e:
+        expect("300 orders / 10 s", e.code == -1015 and e.status_code == 429 and ex.response.status_code == 429,
+               f"retry after {e.retry_after:.0f} s")
+    now[0] = 10.0
+    ex.futures_create_order(symbol="SOLUSDT", side="BUY", type="MARKET", quantity=1)
+    expect("window slides", ex.response.headers["X-MBX-ORDER-COUNT-10S"] == "1")
+    for _ in range(60):
+        ex.futures_get_open_orders()
+    expect("weight header", ex.response.headers["X-MBX-USED-WEIGHT-1M"] == "2400")
+    expect("weight limit", error_code(ex.futures_get_open_orders) == -1003)
+
+    ex = MockExchange(latency=0.005, rate_limits=None)
+    start = time.perf_counter()
+    for _ in range(10):
+        ex.futures_exchange_info()
+    per_call = (time.perf_counter() - start) * 100
+    expect("latency injection", 5 <= per_call < 8, f"{per_call:.1f} ms per call")
+
+
+def check_client_config():
+    os.environ["BOT_EXCHANGE"] = "mock"
+    try:
+        from src.binance_client import get_client
+        client = get_client(lazy=True)
+    finally:
+        del os.environ["BOT_EXCHANGE"]
+    expect("BOT_EXCHANGE=mock", isinstance(getattr(client, "client", client), MockExchange))
+
+
+def check_oco_round_trip():
+    print("OCO round trip (executor + watcher on the mock stream):")
+    from src.advanced.oco import execute_oco_order
+    from src.advanced.oco_watcher import start_watcher
+
+    ex = MockExchange(spread_bps=0, rate_limits=None)
+    watcher = start_watcher(ex, stream_url=ex.serve_user_stream())
+    if not wait_for(watcher.connected.is_set):
+        expect("watcher connected", False)
+        return
+    out = execute_oco_order(ex, "BTCUSDT", "BUY", 0.01, 88000, 84000)
+    tp, sl = out["take_profit_order"], out["stop_loss_order"]
+    wait_for(lambda: out["group_id"] in watcher.groups)
+    ex.set_price("BTCUSDT", 88000)
+    state = lambda o: ex.futures_get_order(symbol="BTCUSDT", orderId=o["orderId"])["status"]  # noqa: E731
+    ok = wait_for(lambda: state(sl) == "CANCELED")
+    expect("TP fill cancels SL", ok and state(tp) == "FILLED", f"{watcher.cancel_ms[-1]:.2f} ms" if ok else "")
+    watcher.stop()
+
+
+def throughput(n):
+    print("throughput:")
+    ex = MockExchange(rate_limits=None)
+    start = time.perf_counter()
+    for i in range(n):
+        ex.futures_create_order(symbol="BTCUSDT", side="BUY" if i % 2 else "SELL", type="LIMIT",
+                                quantity=0.01, price=86000 + (1 if i % 2 else -1) * (100 + i % 500),
+                                timeInForce="GTC")
+    rest = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(n):
+        ex.futures_create_order(symbol="BTCUSDT", side="BUY" if i % 2 else "SELL", type="MARKET", quantity=0.01)
+    take = time.perf_counter() - start
+    samples = []
+    for i in range(200):
+        t = time.perf_counter()
+        ex.set_price("BTCUSDT", 86000 + (i % 20 - 10) * 30)
+        samples.append((time.perf_counter() - t) * 1e6)
+    print(f"  {n} resting limits {n / rest:,.0f} orders/s, {n} market orders "
+          f"{n / take:,.0f} orders/s, feed tick p50 {statistics.median(samples):.0f} us")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    check_matching()
+    check_triggers()
+    check_rejections()
+    check_limits()
+    check_client_config()
+    check_oco_round_trip()
+    throughput(n)
+    print(f"checks: {'ok' if not FAILURES else 'FAILED ' + ', '.join(FAILURES)}")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# /benchmarks/bench_oco_watcher.py
+# OCO watcher against a local websocket stand-in for the user-data stream.
+#   python benchmarks/bench_oco_watcher.py [groups]
+#
+# FakeExchange keeps the orders, answers the REST calls the watcher makes
+# and pushes ORDER_TRADE_UPDATE events to every connected stream. Checks:
+#   - filling one leg of each group cancels its sibling (latency reported)
+#   - a partial fill shrinks the sibling, the final fill cancels it
+#   - a fill while the stream is down is settled by the reconnect sweep,
+#     which also picks up groups this process never placed
+#   - an untracked group's fill event still cancels its sibling
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+
+from websockets.asyncio.server import serve  # noqa: E402
+
+from src.advanced.oco_watcher import start_watcher  # noqa: E402
+from src.advanced.oco import execute_oco_order  # noqa: E402
+
+
+class FakeExchange:
+
+    def __init__(self):
+        self.orders = {}        # clientOrderId -> order
+        self.lock = threading.Lock()
+        self.streams = set()
+        self.loop = None
+        self.cancels = 0
+        self.next_id = 1
+
+    # REST ---------------------------------------------------------------
+    def futures_stream_get_listen_key(self):
+        return {"listenKey": "listen-key"}
+
+    def futures_stream_keepalive(self, listenKey):
+        return {}
+
+    def futures_create_order(self, **p):
+        with self.lock:
+            order = {"orderId": self.next_id, "clientOrderId": p["newClientOrderId"], "symbol": p["symbol"],
+                     "side": p["side"], "type": p["type"], "origType": p["type"], "origQty": str(p["quantity"]),
+                     "executedQty": "0", "price": str(p.get("price", "0")),
+                     "stopPrice": str(p.get("stopPrice", "0")), "timeInForce": p.get("timeInForce", "GTC"),
+                     "status": "NEW"}
+            self.next_id += 1
+            self.orders[order["clientOrderId"]] = order
+        return dict(order)
+
+    def futures_place_batch_order(self, batchOrders):
+        return [self.futures_create_order(**p) for p in batchOrders]
+
+    def futures_cancel_order(self, symbol, origClientOrderId):
+        with self.lock:
+            order = self.orders.get(origClientOrderId)
+            if order is None or order["status"] not in ("NEW", "PARTIALLY_FILLED"):
+                raise RuntimeError("APIError(code=-2011): Unknown order sent.")
+            order["status"] = "CANCELED"
+            self.cancels += 1
+        self.push(order)
+        return dict(order)
+
+    def futures_get_open_orders(self, symbol=None):
+        with self.lock:
+            return [dict(o) for o in self.orders.values() if o["status"] in ("NEW", "PARTIALLY_FILLED")]
+
+    def futures_get_order(self, symbol, origClientOrderId):
+        with self.lock:
+            if origClientOrderId not in self.orders:
+                raise RuntimeError("APIError(code=-2013): Order does not exist.")
+            return dict(self.orders[origClientOrderId])
+
+    # Market ---------------------------------------------------------------
+    def fill(self, client_id, qty=None, notify=True):
+        with self.lock:
+            order = self.orders[client_id]
+            total = float(order["origQty"])
+            filled = min(total, float(order["executedQty"]) + (qty if qty is not None else total))
+            order["executedQty"] = repr(filled)
+            order["status"] = "FILLED" if filled >= total else "PARTIALLY_FILLED"
+        if notify:
+            self.push(order)
+
+    def push(self, order):
+        if self.loop is None:
+            return
+        event = json.dumps({"e": "ORDER_TRADE_UPDATE", "E": int(time.time() * 1000), "o": {
+            "s": order["symbol"], "c": order["clientOrderId"], "S": order["side"], "o": order["type"],
+            "ot": order["origType"], "q": order["origQty"], "p": order["price"], "sp": order["stopPrice"],
+            "f": order["timeInForce"], "x": "TRADE", "X": order["status"], "i": order["orderId"],
+            "z": order["executedQty"]}})
+        for ws in list(self.streams):
+            asyncio.run_coroutine_threadsafe(ws.send(event), self.loop)
+
+    # Stream ---------------------------------------------------------------
+    async def _handler(self, ws):
+        self.streams.add(ws)
+        try:
+            await ws.wait_closed()
+        finally:
+            self.streams.discard(ws)
+
+    def start(self):
+        ready = threading.Event()
+
+        async def main():
+            self.loop = asyncio.get_running_loop()
+            async with serve(self._handler, "127.0.0.1", 0) as server:
+                self.port = server.sockets[0].getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+
+        threading.Thread(target=lambda: asyncio.run(main()), daemon=True).start()
+        ready.wait()
+        return f"ws://127.0.0.1:{self.port}/ws/"
+
+    def drop_streams(self):
+        for ws in list(self.streams):
+            asyncio.run_coroutine_threadsafe(ws.close(), self.loop)
+
+
+def wait_for(cond, timeout=5.0):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond():
+            return True
+        time.sleep(0.002)
+    return False
+
+
+def status(ex, cid):
+    return ex.orders[cid]["status"]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    failures = 0
+
+    ex = FakeExchange()
+    url = ex.start()
+
+    # A group placed before the watcher starts, e.g. by a one-shot CLI run
+    early = execute_oco_order(ex, "ETHUSDT", "BUY", 1, 3500, 3000)["group_id"]
+
+    watcher = start_watcher(ex, stream_url=url)
+    if not wait_for(watcher.connected.is_set):
+        print("watcher never connected")
+        sys.exit(1)
+
+    # 1) one fill per group -> sibling cancelled
+    groups = [execute_oco_order(ex, "BTCUSDT", "BUY", 0.01, 90000, 80000)["group_id"] for _ in range(n)]
+    wait_for(lambda: all(g in watcher.groups for g in groups))
+    for i, g in enumerate(groups):
+        ex.fill(f"{'TP' if i % 2 else 'SL'}-{g}")
+    ok = wait_for(lambda: all(status(ex, f"{'SL' if i % 2 else 'TP'}-{g}") == "CANCELED"
+                              for i, g in enumerate(groups)))
+    lat = sorted(watcher.cancel_ms)
+    print(f"burst: {n} fills at once, siblings cancelled {'ok' if ok else 'FAIL'}; event->cancel "
+          f"p50 {statistics.median(lat):.2f} ms p99 {lat[int(len(lat) * 0.99) - 1]:.2f} ms")
+    failures += not ok
+
+    # Unloaded latency: one fill at a time
+    single = []
+    for _ in range(50):
+        g = execute_oco_order(ex, "BTCUSDT", "BUY", 0.01, 90000, 80000)["group_id"]
+        wait_for(lambda: g in watcher.groups)
+        before = len(watcher.cancel_ms)
+        start = time.perf_counter()
+        ex.fill(f"TP-{g}")
+        wait_for(lambda: status(ex, f"SL-{g}") == "CANCELED")
+        single.append((time.perf_counter() - start) * 1000)
+        wait_for(lambda: len(watcher.cancel_ms) > before)
+    print(f"single fills: fill -> sibling cancelled p50 {statistics.median(single):.2f} ms "
+          f"(watcher side p50 {statistics.median(watcher.cancel_ms[-50:]):.2f} ms)")
+
+    # 2) partial fill shrinks the sibling, final fill cancels it
+    g = execute_oco_order(ex, "BTCUSDT", "SELL", 1, 80000, 90000)["group_id"]
+    wait_for(lambda: g in watcher.groups)
+    ex.fill(f"TP-{g}", 0.4)
+    resized = wait_for(lambda: f"SL-{g}.1" in ex.orders and status(ex, f"SL-{g}") == "CANCELED")
+    ok = resized and abs(float(ex.orders[f"SL-{g}.1"]["origQty"]) - 0.6) < 1e-9
+    ex.fill(f"TP-{g}")
+    ok = ok and wait_for(lambda: status(ex, f"SL-{g}.1") == "CANCELED")
+    print(f"partial fill: sibling resized to 0.6 then cancelled -> {'ok' if ok else 'FAIL'}")
+    failures += not ok
+
+    # 3) fill while the stream is down -> reconnect sweep settles it
+    g = execute_oco_order(ex, "BTCUSDT", "BUY", 0.01, 90000, 80000)["group_id"]
+    wait_for(lambda: g in watcher.groups)
+    ex.drop_streams()
+    wait_for(lambda: not watcher.connected.is_set())
+    ex.fill(f"SL-{g}", notify=False)
+    ok = wait_for(lambda: status(ex, f"TP-{g}") == "CANCELED")
+    ok = ok and wait_for(lambda: watcher.connected.is_set())
+    print(f"reconnect: {watcher.reconnects} reconnect(s), missed fill settled by sweep -> {'ok' if ok else 'FAIL'}")
+    failures += not ok
+
+    # 4) the pre-existing group was picked up by the first sweep
+    ok = early in watcher.groups
+    ex.fill(f"TP-{early}")
+    ok = ok and wait_for(lambda: status(ex, f"SL-{early}") == "CANCELED")
+    print(f"untracked group found by sweep -> {'ok' if ok else 'FAIL'}")
+    failures += not ok
+
+    # 5) a group placed by another process after the sweep
+    gid = "cafebabe-123"
+    ex.futures_create_order(symbol="SOLUSDT", side="SELL", type="TAKE_PROFIT", quantity=3,
+                            price=150, stopPrice=150, newClientOrderId=f"TP-{gid}")
+    ex.futures_create_order(symbol="SOLUSDT", side="SELL", type="STOP_MARKET", quantity=3,
+                            stopPrice=130, newClientOrderId=f"SL-{gid}")
+    ex.fill(f"SL-{gid}")
+    ok = wait_for(lambda: status(ex, f"TP-{gid}") == "CANCELED")
+    print(f"event for unknown group cancels derived sibling -> {'ok' if ok else 'FAIL'}")
+    failures += not ok
+
+    print("watcher:", watcher.status())
+    watcher.stop()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
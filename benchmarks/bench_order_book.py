@@ -0,0 +1,271 @@
+# /benchmarks/bench_order_book.py
+# Order-book mirror (src/order_book.py) fed by a depth log replayed through
+# the local stand-in feed (DepthReplay in src/mock_exchange.py).
+#   python benchmarks/bench_order_book.py [--events 5000]
+#
+# The depth log is generated first (a snapshot plus depthUpdate messages in
+# the futures stream format, written as JSON lines) and then replayed from
+# that file.
+#
+# Checks:
+#   - applying the log to an OrderBook gives exactly the book a plain dict
+#     replay gives; a missing message is detected as a gap
+#   - fill estimates, depth within X bps and the largest quantity within X
+#     bps match a level-by-level walk; a query costs about the same at 1k,
+#     10k and 100k levels (binary search), unlike the walk
+#   - over the websocket, with a dropped message and a forced disconnect,
+#     the mirror resyncs from snapshots and ends on the feed's exact book
+#   - the slippage guard in validate(): small orders pass, large ones are
+#     rejected, or turned into a TWAP whose slices are whole step sizes
+#     that each fit
+#   - diff apply throughput (messages/s)
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+
+from src import logger  # noqa: E402
+from src import order_book  # noqa: E402
+from src.advanced.twap import twap_quantities  # noqa: E402
+from src.order_book import OrderBook, start_mirror  # noqa: E402
+from src.mock_exchange import DepthReplay, MockExchange  # noqa: E402
+from src.symbol_filters import SymbolFilterCache  # noqa: E402
+from src.validators import validate  # noqa: E402
+
+SYMBOL, TICK = "BTCUSDT", 0.1
+
+
+def _fmt(x):
+    return f"{x:.3f}".rstrip("0").rstrip(".")
+
+
+def write_depth_log(path, events, seed=4, levels=300):
+    """
+    Snapshot + `events` depthUpdate messages around a random-walk mid.
+    """
+    rng = np.random.default_rng(seed)
+    mid = 400000   # in ticks
+    book = {"bids": {}, "asks": {}}
+    for i in range(1, levels + 1):
+        book["bids"][mid - i] = round(float(rng.lognormal(-1, 1)), 3) + 0.001
+        book["asks"][mid + i] = round(float(rng.lognormal(-1, 1)), 3) + 0.001
+    update_id = 1000
+    snapshot = {"lastUpdateId": update_id, "E": 1704067200000, "T": 1704067200000,
+                "bids": [[f"{p * TICK:.1f}", _fmt(q)] for p, q in sorted(book["bids"].items(), reverse=True)],
+                "asks": [[f"{p * TICK:.1f}", _fmt(q)] for p, q in sorted(book["asks"].items())]}
+    with open(path, "w") as f:
+        f.write(json.dumps(snapshot) + "\n")
+        for n in range(events):
+            mid += int(rng.choice((-1, 0, 0, 1)))
+            changes = {"bids": {}, "asks": {}}
+            # levels the mid moved through leave the book
+            for p in [p for p in book["bids"] if p >= mid]:
+                changes["bids"][p] = 0.0
+            for p in [p for p in book["asks"] if p <= mid]:
+                changes["asks"][p] = 0.0
+            for _ in range(int(rng.integers(1, 12))):
+                side = "bids" if rng.random() < 0.5 else "asks"
+                offset = int(rng.geometric(0.02))
+                p = mid - offset if side == "bids" else mid + offset
+                changes[side][p] = 0.0 if rng.random() < 0.3 else round(float(rng.lognormal(-1, 1)), 3) + 0.001
+            for side in ("bids", "asks"):
+                for p, q in changes[side].items():
+                    if q > 0:
+                        book[side][p] = q
+                    else:
+                        book[side].pop(p, None)
+            first = update_id + 1
+            update_id = first + int(rng.integers(0, 4))
+            f.write(json.dumps({
+                "e": "depthUpdate", "E": 1704067200000 + 100 * (n + 1), "T": 1704067200000 + 100 * (n + 1),
+                "s": SYMBOL, "U": first, "u": update_id, "pu": first - 1,
+                "b": [[f"{p * TICK:.1f}", _fmt(q)] for p, q in changes["bids"].items()],
+                "a": [[f"{p * TICK:.1f}", _fmt(q)] for p, q in changes["asks"].items()],
+            }) + "\n")
+
+
+def same_book(book, reference):
+    return all(np.allclose(np.array(book.levels(side)).reshape(-1, 2), np.array(reference.levels(side)).reshape(-1, 2),
+                           rtol=0, atol=1e-9) and len(book.levels(side)) == len(reference.levels(side))
+               for side in ("bids", "asks"))
+
+
+def check_offline(path):
+    failures = 0
+    replay = DepthReplay.from_file(path)
+    book = OrderBook(SYMBOL)
+    book.load_snapshot(replay.futures_order_book(limit=1000))
+    # the previous message's u, so the first pu check lines up
+    start = time.perf_counter()
+    ok = all(book.apply(e) for e in replay.events)
+    apply_s = time.perf_counter() - start
+    for i in range(len(replay.events)):
+        replay._play(i)
+    identical = ok and same_book(book, replay)
+    rate = len(replay.events) / apply_s
+    failures += 0 if identical else 1
+    print(f"offline replay: {len(replay.events)} messages, {len(book.levels('bids'))} bids / "
+          f"{len(book.levels('asks'))} asks, identical to a dict replay {identical}, "
+          f"{rate:,.0f} messages/s -> {'ok' if identical else 'FAIL'}")
+
+    fresh = DepthReplay.from_file(path)
+    book = OrderBook(SYMBOL)
+    book.load_snapshot(fresh.futures_order_book(limit=1000))
+    events = fresh.events
+    ok = book.apply(events[0]) and book.apply(events[1]) and not book.apply(events[3]) and not book.synced
+    failures += 0 if ok else 1
+    print(f"sequence check: message 3 after 1 (2 lost) is a gap, book out of sync {not book.synced} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return failures
+
+
+def walk(levels, quantity):
+    # level-by-level average fill price
+    left, notional = quantity, 0.0
+    for price, qty in levels:
+        take = min(left, qty)
+        notional += take * price
+        left -= take
+        if left <= 0:
+            break
+    return notional / (quantity - left)
+
+
+def synthetic_book(levels, seed=5):
+    rng = np.random.default_rng(seed)
+    bids = [[f"{(400000 - i) * TICK:.1f}", f"{q:.3f}"] for i, q in enumerate(rng.lognormal(-1, 1, levels) + 0.001, 1)]
+    asks = [[f"{(400000 + i) * TICK:.1f}", f"{q:.3f}"] for i, q in enumerate(rng.lognormal(-1, 1, levels) + 0.001, 1)]
+    book = OrderBook(SYMBOL)
+    book.load_snapshot({"lastUpdateId": 1, "bids": bids, "asks": asks})
+    return book
+
+
+def check_queries():
+    failures = 0
+    timings = {}
+    for levels in (1000, 10000, 100000):
+        book = synthetic_book(levels)
+        asks, bids = book.levels("asks"), book.levels("bids")
+        total = min(sum(q for _, q in asks), sum(q for _, q in bids))
+        mid = book.best()["mid"]
+        ok = True
+        for q in (0.001, 1.0, 50.0, total * 0.5, total * 0.999):
+            for side, side_levels in (("BUY", asks), ("SELL", bids)):
+                e = book.estimate(side, q)
+                ok &= abs(e["avg_price"] - walk(side_levels, q)) < 1e-6 and e["complete"]
+        ok &= not book.estimate("BUY", total * 2)["complete"]
+        for bps in (1, 5, 25):
+            within = sum(qty for p, qty in asks if p <= mid * (1 + bps / 1e4))
+            ok &= abs(book.depth_within("BUY", bps)["quantity"] - within) < 1e-6
+            cap = book.max_quantity("SELL", bps)
+            ok &= abs(book.estimate("SELL", cap)["slippage_bps"] - bps) < 1e-6 or cap == sum(q for _, q in bids)
+
+        book.estimate("BUY", 1.0)   # prefix sums built
+        lat = []
+        for q in np.random.default_rng(6).uniform(0, total * 0.9, 2000):
+            start = time.perf_counter()
+            book.estimate("BUY", q)
+            lat.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(20):
+            walk(asks, total * 0.9)
+        walk_us = (time.perf_counter() - start) / 20 * 1e6
+        timings[levels] = statistics.median(lat) * 1e6
+        failures += 0 if ok else 1
+        print(f"queries ({levels:6d} levels): match a level walk {ok}, estimate p50 {timings[levels]:.1f} us, "
+              f"walk {walk_us:,.0f} us -> {'ok' if ok else 'FAIL'}")
+    flat = timings[100000] < 3 * timings[1000]
+    print(f"estimate cost 1k -> 100k levels: {timings[1000]:.1f} -> {timings[100000]:.1f} us "
+          f"-> {'ok' if flat else 'FAIL'}")
+    return failures + (0 if flat else 1)
+
+
+def check_live(path):
+    replay = DepthReplay.from_file(path, drop={len(DepthReplay.from_file(path).events) // 3})
+    final = replay.events[-1]["u"]
+    url = replay.serve(interval=0.0002, disconnect_at=2 * len(replay.events) // 3)
+    start = time.perf_counter()
+    mirror = start_mirror(replay, [SYMBOL], stream_url=url)
+    book = mirror.books[SYMBOL]
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline and not (replay.done.is_set() and book.last_update_id == final):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    identical = book.last_update_id == final and same_book(book, replay)
+    status = mirror.status()
+    ok = identical and status["gaps"] >= 1 and status["reconnects"] >= 1 and status["snapshots"] >= 3
+    print(f"live replay over the websocket: {status['events']} messages in {elapsed:.1f} s, {status['gaps']} gap, "
+          f"{status['reconnects']} reconnect, {status['snapshots']} snapshots, ends on the feed's book {identical} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return mirror, 0 if ok else 1
+
+
+def check_guard(mirror):
+    failures = 0
+    filters = SymbolFilterCache(path=None)
+    filters.load_exchange_info(MockExchange(rate_limits=None).futures_exchange_info())
+    book = mirror.books[SYMBOL]
+    small = round(book.max_quantity("BUY", 2) * 0.5, 3)
+    large = round(book.max_quantity("BUY", 2) * 3.5, 3)
+    order = {"order_type": "market", "symbol": SYMBOL, "side": "BUY"}
+
+    order_book.configure(max_slippage_bps=2, guard_mode="reject")
+    passed = validate({**order, "quantity": small}, filters=filters)["order_type"] == "market"
+    try:
+        validate({**order, "quantity": large}, filters=filters)
+        rejected = False
+    except ValueError as e:
+        rejected = "exceeds 2 bps" in str(e)
+    ok = passed and rejected
+    failures += 0 if ok else 1
+    print(f"guard reject (2 bps): {small} BTC passes {passed}, {large} BTC rejected {rejected} "
+          f"-> {'ok' if ok else 'FAIL'}")
+
+    order_book.configure(guard_mode="slice")
+    sliced = validate({**order, "quantity": large}, filters=filters)
+    n = sliced.get("twap_intervals", 0)
+    slices = twap_quantities(None, SYMBOL, sliced["quantity"], n, filters) if n else []
+    step = float(filters.get(SYMBOL).market_step_size)
+    whole = all(abs(q / step - round(q / step)) < 1e-9 for q in slices) and abs(sum(slices) - large) < 1e-9
+    fits = sliced["order_type"] == "twap" and book.estimate("BUY", max(slices))["slippage_bps"] <= 2 + 1e-9
+    fewest = n == 1 or book.estimate("BUY", large / (n - 1))["slippage_bps"] > 2
+    ok = whole and fits and fewest
+    failures += 0 if ok else 1
+    print(f"guard slice (2 bps): {large} BTC -> twap of {n} slices {min(slices):g}..{max(slices):g}, "
+          f"whole steps summing to the order {whole}, each within the limit {fits}, fewest {fewest} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    order_book.configure(max_slippage_bps=0)
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=5000)
+    args = ap.parse_args()
+
+    path = os.path.join(WORKDIR, f"{SYMBOL}-depth.jsonl")
+    write_depth_log(path, args.events)
+    failures = check_offline(path)
+    failures += check_queries()
+    mirror, live_failures = check_live(path)
+    failures += live_failures
+    failures += check_guard(mirror)
+    mirror.stop()
+    logger.flush()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
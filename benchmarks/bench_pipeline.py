@@ -0,0 +1,286 @@
+# /benchmarks/bench_pipeline.py
+# End-to-end benchmark of parse -> validate -> route -> execute.
+#   python benchmarks/bench_pipeline.py [--n 2000] [--json] [--out results.json]
+#                                       [--baseline results.json] [--threshold 0.25]
+#
+# Everything is local: the LLM is benchmarks/mock_llm.py and the exchange
+# is src/mock_exchange.py. Stages:
+#   parse_fast / parse_llm       LLMParser.parse via the grammar / the mock LLM
+#   validate                     validators.validate (symbol filters included)
+#   graph_<type>                 build_bot_graph().invoke for each order type
+#   exec_<type>                  the executor alone, same orders
+# Each gets throughput and p50/p95/p99 latency. Also reported: memory per
+# order through the graph (tracemalloc), and what the logger costs (graph
+# and executor latency with log writes turned into no-ops, plus the per-call
+# cost of log_info).
+#
+# --out saves the results; --baseline compares against a saved run and
+# exits 1 if any stage's p50 or p95 (or the memory per order) got worse by
+# more than --threshold (relative).
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_PARSE_CACHE_FILE"] = os.path.join(WORKDIR, "parse_cache.db")
+os.environ.setdefault("HF_API_KEY", "mock")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.environ["BOT_TWAP_STATE_DIR"] = os.path.join(WORKDIR, "twap_state")
+
+from benchmarks.corpus import EXPECTED  # noqa: E402
+from benchmarks.mock_llm import MockLLMServer  # noqa: E402
+from src import logger  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+from src.validators import validate  # noqa: E402
+from src.market_orders import execute_market_order  # noqa: E402
+from src.limit_orders import execute_limit_order  # noqa: E402
+from src.stop_limit import execute_stop_limit_order  # noqa: E402
+from src.advanced.oco import execute_oco_order  # noqa: E402
+from src.advanced.twap import execute_twap_order  # noqa: E402
+from graph import build_bot_graph  # noqa: E402
+from llm_parser import LLMParser  # noqa: E402
+
+# Orders the exchange accepts and that stay cheap to match: limits rest
+# away from the feed, stops sit far from it
+ORDERS = {
+    "market": {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01},
+    "limit": {"order_type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01, "price": 80000},
+    "stop_limit": {"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01,
+                   "stop_price": 90000, "price": 90050},
+    "oco": {"order_type": "oco", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01,
+            "price": 92000, "stop_price": 80000},
+    "twap": {"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.03,
+             "twap_intervals": 3, "twap_delay": 0},
+}
+
+EXECUTORS = {
+    "market": lambda c, o: execute_market_order(c, o["symbol"], o["side"], o["quantity"]),
+    "limit": lambda c, o: execute_limit_order(c, o["symbol"], o["side"], o["quantity"], o["price"]),
+    "stop_limit": lambda c, o: execute_stop_limit_order(c, o["symbol"], o["side"], o["quantity"],
+                                                        o["stop_price"], o["price"]),
+    "oco": lambda c, o: execute_oco_order(c, o["symbol"], o["side"], o["quantity"], o["price"], o["stop_price"]),
+    "twap": lambda c, o: execute_twap_order(c, o["symbol"], o["side"], o["quantity"], o["twap_intervals"],
+                                            o["twap_delay"]),
+}
+
+# TWAP runs through the real scheduler (one event-loop round trip per slice)
+TWAP_SHARE = 10
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def measure(fn, n, warmup=20):
+    """
+    Call fn() n times; returns throughput and latency percentiles in us.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(n):
+        t = clock()
+        fn()
+        samples.append(clock() - t)
+    elapsed = clock() - start
+    samples.sort()
+    return {"n": n, "ops_per_s": round(n / elapsed, 1),
+            **{f"p{q}_us": round(percentile(samples, q / 100) * 1e6, 2) for q in (50, 95, 99)}}
+
+
+def cycle(items):
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+    return next_item
+
+
+def bench_parse(n):
+    commands = [text for text, _ in EXPECTED]
+    fast = LLMParser(fast_path=True, cache=False)
+    next_command = cycle(commands)
+    out = {"parse_fast": measure(lambda: fast.parse(next_command()), n)}
+
+    server = MockLLMServer().start()
+    try:
+        llm = LLMParser(fast_path=False, cache=False, url=server.url())
+        out["parse_llm"] = measure(lambda: llm.parse(next_command()), max(50, n // 10))
+    finally:
+        server.shutdown()
+    return out
+
+
+def bench_stages(n, client, graph):
+    out = {}
+    states = [dict(o, client=client) for o in ORDERS.values()]
+    next_state = cycle(states)
+    out["validate"] = measure(lambda: validate(next_state()), n)
+
+    for kind, order in ORDERS.items():
+        runs = n // TWAP_SHARE if kind == "twap" else n
+        state = dict(order, client=client)
+        out[f"graph_{kind}"] = measure(lambda: graph.invoke(dict(state)), runs)
+        execute = EXECUTORS[kind]
+        out[f"exec_{kind}"] = measure(lambda: execute(client, order), runs)
+    return out
+
+
+def bench_memory(n, graph):
+    """
+    Bytes per market order through the graph: peak while one order is in
+    flight, and what stays allocated afterwards (includes the mock
+    exchange's record of the order and the logger's queue).
+    """
+    client = MockExchange(rate_limits=None)
+    state = dict(ORDERS["market"], client=client)
+    for _ in range(20):
+        graph.invoke(dict(state))
+    logger.flush()
+
+    tracemalloc.start()
+    peaks = []
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(n):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        graph.invoke(dict(state))
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    logger.flush()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peaks.sort()
+    return {"peak_bytes_per_order": percentile(peaks, 0.5),
+            "retained_bytes_per_order": round((retained - base) / n, 1)}
+
+
+def bench_logger(n, client, graph):
+    """
+    Latency with log entries dropped before they are queued vs normal.
+    """
+    state = dict(ORDERS["market"], client=client)
+    order = ORDERS["market"]
+    with_logs = {"graph": measure(lambda: graph.invoke(dict(state)), n),
+                 "exec": measure(lambda: EXECUTORS["market"](client, order), n)}
+    log_info = measure(lambda: logger.log_info("bench", {"symbol": "BTCUSDT", "quantity": 0.01}), n)
+
+    original = logger._write_log
+    logger._write_log = lambda entry: None
+    try:
+        without = {"graph": measure(lambda: graph.invoke(dict(state)), n),
+                   "exec": measure(lambda: EXECUTORS["market"](client, order), n)}
+    finally:
+        logger._write_log = original
+    logger.flush()
+
+    out = {"log_info_p50_us": log_info["p50_us"]}
+    for name in ("graph", "exec"):
+        cost = with_logs[name]["p50_us"] - without[name]["p50_us"]
+        out[f"{name}_p50_us"] = with_logs[name]["p50_us"]
+        out[f"{name}_nolog_p50_us"] = without[name]["p50_us"]
+        out[f"{name}_overhead_pct"] = round(100 * cost / with_logs[name]["p50_us"], 1)
+    return out
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns the list of regressions (metric, baseline, current).
+    """
+    regressions = []
+    for stage, current in results["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            if current[metric] > before[metric] * (1 + threshold):
+                regressions.append((f"{stage}.{metric}", before[metric], current[metric]))
+    before = baseline.get("memory", {}).get("peak_bytes_per_order")
+    current = results["memory"]["peak_bytes_per_order"]
+    if before and current > before * (1 + threshold):
+        regressions.append(("memory.peak_bytes_per_order", before, current))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000, help="iterations per stage")
+    ap.add_argument("--json", action="store_true")
+    ap.add_argument("--out", help="save the results to this file")
+    ap.add_argument("--baseline", help="compare against results saved with --out")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown")
+    args = ap.parse_args()
+
+    client = MockExchange(rate_limits=None)
+    graph = build_bot_graph()
+    stages = bench_parse(args.n)
+    stages.update(bench_stages(args.n, client, graph))
+    results = {
+        "meta": {"commit": git_commit(), "python": platform.python_version(), "machine": platform.machine(),
+                 "n": args.n, "time": int(time.time())},
+        "stages": stages,
+        "memory": bench_memory(min(args.n, 500), graph),
+        "logger": bench_logger(args.n, client, graph),
+    }
+    logger.flush()
+
+    if args.out:
+        with open(os.path.join(ROOT, args.out) if not os.path.isabs(args.out) else args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        path = args.baseline if os.path.isabs(args.baseline) else os.path.join(ROOT, args.baseline)
+        with open(path) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        results["regressions"] = [{"metric": m, "baseline": b, "current": c} for m, b, c in regressions]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'stage':18s} {'ops/s':>10s} {'p50 us':>10s} {'p95 us':>10s} {'p99 us':>10s}")
+        for name, r in stages.items():
+            print(f"{name:18s} {r['ops_per_s']:10,.0f} {r['p50_us']:10.1f} {r['p95_us']:10.1f} {r['p99_us']:10.1f}")
+        m = results["memory"]
+        print(f"memory per market order: peak {m['peak_bytes_per_order'] / 1024:.1f} KiB, "
+              f"retained {m['retained_bytes_per_order'] / 1024:.2f} KiB")
+        lg = results["logger"]
+        print(f"logger: log_info p50 {lg['log_info_p50_us']:.1f} us; graph {lg['graph_p50_us']:.1f} -> "
+              f"{lg['graph_nolog_p50_us']:.1f} us without logs ({lg['graph_overhead_pct']:.0f}%), "
+              f"executor {lg['exec_p50_us']:.1f} -> {lg['exec_nolog_p50_us']:.1f} us "
+              f"({lg['exec_overhead_pct']:.0f}%)")
+        if args.baseline:
+            for metric, before, current in regressions:
+                print(f"REGRESSION {metric}: {before} -> {current} (+{(current / before - 1) * 100:.0f}%)")
+            print(f"baseline: {'ok' if not regressions else f'{len(regressions)} regression(s)'} "
+                  f"(threshold {args.threshold:.0%})")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# /benchmarks/bench_prompts.py
+# Monolithic vs compact (per-order-type) parse prompts.
+#   python benchmarks/bench_prompts.py [--budget 250] [--prefill-us 50]
+#   python benchmarks/bench_prompts.py --url https://router.huggingface.co/v1/chat/completions
+#
+# Against the local mock (default) the reply is always the fixture answer,
+# so "accuracy" there is schema coverage: did the compact prompt include the
+# schema of the expected order type. Pass --url (with HF_API_KEY set) to
+# measure real model accuracy on the same corpus.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks import mock_llm  # noqa: E402
+from benchmarks.corpus import EXPECTED, LLM_ONLY  # noqa: E402
+from llm_parser import LLMParser, PARSE_SYSTEM_PROMPT  # noqa: E402
+from src import logger  # noqa: E402
+from src.prompt_builder import build_parse_prompt, estimate_tokens  # noqa: E402
+
+
+def matches(got, expected):
+    if set(got) - {"twap_intervals", "twap_delay"} != set(expected) - {"twap_intervals", "twap_delay"}:
+        return False
+    for k, v in expected.items():
+        g = got.get(k)
+        if isinstance(v, (int, float)):
+            try:
+                if abs(float(g) - v) > 1e-9:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif str(g).upper() != str(v).upper():
+            return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget", type=int, default=None)
+    ap.add_argument("--prefill-us", type=float, default=50.0, help="mock prefill cost per prompt token")
+    ap.add_argument("--url", default=None)
+    args = ap.parse_args()
+
+    logger.LOG_FILE = os.path.join(tempfile.mkdtemp(), "bench.log")
+    corpus = EXPECTED + LLM_ONLY
+
+    server = None
+    if args.url is None:
+        os.environ.setdefault("HF_API_KEY", "mock")
+        mock_llm.ANSWERS.update({cmd: expected for cmd, expected in corpus})
+        server = mock_llm.MockLLMServer(prefill_delay=args.prefill_us / 1e6).start()
+        url = server.url()
+    else:
+        url = args.url
+
+    full_tokens = estimate_tokens(PARSE_SYSTEM_PROMPT)
+    compact_tokens, coverage = [], 0
+    for cmd, expected in corpus:
+        _, candidates, tokens = build_parse_prompt(cmd, args.budget)
+        compact_tokens.append(tokens)
+        coverage += expected["order_type"] in candidates
+
+    print(f"system prompt tokens: monolithic {full_tokens}, compact median "
+          f"{statistics.median(compact_tokens)} (max {max(compact_tokens)}, budget {args.budget})")
+    print(f"compact schema coverage: {coverage}/{len(corpus)}")
+
+    try:
+        for compact in (False, True):
+            parser = LLMParser(fast_path=False, cache=False, url=url,
+                               compact_prompt=compact, prompt_budget=args.budget)
+            correct, latencies = 0, []
+            for cmd, expected in corpus:
+                start = time.perf_counter()
+                try:
+                    got = parser.parse(cmd)
+                except RuntimeError:
+                    got = {}
+                latencies.append((time.perf_counter() - start) * 1000)
+                correct += matches(got, expected)
+            label = "compact   " if compact else "monolithic"
+            print(f"{label}: accuracy {correct}/{len(corpus)}, "
+                  f"p50 {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+# /benchmarks/bench_rate_limiter.py
+# Rate limiter (src/rate_limiter.py) against the mock exchange's limits.
+#   python benchmarks/bench_rate_limiter.py [--threads 8] [--orders 300]
+#
+# Uses tight limits (60 orders / 2 s, 200 weight / 2 s) so runs take seconds.
+# Checks:
+#   - a threaded burst straight at the mock collects 429s; through
+#     RateLimitedClient it gets none and runs close to the limit
+#   - cancels and stop-losses are served ahead of queued TWAP slices
+#   - a 429 the limiter did not see coming (exchange limit lower than
+#     configured) pauses everything for Retry-After instead of hammering
+#   - several processes on one state file stay within the limit together;
+#     the same processes with private budgets do not
+#   - usage headers are read from each call's own response, not from the
+#     client's last one (which another thread may have overwritten)
+#   - the shared limiter takes its limits from the persisted exchange info
+# Plus the uncontended cost of acquire().
+
+import argparse
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.environ["BOT_RATE_LIMIT_FILE"] = os.path.join(WORKDIR, "shared.bin")
+
+from src.mock_exchange import MockExchange, MockAPIError, MockResponse, _RateLimiter  # noqa: E402
+from src.rate_limiter import (  # noqa: E402
+    RateLimiter, RateLimitedClient, RateLimitError, MARGIN, get_rate_limiter,
+)
+from src.symbol_filters import SymbolFilterCache, FILTERS_FILE  # noqa: E402
+
+LIMITS = [
+    {"rateLimitType": "REQUEST_WEIGHT", "interval": "SECOND", "intervalNum": 2, "limit": 200},
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 2, "limit": 60},
+]
+ORDER_LIMIT, WINDOW = 60, 2.0
+
+
+def state_file(name):
+    return os.path.join(WORKDIR, f"{name}.bin")
+
+
+def burst(client, n, threads, client_id_prefix=""):
+    rejected = []
+
+    def send(i):
+        params = {"symbol": "SOLUSDT", "side": "BUY", "type": "MARKET", "quantity": 1}
+        if client_id_prefix:
+            params["newClientOrderId"] = f"{client_id_prefix}{i}"
+        try:
+            client.futures_create_order(**params)
+        except MockAPIError as e:
+            rejected.append(e.code)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(send, range(n)))
+    return rejected, time.perf_counter() - start
+
+
+def check_burst(n, threads):
+    raw = MockExchange(rate_limits=LIMITS)
+    rejected, _ = burst(raw, n, threads)
+    ex = MockExchange(rate_limits=LIMITS)
+    limited = RateLimitedClient(ex, RateLimiter(LIMITS, path=state_file("burst")))
+    rejected_limited, elapsed = burst(limited, n, threads)
+    # a full bucket (limit less the margin) at t=0, then one more per window
+    capacity = int(ORDER_LIMIT * (1 - MARGIN))
+    ideal = (math.ceil(n / capacity) - 1) * WINDOW
+    ok = len(rejected) > 0 and not rejected_limited
+    print(f"burst: {n} orders from {threads} threads -> {len(rejected)} rejected (429) without the limiter, "
+          f"{len(rejected_limited)} with it in {elapsed:.1f} s (ideal {ideal:.1f} s) -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_priority(threads):
+    ex = MockExchange(rate_limits=LIMITS)
+    limiter = RateLimiter(LIMITS, path=state_file("priority"))
+    client = RateLimitedClient(ex, limiter)
+    stop = threading.Event()
+
+    def twap_flood(t):
+        i = 0
+        while not stop.is_set():
+            client.futures_create_order(symbol="SOLUSDT", side="BUY", type="MARKET", quantity=1,
+                                        newClientOrderId=f"TWAP-flood{t}-{i}")
+            i += 1
+
+    flooders = [threading.Thread(target=twap_flood, args=(t,), daemon=True) for t in range(threads)]
+    for f in flooders:
+        f.start()
+    time.sleep(WINDOW)   # budget drained, flood queued
+
+    cancel_ms, stop_ms = [], []
+    for i in range(10):
+        order = ex.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity=0.01, price=80000,
+                                        timeInForce="GTC")
+        start = time.perf_counter()
+        client.futures_cancel_order(symbol="BTCUSDT", orderId=order["orderId"])
+        cancel_ms.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        client.futures_create_order(symbol="BTCUSDT", side="SELL", type="STOP_MARKET", quantity=0.01,
+                                    stopPrice=70000, newClientOrderId=f"SL-prio-{i}")
+        stop_ms.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    stop.set()
+    for f in flooders:
+        f.join()
+
+    bulk = limiter.status()
+    bulk_wait = bulk["waited_s"]["bulk"] / max(1, bulk["granted"]["bulk"]) * 1000
+    # one order's worth of refill is WINDOW / ORDER_LIMIT = 33 ms
+    ok = statistics.median(stop_ms) < bulk_wait and statistics.median(cancel_ms) < 50
+    print(f"priority: under a {threads}-thread TWAP flood, cancel p50 {statistics.median(cancel_ms):.1f} ms, "
+          f"stop-loss p50 {statistics.median(stop_ms):.1f} ms, TWAP slice mean wait {bulk_wait:.0f} ms "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_penalty():
+    # the exchange allows 20 orders / 2 s, the limiter believes 60
+    ex = MockExchange(rate_limits=[dict(LIMITS[1], limit=20)])
+    limiter = RateLimiter(LIMITS, path=state_file("penalty"))
+    client = RateLimitedClient(ex, limiter)
+    rejected, elapsed = burst(client, 40, 1)
+    blocked = limiter.status()["blocked_s"]
+    ok = 0 < len(rejected) <= 2 and elapsed >= 1.0
+    print(f"penalty: {len(rejected)} 429(s) for 40 orders, paused for Retry-After "
+          f"({elapsed:.1f} s total, blocked {blocked:.1f} s left) -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def _worker(path, seconds, out):
+    limiter = RateLimiter(LIMITS, path=path)
+    stamps = []
+    end = time.time() + seconds
+    while time.time() < end:
+        try:
+            limiter.acquire(0, 1, timeout=end - time.time())
+        except RateLimitError:
+            break
+        stamps.append(time.time())
+    out.put(stamps)
+
+
+def run_processes(n, shared, seconds=4.0):
+    ctx = multiprocessing.get_context("fork")
+    out = ctx.Queue()
+    paths = [state_file("shared")] * n if shared else [state_file(f"private{i}") for i in range(n)]
+    for p in paths:
+        if os.path.exists(p):
+            os.remove(p)
+    procs = [ctx.Process(target=_worker, args=(p, seconds, out)) for p in paths]
+    for p in procs:
+        p.start()
+    stamps = sorted(t for _ in procs for t in out.get())
+    for p in procs:
+        p.join()
+
+    # replay the send times through the exchange's own sliding window
+    now = [0.0]
+    exchange = _RateLimiter([LIMITS[1]], clock=lambda: now[0])
+    violations = 0
+    for t in stamps:
+        now[0] = t
+        try:
+            exchange.acquire(0, 1)
+        except MockAPIError:
+            violations += 1
+    return len(stamps), violations
+
+
+def check_processes(n):
+    sent, violations = run_processes(n, shared=True)
+    sent_private, violations_private = run_processes(n, shared=False)
+    ok = violations == 0 and violations_private > 0
+    print(f"processes: {n} processes, shared budget -> {sent} orders in 4 s, {violations} over the limit; "
+          f"private budgets -> {sent_private} orders, {violations_private} over -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_headers():
+    class SessionClient:
+        # python-binance shape: client.response is whichever call finished
+        # last (here another thread's, at the limit); the session's
+        # response hooks see each call's own response
+        def __init__(self):
+            self.session = type("Session", (), {"hooks": {"response": []}})()
+            self.response = MockResponse(200, {"X-MBX-USED-WEIGHT-1M": "2000"})
+
+        def futures_create_order(self, **p):
+            for hook in self.session.hooks["response"]:
+                hook(MockResponse(200, {"X-MBX-USED-WEIGHT-1M": "1"}))
+            return {"orderId": 1}
+
+    limiter = RateLimiter(path=None)
+    client = RateLimitedClient(SessionClient(), limiter)
+    client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=1)
+    weight = limiter.status()["buckets"][0]
+    ok = weight["capacity"] - weight["available"] < 10
+    print(f"headers: {weight['capacity'] - weight['available']:g} weight charged for a call that used 1, "
+          f"while client.response says 2000 -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def check_cached_limits():
+    cache = SymbolFilterCache(path=FILTERS_FILE)
+    cache.load_exchange_info(MockExchange(rate_limits=LIMITS).futures_exchange_info())
+    cache.save()
+    limiter = get_rate_limiter()
+    ok = [b.limit for b in limiter.buckets] == [rl["limit"] for rl in LIMITS]
+    print(f"cached limits: shared limiter built with {[b.header for b in limiter.buckets]} "
+          f"from {os.path.basename(FILTERS_FILE)} -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def overhead():
+    for label, path in (("shared file", state_file("overhead")), ("in-process", None)):
+        limiter = RateLimiter(path=path)
+        calls = 20000
+        start = time.perf_counter()
+        for _ in range(calls):
+            limiter.acquire(0, 0)
+        print(f"acquire ({label}): {(time.perf_counter() - start) / calls * 1e6:.1f} us")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--orders", type=int, default=300)
+    args = ap.parse_args()
+
+    failures = check_burst(args.orders, args.threads)
+    failures += check_priority(args.threads)
+    failures += check_penalty()
+    failures += check_processes(4)
+    failures += check_headers()
+    failures += check_cached_limits()
+    overhead()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
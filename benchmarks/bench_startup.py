@@ -0,0 +1,110 @@
+# /benchmarks/bench_startup.py
+# Import-time budget for the bot.py entry points (`python -X importtime`).
+#   python benchmarks/bench_startup.py [--runs N] [--json] [--slack 1.5]
+#
+# Every scenario runs in a fresh interpreter with -X importtime; the import
+# cost is the sum of the cumulative times of the top-level imports, median
+# over N runs, minus the same for a bare `python -c pass` (site, encodings,
+# .pth files). A scenario fails (exit 1) if
+#   - it imports one of the heavy modules listed for it, or
+#   - its median import time exceeds its budget * slack.
+#
+# No network: the dry-run command is resolved by the fast path, `send` has
+# no server to talk to and `logs` reads a throwaway log file.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT = os.path.join(ROOT, "bot.py")
+
+HEAVY = ("langgraph", "binance", "transformers", "torch", "requests", "graph", "llm_parser")
+
+# name -> (argv, import budget in ms, modules that must not be imported)
+SCENARIOS = {
+    "usage":   ([], 25, HEAVY),
+    "logs":    (["logs", "--since", "1h"], 40, HEAVY),
+    "send":    (["send", "--socket", "{workdir}/none.sock", "buy 2 btc"], 35, HEAVY),
+    "dry-run": (["--dry-run", "buy 2 btc"], 45, ("langgraph", "binance", "transformers", "torch",
+                                                 "requests", "graph")),
+}
+
+
+def parse_importtime(stderr: str):
+    """
+    Returns (total_ms, set of imported module names) from -X importtime output.
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):   # top level: one space after the bar
+            total_us += int(cumulative)
+        modules.add(name.strip())
+    return total_us / 1000, modules
+
+
+def run_scenario(argv, workdir, runs):
+    env = dict(os.environ, HF_API_KEY="mock", BOT_LOG_FILE=os.path.join(workdir, "bot.log"),
+               BOT_PARSE_CACHE_FILE=os.path.join(workdir, "parse_cache.db"))
+    argv = [a.format(workdir=workdir) for a in argv] if argv is not None else None
+    import_ms, wall_ms, modules = [], [], set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        cmd = [BOT, *argv] if argv is not None else ["-c", "pass"]
+        proc = subprocess.run([sys.executable, "-X", "importtime", *cmd],
+                              capture_output=True, text=True, cwd=workdir, env=env)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        ms, mods = parse_importtime(proc.stderr)
+        import_ms.append(ms)
+        modules |= mods
+    return statistics.median(import_ms), statistics.median(wall_ms), modules
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--slack", type=float, default=1.5, help="allowed factor over each budget")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    results, failures = {}, []
+    base_import_ms, base_wall_ms, _ = run_scenario(None, workdir, args.runs)
+
+    for name, (argv, budget_ms, forbidden) in SCENARIOS.items():
+        import_ms, wall_ms, modules = run_scenario(argv, workdir, args.runs)
+        import_ms = max(0.0, import_ms - base_import_ms)
+        leaked = sorted(m for m in modules if m.split(".")[0] in forbidden)
+        limit = budget_ms * args.slack
+        ok = import_ms <= limit and not leaked
+        results[name] = {"import_ms": round(import_ms, 2), "wall_ms": round(wall_ms, 2),
+                         "budget_ms": budget_ms, "ok": ok, "leaked": leaked[:10]}
+        if not ok:
+            failures.append(name)
+
+    if args.json:
+        print(json.dumps({"interpreter": {"import_ms": round(base_import_ms, 2),
+                                          "wall_ms": round(base_wall_ms, 2)}, **results}, indent=2))
+    else:
+        print(f"interpreter: imports {base_import_ms:.1f} ms, wall {base_wall_ms:.1f} ms (subtracted)")
+        for name, r in results.items():
+            status = "ok" if r["ok"] else "FAIL"
+            print(f"{name:8s}: imports {r['import_ms']:7.1f} ms (budget {r['budget_ms']} ms), "
+                  f"wall {r['wall_ms']:7.1f} ms  {status}")
+            if r["leaked"]:
+                print(f"          heavy modules imported: {', '.join(r['leaked'])}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# /benchmarks/bench_symbol_filters.py
+# Fixture check + benchmark for exchange-filter rounding in validate().
+#   python benchmarks/bench_symbol_filters.py [orders]
+#
+# Uses the recorded futures exchange info in fixtures/exchange_info.json
+# through a fake client; never touches the network.
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+
+from src.symbol_filters import SymbolFilterCache  # noqa: E402
+from src.validators import validate  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "exchange_info.json")
+
+
+class RecordedClient:
+    def __init__(self):
+        with open(FIXTURE) as f:
+            self.info = json.load(f)
+        self.calls = 0
+
+    def futures_exchange_info(self):
+        self.calls += 1
+        return self.info
+
+
+# (order, expected adjusted fields or the start of the expected error)
+CASES = [
+    ({"order_type": "market", "symbol": "btcusdt", "side": "buy", "quantity": 0.0123456},
+     {"quantity": 0.012}),
+    ({"order_type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.1 + 0.2, "price": 86000.06},
+     {"quantity": 0.3, "price": 86000.1}),
+    ({"order_type": "limit", "symbol": "ETHUSDT", "side": "SELL", "quantity": 1, "price": 3200.004},
+     {"quantity": 1.0, "price": 3200.0}),
+    ({"order_type": "stop_limit", "symbol": "SOLUSDT", "side": "SELL", "quantity": 3.7,
+      "stop_price": 140.005, "price": 139.5},
+     {"quantity": 3.0, "stop_price": 140.01, "price": 139.5}),
+    ({"order_type": "oco", "symbol": "DOGEUSDT", "side": "BUY", "quantity": 1000,
+      "price": 0.1234567, "stop_price": 0.1100001},
+     {"quantity": 1000.0, "price": 0.12346, "stop_price": 0.11}),
+    ({"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.0004},
+     "quantity must be >= 0.001"),
+    ({"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 500},
+     "quantity must be <= 120"),
+    ({"order_type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.001, "price": 86000},
+     "order value 86 is below the 100 minimum notional"),
+    ({"order_type": "limit", "symbol": "ETHUSDT", "side": "BUY", "quantity": 1, "price": 10},
+     "price must be >= 39.86"),
+    ({"order_type": "oco", "symbol": "BTCUSDT", "side": "SELL", "quantity": 0.01,
+      "price": 88000, "stop_price": 84000},
+     "oco SELL needs take-profit price below stop_price"),
+    ({"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01,
+      "stop_price": 86000, "price": 80000},
+     "stop_limit BUY price more than 5% below stop_price"),
+    ({"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.004, "twap_intervals": 4},
+     {"quantity": 0.004}),
+    ({"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.0049, "twap_intervals": 5},
+     "0.004 BTCUSDT can't be split into 5 slices of at least 0.001: use at most 4 intervals"),
+    ({"order_type": "twap", "symbol": "SOLUSDT", "side": "SELL", "quantity": 3},
+     "3 SOLUSDT can't be split into 5 slices of at least 1: use at most 3 intervals"),
+    ({"order_type": "market", "symbol": "FOOUSDT", "side": "BUY", "quantity": 1},
+     "Unknown symbol: FOOUSDT"),
+    ({"order_type": "market", "symbol": "LUNAUSDT", "side": "BUY", "quantity": 1},
+     "LUNAUSDT is not trading"),
+]
+
+
+def check(cache, client):
+    failures = 0
+    for order, expected in CASES:
+        try:
+            cleaned = validate({**order, "client": client}, filters=cache)
+            got = {k: cleaned[k] for k in ("quantity", "price", "stop_price") if k in cleaned}
+        except ValueError as e:
+            got = str(e)
+        ok = got == expected if isinstance(expected, dict) else isinstance(got, str) and got.startswith(expected)
+        if not ok:
+            failures += 1
+            print(f"MISMATCH  {order}\n  expected {expected}\n  got      {got}")
+    print(f"fixture: {len(CASES) - failures}/{len(CASES)} cases ok")
+    return failures
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    failures = 0
+
+    client = RecordedClient()
+    path = os.path.join(WORKDIR, "symbol_filters.json")
+    cache = SymbolFilterCache(path=path)
+    failures += check(cache, client)
+    if client.calls != 1:
+        failures += 1
+        print(f"expected one bulk exchange-info call, got {client.calls}")
+
+    # A fresh process reads the persisted file and needs no client at all
+    reloaded = SymbolFilterCache(path=path)
+    failures += check(reloaded, None)
+
+    # Stale entries are served while one background refresh runs
+    stale = SymbolFilterCache(path=path, ttl=0)
+    stale_client = RecordedClient()
+    for _ in range(50):
+        stale.get("BTCUSDT", stale_client)
+    time.sleep(0.2)
+    print(f"stale cache: {stale_client.calls} background refresh(es) for 50 lookups")
+    if stale_client.calls < 1 or stale.refreshes != stale_client.calls:
+        failures += 1
+
+    order = {"order_type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.0123, "price": 86000.06}
+    empty = SymbolFilterCache(path=None)
+    empty.get("BTCUSDT")  # nothing loaded -> filters skipped
+    for label, c in (("no filters", empty), ("with filters", reloaded)):
+        start = time.perf_counter()
+        for _ in range(n):
+            validate(order, filters=c)
+        us = (time.perf_counter() - start) / n * 1e6
+        print(f"validate ({label}): {us:.1f} us/order")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# /benchmarks/bench_twap_scheduler.py
+# Fake-clock harness + benchmark for the asyncio TWAP scheduler.
+#   python benchmarks/bench_twap_scheduler.py [plans]
+#
+# Virtual time: FakeClock jumps straight to the next slice deadline, and
+# exchange calls run inline, so hours of TWAP schedule replay in
+# milliseconds. Checks:
+#   - slices go out at start + i * delay even when every call is slow
+#   - NEW market replies (executedQty "0") still count as sent quantity
+#   - many plans run concurrently on one loop
+#   - cancel stops a plan between slices
+#   - a restart resumes the remaining slices from the state file, spaced
+#     from the resume time instead of fired back to back, and a
+#     slice that was in flight at the crash is neither lost nor repeated,
+#     even when looking it up fails with a transport error at first
+#   - two schedulers on one state dir keep each other's plans, and a plan
+#     owned by a live process is not resumed by another
+# Finishes with a short real-clock run through the synchronous API, with
+# plan state saved on the writer thread.
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import Executor, Future
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+
+from src.advanced.twap_scheduler import TwapScheduler, TwapPlan, DONE, CANCELLED  # noqa: E402
+
+
+class FakeClock:
+
+    def __init__(self, epoch=1_700_000_000.0):
+        self.now = 0.0
+        self.epoch = epoch
+        self._sleepers = []
+        self._seq = itertools.count()
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now
+
+    async def sleep(self, seconds):
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + max(0.0, seconds), next(self._seq), fut))
+        await fut
+
+    async def run(self, until=None):
+        """
+        Advance virtual time deadline by deadline until nothing is sleeping
+        (or `until` is reached).
+        """
+        while True:
+            # let every runnable task (incl. executor round trips) reach its next sleep
+            for _ in range(50):
+                await asyncio.sleep(0)
+            while self._sleepers and self._sleepers[0][2].done():
+                heapq.heappop(self._sleepers)
+            if not self._sleepers:
+                return
+            deadline = self._sleepers[0][0]
+            if until is not None and deadline > until:
+                self.now = until
+                return
+            self.now = deadline
+            while self._sleepers and self._sleepers[0][0] <= deadline:
+                _, _, fut = heapq.heappop(self._sleepers)
+                if not fut.done():
+                    fut.set_result(None)
+
+
+class InlineExecutor(Executor):
+
+    def submit(self, fn, *args, **kwargs):
+        f = Future()
+        try:
+            f.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            f.set_exception(e)
+        return f
+
+
+class MockClient:
+    """
+    Records every order with the virtual time it was sent; each call
+    takes `latency` virtual seconds.
+    """
+
+    def __init__(self, clock, latency=0.0, status="FILLED"):
+        self.clock = clock
+        self.latency = latency
+        self.status = status
+        self.orders = {}
+        self.sent_at = []
+
+    def futures_create_order(self, **p):
+        self.sent_at.append((p["newClientOrderId"], self.clock.now))
+        self.clock.now += self.latency
+        if p["newClientOrderId"] in self.orders:
+            raise RuntimeError("duplicate clientOrderId")
+        order = {"orderId": len(self.orders) + 1, "clientOrderId": p["newClientOrderId"],
+                 "status": self.status, "origQty": str(p["quantity"]),
+                 "executedQty": str(p["quantity"]) if self.status == "FILLED" else "0"}
+        self.orders[p["newClientOrderId"]] = order
+        return order
+
+    def futures_get_order(self, symbol, origClientOrderId):
+        if origClientOrderId not in self.orders:
+            raise UnknownOrder("APIError(code=-2013): Order does not exist.")
+        return self.orders[origClientOrderId]
+
+
+class UnknownOrder(Exception):
+    code = -2013
+
+
+class FlakyLookups(MockClient):
+    """
+    futures_get_order fails with a transport error the first `failures` times.
+    """
+
+    def __init__(self, clock, failures):
+        super().__init__(clock)
+        self.failures = failures
+        self.lookups = 0
+
+    def futures_get_order(self, symbol, origClientOrderId):
+        self.lookups += 1
+        if self.lookups <= self.failures:
+            raise ConnectionError("Connection aborted.")
+        return super().futures_get_order(symbol, origClientOrderId)
+
+
+def scheduler(clock, path=None):
+    return TwapScheduler(path=path, clock=clock, executor=InlineExecutor(), save_executor=InlineExecutor())
+
+
+def write_plan(path, data):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, f"{data['plan_id']}.json"), "w") as f:
+        json.dump(data, f)
+
+
+async def abandon(s):
+    # "kill" a scheduler: cancel its tasks and let them finish
+    tasks = list(s._tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def check_drift():
+    clock = FakeClock()
+    client = MockClient(clock, latency=0.7)
+    s = scheduler(clock)
+    plan = await s.add(client, TwapPlan("BTCUSDT", "BUY", 1.0, 10, 5))
+    await clock.run()
+    times = [t for _, t in client.sent_at]
+    expected = [i * 5.0 for i in range(10)]
+    ok = plan.status == DONE and times == expected and abs(plan.filled - 1.0) < 1e-9
+    print(f"drift: slices at {times[:4]}... with 0.7 s per call -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_new_replies():
+    clock = FakeClock()
+    s = scheduler(clock)
+    plans = {}
+    for status in ("NEW", "EXPIRED"):
+        plans[status] = await s.add(MockClient(clock, status=status), TwapPlan("BTCUSDT", "BUY", 1.0, 4, 5))
+    await clock.run()
+    ok = abs(plans["NEW"].filled - 1.0) < 1e-9 and plans["EXPIRED"].filled == 0
+    print(f"NEW replies: filled {plans['NEW'].filled:g} of 1.0, expired {plans['EXPIRED'].filled:g} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_concurrency(n):
+    clock = FakeClock()
+    client = MockClient(clock)
+    s = scheduler(clock)
+    start = time.perf_counter()
+    for i in range(n):
+        await s.add(client, TwapPlan("ETHUSDT", "SELL", 2.0, 5, 60 + i % 7))
+    await clock.run()
+    elapsed = time.perf_counter() - start
+    done = sum(1 for p in s.plans.values() if p.status == DONE)
+    ok = done == n and len(client.orders) == 5 * n and max(s.late_ms) == 0
+    print(f"concurrency: {n} plans x 5 slices over {clock.now:.0f} virtual s in {elapsed * 1000:.0f} ms "
+          f"({5 * n / elapsed:,.0f} slices/s scheduler overhead) -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_cancel():
+    clock = FakeClock()
+    client = MockClient(clock)
+    s = scheduler(clock)
+    plan = await s.add(client, TwapPlan("BTCUSDT", "BUY", 1.0, 5, 10))
+    await clock.run(until=15)
+    cancelled = await s._cancel(plan.plan_id)
+    await clock.run()
+    ok = cancelled and plan.status == CANCELLED and plan.done == 2 and len(client.orders) == 2
+    print(f"cancel: {plan.done}/5 slices sent before cancel -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_resume():
+    path = os.path.join(WORKDIR, "twap_state")
+    clock = FakeClock()
+    client = MockClient(clock)
+
+    # First process: 3 of 8 slices, then it "dies"
+    s1 = scheduler(clock, path)
+    plan = await s1.add(client, TwapPlan("BTCUSDT", "BUY", 0.8, 8, 30))
+    await clock.run(until=70)
+    await abandon(s1)
+
+    # Crash between sending slice 3 and recording it: the file it left behind
+    client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.1,
+                                newClientOrderId=plan.client_order_id(3))
+    write_plan(path, dict(plan.to_dict(), done=3, status="running", pending=3))
+
+    clock.now = 200
+    s2 = scheduler(clock, path)
+    resumed = await s2.resume_async(client)
+    await clock.run()
+    p2 = s2.plans[plan.plan_id]
+    ids = [cid for cid, _ in client.sent_at]
+    after = [t for _, t in client.sent_at if t >= 200]
+    spaced = after == [230.0, 260.0, 290.0, 320.0]
+    ok = (resumed == [plan.plan_id] and p2.status == DONE and p2.done == 8
+          and len(ids) == len(set(ids)) == 8 and spaced)
+    ok = ok and [n for n in os.listdir(path) if n.endswith(".json")] == []
+    print(f"resume: {len(ids)} slices, no duplicates, overdue slices re-spaced from the resume time {after} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_shared_dir():
+    path = os.path.join(WORKDIR, "twap_shared")
+    clock = FakeClock()
+    client = MockClient(clock)
+
+    # A daemon and a one-shot CLI run, each with a plan in flight
+    daemon, cli = scheduler(clock, path), scheduler(clock, path)
+    long_plan = await daemon.add(client, TwapPlan("BTCUSDT", "BUY", 1.0, 10, 60))
+    short_plan = await cli.add(client, TwapPlan("ETHUSDT", "SELL", 1.0, 2, 5))
+    await clock.run(until=30)   # the CLI plan finishes and removes its file
+    saved = {p["plan_id"]: p for p in daemon._load()}
+    ok = list(saved) == [long_plan.plan_id] and short_plan.status == DONE
+
+    # Same plan, claimed by another live process (our parent): not resumed
+    write_plan(path, dict(saved[long_plan.plan_id], owner=os.getppid()))
+    ok = ok and await scheduler(clock, path).resume_async(client) == []
+    await abandon(daemon)
+    print(f"shared state dir: {len(saved)} plan kept across schedulers -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def check_reconcile_retry():
+    path = os.path.join(WORKDIR, "twap_flaky")
+    clock = FakeClock()
+    client = FlakyLookups(clock, failures=2)
+    plan = TwapPlan("BTCUSDT", "BUY", 0.4, 4, 30, start_ts=clock.time(), pending=0)
+    client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity=0.1,
+                                newClientOrderId=plan.client_order_id(0))
+    s = scheduler(clock, path)
+    await s.add(client, plan)
+    await clock.run()
+    ok = plan.status == DONE and plan.done == 4 and len(client.sent_at) == 4 and client.lookups == 3
+    print(f"pending lookup: {client.lookups - 1} transport errors, {client.lookups} lookups, "
+          f"{len(client.sent_at)} orders for 4 slices -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def real_clock_run():
+    class Client:
+        def futures_create_order(self, **p):
+            time.sleep(0.01)
+            return {"orderId": 1, "executedQty": p["quantity"]}
+
+    path = os.path.join(WORKDIR, "twap_real")
+    s = TwapScheduler(path=path).start()
+    plans = [s.submit(Client(), "BTCUSDT", "BUY", 1.0, 10, 0.05) for _ in range(20)]
+    start = time.perf_counter()
+    for p in plans:
+        s.wait(p.plan_id, 10)
+    elapsed = time.perf_counter() - start
+    s.stop()
+    ok = all(p.status == DONE for p in plans) and not [n for n in os.listdir(path) if n.endswith(".json")]
+    print(f"real clock (saving state): 20 plans x 10 slices, 0.05 s delay in {elapsed:.2f} s "
+          f"(sequential sleeps: {20 * 9 * 0.05:.1f} s), slice lateness p50 "
+          f"{statistics.median(s.late_ms):.2f} ms max {max(s.late_ms):.2f} ms -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+async def checks(n):
+    failures = await check_drift()
+    failures += await check_new_replies()
+    failures += await check_concurrency(n)
+    failures += await check_cancel()
+    failures += await check_resume()
+    failures += await check_reconcile_retry()
+    failures += await check_shared_dir()
+    return failures
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    failures = asyncio.run(checks(n))
+    failures += real_clock_run()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# /benchmarks/bench_validate_batch.py
+# validate_batch (src/batch_validation.py) vs looping validate() over the
+# same orders.
+#   python benchmarks/bench_validate_batch.py [orders] [--seed 1]
+#
+# Orders are random over the symbols in fixtures/exchange_info.json (one of
+# them not trading, plus an unknown one): every order type, prices a few
+# percent around a reference with more decimals than the tick, quantities
+# around the minimum notional, and a sprinkling of bad sides, non-numeric
+# cells, missing prices and inverted oco / stop-limit prices.
+# Checks that both agree row by row (same rows rejected, identical rounded
+# values otherwise), then reports throughput for list input and for
+# ready-made NumPy columns.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+
+from src import logger  # noqa: E402
+from src.symbol_filters import SymbolFilterCache  # noqa: E402
+from src.batch_validation import REASONS  # noqa: E402
+from src.validators import validate, validate_batch  # noqa: E402
+
+FIXTURE = os.path.join(ROOT, "benchmarks", "fixtures", "exchange_info.json")
+
+REFERENCE = {"BTCUSDT": 86000, "ETHUSDT": 3200, "SOLUSDT": 140, "BNBUSDT": 600, "XRPUSDT": 0.6,
+             "DOGEUSDT": 0.12, "LUNAUSDT": 0.5, "FOOUSDT": 1.0}
+TYPES = ("market", "limit", "stop_limit", "oco", "twap")
+
+
+def make_orders(n, seed):
+    rng = np.random.default_rng(seed)
+    names = list(REFERENCE)
+    sym_idx = rng.choice(len(names), n, p=[0.2, 0.2, 0.15, 0.15, 0.1, 0.1, 0.05, 0.05])
+    ref = np.array([REFERENCE[s] for s in names])[sym_idx]
+    types = np.array(TYPES)[rng.integers(0, len(TYPES), n)]
+    side_buy = rng.random(n) < 0.5
+    # notional from ~0.5x to ~20x a 20 USDT minimum, with 7 decimals
+    qty = np.round(20 * np.exp(rng.normal(0.8, 1.2, n)) / ref, 7)
+    price = np.round(ref * (1 + rng.normal(0, 0.03, n)), 7)
+    # oco: take-profit 1-5% on the profit side; stop-limit: trigger near the limit
+    offset = rng.uniform(0.01, 0.05, n)
+    sign = np.where(side_buy, 1, -1)
+    stop = np.where(types == "oco", price * (1 - sign * offset), price * (1 + sign * offset * 0.2))
+    stop = np.round(stop, 7)
+    intervals = rng.integers(1, 9, n)
+
+    symbols = [names[i].lower() if i % 3 == 0 else names[i] for i in sym_idx]
+    sides = ["BUY" if b else "sell " for b in side_buy]
+    quantities, prices, stops = qty.tolist(), price.tolist(), stop.tolist()
+    # a third of the TWAPs use the default 5 intervals
+    twap_intervals = [int(k) if t == "twap" and i % 3 else None for i, (t, k) in enumerate(zip(types, intervals))]
+    needs_price = np.isin(types, ("limit", "stop_limit", "oco"))
+    needs_stop = np.isin(types, ("stop_limit", "oco"))
+    for i in range(n):
+        if not needs_price[i]:
+            prices[i] = None
+        if not needs_stop[i]:
+            stops[i] = None
+    # noise
+    for i in rng.choice(n, n // 50, replace=False):
+        kind = i % 6
+        if kind == 0:
+            sides[i] = "hold"
+        elif kind == 1:
+            quantities[i] = "abc"
+        elif kind == 2:
+            quantities[i] = str(quantities[i])
+        elif kind == 3 and needs_price[i]:
+            prices[i] = None
+        elif kind == 4 and needs_stop[i]:
+            prices[i], stops[i] = stops[i], prices[i]   # inverted
+        elif kind == 5:
+            quantities[i] = -quantities[i]
+    return {"symbols": symbols, "sides": sides, "quantities": quantities, "prices": prices,
+            "stop_prices": stops, "order_types": types.tolist(), "twap_intervals": twap_intervals}
+
+
+def loop_validate(cols, cache):
+    out = []
+    for i in range(len(cols["quantities"])):
+        state = {"order_type": cols["order_types"][i], "symbol": cols["symbols"][i],
+                 "side": cols["sides"][i], "quantity": cols["quantities"][i]}
+        if cols["prices"][i] is not None:
+            state["price"] = cols["prices"][i]
+        if cols["stop_prices"][i] is not None:
+            state["stop_price"] = cols["stop_prices"][i]
+        if cols["twap_intervals"][i] is not None:
+            state["twap_intervals"] = cols["twap_intervals"][i]
+        try:
+            out.append(validate(state, filters=cache))
+        except ValueError as e:
+            out.append(e)
+    return out
+
+
+def compare(batch, scalar):
+    mismatches = []
+    for i, expected in enumerate(scalar):
+        if isinstance(expected, Exception):
+            if not batch.error[i]:
+                mismatches.append((i, f"validate raised {expected!r}, batch accepted"))
+            continue
+        if batch.error[i]:
+            mismatches.append((i, f"batch rejected ({REASONS[batch.reason[i]]}), validate accepted {expected}"))
+            continue
+        got = {"quantity": batch.quantities[i], "price": batch.prices[i], "stop_price": batch.stop_prices[i]}
+        for key, value in got.items():
+            if key in expected and expected[key] != value:
+                mismatches.append((i, f"{key}: validate {expected[key]!r}, batch {value!r}"))
+    return mismatches
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("orders", nargs="?", type=int, default=100000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    cache = SymbolFilterCache(path=None)
+    with open(FIXTURE) as f:
+        cache.load_exchange_info(json.load(f))
+    cols = make_orders(args.orders, args.seed)
+
+    start = time.perf_counter()
+    scalar = loop_validate(cols, cache)
+    scalar_s = time.perf_counter() - start
+    logger.flush()
+
+    start = time.perf_counter()
+    batch = validate_batch(**cols, filters=cache)
+    batch_s = time.perf_counter() - start
+
+    arrays = {"symbols": np.array(cols["symbols"]), "sides": np.array(cols["sides"]),
+              "quantities": np.array([q if isinstance(q, float) else np.nan for q in cols["quantities"]]),
+              "prices": np.array([np.nan if p is None else p for p in cols["prices"]]),
+              "stop_prices": np.array([np.nan if p is None else p for p in cols["stop_prices"]]),
+              "order_types": np.array(cols["order_types"]),
+              "twap_intervals": np.array([np.nan if k is None else k for k in cols["twap_intervals"]])}
+    start = time.perf_counter()
+    validate_batch(**arrays, filters=cache)
+    arrays_s = time.perf_counter() - start
+
+    mismatches = compare(batch, scalar)
+    for i, what in mismatches[:10]:
+        print(f"  row {i}: {what}")
+    rejected = int(np.count_nonzero(batch.error))
+    ok = not mismatches
+    print(f"agreement: {args.orders - len(mismatches)}/{args.orders} rows identical, "
+          f"{rejected} rejected -> {'ok' if ok else 'FAIL'}")
+    reasons = {}
+    for _, message in batch.errors():
+        reasons[message] = reasons.get(message, 0) + 1
+    for message, count in sorted(reasons.items(), key=lambda kv: -kv[1]):
+        print(f"  {count:6d}  {message}")
+
+    n = args.orders
+    print(f"validate() loop: {n / scalar_s:12,.0f} orders/s ({scalar_s * 1000:.0f} ms)")
+    print(f"validate_batch (lists): {n / batch_s:12,.0f} orders/s ({batch_s * 1000:.0f} ms, "
+          f"{scalar_s / batch_s:.0f}x)")
+    print(f"validate_batch (arrays): {n / arrays_s:12,.0f} orders/s ({arrays_s * 1000:.0f} ms, "
+          f"{scalar_s / arrays_s:.0f}x)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# /benchmarks/bench_vwap.py
+# VWAP slicing (src/advanced/volume_profile.py) against the sample klines
+# in fixtures/klines (two generated days in the data.binance.vision layout)
+# and a generated year of 1-minute bars.
+#   python benchmarks/bench_vwap.py [--days 365]
+#
+# Checks:
+#   - the profile of the fixture (two days, one file with a header row and
+#     one without) matches a plain per-bar average, and is cached in memory,
+#     on disk, and recomputed when a kline file changes
+#   - slice plans add up to the total exactly in step-size units, follow the
+#     profile to within one step, respect the participation cap, and an
+#     impossible cap is refused
+#   - a VWAP order on the mock exchange sends exactly the planned slices
+#     (clientOrderId VWAP-...)
+#   - a year of bars: CSV load, vectorized profile and cached lookups timed;
+#     the profile must beat a per-bar Python loop by 10x
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["BOT_LOG_FILE"] = os.path.join(WORKDIR, "bot.log")
+os.environ["BOT_LEDGER_FILE"] = os.path.join(WORKDIR, "ledger.db")
+os.environ["BOT_SYMBOL_FILTERS_FILE"] = os.path.join(WORKDIR, "symbol_filters.json")
+os.environ["BOT_TWAP_STATE_DIR"] = os.path.join(WORKDIR, "twap_state")
+os.chdir(WORKDIR)   # volume_profiles.json
+
+from src import logger  # noqa: E402
+from src.advanced import volume_profile  # noqa: E402
+from src.advanced.volume_profile import (  # noqa: E402
+    ProfileCache, load_klines, minute_profile, plan_vwap_slices, window_volumes,
+)
+from src.advanced.twap import execute_twap_order  # noqa: E402
+from src.mock_exchange import MockExchange  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures", "klines")
+STEP = 0.001
+DAY = 86400
+
+
+def loop_profile(open_time, volume):
+    total, days = [0.0] * 1440, [0] * 1440
+    for t, v in zip(open_time.tolist(), volume.tolist()):
+        m = (t // 60000) % 1440
+        total[m] += v
+        days[m] += 1
+    return np.array([t / d if d else 0.0 for t, d in zip(total, days)])
+
+
+def check_fixture_profile():
+    klines = os.path.join(WORKDIR, "klines")
+    shutil.copytree(FIXTURES, klines)
+    path = os.path.join(WORKDIR, "profiles.json")
+    cache = ProfileCache(klines_dir=klines, path=path)
+    profile = cache.get("BTCUSDT")
+
+    columns = [load_klines(p) for p in cache.files("BTCUSDT")]
+    open_time = np.concatenate([c[0] for c in columns])
+    volume = np.concatenate([c[1] for c in columns])
+    expected = loop_profile(open_time, volume)
+    same = profile.shape == (1440,) and open_time.size == 2880 and np.allclose(profile, expected, rtol=1e-12)
+
+    again = cache.get("BTCUSDT") is profile and cache.computed == 1
+    from_disk = ProfileCache(klines_dir=klines, path=path)
+    disk_ok = np.allclose(from_disk.get("BTCUSDT"), profile) and from_disk.computed == 0
+    os.utime(cache.files("BTCUSDT")[0], ns=(0, 10 ** 18))
+    stale_ok = from_disk.get("BTCUSDT") is not None and from_disk.computed == 1
+    missing_ok = cache.get("ETHUSDT") is None
+
+    ok = same and again and disk_ok and stale_ok and missing_ok
+    busiest = int(np.argmax(profile))
+    print(f"fixture profile: {open_time.size} bars, busiest minute {busiest // 60:02d}:{busiest % 60:02d} UTC, "
+          f"matches per-bar average {same}, cached {again}, from disk {disk_ok}, refreshed on change {stale_ok} "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return profile, 0 if ok else 1
+
+
+def check_plans(profile):
+    failures = 0
+    midnight = 1709510400   # 2024-03-04 00:00 UTC
+    cases = [
+        # total, intervals, delay, start, participation
+        (1.0, 12, 300, midnight + 13 * 3600, None),
+        (0.7, 24, 3600, midnight, None),
+        (2.5, 10, 60, midnight + 23.5 * 3600, None),    # wraps over midnight
+        (0.123, 50, 20, midnight + 5 * 3600, None),     # sub-minute windows, some slices 0
+        (3.0, 12, 300, midnight + 13 * 3600, 0.15),
+        (5.0, 24, 600, midnight + 2 * 3600, 0.05),
+    ]
+    for total, intervals, delay, start, participation in cases:
+        q = plan_vwap_slices(profile, total, intervals, delay, start, STEP, participation)
+        expected = window_volumes(profile, start, intervals, delay)
+        units = np.round(q / STEP)
+        exact = np.allclose(q, units * STEP, atol=1e-12) and int(units.sum()) == round(total / STEP)
+        if participation:
+            follows = bool(np.all(q <= participation * expected + 1e-12))
+        else:
+            follows = bool(np.all(np.abs(q - total * expected / expected.sum()) < STEP + 1e-12))
+        ok = exact and follows and bool(np.all(q >= 0))
+        failures += 0 if ok else 1
+        print(f"plan {total:g} over {intervals}x{delay}s from {(start - midnight) / 3600 % 24:04.1f}h"
+              f"{'' if participation is None else f', cap {participation:.0%}'}: "
+              f"min {q.min():g} max {q.max():g}, {int(np.count_nonzero(q == 0))} empty "
+              f"-> {'ok' if ok else 'FAIL'}")
+
+    try:
+        plan_vwap_slices(profile, 100.0, 4, 60, midnight + 5 * 3600, STEP, 0.01)
+        refused = False
+    except ValueError:
+        refused = True
+    print(f"plan over the participation cap refused: {refused} -> {'ok' if refused else 'FAIL'}")
+    return failures + (0 if refused else 1)
+
+
+def check_execution():
+    volume_profile.configure(klines_dir=os.path.join(WORKDIR, "klines"))
+    exchange = MockExchange(rate_limits=None)
+    start = time.time()
+    responses = execute_twap_order(exchange, "BTCUSDT", "BUY", 0.5, intervals=10, delay=0, vwap=True)
+    planned = plan_vwap_slices(volume_profile.get_profile_cache().get("BTCUSDT"), 0.5, 10, 0, start, STEP)
+
+    sent = [float(r["origQty"]) for r in responses]
+    ids_ok = all(r["clientOrderId"].startswith("VWAP-") for r in responses)
+    # delay 0: every window is empty, so the plan falls back to equal slices
+    ok = ids_ok and sent == [x for x in planned.tolist() if x > 0] and round(sum(sent), 9) == 0.5
+    print(f"execution: {len(sent)} slices sent {sent[:3]}..., VWAP- ids {ids_ok} -> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def write_year(days, directory, seed=1):
+    rng = np.random.default_rng(seed)
+    start_ms = 1704067200000   # 2024-01-01
+    minutes = np.arange(days * 1440)
+    shape = 1 + 0.8 * np.exp(-0.5 * (((minutes % 1440) - 840) / 60.0) ** 2)
+    volume = np.round(shape * rng.lognormal(0, 0.4, minutes.size) * 10, 3)
+    open_time = start_ms + minutes * 60000
+    price = 40000 * np.exp(np.cumsum(rng.normal(0, 5e-4, minutes.size)))
+    per_file = 31 * 1440
+    for k, i in enumerate(range(0, minutes.size, per_file)):
+        sl = slice(i, i + per_file)
+        n = open_time[sl].size
+        table = np.column_stack([open_time[sl], price[sl], price[sl], price[sl], price[sl], volume[sl],
+                                 open_time[sl] + 59999, volume[sl] * price[sl], np.full(n, 100),
+                                 volume[sl] / 2, volume[sl] * price[sl] / 2, np.zeros(n)])
+        np.savetxt(os.path.join(directory, f"BTCUSDT-1m-part{k:02d}.csv"), table, delimiter=",",
+                   fmt=["%d", "%.1f", "%.1f", "%.1f", "%.1f", "%.3f", "%d", "%.4f", "%d", "%.3f", "%.4f", "%d"])
+    return minutes.size
+
+
+def check_year(days):
+    directory = os.path.join(WORKDIR, "year")
+    os.makedirs(directory)
+    bars = write_year(days, directory)
+
+    cache = ProfileCache(klines_dir=directory, path=os.path.join(WORKDIR, "year_profiles.json"), lookback_days=days)
+    start = time.perf_counter()
+    columns = [load_klines(p) for p in cache.files("BTCUSDT")]
+    load_s = time.perf_counter() - start
+    open_time = np.concatenate([c[0] for c in columns])
+    volume = np.concatenate([c[1] for c in columns])
+
+    start = time.perf_counter()
+    profile = minute_profile(open_time, volume)
+    profile_s = time.perf_counter() - start
+    start = time.perf_counter()
+    baseline = loop_profile(open_time, volume)
+    loop_s = time.perf_counter() - start
+
+    cache.get("BTCUSDT")
+    start = time.perf_counter()
+    cache.get("BTCUSDT")
+    memory_s = time.perf_counter() - start
+    start = time.perf_counter()
+    ProfileCache(klines_dir=directory, path=cache.path, lookback_days=days).get("BTCUSDT")
+    disk_s = time.perf_counter() - start
+
+    ok = open_time.size == bars and np.allclose(profile, baseline) and loop_s > 10 * profile_s
+    print(f"year of 1m bars ({bars:,} bars, {len(columns)} files): CSV load {load_s * 1000:.0f} ms, "
+          f"profile {profile_s * 1000:.1f} ms ({loop_s / profile_s:.0f}x a per-bar loop), "
+          f"cached {memory_s * 1000:.2f} ms in memory / {disk_s * 1000:.2f} ms from disk "
+          f"-> {'ok' if ok else 'FAIL'}")
+    return 0 if ok else 1
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--days", type=int, default=365)
+    args = ap.parse_args()
+
+    profile, failures = check_fixture_profile()
+    failures += check_plans(profile)
+    failures += check_execution()
+    failures += check_year(args.days)
+    logger.flush()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
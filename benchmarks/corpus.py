@@ -0,0 +1,73 @@
+# /benchmarks/corpus.py
+# Fixture commands with their expected parse, shared by the benchmarks.
+
+# Prompt / README examples: the fast path must resolve these exactly
+EXPECTED = [
+    ("buy 2 btc",
+     {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 2}),
+    ("sell 1 eth limit at 3200",
+     {"order_type": "limit", "symbol": "ETHUSDT", "side": "SELL", "quantity": 1, "price": 3200}),
+    ("twap buy btc amount 0.3",
+     {"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.3}),
+    ("sell 0.5 eth oco for 2700 stop_price 3200",
+     {"order_type": "oco", "symbol": "ETHUSDT", "side": "SELL", "quantity": 0.5,
+      "price": 2700, "stop_price": 3200}),
+    ("buy btcusdt 0.01",
+     {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01}),
+    ("place a limit buy on btcusdt at 86000 quantity 0.01",
+     {"order_type": "limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01, "price": 86000}),
+    ("buy 0.01 btc if price hits 86000 with limit 85950",
+     {"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01,
+      "stop_price": 86000, "price": 85950}),
+    ("set oco sell btcusdt 0.01 take profit 88000 stop 84000",
+     {"order_type": "oco", "symbol": "BTCUSDT", "side": "SELL", "quantity": 0.01,
+      "price": 88000, "stop_price": 84000}),
+    ("sell 1 btc tp 70000 sl 60000",
+     {"order_type": "oco", "symbol": "BTCUSDT", "side": "SELL", "quantity": 1, "price": 70000,
+      "stop_price": 60000}),
+    ("twap buy btcusdt 1 over 10 intervals",
+     {"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 1, "twap_intervals": 10}),
+    ("buy 0.5 btc at market",
+     {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.5}),
+    ("btc stop limit order buy 0.1 price is 86500 stop price is 86900",
+     {"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.1,
+      "price": 86500, "stop_price": 86900}),
+]
+
+# Must NOT be resolved locally (ambiguous / contradictory / not a command)
+MUST_FALL_BACK = [
+    "help",
+    "but 0.5 btc as market order",
+    "buy btc 30 1",
+    "btc oco buy 0.1 price 92000",
+    "btc market order price 86753 buy 0.1",
+    "btc limit order buy 0.1 price 86500 stop price 87000",
+    "buy 1 btc and sell 1 eth",
+    "buy 100 usdt of btc",
+    "buy 2 btc at -5",
+    "twap buy 1 btc over 10 minutes",
+    "buy 0,500 btc",
+    "buy 1,5000 btc",
+    "buy 1,5 btc at 86,000",
+]
+
+# Phrasings the local grammar leaves to the model, with the intended parse
+LLM_ONLY = [
+    ("but 0.5 btc as market order",
+     {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.5}),
+    ("btc lim stop limit order buy 0.1 price 86500 stop price 87000",
+     {"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.1,
+      "price": 86500, "stop_price": 87000}),
+    ("could you grab me half an eth right now",
+     {"order_type": "market", "symbol": "ETHUSDT", "side": "BUY", "quantity": 0.5}),
+    ("dump 3 sol once it drops to 140, limit 139.5",
+     {"order_type": "stop_limit", "symbol": "SOLUSDT", "side": "SELL", "quantity": 3,
+      "stop_price": 140, "price": 139.5}),
+    ("protect my 0.2 btc long: take profit 98000 stop loss 91000 (sell side)",
+     {"order_type": "oco", "symbol": "BTCUSDT", "side": "SELL", "quantity": 0.2,
+      "price": 98000, "stop_price": 91000}),
+    ("accumulate 10 sol slowly over 6 slices",
+     {"order_type": "twap", "symbol": "SOLUSDT", "side": "BUY", "quantity": 10, "twap_intervals": 6}),
+    ("i want to sell 2 eth but only at 3500 or better",
+     {"order_type": "limit", "symbol": "ETHUSDT", "side": "SELL", "quantity": 2, "price": 3500}),
+]
@@ -0,0 +1,161 @@
+# /benchmarks/mock_llm.py
+# Local stand-in for the HuggingFace chat-completions router.
+# Used by the benchmark scripts; never touches the network.
+#
+# Behaviour is selected by the URL path:
+#   /v1/chat/completions            normal answer
+#   /slow/<ms>/v1/chat/completions  sleeps <ms> before answering
+#   /fail/<n>/v1/chat/completions   first <n> calls return 503, then answers
+#   /ratelimit/<n>/v1/chat/completions  first <n> calls return 429 + Retry-After
+#
+# "stream": true in the payload gets a server-sent-events reply, one
+# ~4-character token every `token_delay` seconds. Every reply ends with
+# `trailing_tokens` of chatter after the JSON, like a model that keeps
+# talking until max_tokens.
+#
+# `prefill_delay` seconds are spent per estimated prompt token before the
+# first output token, so prompt size shows up in latency.
+#
+# The answer is the fast_parse result for the user command (or the
+# ANSWERS override) wrapped in some chatter, like a real model reply.
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.fast_parser import fast_parse  # noqa: E402
+from src.prompt_builder import estimate_tokens  # noqa: E402
+
+ANSWERS = {}
+
+
+def answer_for(command: str) -> dict:
+    if command in ANSWERS:
+        return ANSWERS[command]
+    return fast_parse(command) or {"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 1}
+
+
+def _command_from_payload(payload: dict) -> str:
+    user = payload["messages"][-1]["content"]
+    m = re.match(r"Command: (.*?)\n", user)
+    return m.group(1) if m else user
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body: bytes, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        server.requests += 1
+
+        parts = self.path.strip("/").split("/")
+        mode = parts[0] if parts[0] in ("slow", "fail", "ratelimit") else None
+        arg = int(parts[1]) if mode else 0
+
+        if mode == "slow":
+            time.sleep(arg / 1000)
+        elif mode in ("fail", "ratelimit"):
+            with server.lock:
+                seen = server.counters.get(self.path, 0)
+                server.counters[self.path] = seen + 1
+            if seen < arg:
+                if mode == "fail":
+                    self._send(503, b'{"error": "unavailable"}')
+                else:
+                    self._send(429, b'{"error": "rate limited"}', {"Retry-After": "0.05"})
+                return
+
+        content = ("Here is the JSON:\n" + json.dumps(answer_for(_command_from_payload(payload)))
+                   + "\nExplanation: " + "the order was parsed. " * (server.trailing_tokens // 5))
+        self.server.handle_completion(self, payload, content)
+
+    def setup(self):
+        super().setup()
+        self.server.peers.add(self.client_address)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, token_delay=0.0, trailing_tokens=0, prefill_delay=0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.prefill_delay = prefill_delay
+        self.token_delay = token_delay
+        self.trailing_tokens = trailing_tokens
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.peers = set()
+        self.requests = 0  # connections opened = len(self.peers)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def url(self, prefix=""):
+        return f"{self.base_url}{prefix}/v1/chat/completions"
+
+    def handle_completion(self, handler, payload, content):
+        tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in payload["messages"])
+        time.sleep(self.prefill_delay * prompt_tokens)
+        if payload.get("stream"):
+            return self._stream(handler, tokens)
+
+        time.sleep(self.token_delay * len(tokens))
+        body = json.dumps({
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens},
+        }).encode()
+        handler._send(200, body)
+
+    def _stream(self, handler, tokens):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def chunk(data: bytes):
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+        try:
+            for tok in tokens:
+                time.sleep(self.token_delay)
+                event = {"choices": [{"delta": {"content": tok}}]}
+                chunk(b"data: " + json.dumps(event).encode() + b"\n\n")
+            chunk(b"data: [DONE]\n\n")
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # client closed early once it had the JSON
+            handler.close_connection = True
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
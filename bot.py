@@ -1,43 +1,360 @@
 #/bot.py
+# Heavy modules (LangGraph + executors, the LLM parser, python-binance) are
+# imported on the code path that needs them, so usage errors, --dry-run,
+# `logs` and `send` start in tens of milliseconds.
+# See benchmarks/bench_startup.py for the import-time budget.
 
+import os
 import sys
-from llm_parser import LLMParser
-from graph import build_bot_graph
+import time
+
+_STARTED = time.perf_counter()
+
 from src.logger import log_error, log_info
-from src.binance_client import get_client
 
-parser_llm = LLMParser()
-graph = build_bot_graph()
+_parser = None
+_graph = None
 
 
-if __name__ == "__main__":
+def get_parser():
+    global _parser
+    if _parser is None:
+        from llm_parser import LLMParser
+        _parser = LLMParser()
+    return _parser
 
-    if len(sys.argv) < 2:
-        print('python bot.py "your trading command"')
-        sys.exit(1)
 
-    user_text = " ".join(sys.argv[1:])
-    log_info("START: Command recieved",{"input":user_text})
-    try:
-        client = get_client(testnet=True)
-    except Exception as e:
-        print(" API setup error:", str(e))
-        log_error("API setup failed", {"error": str(e)})
-        sys.exit(1)
+def get_graph():
+    global _graph
+    if _graph is None:
+        from graph import build_bot_graph
+        _graph = build_bot_graph()
+    return _graph
+
+
+USAGE = """python bot.py "your trading command"
+python bot.py --dry-run "your trading command"   parse + validate only, nothing is sent
+python bot.py repl                       interactive mode, keeps everything warm
+python bot.py serve [--socket PATH] [--metrics-port PORT]   command server on a Unix socket
+python bot.py bulk FILE|- [--out results.jsonl] [--workers N] [--dry-run]   run a file of commands
+python bot.py send [--socket PATH] "your trading command" | --twap [ID] | --twap-cancel ID | --grid [ID] | --book SYMBOL [QTY] | --metrics
+python bot.py logs [--type ERROR] [--message TEXT] [--since 24h]
+python bot.py ledger orders [--symbol S] [--strategy twap] [--open] | open [--strategy oco] | group ID [--fills] | reconcile | stats
+python bot.py backtest twap|oco DATA [--symbol S] [--intervals 5,10 --delay 60,300 | --tp-bps 50,100 --sl-bps 50]"""
+
+
+def execute_command(user_text, client, suggest=True):
+    """
+    Parse, validate and execute one command with the already-built parser,
+    graph and client. Returns an outcome dict instead of printing.
+    """
+    log_info("START: Command recieved", {"input": user_text})
+    start = time.perf_counter()
+    timings = {}
+
+    parser_llm = get_parser()
 
     try:
         parsed = parser_llm.parse(user_text)
-        parsed['client']=client
+        timings["parse_ms"] = (time.perf_counter() - start) * 1000
+        timings["parse_path"] = parser_llm.last_parse_path
+
+        parsed['client'] = client
+        graph = get_graph()
+        graph_start = time.perf_counter()
         result = graph.invoke(parsed)
-        print("\nORDER EXECUTION RESULT:")
-        print(result)
+        timings["execute_ms"] = (time.perf_counter() - graph_start) * 1000
+        if isinstance(result, dict):   # TWAP / VWAP return their slice responses
+            result.pop("client", None)
+        outcome = {"ok": True, "result": result}
 
     except Exception as e:
         error_message = str(e)
         log_error("Bot failed", {"error": error_message, "input": user_text})
+        outcome = {"ok": False, "error": error_message}
+        if suggest:
+            outcome["suggestion"] = parser_llm.suggest_correction(user_text, error_message)
+
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    outcome["timings"] = timings
+    return outcome
+
 
-        print("\nERROR:", error_message)
-        print("Trying to suggest a correction...")
+def dry_run(user_text):
+    """
+    Parse and validate a command without building the graph or the
+    exchange client. Returns an outcome dict like execute_command.
+    """
+    from src.validators import validate
 
-        suggestion = parser_llm.suggest_correction(user_text, error_message)
-        print(suggestion)
+    start = time.perf_counter()
+    parser_llm = get_parser()
+    try:
+        parsed = parser_llm.parse(user_text)
+        timings = {"parse_ms": (time.perf_counter() - start) * 1000,
+                   "parse_path": parser_llm.last_parse_path}
+        outcome = {"ok": True, "dry_run": True, "result": validate(parsed)}
+    except Exception as e:
+        timings = {}
+        outcome = {"ok": False, "error": str(e)}
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    outcome["timings"] = timings
+    return outcome
+
+
+def print_outcome(outcome):
+    if outcome.get("dry_run"):
+        print("\nDRY RUN (not sent):")
+        print(outcome["result"])
+    elif outcome["ok"]:
+        print("\nORDER EXECUTION RESULT:")
+        print(outcome["result"])
+    else:
+        print("\nERROR:", outcome["error"])
+        if "suggestion" in outcome:
+            print("Trying to suggest a correction...")
+            print(outcome["suggestion"])
+
+
+def _format_timings(t):
+    parts = [f"total {t['total_ms']:.2f} ms"]
+    if "parse_ms" in t:
+        parts.append(f"parse {t['parse_ms']:.2f} ms ({t.get('parse_path')})")
+    if "execute_ms" in t:
+        parts.append(f"execute {t['execute_ms']:.2f} ms")
+    return ", ".join(parts)
+
+
+def _dump_node_metrics():
+    """
+    Per-node timings of this process (only if the graph ran).
+    """
+    if "src.metrics" not in sys.modules:
+        return
+    from src.metrics import get_metrics
+
+    metrics = get_metrics()
+    summary = metrics.summary()
+    if summary:
+        log_info("Node timings", summary)
+        print(f"[nodes: {metrics.format_summary()}]")
+
+
+def _connect(lazy=False):
+    from src.binance_client import get_client
+
+    try:
+        return get_client(testnet=True, lazy=lazy)
+    except Exception as e:
+        print(" API setup error:", str(e))
+        log_error("API setup failed", {"error": str(e)})
+        sys.exit(1)
+
+
+def _start_twap_scheduler(client):
+    """
+    Long-running modes: TWAP commands return once scheduled, and plans left
+    unfinished by an earlier process are resumed.
+    """
+    from src.advanced import twap
+    from src.advanced.twap_scheduler import get_scheduler
+
+    twap.configure(background=True)
+    scheduler = get_scheduler()
+    resumed = scheduler.resume(client)
+    if resumed:
+        print(f"Resumed {len(resumed)} TWAP plan(s): {', '.join(resumed)}")
+    return scheduler
+
+
+def _start_oco_watcher(client):
+    """
+    Long-running modes: cancel the surviving OCO leg as soon as one fills,
+    and re-arm grid levels from the same user-data stream.
+    """
+    from src.advanced.oco_watcher import start_watcher
+
+    if hasattr(client, "serve_user_stream"):
+        # MockExchange: its events come from a local websocket
+        watcher = start_watcher(client, stream_url=client.serve_user_stream())
+    else:
+        watcher = start_watcher(client)
+    watcher.add_listener(_grid_engine().on_event)
+    # Fills and status changes go to the order ledger
+    from src.ledger import record_event
+    watcher.add_listener(record_event)
+    return watcher
+
+
+def _start_book_mirror(client):
+    """
+    Long-running modes with BOT_BOOK_SYMBOLS=BTCUSDT,ETHUSDT: mirror those
+    order books for the slippage guard and `book` queries.
+    """
+    symbols = [s.strip().upper() for s in os.getenv("BOT_BOOK_SYMBOLS", "").split(",") if s.strip()]
+    if not symbols:
+        return None
+    if not hasattr(client, "futures_order_book"):
+        print("Order book mirror not started: the client has no depth endpoint")
+        return None
+    from src.order_book import start_mirror
+    return start_mirror(client, symbols)
+
+
+def _book_report(symbol, quantity=None):
+    from src.order_book import book_report
+    return book_report(symbol, quantity)
+
+
+def _grid_engine():
+    # NumPy and the grid module load on first use
+    from src.advanced.grid_strategy import get_grid_engine
+    return get_grid_engine()
+
+
+def repl(client):
+    get_parser()
+    get_graph()
+    scheduler = _start_twap_scheduler(client)
+    _start_oco_watcher(client)
+    _start_book_mirror(client)
+    print("Bot ready. Type a trading command, 'twap status [ID]', 'twap cancel ID', 'grid status [ID]', "
+          "'grid cancel ID', 'book SYMBOL [QTY]', or 'quit' to exit.")
+    while True:
+        try:
+            user_text = input("bot> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if not user_text:
+            continue
+        if user_text.lower() in ("quit", "exit"):
+            break
+        words = user_text.split()
+        if words[0].lower() == "twap" and len(words) <= 3 and words[1:2] in (["status"], ["cancel"]):
+            if words[1] == "status":
+                print(scheduler.progress(words[2] if len(words) > 2 else None))
+            else:
+                print("cancelled" if len(words) > 2 and scheduler.cancel(words[2]) else "no such running TWAP")
+            continue
+        if words[0].lower() == "grid" and len(words) <= 3 and words[1:2] in (["status"], ["cancel"]):
+            grids = _grid_engine()
+            if words[1] == "status":
+                print(grids.progress(words[2] if len(words) > 2 else None))
+            else:
+                print("cancelled" if len(words) > 2 and grids.cancel(words[2]) else "no such running grid")
+            continue
+        if words[0].lower() == "book" and 2 <= len(words) <= 3:
+            try:
+                print(_book_report(words[1], float(words[2]) if len(words) > 2 else None))
+            except ValueError:
+                print("usage: book SYMBOL [QTY]")
+            continue
+        outcome = execute_command(user_text, client)
+        print_outcome(outcome)
+        print(f"[{_format_timings(outcome['timings'])}]")
+    _dump_node_metrics()
+
+
+def serve(client, argv):
+    import argparse
+    from src.daemon import CommandServer, SOCKET_PATH
+
+    ap = argparse.ArgumentParser(prog="bot.py serve")
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    ap.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    args = ap.parse_args(argv)
+
+    from src.metrics import get_metrics, serve_metrics
+
+    if args.metrics_port is not None:
+        serve_metrics(args.metrics_port)
+        log_info("Metrics endpoint started", {"port": args.metrics_port})
+
+    get_parser()
+    get_graph()
+    scheduler = _start_twap_scheduler(client)
+    watcher = _start_oco_watcher(client)
+    _start_book_mirror(client)
+    ops = {
+        "oco": lambda request: {"oco": watcher.status()},
+        "twap": lambda request: {"twap": scheduler.progress(request.get("plan_id"))},
+        "twap_cancel": lambda request: {"cancelled": scheduler.cancel(request["plan_id"])},
+        "grid": lambda request: {"grid": _grid_engine().progress(request.get("grid_id")),
+                                 "engine": _grid_engine().status()},
+        "grid_cancel": lambda request: {"cancelled": _grid_engine().cancel(request["grid_id"])},
+        "book": lambda request: {"book": _book_report(request["symbol"], request.get("quantity"))},
+        "metrics": lambda request: {"nodes": get_metrics().summary(tuple(request.get("by") or ("node",)))},
+    }
+    server = CommandServer(lambda text: execute_command(text, client), args.socket, ops=ops)
+    log_info("Bot server started", {"socket": args.socket})
+    print(f"Bot server listening on {args.socket} (startup {(time.perf_counter() - _STARTED) * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("Command latency:", server.stats.summary())
+        print("Node timings:", get_metrics().format_summary())
+
+
+def main(argv):
+    if not argv:
+        print(USAGE)
+        return 1
+
+    mode = argv[0]
+
+    if mode == "logs":
+        # Log tools don't need the LLM, LangGraph or the exchange client
+        from src.log_analytics import main as logs_main
+        return logs_main(argv[1:])
+
+    if mode == "ledger":
+        # Order ledger queries read the SQLite file; only reconcile connects
+        from src.ledger import main as ledger_main
+        return ledger_main(argv[1:], lambda: _connect(lazy=True))
+
+    if mode == "backtest":
+        # Offline replay over historical data: NumPy only, no client or graph
+        from src.advanced.backtest import main as backtest_main
+        return backtest_main(argv[1:])
+
+    if mode == "send":
+        # Thin client for a running `bot.py serve`
+        from src.daemon import send_main
+        return send_main(argv[1:])
+
+    if mode == "bulk":
+        # Many commands: parsed on a pool, validated, then submitted per symbol
+        from src.bulk_commands import main as bulk_main
+        return bulk_main(argv[1:], get_parser, get_graph, lambda: _connect(lazy=True))
+
+    if mode == "--dry-run":
+        if len(argv) < 2:
+            print(USAGE)
+            return 1
+        outcome = dry_run(" ".join(argv[1:]))
+        print_outcome(outcome)
+        print(f"\n[cold start {(time.perf_counter() - _STARTED) * 1000:.0f} ms, "
+              f"{_format_timings(outcome['timings'])}]")
+        return 0 if outcome["ok"] else 1
+
+    if mode == "repl":
+        repl(_connect())
+    elif mode == "serve":
+        serve(_connect(), argv[1:])
+    else:
+        # The client is only built once the command has parsed and validated
+        user_text = " ".join(argv)
+        outcome = execute_command(user_text, _connect(lazy=True))
+        print_outcome(outcome)
+        print(f"\n[cold start {(time.perf_counter() - _STARTED) * 1000:.0f} ms, "
+              f"{_format_timings(outcome['timings'])}]")
+        _dump_node_metrics()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -12,6 +12,7 @@ from src.advanced.oco import execute_oco_order
 from src.advanced.twap import execute_twap_order
 
 from src.logger import log_info, log_error
+from src.metrics import timed
 
 
 State = Dict[str, Any]
@@ -74,22 +75,53 @@ def build_bot_graph():
             state["client"],
             state["symbol"],
             state["side"],
-            state["quantity"]
+            state["quantity"],
+            state.get("twap_intervals", 5),
+            state.get("twap_delay", 60)
+        )
+
+    def vwap_node(state: State) -> State:
+        return execute_twap_order(
+            state["client"],
+            state["symbol"],
+            state["side"],
+            state["quantity"],
+            state.get("twap_intervals", 5),
+            state.get("twap_delay", 60),
+            vwap=True,
+            participation=state.get("participation")
+        )
+
+    def grid_node(state: State) -> State:
+        # NumPy is only loaded once a grid is placed
+        from src.advanced.grid_strategy import execute_grid_order
+
+        return execute_grid_order(
+            state["client"],
+            state["symbol"],
+            state["side"],
+            state["quantity"],
+            state["grid_lower"],
+            state["grid_upper"],
+            state["grid_levels"],
+            state.get("grid_mode", "arithmetic")
         )
 
     def done_node(state: State) -> State:
         log_info("Order execution complete", {"result": state})
         return state
 
-    # Nodes
-    graph.add_node("validate_node", validate_node)
-    graph.add_node("route_node", route_node)
-    graph.add_node("market_node", market_node)
-    graph.add_node("limit_node", limit_node)
-    graph.add_node("stop_limit_node", stop_limit_node)
-    graph.add_node("oco_node", oco_node)
-    graph.add_node("twap_node", twap_node)
-    graph.add_node("done_node", done_node)
+    # Nodes (timed per node, see src/metrics.py)
+    graph.add_node("validate_node", timed("validate_node", validate_node))
+    graph.add_node("route_node", timed("route_node", route_node))
+    graph.add_node("market_node", timed("market_node", market_node))
+    graph.add_node("limit_node", timed("limit_node", limit_node))
+    graph.add_node("stop_limit_node", timed("stop_limit_node", stop_limit_node))
+    graph.add_node("oco_node", timed("oco_node", oco_node))
+    graph.add_node("twap_node", timed("twap_node", twap_node))
+    graph.add_node("vwap_node", timed("vwap_node", vwap_node))
+    graph.add_node("grid_node", timed("grid_node", grid_node))
+    graph.add_node("done_node", timed("done_node", done_node))
 
     # EDGES
     graph.set_entry_point("validate_node")
@@ -103,6 +135,8 @@ def build_bot_graph():
             "stop_limit": "stop_limit_node",
             "oco": "oco_node",
             "twap": "twap_node",
+            "vwap": "vwap_node",
+            "grid": "grid_node",
         }
     )
 
@@ -112,7 +146,9 @@ def build_bot_graph():
         "limit_node", 
         "stop_limit_node", 
         "oco_node", 
-        "twap_node"
+        "twap_node",
+        "vwap_node",
+        "grid_node"
     ]
     for node in execution_nodes:
         graph.add_edge(node, "done_node")
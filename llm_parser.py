@@ -9,32 +9,16 @@ mistralai/Mistral-7B-v0.1
 meta‑llama/Llama-2-7b-hf
 bigscience/bloom
 """
-import json
-import requests
 import os
-from src.logger import log_error
-
-class LLMParser:
-    """
-    Uses HuggingFace Chat Completions API (router endpoint)
-    with a supported chat model.
-    """
-
-    def __init__(self, model="meta-llama/Llama-3.2-1B-Instruct:novita"):
-        self.model = model
-        self.api_key = os.getenv("HF_API_KEY")
-        if not self.api_key:
-            raise RuntimeError("HF_API_KEY not set.")
-
-        self.url = "https://router.huggingface.co/v1/chat/completions"
-        self.headers = {"Authorization": f"Bearer {self.api_key}"}
-
-    def parse(self, text: str):
-        """
-        Parse trading commands into STRICT JSON using a supported chat model.
-        """
-
-        system_prompt = """
+import time
+from src.logger import log_error, log_info
+from src.fast_parser import fast_parse
+from src.parse_cache import ParseCache, CACHE_FILE
+from src.http_transport import get_transport
+from src.llm_stream import extract_first_json, stream_first_json
+from src.prompt_builder import build_parse_prompt, estimate_tokens, prompt_source
+
+PARSE_SYSTEM_PROMPT = """
 You are a Trader who knows the trading keywords for a Binance Futures bot.
 You have to parse the user input CLI into a JSON.
 JSON ouput keys for different type of orders are:
@@ -83,10 +67,30 @@ JSON ouput keys for different type of orders are:
   "twap_intervals": 5,
   "twap_delay": 60
 }
+6) "vwap" (Volume Weighted Average Price, like twap but the slice sizes follow the symbol's usual trading volume over the day. Same keys as twap plus an optional participation: the max fraction of market volume per slice, 5% -> 0.05.)
+{
+  "order_type": "vwap",
+  "symbol": "ETHUSDT",
+  "side": "SELL",
+  "quantity": 2,
+  "twap_intervals": 12,
+  "twap_delay": 300,
+  "participation": 0.05
+}
+7) "grid" (Grid strategy, limit orders on a ladder of grid_levels prices from grid_lower to grid_upper; quantity is per order. grid_mode is "arithmetic" (equal steps, the default) or "geometric" (equal ratios).)
+{
+  "order_type": "grid",
+  "symbol": "BTCUSDT",
+  "side": "BUY",
+  "quantity": 0.002,
+  "grid_lower": 80000,
+  "grid_upper": 90000,
+  "grid_levels": 20
+}
 
 Look at the user input, brainstorm and logically assing the following: 
 Required keys:
-1)  "order_type" which will be only among th following (market,limit, stop_limit, oco or twap) nothing else.
+1)  "order_type" which will be only among th following (market,limit, stop_limit, oco, twap, vwap or grid) nothing else.
 2)  "symbol" will be the coin symbol used in binance future trade
 3)  "side" i.e. SELL or BUY. extract the keyword "buy" or "sell" from the usertext. buy means side is BUY and sell means side is SELL.
 4)  "quantity" which means the number of coins to buy or sell which can be fractional.
@@ -95,6 +99,8 @@ Required keys:
     *Interchange them as necessary (It cannot not be same a price)
 7)  "twap_interval" the no. of intervals of time unit mentioned for twap order duration.
 8)  "twap_delay" the time unit mentioned for the twap order
+9)  "participation" for vwap orders, only if mentioned.
+10) "grid_lower", "grid_upper", "grid_levels" (and "grid_mode" if mentioned) for grid orders.
 
 
 RULES:
@@ -119,10 +125,76 @@ $ python bot.py "twap buy btc amount 0.3"
 $ python bot.py "sell 0.5 eth oco for 2700 stop_price 3200"
 {'order_type': 'oco', 'symbol': 'ETHUSDT', 'side': 'SELL', 'quantity': 0.5, 'price': 2700, 'stop_price': 3200}
 
-order can only be among: 'market', 'limit', 'stop_limit', 'oco, 'twap'
+order can only be among: 'market', 'limit', 'stop_limit', 'oco, 'twap', 'vwap', 'grid'
 """
 
 
+class LLMParser:
+    """
+    Uses HuggingFace Chat Completions API (router endpoint)
+    with a supported chat model.
+    """
+
+    def __init__(self, model="meta-llama/Llama-3.2-1B-Instruct:novita", fast_path=True,
+                 cache=True, cache_path=CACHE_FILE, transport=None,
+                 url="https://router.huggingface.co/v1/chat/completions", stream=False,
+                 compact_prompt=False, prompt_budget=None):
+        self.model = model
+        self.stream = stream
+        self.compact_prompt = compact_prompt
+        self.prompt_budget = prompt_budget
+        self.last_timings = None
+        self._transport = transport  # shared pooled transport, created on first LLM call
+        self.fast_path = fast_path
+        self.last_parse_path = None  # "fast", "cache" or "llm"
+        cache_prompt = f"{prompt_source()}\n{prompt_budget}" if compact_prompt else PARSE_SYSTEM_PROMPT
+        self.cache = ParseCache(model, cache_prompt, path=cache_path) if cache else None
+        self.api_key = os.getenv("HF_API_KEY")
+        if not self.api_key:
+            raise RuntimeError("HF_API_KEY not set.")
+
+        self.url = url
+        self.headers = {"Authorization": f"Bearer {self.api_key}"}
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = get_transport()
+        return self._transport
+
+    def parse(self, text: str):
+        """
+        Parse trading commands into STRICT JSON using a supported chat model.
+        Simple commands are resolved locally by fast_parse; the model is only
+        called when the local grammar can't produce an unambiguous parse.
+        Model results are cached (see src/parse_cache.py).
+        With stream=True the completion is streamed and the connection is
+        closed as soon as the first JSON object is complete.
+        With compact_prompt=True only the schemas of the likely order types
+        are sent (see src/prompt_builder.py).
+        """
+
+        if self.fast_path:
+            parsed = fast_parse(text)
+            if parsed is not None:
+                self.last_parse_path = "fast"
+                log_info("Command parsed", {"path": "fast", "input": text})
+                return parsed
+
+        if self.cache is not None:
+            parsed = self.cache.get(text)
+            if parsed is not None:
+                self.last_parse_path = "cache"
+                log_info("Command parsed", {"path": "cache", "input": text})
+                return parsed
+
+        self.last_parse_path = "llm"
+
+        if self.compact_prompt:
+            system_prompt, _, prompt_tokens = build_parse_prompt(text, self.prompt_budget)
+        else:
+            system_prompt, prompt_tokens = PARSE_SYSTEM_PROMPT, estimate_tokens(PARSE_SYSTEM_PROMPT)
+
         user_prompt = f"Command: {text}\nReturn ONLY JSON."
 
         payload = {
@@ -136,19 +208,23 @@ order can only be among: 'market', 'limit', 'stop_limit', 'oco, 'twap'
         }
 
         try:
-            response = requests.post(self.url, headers=self.headers, json=payload)
-            data = response.json()
-            content = data["choices"][0]["message"]["content"]
-
-            # Extract JSON block
-            start = content.find("{")
-            end = content.rfind("}") + 1
-
-            if start == -1 or end == -1:
-                raise ValueError("No JSON detected in model output.")
-
-            json_str = content[start:end]
-            return json.loads(json_str)
+            if self.stream:
+                parsed, timings = stream_first_json(self.transport, self.url, payload, headers=self.headers)
+            else:
+                start = time.perf_counter()
+                data = self.transport.post_json(self.url, payload, headers=self.headers)
+                content = data["choices"][0]["message"]["content"]
+                # First balanced JSON object; trailing text is ignored
+                parsed = extract_first_json(content)
+                elapsed = (time.perf_counter() - start) * 1000
+                timings = {"ttft_ms": elapsed, "json_ms": elapsed}
+
+            timings["prompt_tokens"] = prompt_tokens
+            self.last_timings = timings
+            if self.cache is not None:
+                self.cache.put(text, parsed)
+            log_info("Command parsed", {"path": "llm", "input": text, "stream": self.stream, **timings})
+            return parsed
 
         except Exception as e:
             log_error("LLM parsing failed", {"error": str(e), "input": text})
@@ -198,8 +274,7 @@ Provide a detailed explanation of the issue.
         }
 
         try:
-            response = requests.post(self.url, headers=self.headers, json=payload)
-            data = response.json()
+            data = self.transport.post_json(self.url, payload, headers=self.headers)
 
             content = data["choices"][0]["message"]["content"]
             return content
@@ -0,0 +1,482 @@
+# /src/advanced/backtest.py
+# Vectorized replay of the TWAP and OCO executors over historical data.
+#   - data is Binance 1m kline CSVs (<SYMBOL>-1m-*.csv) or trade CSVs
+#     (<SYMBOL>-aggTrades-*.csv / <SYMBOL>-trades-*.csv) as downloaded from
+#     data.binance.vision. They are converted once to one <SYMBOL>-<kind>.npy
+#     next to them, column-major (time ms, open, high, low, close, volume), and
+#     memory-mapped from then on; a trade is a row with open = high = low = close
+#   - a TWAP run is TwapPlan's schedule: slice i is a MARKET order at the open
+#     of the first row at or after start + i * delay, filled at that price plus
+#     half the spread and an impact term proportional to the slice's share of
+#     the volume traded in its window
+#   - an OCO run is a MARKET entry followed by execute_oco_order's legs on the
+#     exit side: TAKE_PROFIT (a limit at its stop price) and STOP_MARKET. The
+#     first row that crosses a leg fills it; a row that crosses both counts as
+#     the stop unless it opened past the take-profit. Runs with neither leg
+#     hit within `horizon` seconds are closed at market
+#   - runs at every start time are evaluated at once as 2-D arrays; sweep()
+#     spreads parameter combinations over a process pool whose workers all map
+#     the same .npy, so the data is read from the page cache, not copied
+#
+#   python bot.py backtest twap klines/ --symbol BTCUSDT --side BUY --quantity 1 --intervals 5,10 --delay 60,300
+#   python bot.py backtest oco klines/ --symbol BTCUSDT --side BUY --quantity 0.01 --tp-bps 50,100 --sl-bps 50
+
+import argparse
+import glob
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from src.advanced.twap_scheduler import TwapPlan
+from src.batch_validation import _decimals, _snap
+from src.logger import log_info
+
+SPREAD_BPS = 1.0       # full bid/ask spread; taker fills pay half of it
+IMPACT_BPS = 10.0      # extra cost of a slice that is 100% of its window's volume
+TAKER_FEE_BPS = 5.0    # USDT-M futures taker fee, charged on every fill
+WINDOW_CELLS = 1 << 22   # runs x rows (or blocks) scanned per OCO chunk
+BLOCK = 32               # rows per block in the OCO first-crossing search
+
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+TAKE_PROFIT, STOP_LOSS, EXPIRED = 0, 1, 2
+OUTCOMES = ("take_profit", "stop_loss", "expired")
+_NONE = np.iinfo(np.int64).max   # no crossing
+
+# kind: (file name tag, CSV columns read)
+_KINDS = {
+    "klines": ("1m", (0, 1, 2, 3, 4, 5)),            # open_time, open, high, low, close, volume
+    "aggTrades": ("aggTrades", (5, 1, 2)),           # transact_time, price, quantity
+    "trades": ("trades", (4, 1, 2)),                 # time, price, qty
+}
+
+
+def configure(spread_bps=None, impact_bps=None, taker_fee_bps=None):
+    global SPREAD_BPS, IMPACT_BPS, TAKER_FEE_BPS
+    if spread_bps is not None:
+        SPREAD_BPS = spread_bps
+    if impact_bps is not None:
+        IMPACT_BPS = impact_bps
+    if taker_fee_bps is not None:
+        TAKER_FEE_BPS = taker_fee_bps
+
+
+# ------------------------------
+# Data
+# ------------------------------
+def read_csv(path: str, kind: str = "klines") -> np.ndarray:
+    """
+    One data file as a (6, n) float64 array of time, open, high, low,
+    close, volume.
+    """
+    with open(path) as f:
+        first = f.readline()
+    data = np.loadtxt(path, delimiter=",", usecols=_KINDS[kind][1], skiprows=0 if first[:1].isdigit() else 1,
+                      dtype=np.float64, ndmin=2).T
+    if data.shape[1] and data[0].max() > 10 ** 14:
+        data[0] = np.floor(data[0] / 1000)   # microsecond timestamps (spot files from 2025 on)
+    if kind != "klines":
+        data = data[[0, 1, 1, 1, 1, 2]]
+    return data
+
+
+def data_files(directory: str, symbol: str, kind: str = "klines") -> List[str]:
+    return sorted(glob.glob(os.path.join(directory, f"{symbol}-{_KINDS[kind][0]}-*.csv")))
+
+
+def data_path(source: str, symbol: Optional[str] = None, kind: str = "klines") -> str:
+    """
+    The .npy for `source`: the file itself, or for a directory the
+    symbol's converted CSVs, rebuilt when a CSV is newer.
+    """
+    if source.endswith(".npy"):
+        return source
+    files = data_files(source, symbol, kind)
+    if not files:
+        raise FileNotFoundError(f"no {symbol}-{_KINDS[kind][0]}-*.csv in {os.path.abspath(source)}")
+    out = os.path.join(source, f"{symbol}-{kind}.npy")
+    if os.path.exists(out) and os.stat(out).st_mtime_ns >= max(os.stat(p).st_mtime_ns for p in files):
+        return out
+
+    start = time.perf_counter()
+    data = np.concatenate([read_csv(p, kind) for p in files], axis=1)
+    if np.any(np.diff(data[TIME]) < 0):
+        data = data[:, np.argsort(data[TIME], kind="stable")]
+    tmp = f"{out}.tmp.npy"
+    np.save(tmp, np.ascontiguousarray(data))
+    os.replace(tmp, out)
+    log_info("Backtest data converted", {"symbol": symbol, "kind": kind, "files": len(files),
+                                         "rows": int(data.shape[1]), "path": out,
+                                         "ms": round((time.perf_counter() - start) * 1000, 2)})
+    return out
+
+
+class Market:
+    """
+    Memory-mapped data plus the cumulative volume / notional used for
+    window volumes and the market VWAP.
+    """
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+        self.time, self.open, self.high, self.low, self.close, self.volume = data
+        self.rows = data.shape[1]
+        self.cum_volume = np.concatenate(([0.0], np.cumsum(self.volume)))
+        self.cum_notional = np.concatenate(([0.0], np.cumsum(self.close * self.volume)))
+        self._blocks = None
+
+    @classmethod
+    def open_path(cls, path: str) -> "Market":
+        return cls(np.load(path, mmap_mode="r"))
+
+    def blocks(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Highest high and lowest low of every BLOCK rows.
+        """
+        if self._blocks is None:
+            padded = -(-self.rows // BLOCK) * BLOCK
+            high = np.full(padded, -np.inf)
+            low = np.full(padded, np.inf)
+            high[:self.rows], low[:self.rows] = self.high, self.low
+            self._blocks = (high.reshape(-1, BLOCK).max(axis=1), low.reshape(-1, BLOCK).min(axis=1))
+        return self._blocks
+
+    def start_times(self, every: float, last: float = 0.0) -> np.ndarray:
+        """
+        A run start every `every` seconds, leaving `last` seconds of data
+        after the final one.
+        """
+        return np.arange(self.time[0], self.time[-1] - last * 1000 + 1, every * 1000)
+
+
+# ------------------------------
+# Simulation
+# ------------------------------
+def simulate_twap(market: Market, side: str, quantity: float, intervals: int, delay: float,
+                  starts: np.ndarray, quantities: Optional[List[float]] = None) -> Dict[str, Any]:
+    """
+    One TWAP run per start time (ms). Runs that would outlast the data
+    are dropped. Slippage is in bps against the open at the start
+    (positive = worse), vs_vwap_bps against the market VWAP over the
+    run; pnl marks the position at the close of the run, after fees.
+    """
+    sign = 1 if side == "BUY" else -1
+    plan = TwapPlan("", side, quantity, intervals, delay, quantities=quantities)
+    qty = np.array([plan.quantity_for(i) for i in range(plan.intervals)])
+    live = qty > 0
+
+    due = np.asarray(starts, dtype=np.float64)[:, None] + np.arange(plan.intervals) * plan.delay * 1000
+    row = np.searchsorted(market.time, due)
+    end = np.maximum(np.searchsorted(market.time, due + plan.delay * 1000), row + 1)
+    valid = end[:, -1] <= market.rows
+    due, row, end = due[valid], row[valid], end[valid]
+
+    window = market.cum_volume[end] - market.cum_volume[row]
+    share = np.divide(qty, window, out=np.ones_like(window), where=window > 0)
+    fill = market.open[row] * (1 + sign * (SPREAD_BPS / 2 + IMPACT_BPS * share) / 1e4)
+    notional = (fill * qty).sum(axis=1)
+    avg = notional / qty.sum()
+
+    arrival = market.open[row[:, 0]]
+    first, last = row[:, 0], end[:, -1]
+    market_vwap = ((market.cum_notional[last] - market.cum_notional[first])
+                   / np.maximum(market.cum_volume[last] - market.cum_volume[first], 1e-300))
+    fill_time = market.time[row]
+    return {
+        "runs": int(row.shape[0]),
+        "orders": int(row.shape[0] * live.sum()),
+        "start": due[:, 0],
+        "fill_price": avg,
+        "slippage_bps": sign * (avg - arrival) / arrival * 1e4,
+        "vs_vwap_bps": sign * (avg - market_vwap) / market_vwap * 1e4,
+        "lag_ms": (fill_time - due)[:, live],
+        "duration_ms": fill_time[:, -1] - fill_time[:, 0],
+        "pnl": sign * (market.close[last - 1] - avg) * qty.sum() - notional * TAKER_FEE_BPS / 1e4,
+    }
+
+
+def _crossings(market: Market, rows: np.ndarray, limit: np.ndarray, tp: np.ndarray, sl: np.ndarray,
+               sign: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First of each run's `rows` (absolute, one line per run) below `limit`
+    where the take-profit / the stop is crossed, _NONE where neither is.
+    """
+    inside = rows < limit[:, None]
+    rows = np.minimum(rows, market.rows - 1)
+    high, low = market.high[rows], market.low[rows]
+    if sign > 0:
+        tp_cross, sl_cross = high >= tp[:, None], low <= sl[:, None]
+    else:
+        tp_cross, sl_cross = low <= tp[:, None], high >= sl[:, None]
+    tp_cross &= inside
+    sl_cross &= inside
+    line = np.arange(rows.shape[0])
+    return (np.where(tp_cross.any(axis=1), rows[line, tp_cross.argmax(axis=1)], _NONE),
+            np.where(sl_cross.any(axis=1), rows[line, sl_cross.argmax(axis=1)], _NONE))
+
+
+def _first_crossings(market: Market, k: np.ndarray, end: np.ndarray, tp: np.ndarray, sl: np.ndarray,
+                     sign: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First row in [k, end) crossing each leg. The rows up to the second
+    block boundary are read directly; after that only the block highs and
+    lows are, and then the rows of the first block that crosses a leg (no
+    earlier row can), so a run costs about horizon / BLOCK reads instead
+    of horizon.
+    """
+    edge = np.minimum((k // BLOCK + 2) * BLOCK, end)
+    tp_row, sl_row = _crossings(market, k[:, None] + np.arange(2 * BLOCK), edge, tp, sl, sign)
+
+    todo = np.nonzero((tp_row == _NONE) & (sl_row == _NONE) & (edge < end))[0]
+    if todo.size:
+        block_high, block_low = market.blocks()
+        first, last = edge[todo] // BLOCK, (end[todo] - 1) // BLOCK
+        blocks = first[:, None] + np.arange(int((last - first).max()) + 1)
+        inside = blocks <= last[:, None]
+        blocks = np.minimum(blocks, block_high.size - 1)
+        if sign > 0:
+            cross = (block_high[blocks] >= tp[todo, None]) | (block_low[blocks] <= sl[todo, None])
+        else:
+            cross = (block_low[blocks] <= tp[todo, None]) | (block_high[blocks] >= sl[todo, None])
+        cross &= inside
+        found = cross.any(axis=1)
+        todo, start = todo[found], blocks[found, cross[found].argmax(axis=1)] * BLOCK
+        tp_row[todo], sl_row[todo] = _crossings(market, start[:, None] + np.arange(BLOCK), end[todo],
+                                                tp[todo], sl[todo], sign)
+    return tp_row, sl_row
+
+
+def simulate_oco(market: Market, side: str, quantity: float, tp_bps: float, sl_bps: float,
+                 horizon: float, starts: np.ndarray, tick: float = 0.0) -> Dict[str, Any]:
+    """
+    One MARKET entry on `side` per start time (ms), protected by an OCO
+    take-profit tp_bps and stop sl_bps away from the entry price (snapped
+    to `tick` like the real legs). Returns per-run outcome, exit row,
+    prices, hold time, slippage (entry + exit, bps, positive = worse)
+    and pnl after fees.
+    """
+    sign = 1 if side == "BUY" else -1
+    half = SPREAD_BPS / 2 / 1e4
+    k = np.searchsorted(market.time, np.asarray(starts, dtype=np.float64))
+    k = k[k < market.rows]
+    m = k.size
+
+    mid = market.open[k]
+    entry = mid * (1 + sign * half)
+    tp = entry * (1 + sign * tp_bps / 1e4)
+    sl = entry * (1 - sign * sl_bps / 1e4)
+    if tick:
+        steps, decimals = np.full(m, float(tick)), np.full(m, _decimals(float(tick)))
+        tp, sl = _snap(tp, steps, decimals, up_half=True), _snap(sl, steps, decimals, up_half=True)
+    end = np.maximum(np.searchsorted(market.time, market.time[k] + horizon * 1000), k + 1)
+
+    # runs x blocks searched per chunk stays under WINDOW_CELLS
+    span = int((end - k).max()) if m else 1
+    chunk = max(1, WINDOW_CELLS // max(2 * BLOCK, span // BLOCK + 2))
+    tp_row = np.empty(m, dtype=np.int64)
+    sl_row = np.empty(m, dtype=np.int64)
+    for lo in range(0, m, chunk):
+        part = slice(lo, min(lo + chunk, m))
+        tp_row[part], sl_row[part] = _first_crossings(market, k[part], end[part], tp[part], sl[part], sign)
+
+    # both legs in one row: the stop, unless the row opened past the take-profit
+    gapped = sign * (market.open[np.minimum(tp_row, market.rows - 1)] - tp) >= 0
+    take = (tp_row < sl_row) | ((tp_row == sl_row) & (tp_row != _NONE) & gapped)
+    stop = ~take & (sl_row != _NONE)
+    outcome = np.where(take, TAKE_PROFIT, np.where(stop, STOP_LOSS, EXPIRED)).astype(np.int8)
+    exit_row = np.where(take, tp_row, np.where(stop, sl_row, end - 1))
+
+    exit_open = market.open[exit_row]
+    # TAKE_PROFIT rests at its price (better if the row gapped through it);
+    # STOP_MARKET and the horizon close pay half the spread
+    take_px = tp + sign * np.maximum(0.0, sign * (exit_open * (1 - sign * half) - tp))
+    stop_px = (sl - sign * np.maximum(0.0, sign * (sl - exit_open))) * (1 - sign * half)
+    close_px = market.close[exit_row] * (1 - sign * half)
+    exit_px = np.where(take, take_px, np.where(stop, stop_px, close_px))
+    reference = np.where(take, tp, np.where(stop, sl, market.close[exit_row]))
+
+    return {
+        "runs": int(m),
+        "orders": int(3 * m),
+        "start": market.time[k],
+        "outcome": outcome,
+        "exit_row": exit_row,
+        "entry_price": entry,
+        "take_profit": tp,
+        "stop_loss": sl,
+        "exit_price": exit_px,
+        "hold_ms": market.time[exit_row] - market.time[k],
+        "slippage_bps": sign * ((entry - mid) / mid + (reference - exit_px) / reference) * 1e4,
+        "pnl": (sign * (exit_px - entry) - (entry + exit_px) * TAKER_FEE_BPS / 1e4) * quantity,
+    }
+
+
+def summarize(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Scalar statistics of a simulate_* result.
+    """
+    pnl, slippage = result["pnl"], result["slippage_bps"]
+    if not result["runs"]:
+        return {"runs": 0, "orders": 0}
+    summary = {
+        "runs": result["runs"],
+        "orders": result["orders"],
+        "pnl_total": float(pnl.sum()),
+        "pnl_mean": float(pnl.mean()),
+        "win_rate": float((pnl > 0).mean()),
+        "slippage_bps_mean": float(slippage.mean()),
+        "slippage_bps_p95": float(np.percentile(slippage, 95)),
+    }
+    if "outcome" in result:
+        counts = np.bincount(result["outcome"], minlength=3) / result["runs"]
+        summary.update({name: float(c) for name, c in zip(OUTCOMES, counts)})
+        summary["hold_s_mean"] = float(result["hold_ms"].mean() / 1000)
+    else:
+        summary["vs_vwap_bps_mean"] = float(result["vs_vwap_bps"].mean())
+        summary["lag_ms_mean"] = float(result["lag_ms"].mean()) if result["lag_ms"].size else 0.0
+        summary["duration_s_mean"] = float(result["duration_ms"].mean() / 1000)
+    return summary
+
+
+# ------------------------------
+# Parameter sweeps
+# ------------------------------
+_markets: Dict[str, Market] = {}
+
+
+def _market(path: str) -> Market:
+    # one mapping (and one set of cumulative sums) per worker process
+    if path not in _markets:
+        _markets[path] = Market.open_path(path)
+    return _markets[path]
+
+
+def run_backtest(path: str, strategy: str, params: Dict[str, Any], every: float) -> Dict[str, Any]:
+    """
+    Simulate one parameter combination over the whole dataset and
+    summarize it.
+    """
+    market = _market(path)
+    p = dict(params)
+    if strategy == "twap":
+        starts = market.start_times(every, p["intervals"] * p["delay"])
+        result = simulate_twap(market, p["side"], p["quantity"], p["intervals"], p["delay"], starts)
+    elif strategy == "oco":
+        starts = market.start_times(every)
+        result = simulate_oco(market, p["side"], p["quantity"], p["tp_bps"], p["sl_bps"],
+                              p.get("horizon", 86400), starts, p.get("tick", 0.0))
+    else:
+        raise ValueError(f"unknown strategy {strategy!r}")
+    return {"params": params, **summarize(result)}
+
+
+def _run_task(task):
+    path, strategy, params, every, model = task
+    configure(*model)   # the parent's settings, whatever the start method
+    return run_backtest(path, strategy, params, every)
+
+
+def sweep(path: str, strategy: str, grid: Dict[str, List[Any]], fixed: Dict[str, Any],
+          every: float = 3600, workers: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Every combination of `grid` (plus `fixed`) over the data at `path`,
+    on a process pool of `workers` (default: one per core; 1 runs
+    in-process). Returns (one summary per combination, throughput).
+    """
+    keys = list(grid)
+    combos = [{**fixed, **dict(zip(keys, values))} for values in itertools.product(*(grid[k] for k in keys))]
+    model = (SPREAD_BPS, IMPACT_BPS, TAKER_FEE_BPS)
+    tasks = [(path, strategy, combo, every, model) for combo in combos]
+    workers = min(workers or os.cpu_count() or 1, len(tasks)) or 1
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, tasks))
+    elapsed = time.perf_counter() - start
+
+    orders = sum(r["orders"] for r in results)
+    stats = {"strategy": strategy, "combinations": len(tasks), "workers": workers, "orders": orders,
+             "seconds": round(elapsed, 3), "orders_per_s": orders / elapsed if elapsed > 0 else 0.0}
+    log_info("Backtest sweep finished", stats)
+    return results, stats
+
+
+# ------------------------------
+# CLI
+# ------------------------------
+def _numbers(text: str, kind=float) -> List[Any]:
+    return [kind(x) for x in text.split(",") if x.strip()]
+
+
+def _print_results(results, stats, strategy):
+    ranked = sorted(results, key=lambda r: r.get("pnl_mean", 0.0), reverse=True)
+    keys = ("intervals", "delay") if strategy == "twap" else ("tp_bps", "sl_bps")
+    extra = ("vs_vwap_bps_mean", "vs VWAP") if strategy == "twap" else ("take_profit", "TP hit")
+    print(f"{keys[0]:>10} {keys[1]:>8} {'runs':>7} {'pnl mean':>12} {'win':>6} {'slip bps':>9} {extra[1]:>9}")
+    for r in ranked:
+        p = r["params"]
+        if not r["runs"]:
+            print(f"{p[keys[0]]:>10g} {p[keys[1]]:>8g} {0:>7} (no complete runs)")
+            continue
+        print(f"{p[keys[0]]:>10g} {p[keys[1]]:>8g} {r['runs']:>7} {r['pnl_mean']:>12.4f} {r['win_rate']:>6.1%} "
+              f"{r['slippage_bps_mean']:>9.2f} {r[extra[0]]:>9.2f}")
+    print(f"\n{stats['combinations']} combinations, {stats['orders']:,} simulated orders in {stats['seconds']} s "
+          f"on {stats['workers']} workers ({stats['orders_per_s']:,.0f} orders/s)")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="bot.py backtest", description="Replay TWAP / OCO over historical data")
+    sub = ap.add_subparsers(dest="strategy", required=True)
+    for name in ("twap", "oco"):
+        p = sub.add_parser(name)
+        p.add_argument("data", help="directory of Binance CSVs, or a converted .npy")
+        p.add_argument("--symbol", default="BTCUSDT")
+        p.add_argument("--trades", action="store_true", help="use <SYMBOL>-aggTrades-*.csv instead of 1m klines")
+        p.add_argument("--side", default="BUY", choices=("BUY", "SELL"))
+        p.add_argument("--quantity", type=float, default=1.0)
+        p.add_argument("--every", type=float, default=3600, help="seconds between run starts")
+        p.add_argument("--workers", type=int, help="processes (default: one per core)")
+        p.add_argument("--spread-bps", type=float)
+        p.add_argument("--fee-bps", type=float)
+        p.add_argument("--json", action="store_true")
+        if name == "twap":
+            p.add_argument("--intervals", default="5", help="comma-separated values to sweep")
+            p.add_argument("--delay", default="60", help="seconds, comma-separated")
+            p.add_argument("--impact-bps", type=float)
+        else:
+            p.add_argument("--tp-bps", default="100", help="comma-separated values to sweep")
+            p.add_argument("--sl-bps", default="100", help="comma-separated values to sweep")
+            p.add_argument("--horizon", type=float, default=86400, help="seconds before an open OCO is closed")
+            p.add_argument("--tick", type=float, default=0.0)
+    args = ap.parse_args(argv)
+
+    configure(spread_bps=args.spread_bps, taker_fee_bps=args.fee_bps, impact_bps=getattr(args, "impact_bps", None))
+    try:
+        path = data_path(args.data, args.symbol, "aggTrades" if args.trades else "klines")
+        fixed = {"side": args.side, "quantity": args.quantity}
+        if args.strategy == "twap":
+            grid = {"intervals": _numbers(args.intervals, int), "delay": _numbers(args.delay)}
+        else:
+            grid = {"tp_bps": _numbers(args.tp_bps), "sl_bps": _numbers(args.sl_bps)}
+            fixed.update({"horizon": args.horizon, "tick": args.tick})
+        results, stats = sweep(path, args.strategy, grid, fixed, args.every, args.workers)
+    except (OSError, ValueError) as e:
+        print("Backtest failed:", e)
+        return 1
+
+    if args.json:
+        print(json.dumps({"results": results, "stats": stats}, indent=2))
+    else:
+        _print_results(results, stats, args.strategy)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
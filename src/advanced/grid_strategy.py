@@ -0,0 +1,409 @@
+# /src/advanced/grid_strategy.py
+# Grid trading: limit orders on a ladder of prices between a low and a high.
+#   - the ladder is an arithmetic (equal steps) or geometric (equal ratios)
+#     NumPy array, snapped to the symbol's tick size and checked level by
+#     level (min notional, price filter) with validate_batch
+#   - every pair of neighbouring levels is a slot that alternates between a
+#     buy at the lower price and a sell at the upper one. A BUY grid arms
+#     the slots below the current price with their buy (it buys the dips);
+#     a SELL grid arms the slots above it with their sell
+#   - the initial orders go out through the batch endpoint
+#     (src/batch_orders.py), several batches at a time, nearest the price
+#     first
+#   - clientOrderIds are GRID-<grid>-<slot>-<n>; a fill finds its grid and
+#     slot with one dict lookup and re-arms the other side of the slot, so
+#     nothing ever lists the open orders
+# Fills come from the user-data stream: the OCO watcher's stream in repl /
+# serve (OcoWatcher.add_listener), or MockExchange.subscribe. Re-arms run
+# on a small thread pool so the stream is never blocked. Grids live as long
+# as the process; a one-shot CLI command only places the ladder.
+
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np
+
+from src.batch_orders import MAX_BATCH_SIZE, submit_orders
+from src.batch_validation import _decimals, _snap
+from src.logger import (
+    log_info,
+    log_error,
+    log_api_request,
+    log_api_response,
+    log_order,
+)
+from src.ledger import record_order
+
+GRID_MODES = ("arithmetic", "geometric")
+PLACE_WORKERS = 4    # batches in flight while placing a ladder
+REARM_WORKERS = 4
+
+RUNNING, CANCELLED = "running", "cancelled"
+_CLOSED = ("CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+
+def build_ladder(low: float, high: float, levels: int, mode: str = "arithmetic",
+                 tick: Optional[float] = None) -> np.ndarray:
+    """
+    `levels` prices from low to high, both included, snapped to `tick`
+    (half-up) when given.
+    """
+    if mode not in GRID_MODES:
+        raise ValueError(f"grid_mode must be one of {', '.join(GRID_MODES)}")
+    if levels < 2:
+        raise ValueError("grid_levels must be at least 2")
+    if not 0 < low < high:
+        raise ValueError("grid needs 0 < grid_lower < grid_upper")
+    if mode == "arithmetic":
+        prices = np.linspace(low, high, levels)
+    else:
+        prices = np.geomspace(low, high, levels)
+    if tick:
+        prices = _snap(prices, np.full(levels, float(tick)), np.full(levels, _decimals(float(tick))), up_half=True)
+    return prices
+
+
+def grid_ladder(symbol: str, side: str, quantity: float, low: float, high: float, levels: int,
+                mode: str = "arithmetic", client=None, filters=None) -> Tuple[np.ndarray, float]:
+    """
+    Ladder checked against the symbol's exchange filters, as every level
+    would be sent: (prices, quantity per order). Raises ValueError for the
+    first level the exchange would reject, or if rounding to the tick size
+    makes two levels equal.
+    """
+    from src.validators import validate_batch
+
+    prices = build_ladder(low, high, levels, mode)
+    checked = validate_batch(symbol, side, np.full(levels, float(quantity)), prices,
+                             order_types="limit", client=client, filters=filters)
+    if checked.error.any():
+        row, message = checked.errors()[0]
+        raise ValueError(f"grid level {row} ({prices[row]:.10g}): {message}")
+    prices = checked.prices
+    if np.any(np.diff(prices) <= 0):
+        raise ValueError("grid levels are closer than the tick size; use fewer levels or a wider range")
+    return prices, float(checked.quantities[0])
+
+
+class Grid:
+    """
+    One running grid. Slot k spans prices[k] (its buy) and prices[k + 1]
+    (its sell); orders[k] is the clientOrderId resting in the slot, or
+    None, and entry[k] says whether that order is the grid's entry side.
+    """
+
+    def __init__(self, client, symbol, side, quantity, prices: np.ndarray, mode, reference_price, grid_id=None):
+        self.grid_id = grid_id or uuid.uuid4().hex[:10]
+        self.client = client
+        self.symbol = symbol
+        self.side = side
+        self.exit_side = "SELL" if side == "BUY" else "BUY"
+        self.quantity = quantity
+        self.prices = prices
+        self.mode = mode
+        self.reference_price = reference_price
+        self.status = RUNNING
+        slots = len(prices) - 1
+        self.orders: List[Optional[str]] = [None] * slots
+        self.entry: List[bool] = [True] * slots
+        self.entries_filled = 0
+        self.round_trips = 0
+        self.profit = 0.0
+        self.failed = 0
+        self._prices = prices.tolist()   # Python floats for the per-fill path
+        self._seq = itertools.count(1)
+
+    def client_id(self, slot: int) -> str:
+        return f"GRID-{self.grid_id}-{slot}-{next(self._seq)}"
+
+    def payload(self, slot: int, entry: bool, client_id: str) -> Dict[str, Any]:
+        side = self.side if entry else self.exit_side
+        return {
+            "symbol": self.symbol,
+            "side": side,
+            "type": "LIMIT",
+            "quantity": self.quantity,
+            "price": self._prices[slot] if side == "BUY" else self._prices[slot + 1],
+            "timeInForce": "GTC",
+            "newClientOrderId": client_id,
+        }
+
+    def armed_slots(self) -> np.ndarray:
+        """
+        Slots that get their entry order when the grid starts, nearest the
+        reference price first.
+        """
+        if self.side == "BUY":
+            slots = np.flatnonzero(self.prices[:-1] < self.reference_price)[::-1]
+        else:
+            slots = np.flatnonzero(self.prices[1:] > self.reference_price)
+        return slots
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "grid_id": self.grid_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "mode": self.mode,
+            "levels": len(self.prices),
+            "low": self._prices[0],
+            "high": self._prices[-1],
+            "quantity": self.quantity,
+            "reference_price": self.reference_price,
+            "status": self.status,
+            "open_orders": sum(1 for o in self.orders if o is not None),
+            "entries_filled": self.entries_filled,
+            "round_trips": self.round_trips,
+            "profit": round(self.profit, 8),
+            "failed": self.failed,
+        }
+
+
+class GridEngine:
+    """
+    Every grid of this process plus the clientOrderId -> (grid, slot) index
+    the fills are routed through. on_event is the user-data stream hook.
+    """
+
+    def __init__(self, executor=None, max_workers: int = REARM_WORKERS):
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="grid")
+        self.grids: Dict[str, Grid] = {}
+        self.index: Dict[str, Tuple[Grid, int]] = {}
+        self.rearm_ms: List[float] = []   # fill event receipt -> re-armed order acknowledged
+        self.events = 0
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    # ------------------------------
+    # Placing
+    # ------------------------------
+    def open(self, client, symbol, side, quantity, low, high, levels, mode="arithmetic",
+             reference_price=None, filters=None, workers: int = PLACE_WORKERS) -> Grid:
+        """
+        Build the ladder, arm the slots on the grid's side of the price and
+        place them. Orders the exchange rejects leave their slot empty.
+        """
+        prices, quantity = grid_ladder(symbol, side, quantity, low, high, int(levels), mode, client, filters)
+        if reference_price is None:
+            log_api_request("futures_symbol_ticker", {"symbol": symbol})
+            ticker = client.futures_symbol_ticker(symbol=symbol)
+            log_api_response("futures_symbol_ticker", ticker)
+            reference_price = float(ticker["price"])
+
+        grid = Grid(client, symbol, side, quantity, prices, mode, reference_price)
+        slots = grid.armed_slots()
+        if not len(slots):
+            raise ValueError(f"no grid level {'below' if side == 'BUY' else 'above'} the current price "
+                             f"{reference_price:g} for a {side} grid")
+
+        payloads = []
+        with self._lock:
+            self.grids[grid.grid_id] = grid
+            # indexed before sending: a fill can be reported before the reply
+            for slot in slots.tolist():
+                client_id = grid.client_id(slot)
+                grid.orders[slot] = client_id
+                self.index[client_id] = (grid, slot)
+                payloads.append(grid.payload(slot, True, client_id))
+
+        log_info("Placing grid", {**grid.to_dict(), "orders": len(payloads)})
+        start = time.perf_counter()
+        chunks = [payloads[i:i + MAX_BATCH_SIZE] for i in range(0, len(payloads), MAX_BATCH_SIZE)]
+        with ThreadPoolExecutor(max(1, min(workers, len(chunks))), thread_name_prefix="grid-place") as pool:
+            results = [r for chunk in pool.map(lambda c: submit_orders(client, c, label="GRID"), chunks)
+                       for r in chunk]
+
+        errors = []
+        with self._lock:
+            for r in results:
+                if r["ok"]:
+                    continue
+                client_id = r["request"]["newClientOrderId"]
+                entry = self.index.pop(client_id, None)
+                if entry is not None and grid.orders[entry[1]] == client_id:
+                    grid.orders[entry[1]] = None
+                grid.failed += 1
+                errors.append(f"{client_id}: {r['error']}")
+
+        log_info("Grid placed", {"grid_id": grid.grid_id, "placed": len(results) - len(errors),
+                                 "failed": len(errors), "ms": round((time.perf_counter() - start) * 1000, 2)})
+        if errors and len(errors) == len(results):
+            with self._lock:
+                grid.status = CANCELLED
+            raise RuntimeError(f"grid {grid.grid_id}: every order was rejected; " + "; ".join(errors[:3]))
+        return grid
+
+    # ------------------------------
+    # Fills
+    # ------------------------------
+    def on_event(self, event: Dict[str, Any], received: Optional[float] = None):
+        """
+        ORDER_TRADE_UPDATE hook. Cheap and non-blocking: the re-arm order
+        is sent from the thread pool.
+        """
+        if event.get("e") != "ORDER_TRADE_UPDATE":
+            return
+        o = event["o"]
+        client_id = o.get("c") or ""
+        if not client_id.startswith("GRID-"):
+            return
+        status = o.get("X")
+        if status != "FILLED" and status not in _CLOSED:
+            return   # NEW / PARTIALLY_FILLED: wait for the order to finish
+        received = received or time.perf_counter()
+
+        with self._lock:
+            entry = self.index.pop(client_id, None)
+            if entry is None:
+                return   # another process's grid, or already handled
+            self.events += 1
+            grid, slot = entry
+            grid.orders[slot] = None
+            if status != "FILLED" or grid.status != RUNNING:
+                if grid.status == RUNNING:
+                    log_info("Grid order closed without a fill", {"grid_id": grid.grid_id, "slot": slot,
+                                                                  "status": status})
+                return
+            filled_entry = grid.entry[slot]
+            if filled_entry:
+                grid.entries_filled += 1
+            else:
+                grid.round_trips += 1
+                grid.profit += grid.quantity * (grid._prices[slot + 1] - grid._prices[slot])
+            # the other side of the same slot
+            new_id = grid.client_id(slot)
+            grid.entry[slot] = not filled_entry
+            grid.orders[slot] = new_id
+            self.index[new_id] = (grid, slot)
+            payload = grid.payload(slot, not filled_entry, new_id)
+
+        future = self.executor.submit(self._rearm, grid, slot, payload, received)
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+
+    def _rearm(self, grid: Grid, slot: int, payload: Dict[str, Any], received: float):
+        try:
+            log_api_request("futures_create_order", payload)
+            response = grid.client.futures_create_order(**payload)
+            log_api_response("futures_create_order", response)
+            log_order("GRID", response)
+            record_order("GRID", response, payload)
+            self.rearm_ms.append((time.perf_counter() - received) * 1000)
+        except Exception as e:
+            log_error("Grid re-arm failed", {"error": str(e), "grid_id": grid.grid_id, "request": payload})
+            with self._lock:
+                if self.index.pop(payload["newClientOrderId"], None) is not None:
+                    grid.orders[slot] = None
+                grid.failed += 1
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no re-arm is in flight (re-arms may trigger more).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            for future in list(self._pending):
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    future.result(remaining)
+                except Exception:
+                    return False
+        return True
+
+    # ------------------------------
+    # Control
+    # ------------------------------
+    def cancel(self, grid_id: str) -> bool:
+        """
+        Stop re-arming and cancel the grid's resting orders.
+        """
+        with self._lock:
+            grid = self.grids.get(grid_id)
+            if grid is None or grid.status != RUNNING:
+                return False
+            grid.status = CANCELLED
+            open_ids = [c for c in grid.orders if c is not None]
+
+        def cancel_one(client_id):
+            payload = {"symbol": grid.symbol, "origClientOrderId": client_id}
+            try:
+                log_api_request("futures_cancel_order", payload)
+                response = grid.client.futures_cancel_order(**payload)
+                log_api_response("futures_cancel_order", response)
+                record_order(None, response)
+            except Exception as e:
+                log_error("Grid cancel failed", {"error": str(e), **payload})
+
+        list(self.executor.map(cancel_one, open_ids))
+        log_info("Grid cancelled", grid.to_dict())
+        return True
+
+    def progress(self, grid_id: Optional[str] = None):
+        with self._lock:
+            if grid_id is not None:
+                grid = self.grids.get(grid_id)
+                return grid.to_dict() if grid else None
+            return [g.to_dict() for g in self.grids.values()]
+
+    def status(self) -> Dict[str, Any]:
+        lat = sorted(self.rearm_ms)
+        return {
+            "grids": sum(1 for g in self.grids.values() if g.status == RUNNING),
+            "open_orders": len(self.index),
+            "events": self.events,
+            "rearms": len(lat),
+            "rearm_p50_ms": lat[len(lat) // 2] if lat else None,
+        }
+
+
+_shared: Optional[GridEngine] = None
+_shared_lock = threading.Lock()
+
+
+def get_grid_engine() -> GridEngine:
+    """
+    Process-wide engine (its grids re-arm for as long as the process runs).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = GridEngine()
+        return _shared
+
+
+def execute_grid_order(client, symbol, side, quantity, low, high, levels, mode="arithmetic"):
+    """
+    Grid strategy: `levels` prices from low to high, `quantity` per order.
+    Places the ladder and returns the grid's summary; fills are re-armed
+    by the shared GridEngine while the process listens to the user-data
+    stream (repl / serve).
+    """
+
+    if client is None:
+        log_error("Binance client not initialized")
+        raise RuntimeError("Binance client not available")
+
+    if mode is None:
+        mode = "arithmetic"
+
+    log_info("Starting grid", {
+        "symbol": symbol,
+        "side": side,
+        "quantity": quantity,
+        "low": low,
+        "high": high,
+        "levels": levels,
+        "mode": mode,
+    })
+
+    try:
+        grid = get_grid_engine().open(client, symbol, side, quantity, low, high, levels, mode)
+        return grid.to_dict()
+
+    except Exception as e:
+        log_error("Grid execution failed", {"error": str(e)})
+        raise
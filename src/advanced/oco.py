@@ -1,21 +1,23 @@
 # /src/advanced/oco.py
 
 import uuid
-from src.logger import (
-    log_info,
-    log_error,
-    log_api_request,
-    log_api_response,
-    log_order,
-)
+from src.logger import log_info, log_error
+from src.batch_orders import submit_orders, cancel_orders
+from src.advanced.oco_watcher import track_oco_group
 
 def execute_oco_order(client, symbol, side, quantity, take_profit_price, stop_price):
     """
     Executes a manual OCO (One-Cancels-the-Other) order on Binance Futures Testnet.
 
-    Creates:
+    Creates, in one batch request:
         1) TAKE-PROFIT limit order
         2) STOP-MARKET order
+    If either leg is rejected the other one is cancelled and the error raised.
+    A leg whose request got no answer is looked up by its client order id
+    first (submit_orders), so a lost reply for two placed legs still tracks
+    the group, and a leg whose state stays unknown is cancelled with the rest.
+    Once placed, the group is handed to the OCO watcher (oco_watcher.py),
+    which cancels the surviving leg when the other one fills.
     """
 
     if client is None:
@@ -27,47 +29,50 @@ def execute_oco_order(client, symbol, side, quantity, take_profit_price, stop_pr
 
     exit_side = "SELL" if side == "BUY" else "BUY"
 
-    try:
-        # ------------------------------
-        # TAKE-PROFIT ORDER
-        # ------------------------------
-        tp_payload = {
-            "symbol": symbol,
-            "side": exit_side,
-            "type": "TAKE_PROFIT",
-            "price": take_profit_price,
-            "stopPrice": take_profit_price,
-            "quantity": quantity,
-            "timeInForce": "GTC",
-            "newClientOrderId": f"TP-{oco_group_id}"
-        }
+    # ------------------------------
+    # TAKE-PROFIT ORDER
+    # ------------------------------
+    tp_payload = {
+        "symbol": symbol,
+        "side": exit_side,
+        "type": "TAKE_PROFIT",
+        "price": take_profit_price,
+        "stopPrice": take_profit_price,
+        "quantity": quantity,
+        "timeInForce": "GTC",
+        "newClientOrderId": f"TP-{oco_group_id}"
+    }
 
-        log_api_request("Placing OCO TAKE-PROFIT order", tp_payload)
-        tp_response = client.futures_create_order(**tp_payload)
-        log_api_response("TP order response", tp_response)
-        log_order("OCO-TAKE-PROFIT", tp_response)
+    # ------------------------------
+    # STOP-LOSS ORDER
+    # ------------------------------
+    sl_payload = {
+        "symbol": symbol,
+        "side": exit_side,
+        "type": "STOP_MARKET",
+        "stopPrice": stop_price,
+        "quantity": quantity,
+        "newClientOrderId": f"SL-{oco_group_id}"
+    }
 
-        # ------------------------------
-        # STOP-LOSS ORDER
-        # ------------------------------
-        sl_payload = {
-            "symbol": symbol,
-            "side": exit_side,
-            "type": "STOP_MARKET",
-            "stopPrice": stop_price,
-            "quantity": quantity,
-            "newClientOrderId": f"SL-{oco_group_id}"
-        }
+    try:
+        # Both legs in one batch round trip
+        log_info("Placing OCO orders", {"group_id": oco_group_id, "take_profit": tp_payload, "stop_loss": sl_payload})
+        tp_result, sl_result = submit_orders(client, [tp_payload, sl_payload], label="OCO")
+
+        failed = [r for r in (tp_result, sl_result) if not r["ok"]]
+        if failed:
+            # Never leave a single naked leg behind
+            cancel_orders(client, [tp_result, sl_result])
+            raise RuntimeError("; ".join(f"{r['request']['newClientOrderId']}: {r['error']}" for r in failed))
 
-        log_api_request("Placing OCO STOP-MARKET order", sl_payload)
-        sl_response = client.futures_create_order(**sl_payload)
-        log_api_response("SL order response", sl_response)
-        log_order("OCO-STOP", sl_response)
+        # The user-data stream watcher cancels the survivor once one leg fills
+        track_oco_group(oco_group_id, symbol, quantity, tp_payload, sl_payload)
 
         return {
             "group_id": oco_group_id,
-            "take_profit_order": tp_response,
-            "stop_loss_order": sl_response,
+            "take_profit_order": tp_result["response"],
+            "stop_loss_order": sl_result["response"],
         }
 
     except Exception as e:
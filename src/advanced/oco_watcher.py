@@ -0,0 +1,450 @@
+# /src/advanced/oco_watcher.py
+# Cancels the surviving leg of a manual OCO (see oco.py) as soon as the
+# other one fills, driven by the futures user-data stream.
+#   - ORDER_TRADE_UPDATE events are matched to their group through the
+#     clientOrderId (TP-<group> / SL-<group>, ".<n>" after a resize)
+#   - a fill cancels the sibling; a partial fill shrinks the sibling to the
+#     quantity still open; a leg cancelled / expired elsewhere takes its
+#     sibling with it
+#   - after every (re)connect a REST sweep over the open orders rebuilds the
+#     index and settles whatever happened while nobody was listening
+#   - cancels run in a thread pool so the socket is never blocked; events of
+#     one group are handled in arrival order
+# Other consumers of ORDER_TRADE_UPDATE (the grid engine) hook into the same
+# stream with add_listener.
+# The websocket client (`websockets`) is only imported when the stream starts.
+
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable
+
+from src.logger import (
+    log_info,
+    log_error,
+    log_api_request,
+    log_api_response,
+)
+from src.ledger import record_order
+
+STREAM_URL = "wss://stream.binancefuture.com/ws/"   # testnet; mainnet: wss://fstream.binance.com/ws/
+KEEPALIVE_INTERVAL = 30 * 60
+RECONNECT_MAX_DELAY = 30.0
+
+_CLIENT_ID = re.compile(r"^(TP|SL)-([^.]+)(?:\.(\d+))?$")
+_SIBLING = {"TP": "SL", "SL": "TP"}
+_CLOSED = ("CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+
+def parse_client_order_id(client_order_id: str):
+    """
+    "TP-<group>" / "SL-<group>.<n>" -> ("TP" | "SL", group) or None.
+    """
+    m = _CLIENT_ID.match(client_order_id or "")
+    return (m.group(1), m.group(2)) if m else None
+
+
+class OcoLeg:
+
+    def __init__(self, client_id, order_type, side, quantity, price=None, stop_price=None,
+                 time_in_force=None):
+        self.client_id = client_id
+        self.order_type = order_type
+        self.side = side
+        self.quantity = float(quantity)
+        self.price = price
+        self.stop_price = stop_price
+        self.time_in_force = time_in_force
+        self.filled = 0.0      # filled by earlier (replaced) orders of this leg
+        self.order_filled = 0.0
+        self.status = "NEW"
+        self.revision = 0
+
+    @property
+    def total_filled(self):
+        return self.filled + self.order_filled
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(payload["newClientOrderId"], payload["type"], payload["side"], payload["quantity"],
+                   payload.get("price"), payload.get("stopPrice"), payload.get("timeInForce"))
+
+    @classmethod
+    def from_order(cls, order):
+        # REST order (futures_get_open_orders / futures_get_order)
+        leg = cls(order["clientOrderId"], order.get("origType") or order["type"], order["side"],
+                  order["origQty"], order.get("price"), order.get("stopPrice"), order.get("timeInForce"))
+        leg.order_filled = float(order.get("executedQty") or 0)
+        leg.status = order.get("status", "NEW")
+        return leg
+
+    def replacement_payload(self, symbol, group_id, quantity):
+        self.revision += 1
+        prefix = self.client_id[:2]
+        payload = {"symbol": symbol, "side": self.side, "type": self.order_type,
+                   "quantity": quantity, "newClientOrderId": f"{prefix}-{group_id}.{self.revision}"}
+        if self.price not in (None, "0", "0.00", 0):
+            payload["price"] = self.price
+        if self.stop_price not in (None, "0", 0):
+            payload["stopPrice"] = self.stop_price
+        if self.time_in_force and self.order_type not in ("MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET"):
+            payload["timeInForce"] = self.time_in_force
+        return payload
+
+
+class OcoGroup:
+
+    def __init__(self, group_id, symbol, quantity, legs: Dict[str, OcoLeg]):
+        self.group_id = group_id
+        self.symbol = symbol
+        self.quantity = float(quantity)
+        self.legs = legs
+        self.closed = False
+        self.lock = asyncio.Lock()
+
+    def to_dict(self):
+        return {"group_id": self.group_id, "symbol": self.symbol, "quantity": self.quantity,
+                "closed": self.closed,
+                "legs": {k: {"client_id": l.client_id, "status": l.status, "filled": l.total_filled,
+                             "quantity": l.quantity} for k, l in self.legs.items() if l is not None}}
+
+
+class OcoWatcher:
+    """
+    Watches the user-data stream and enforces one-cancels-the-other for
+    every TP-/SL- group. Runs its own asyncio loop on a daemon thread
+    (start/stop), or can be driven directly with on_event / reconcile.
+    """
+
+    def __init__(self, client, stream_url: str = STREAM_URL, executor=None, max_workers: int = 8):
+        self.client = client
+        self.stream_url = stream_url
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="oco")
+        self.groups: Dict[str, OcoGroup] = {}
+        self.listeners: List[Callable[[Dict[str, Any], Optional[float]], None]] = []
+        self.cancel_ms: List[float] = []   # event receipt -> sibling cancel acknowledged
+        self.events = 0
+        self.reconnects = 0
+        self.connected = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+        self._task = None
+        self._stopping = False
+        self._pending = set()
+
+    # ------------------------------
+    # Background loop
+    # ------------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self.loop = asyncio.new_event_loop()
+        self._stopping = False
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.run())
+
+        self._thread = threading.Thread(target=run, name="oco-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        if self.loop is not None and self._task is not None:
+            self.loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def track(self, group_id: str, symbol: str, quantity, tp_payload: Dict[str, Any], sl_payload: Dict[str, Any]):
+        """
+        Register a freshly placed group (thread-safe).
+        """
+        group = OcoGroup(group_id, symbol, quantity,
+                         {"TP": OcoLeg.from_payload(tp_payload), "SL": OcoLeg.from_payload(sl_payload)})
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.groups.setdefault, group_id, group)
+        else:
+            self.groups.setdefault(group_id, group)
+
+    def add_listener(self, callback: Callable[[Dict[str, Any], Optional[float]], None]):
+        """
+        Also hand every ORDER_TRADE_UPDATE to callback(event, received).
+        It runs on the watcher's loop, so it must not block.
+        """
+        self.listeners.append(callback)
+
+    def status(self) -> Dict[str, Any]:
+        groups = list(self.groups.values())
+        lat = sorted(self.cancel_ms)
+        return {
+            "connected": self.connected.is_set(),
+            "open_groups": sum(1 for g in groups if not g.closed),
+            "events": self.events,
+            "reconnects": self.reconnects,
+            "cancels": len(lat),
+            "cancel_p50_ms": lat[len(lat) // 2] if lat else None,
+        }
+
+    # ------------------------------
+    # Stream
+    # ------------------------------
+    async def run(self):
+        self._task = asyncio.current_task()
+        delay = 0.5
+        while not self._stopping:
+            try:
+                await self._session()
+                delay = 0.5
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log_error("OCO watcher stream error", {"error": str(e)})
+            finally:
+                self.connected.clear()
+            if self._stopping:
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _session(self):
+        from websockets.asyncio.client import connect
+
+        listen_key = await self._rest(self.client.futures_stream_get_listen_key)
+        if isinstance(listen_key, dict):
+            listen_key = listen_key["listenKey"]
+
+        async with connect(self.stream_url + listen_key) as ws:
+            # Anything that happened before the stream was up is settled over REST
+            await self.reconcile()
+            self.connected.set()
+            log_info("OCO watcher connected", {"groups": len(self.groups)})
+            keepalive = asyncio.get_running_loop().create_task(self._keepalive(listen_key))
+            try:
+                async for message in ws:
+                    received = time.perf_counter()
+                    event = json.loads(message)
+                    if event.get("e") == "listenKeyExpired":
+                        log_info("OCO watcher listen key expired, reconnecting")
+                        return
+                    self._dispatch(event, received)
+            finally:
+                keepalive.cancel()
+
+    async def _keepalive(self, listen_key):
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            try:
+                await self._rest(self.client.futures_stream_keepalive, listenKey=listen_key)
+            except Exception as e:
+                log_error("OCO watcher keepalive failed", {"error": str(e)})
+
+    def _dispatch(self, event, received=None):
+        task = asyncio.get_running_loop().create_task(self.on_event(event, received))
+        self._pending.add(task)
+        task.add_done_callback(self._handled)
+
+    def _handled(self, task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log_error("OCO watcher event failed", {"error": str(task.exception())})
+
+    async def drain(self):
+        """
+        Wait for every dispatched event to be handled.
+        """
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    # ------------------------------
+    # Event handling
+    # ------------------------------
+    async def on_event(self, event: Dict[str, Any], received: Optional[float] = None):
+        if event.get("e") != "ORDER_TRADE_UPDATE":
+            return
+        for listener in self.listeners:
+            try:
+                listener(event, received)
+            except Exception as e:
+                log_error("OCO watcher listener failed", {"error": str(e)})
+        o = event["o"]
+        parsed = parse_client_order_id(o.get("c"))
+        if parsed is None:
+            return
+        self.events += 1
+        received = received or time.perf_counter()
+        prefix, group_id = parsed
+
+        group = self.groups.get(group_id)
+        if group is None:
+            # Placed by another process (e.g. a one-shot CLI command)
+            group = OcoGroup(group_id, o["s"], o["q"], {})
+            group.legs[prefix] = OcoLeg(o["c"], o.get("ot") or o.get("o"), o["S"], o["q"],
+                                        o.get("p"), o.get("sp"), o.get("f"))
+            group.legs[_SIBLING[prefix]] = None
+            self.groups[group_id] = group
+
+        async with group.lock:
+            leg = group.legs.get(prefix)
+            if group.closed or leg is None or leg.client_id != o["c"]:
+                return   # old order of a replaced leg, or group already settled
+            leg.status = o["X"]
+            leg.order_filled = float(o.get("z") or 0)
+            await self._enforce(group, received)
+
+    async def _enforce(self, group: OcoGroup, received=None):
+        """
+        Bring the sibling in line with what the filled / closed leg did.
+        """
+        for prefix, leg in list(group.legs.items()):
+            if leg is None:
+                continue
+            sibling_prefix = _SIBLING[prefix]
+            sibling = group.legs.get(sibling_prefix)
+
+            if leg.status == "FILLED" or leg.status in _CLOSED:
+                group.closed = True
+                await self._cancel_sibling(group, sibling_prefix, sibling, received, reason=leg.status)
+                log_info("OCO group closed", group.to_dict())
+                return
+
+            if leg.status == "PARTIALLY_FILLED" and sibling is not None and sibling.status == "NEW":
+                remaining = group.quantity - leg.total_filled
+                open_qty = sibling.quantity - sibling.total_filled
+                if 0 < remaining < open_qty:
+                    await self._resize(group, sibling, remaining)
+
+    async def _cancel_sibling(self, group, prefix, sibling, received, reason):
+        client_id = sibling.client_id if sibling is not None else f"{prefix}-{group.group_id}"
+        if sibling is not None and (sibling.status == "FILLED" or sibling.status in _CLOSED):
+            return
+        payload = {"symbol": group.symbol, "origClientOrderId": client_id}
+        try:
+            log_api_request("futures_cancel_order", payload)
+            response = await self._rest(self.client.futures_cancel_order, **payload)
+            log_api_response("futures_cancel_order", response)
+            record_order(None, response)
+            if sibling is not None:
+                sibling.status = "CANCELED"
+            if received is not None:
+                self.cancel_ms.append((time.perf_counter() - received) * 1000)
+            log_info("OCO sibling cancelled", {"group_id": group.group_id, "cancelled": client_id,
+                                               "because": reason})
+        except Exception as e:
+            # -2011 unknown order: it already filled / was cancelled
+            log_error("OCO sibling cancel failed", {"group_id": group.group_id, "order": client_id,
+                                                    "error": str(e)})
+
+    async def _resize(self, group, leg, quantity):
+        payload = leg.replacement_payload(group.symbol, group.group_id, quantity)
+        old = leg.client_id
+        try:
+            await self._rest(self.client.futures_cancel_order, symbol=group.symbol, origClientOrderId=old)
+            log_api_request("futures_create_order", payload)
+            response = await self._rest(self.client.futures_create_order, **payload)
+            log_api_response("futures_create_order", response)
+            record_order("OCO", response, payload)
+        except Exception as e:
+            log_error("OCO sibling resize failed", {"group_id": group.group_id, "order": old, "error": str(e)})
+            return
+        leg.filled += leg.order_filled
+        leg.order_filled = 0.0
+        leg.client_id = payload["newClientOrderId"]
+        leg.quantity = leg.filled + quantity
+        leg.status = "NEW"
+        log_info("OCO sibling resized", {"group_id": group.group_id, "order": leg.client_id, "quantity": quantity})
+
+    # ------------------------------
+    # REST reconciliation
+    # ------------------------------
+    async def reconcile(self):
+        """
+        One sweep over the open orders: rebuild groups placed elsewhere and
+        settle groups whose legs changed while the stream was down.
+        """
+        start = time.perf_counter()
+        open_orders = await self._rest(self.client.futures_get_open_orders)
+        seen: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for order in open_orders:
+            parsed = parse_client_order_id(order.get("clientOrderId"))
+            if parsed:
+                seen.setdefault(parsed[1], {})[parsed[0]] = order
+
+        for group_id, legs in seen.items():
+            if group_id not in self.groups:
+                any_leg = next(iter(legs.values()))
+                self.groups[group_id] = OcoGroup(group_id, any_leg["symbol"], any_leg["origQty"], {
+                    prefix: (OcoLeg.from_order(legs[prefix]) if prefix in legs else None)
+                    for prefix in ("TP", "SL")})
+
+        settled = 0
+        for group_id, group in list(self.groups.items()):
+            if group.closed:
+                continue
+            async with group.lock:
+                open_legs = seen.get(group_id, {})
+                for prefix in ("TP", "SL"):
+                    leg = group.legs.get(prefix)
+                    if prefix in open_legs:
+                        order = open_legs[prefix]
+                        if leg is None or leg.client_id != order["clientOrderId"]:
+                            group.legs[prefix] = leg = OcoLeg.from_order(order)
+                        leg.status = order["status"]
+                        leg.order_filled = float(order.get("executedQty") or 0)
+                    else:
+                        # Not open any more: ask how it ended
+                        client_id = leg.client_id if leg is not None else f"{prefix}-{group_id}"
+                        try:
+                            order = await self._rest(self.client.futures_get_order, symbol=group.symbol,
+                                                     origClientOrderId=client_id)
+                        except Exception:
+                            if leg is not None:
+                                leg.status = "UNKNOWN"
+                            continue
+                        if leg is None:
+                            group.legs[prefix] = leg = OcoLeg.from_order(order)
+                        leg.status = order["status"]
+                        leg.order_filled = float(order.get("executedQty") or 0)
+                await self._enforce(group)
+                if group.closed:
+                    settled += 1
+
+        # Settled groups are only kept long enough to ignore late events
+        for group_id in [g for g, grp in self.groups.items() if grp.closed and g not in seen]:
+            del self.groups[group_id]
+
+        log_info("OCO reconciliation sweep", {
+            "open_orders": len(open_orders), "groups": len(self.groups), "settled": settled,
+            "ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    async def _rest(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+
+_shared: Optional[OcoWatcher] = None
+
+
+def start_watcher(client, stream_url: str = STREAM_URL) -> OcoWatcher:
+    """
+    Start the process-wide watcher (repl / serve).
+    """
+    global _shared
+    if _shared is None:
+        _shared = OcoWatcher(client, stream_url)
+    return _shared.start()
+
+
+def track_oco_group(group_id, symbol, quantity, tp_payload, sl_payload):
+    """
+    Hand a newly placed group to the running watcher, if there is one.
+    """
+    if _shared is not None:
+        _shared.track(group_id, symbol, quantity, tp_payload, sl_payload)
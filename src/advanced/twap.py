@@ -1,64 +1,98 @@
 # /src/advanced/twap.py
 
-import time
 from src.logger import (
     log_info,
     log_error,
-    log_api_request,
-    log_api_response,
-    log_order,
 )
+from src.advanced.twap_scheduler import get_scheduler, DONE
+from src.symbol_filters import get_filter_cache, _plain
 
-def execute_twap_order(client, symbol, side, total_quantity, intervals=5, delay=60):
+# When True (repl / serve) execute_twap_order returns as soon as the plan is
+# scheduled instead of waiting for the last slice.
+BACKGROUND = False
+
+
+def configure(background=None):
+    global BACKGROUND
+    if background is not None:
+        BACKGROUND = background
+
+
+def twap_quantities(client, symbol, total_quantity, intervals, filters=None):
+    """
+    Equal TWAP slices in whole MARKET steps of the symbol: each slice is
+    total / intervals floored to the step, and the steps left over go one
+    each to the last slices, so the slices add up to the (floored) total
+    and none is more than one step above the others. None when the
+    symbol's filters are unknown (the slices are then left unrounded).
+    """
+    if filters is None:
+        filters = get_filter_cache()
+    symbol_filters = filters.get(symbol, client)
+    if symbol_filters is None:
+        return None
+    step = symbol_filters.market_step_size or symbol_filters.step_size
+    if not step:
+        return None
+    intervals = int(intervals)
+    units = int(symbol_filters.round_quantity(total_quantity, market=True) / step)
+    base, extra = divmod(units, intervals)
+    return [_plain((base + (i >= intervals - extra)) * step) for i in range(intervals)]
+
+
+def execute_twap_order(client, symbol, side, total_quantity, intervals=5, delay=60,
+                       vwap=False, participation=None):
     """
     TWAP Strategy (Time-Weighted Average Price)
     Splits a large MARKET order into smaller chunks executed over time.
+    Chunks are whole multiples of the symbol's MARKET step size (Binance
+    rejects e.g. 0.0033333333333333335). With vwap=True the chunks follow the symbol's intraday volume profile
+    from local klines instead of being equal, each at most `participation`
+    of the volume expected in its window (src/advanced/volume_profile.py).
+    Slices run on the shared TwapScheduler (src/advanced/twap_scheduler.py),
+    so several TWAPs can run at once. Returns the slice responses, or the
+    plan's progress when BACKGROUND is set.
     """
 
     if client is None:
         log_error("Binance client not initialized")
         raise RuntimeError("Binance client not available")
 
-    intervals = int(intervals)
-    delay = float(delay)
-
-    if intervals <= 0:
-        raise ValueError("twap_intervals must be > 0")
-
-    qty_per_order = total_quantity / intervals
-
-    log_info("Starting TWAP execution", {
-        "symbol": symbol,
-        "side": side,
-        "total_qty": total_quantity,
-        "intervals": intervals,
-        "delay": delay,
-        "chunk_qty": qty_per_order
-    })
-
-    responses = []
+    if intervals is None:
+        intervals = 5
+    if delay is None:
+        delay = 60
 
     try:
-        for i in range(intervals):
-
-            request_payload = {
-                "symbol": symbol,
-                "side": side,
-                "type": "MARKET",
-                "quantity": qty_per_order
-            }
+        quantities = None
+        if vwap:
+            # NumPy and the kline files are only needed for VWAP
+            from src.advanced.volume_profile import vwap_quantities
+            quantities = vwap_quantities(client, symbol, total_quantity, intervals, delay, participation)
+        elif int(intervals) > 0:
+            quantities = twap_quantities(client, symbol, total_quantity, intervals)
 
-            log_api_request(f"TWAP chunk {i+1}/{intervals}", request_payload)
-            order = client.futures_create_order(**request_payload)
-            log_api_response("TWAP MARKET order executed", order)
-            log_order("TWAP", order)
+        log_info(f"Starting {'VWAP' if vwap else 'TWAP'} execution", {
+            "symbol": symbol,
+            "side": side,
+            "total_qty": total_quantity,
+            "intervals": intervals,
+            "delay": delay,
+            "chunk_qty": total_quantity / int(intervals) if int(intervals) > 0 else None,
+            "chunks": quantities,
+        })
 
-            responses.append(order)
+        scheduler = get_scheduler()
+        plan = scheduler.submit(client, symbol, side, total_quantity, intervals, delay,
+                                quantities=quantities, kind="vwap" if vwap else "twap")
 
-            if i < intervals - 1:
-                time.sleep(delay)
+        if BACKGROUND:
+            return scheduler.progress(plan.plan_id)
 
-        return responses
+        plan = scheduler.wait(plan.plan_id)
+        if plan.status != DONE:
+            raise RuntimeError(plan.error or f"TWAP {plan.plan_id} {plan.status}")
+        return plan.responses
 
     except Exception as e:
         log_error("TWAP execution failed", {"error": str(e)})
@@ -0,0 +1,492 @@
+# /src/advanced/twap_scheduler.py
+# Event-loop scheduler for TWAP plans.
+#   - every plan is an asyncio task on one background loop, so hundreds of
+#     TWAPs run side by side without a thread (or a blocked process) each
+#   - slice i is due at start + i * delay on the monotonic clock; sleeping
+#     until that deadline means exchange latency never accumulates as drift
+#   - a plan resumed after downtime is re-anchored so its next slice is due
+#     at the resume time and the rest keep their spacing; overdue slices are
+#     never fired back to back
+#   - exchange calls run in a small thread pool (python-binance is blocking)
+#   - a plan may carry its own slice sizes (VWAP mode, see volume_profile.py);
+#     slices of size 0 are skipped
+#   - each unfinished plan is persisted to STATE_DIR/<plan_id>.json after
+#     every slice, by a single writer thread so the loop never waits on the
+#     disk and a save costs one plan, not all of them; the slice in flight
+#     is recorded first and checked by its clientOrderId on resume, so a
+#     restart neither skips nor repeats a slice (it is only resent once the
+#     exchange says the order is unknown)
+#   - several processes share STATE_DIR: a plan file names its owning
+#     process, and resume (under flock) only adopts plans whose owner is gone
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+from src.logger import (
+    log_info,
+    log_error,
+    log_api_request,
+    log_api_response,
+    log_order,
+)
+from src.ledger import record_order
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+STATE_DIR = os.getenv(
+    "BOT_TWAP_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                 "twap_state"),
+)
+MAX_WORKERS = 16
+UNKNOWN_ORDER = -2013        # exchange code for "Order does not exist."
+RECONCILE_BACKOFF = 1.0      # first retry (s) of an inconclusive pending-slice lookup
+RECONCILE_BACKOFF_MAX = 60.0
+
+RUNNING, DONE, CANCELLED, FAILED = "running", "done", "cancelled", "failed"
+_CLOSED = ("CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+
+class SystemClock:
+
+    monotonic = staticmethod(time.monotonic)
+    time = staticmethod(time.time)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class TwapPlan:
+    """
+    State of one TWAP execution. `start_ts` is wall-clock so the schedule
+    survives a restart; everything else is derived from it.
+    """
+
+    def __init__(self, symbol, side, total_quantity, intervals, delay,
+                 plan_id=None, start_ts=None, done=0, filled=0.0,
+                 status=RUNNING, pending=None, order_ids=None, error=None, quantities=None, kind="twap"):
+        intervals = int(intervals)
+        if intervals <= 0:
+            raise ValueError("twap_intervals must be > 0")
+        delay = float(delay)
+        if delay < 0:
+            raise ValueError("twap_delay must be >= 0")
+        self.plan_id = plan_id or uuid.uuid4().hex[:12]
+        self.symbol = symbol
+        self.side = side
+        self.total_quantity = float(total_quantity)
+        self.intervals = intervals
+        self.delay = delay
+        self.start_ts = start_ts
+        self.done = done
+        self.filled = filled
+        self.status = status
+        self.pending = pending
+        self.order_ids = order_ids or []
+        self.error = error
+        if quantities is not None and len(quantities) != intervals:
+            raise ValueError("one quantity per slice is needed")
+        self.quantities = quantities
+        self.kind = kind
+        self.responses: List[Dict[str, Any]] = []
+
+    @property
+    def slice_quantity(self) -> float:
+        return self.total_quantity / self.intervals
+
+    def quantity_for(self, i: int) -> float:
+        return self.quantities[i] if self.quantities is not None else self.slice_quantity
+
+    def client_order_id(self, i: int) -> str:
+        return f"{self.kind.upper()}-{self.plan_id}-{i}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan_id": self.plan_id, "symbol": self.symbol, "side": self.side,
+            "total_quantity": self.total_quantity, "intervals": self.intervals,
+            "delay": self.delay, "start_ts": self.start_ts, "done": self.done,
+            "filled": self.filled, "status": self.status, "pending": self.pending,
+            "order_ids": list(self.order_ids), "error": self.error,
+            "quantities": self.quantities, "kind": self.kind,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TwapPlan":
+        return cls(**data)
+
+    def progress(self, clock=None) -> Dict[str, Any]:
+        out = self.to_dict()
+        out["remaining_slices"] = self.intervals - self.done
+        if self.status == RUNNING and self.start_ts is not None:
+            now = (clock or SystemClock).time()
+            out["next_slice_in"] = max(0.0, self.start_ts + self.done * self.delay - now)
+        return out
+
+
+class TwapScheduler:
+    """
+    Runs TWAP plans on an asyncio loop.
+
+    From synchronous code call start() once, then submit()/cancel()/
+    progress()/wait(); the loop lives on a daemon thread. Async callers
+    (and the fake-clock harness) can use add() directly on their own loop.
+    """
+
+    def __init__(self, path: Optional[str] = STATE_DIR, clock=None, executor=None,
+                 max_workers: int = MAX_WORKERS, save_executor=None):
+        self.path = path
+        self.clock = clock or SystemClock()
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                       thread_name_prefix="twap")
+        # One thread, so the saves of a plan reach the disk in order
+        self.save_executor = save_executor or ThreadPoolExecutor(max_workers=1,
+                                                                 thread_name_prefix="twap-save")
+        self.plans: Dict[str, TwapPlan] = {}
+        self.late_ms: List[float] = []   # how far each slice went out after its deadline
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._clients: Dict[str, Any] = {}
+        self._finished: Dict[str, threading.Event] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread = None
+
+    # ------------------------------
+    # Background loop (sync callers)
+    # ------------------------------
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return self
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.call_soon(ready.set)
+            self.loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="twap-scheduler", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def _call(self, coro, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def submit(self, client, symbol, side, total_quantity, intervals=5, delay=60,
+               quantities=None, kind="twap") -> TwapPlan:
+        plan = TwapPlan(symbol, side, total_quantity, intervals, delay, quantities=quantities, kind=kind)
+        self.start()
+        self._finished[plan.plan_id] = threading.Event()
+        self._call(self.add(client, plan))
+        return plan
+
+    def cancel(self, plan_id: str) -> bool:
+        if self.loop is None:
+            return False
+        return self._call(self._cancel(plan_id))
+
+    def wait(self, plan_id: str, timeout: Optional[float] = None) -> TwapPlan:
+        finished = self._finished.get(plan_id)
+        if finished is not None:
+            finished.wait(timeout)
+        return self.plans[plan_id]
+
+    def resume(self, client) -> List[str]:
+        """
+        Restart every unfinished plan left in the state directory.
+        """
+        self.start()
+        return self._call(self.resume_async(client))
+
+    def stop(self):
+        if self.loop is not None and self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(5)
+            self._thread = None
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def progress(self, plan_id: Optional[str] = None):
+        if plan_id is not None:
+            plan = self.plans.get(plan_id)
+            return plan.progress(self.clock) if plan else None
+        return [p.progress(self.clock) for p in list(self.plans.values())]
+
+    def active(self) -> int:
+        return sum(1 for p in list(self.plans.values()) if p.status == RUNNING)
+
+    # ------------------------------
+    # Loop side
+    # ------------------------------
+    async def add(self, client, plan: TwapPlan) -> TwapPlan:
+        if plan.start_ts is None:
+            plan.start_ts = self.clock.time()
+        self.plans[plan.plan_id] = plan
+        self._clients[plan.plan_id] = client
+        self._finished.setdefault(plan.plan_id, threading.Event())
+        await self._save(plan)
+        log_info("TWAP scheduled", plan.to_dict())
+        self._tasks[plan.plan_id] = asyncio.get_running_loop().create_task(self._run(plan))
+        return plan
+
+    async def resume_async(self, client) -> List[str]:
+        resumed = []
+        claimed = await asyncio.get_running_loop().run_in_executor(self.save_executor, self._claim)
+        for data in claimed:
+            plan = TwapPlan.from_dict(data)
+            behind = 0.0 if plan.start_ts is None else self.clock.time() - (plan.start_ts + plan.done * plan.delay)
+            if behind > 0:
+                plan.start_ts += behind
+                log_info("TWAP schedule re-anchored to resume time", {
+                    "plan_id": plan.plan_id, "behind_s": round(behind, 3),
+                    "remaining": plan.intervals - plan.done, "delay": plan.delay})
+            await self.add(client, plan)   # _run reconciles a pending slice first
+            resumed.append(plan.plan_id)
+        if resumed:
+            log_info("TWAP plans resumed", {"plans": resumed})
+        return resumed
+
+    async def _cancel(self, plan_id: str) -> bool:
+        task = self._tasks.get(plan_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def _exchange(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+    async def _reconcile_pending(self, client, plan: TwapPlan):
+        # The process died between sending slice `pending` and recording it.
+        # Only UNKNOWN_ORDER proves it never reached the exchange; a timeout,
+        # 429 or dropped connection says nothing, so the lookup is retried
+        # (with backoff) instead of resending and risking a duplicate
+        i = plan.pending
+        backoff = RECONCILE_BACKOFF
+        while True:
+            try:
+                order = await self._exchange(client.futures_get_order, symbol=plan.symbol,
+                                             origClientOrderId=plan.client_order_id(i))
+            except Exception as e:
+                if getattr(e, "code", None) == UNKNOWN_ORDER:
+                    log_info("TWAP pending slice not found, resending", {"plan_id": plan.plan_id, "slice": i,
+                                                                           "error": str(e)})
+                    break
+                log_error("TWAP pending slice lookup failed, retrying", {"plan_id": plan.plan_id, "slice": i,
+                                                                           "error": str(e), "retry_in": backoff})
+                await self.clock.sleep(backoff)
+                backoff = min(backoff * 2, RECONCILE_BACKOFF_MAX)
+            else:
+                self._record(plan, order)
+                break
+        plan.pending = None
+
+    def _record(self, plan: TwapPlan, order: Dict[str, Any]):
+        plan.done += 1
+        plan.filled += _filled_quantity(order, plan.quantity_for(plan.done - 1))
+        plan.order_ids.append(order.get("orderId"))
+        plan.responses.append(order)
+        record_order(plan.kind.upper(), order)
+
+    async def _run(self, plan: TwapPlan):
+        client = self._clients[plan.plan_id]
+        # Monotonic time at which the plan started (start_ts is wall clock)
+        anchor = self.clock.monotonic() - (self.clock.time() - plan.start_ts)
+
+        try:
+            if plan.pending is not None:
+                await self._reconcile_pending(client, plan)
+                await self._save(plan)
+
+            while plan.done < plan.intervals:
+                i = plan.done
+                deadline = anchor + i * plan.delay
+                wait = deadline - self.clock.monotonic()
+                if wait > 0:
+                    await self.clock.sleep(wait)
+                self.late_ms.append(max(0.0, self.clock.monotonic() - deadline) * 1000)
+
+                quantity = plan.quantity_for(i)
+                if quantity <= 0:
+                    # VWAP: nothing to trade in this window
+                    plan.done += 1
+                    await self._save(plan)
+                    continue
+
+                payload = {
+                    "symbol": plan.symbol,
+                    "side": plan.side,
+                    "type": "MARKET",
+                    "quantity": quantity,
+                    "newClientOrderId": plan.client_order_id(i),
+                }
+                plan.pending = i
+                await self._save(plan)
+
+                log_api_request(f"{plan.kind.upper()} chunk {i + 1}/{plan.intervals}", payload)
+                order = await self._exchange(client.futures_create_order, **payload)
+                log_api_response("TWAP MARKET order executed", order)
+                log_order("TWAP", order)
+
+                self._record(plan, order)
+                plan.pending = None
+                await self._save(plan)
+
+            plan.status = DONE
+            log_info("TWAP execution complete", {"plan_id": plan.plan_id, "filled": plan.filled})
+
+        except asyncio.CancelledError:
+            plan.status = CANCELLED
+            plan.pending = None
+            log_info("TWAP cancelled", {"plan_id": plan.plan_id, "done": plan.done,
+                                        "remaining": plan.intervals - plan.done})
+        except Exception as e:
+            plan.status = FAILED
+            plan.error = str(e)
+            log_error("TWAP execution failed", {"plan_id": plan.plan_id, "error": str(e)})
+        finally:
+            await self._save(plan)
+            self._tasks.pop(plan.plan_id, None)
+            self._clients.pop(plan.plan_id, None)
+            self._finished[plan.plan_id].set()
+
+    # ------------------------------
+    # Persistence
+    # ------------------------------
+    async def _save(self, plan: TwapPlan):
+        # Only unfinished plans are kept; finished ones stay queryable in memory.
+        # The snapshot is taken here on the loop, the file is written by the
+        # save thread
+        if not self.path:
+            return
+        data = dict(plan.to_dict(), owner=os.getpid()) if plan.status == RUNNING else None
+        await asyncio.get_running_loop().run_in_executor(self.save_executor, self._write_plan,
+                                                         plan.plan_id, data)
+
+    def _plan_file(self, plan_id: str) -> str:
+        return os.path.join(self.path, f"{plan_id}.json")
+
+    def _write_plan(self, plan_id: str, data: Optional[Dict[str, Any]]):
+        path = self._plan_file(plan_id)
+        try:
+            if data is None:
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            os.makedirs(self.path, exist_ok=True)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            log_error("Failed to save TWAP state", {"path": path, "error": str(e)})
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not self.path or not os.path.isdir(self.path):
+            return []
+        plans = []
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.path, name)) as f:
+                    plans.append(json.load(f))
+            except Exception as e:
+                log_error("Failed to load TWAP state", {"path": name, "error": str(e)})
+        return plans
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        # Runs on the save thread. Under the directory lock, so two processes
+        # resuming at once never adopt the same plan
+        if not self.path or not os.path.isdir(self.path):
+            return []
+        claimed = []
+        with _file_lock(os.path.join(self.path, ".lock")):
+            for data in self._load():
+                owner = data.pop("owner", None)
+                if data["plan_id"] in self.plans or _alive(owner):
+                    continue
+                self._write_plan(data["plan_id"], dict(data, owner=os.getpid()))
+                claimed.append(data)
+        return claimed
+
+
+def _filled_quantity(order: Dict[str, Any], sent: float) -> float:
+    """
+    Quantity a slice accounts for. USDT-M MARKET replies usually come back
+    as NEW with executedQty "0" and fill a moment later, so executedQty is
+    only trusted once it is > 0; a NEW (or partly filled) market order
+    counts for its full size, a closed one for what it filled.
+    """
+    executed = float(order.get("executedQty") or 0)
+    if executed > 0 or order.get("status") in _CLOSED:
+        return executed
+    return float(order.get("origQty") or sent)
+
+
+class _file_lock:
+    """
+    Exclusive flock on `path` for the duration of a with-block; a no-op
+    without fcntl (Windows), where the state is per process in practice.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError as e:
+                log_error("Failed to lock TWAP state", {"path": self.path, "error": str(e)})
+                self._fd = None
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def _alive(pid) -> bool:
+    # Another live process still runs this plan; ours never counts
+    if not pid or pid == os.getpid() or os.name != "posix":
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+_shared: Optional[TwapScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> TwapScheduler:
+    """
+    Process-wide scheduler, started on first use.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TwapScheduler()
+        return _shared.start()
@@ -0,0 +1,258 @@
+# /src/advanced/volume_profile.py
+# Intraday volume profiles from local kline files, and VWAP slice plans.
+#   - klines are Binance 1m CSVs (data.binance.vision layout: open_time,
+#     open, high, low, close, volume, ...; header row optional, open_time in
+#     ms or us) named <SYMBOL>-1m-*.csv under KLINES_DIR
+#   - the profile is the mean volume traded in each minute of the UTC day
+#     over the last LOOKBACK_DAYS days: two np.bincount passes over all bars
+#   - profiles are cached per symbol in memory and in PROFILE_FILE, keyed by
+#     the size and mtime of the source files, so a one-shot command doesn't
+#     re-read a year of CSVs
+#   - plan_vwap_slices sizes slice i by the volume the profile expects in
+#     [start + i * delay, start + (i + 1) * delay), caps every slice at
+#     participation x that volume (the excess moves to slices with room) and
+#     rounds to the step size by largest remainder, so the slices still add
+#     up to the total exactly
+
+import glob
+import json
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from src.logger import log_info, log_error
+
+KLINES_DIR = os.environ.get("BOT_KLINES_DIR", "klines")
+PROFILE_FILE = "volume_profiles.json"
+LOOKBACK_DAYS = 30
+PARTICIPATION = None   # default cap on slice / expected market volume (None = no cap)
+
+MINUTES_PER_DAY = 1440
+_MINUTE_MS = 60_000
+
+
+def configure(klines_dir=None, lookback_days=None, participation=None):
+    global KLINES_DIR, LOOKBACK_DAYS, PARTICIPATION
+    if klines_dir is not None:
+        KLINES_DIR = klines_dir
+    if lookback_days is not None:
+        LOOKBACK_DAYS = lookback_days
+    if participation is not None:
+        PARTICIPATION = participation
+
+
+def load_klines(path: str):
+    """
+    (open_time in ms as int64, volume as float64) from one kline CSV.
+    """
+    with open(path) as f:
+        first = f.readline()
+    data = np.loadtxt(path, delimiter=",", usecols=(0, 5), skiprows=0 if first[:1].isdigit() else 1,
+                      dtype=np.float64, ndmin=2)
+    open_time = data[:, 0].astype(np.int64)
+    if open_time.size and open_time.max() > 10 ** 14:
+        open_time //= 1000   # microsecond timestamps (spot files from 2025 on)
+    return open_time, data[:, 1]
+
+
+def minute_profile(open_time: np.ndarray, volume: np.ndarray, lookback_days: Optional[int] = None) -> np.ndarray:
+    """
+    Mean volume per minute of the UTC day (1440 values). Minutes without
+    any bar are 0.
+    """
+    if lookback_days and open_time.size:
+        recent = open_time >= open_time.max() - lookback_days * MINUTES_PER_DAY * _MINUTE_MS
+        open_time, volume = open_time[recent], volume[recent]
+    minute = (open_time // _MINUTE_MS) % MINUTES_PER_DAY
+    total = np.bincount(minute, weights=volume, minlength=MINUTES_PER_DAY)
+    days = np.bincount(minute, minlength=MINUTES_PER_DAY)
+    return np.divide(total, days, out=np.zeros(MINUTES_PER_DAY), where=days > 0)
+
+
+class ProfileCache:
+    """
+    Symbol -> minute profile, computed from KLINES_DIR on first use.
+    path=None keeps everything in memory only.
+    """
+
+    def __init__(self, klines_dir: Optional[str] = None, path: Optional[str] = PROFILE_FILE,
+                 lookback_days: Optional[int] = None):
+        self.klines_dir = klines_dir
+        self.path = path
+        self.lookback_days = lookback_days
+        self.computed = 0
+        self._profiles: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def files(self, symbol: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.klines_dir or KLINES_DIR, f"{symbol}-1m-*.csv")))
+
+    def get(self, symbol: str) -> Optional[np.ndarray]:
+        """
+        The symbol's profile, or None when there are no kline files for it.
+        """
+        files = self.files(symbol)
+        if not files:
+            return None
+        lookback = self.lookback_days or LOOKBACK_DAYS
+        signature = [[os.path.basename(p), os.path.getsize(p), os.stat(p).st_mtime_ns] for p in files]
+        signature.append(lookback)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._profiles.get(symbol)
+            if entry is not None and entry["signature"] == signature:
+                return entry["profile"]
+
+        start = time.perf_counter()
+        columns = [load_klines(p) for p in files]
+        open_time = np.concatenate([c[0] for c in columns])
+        volume = np.concatenate([c[1] for c in columns])
+        profile = minute_profile(open_time, volume, lookback)
+        with self._lock:
+            self._profiles[symbol] = {"signature": signature, "profile": profile}
+            self.computed += 1
+        log_info("Volume profile computed", {"symbol": symbol, "files": len(files), "bars": int(open_time.size),
+                                             "ms": round((time.perf_counter() - start) * 1000, 2)})
+        self.save()
+        return profile
+
+    def _load(self):
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._profiles = {sym: {"signature": e["signature"], "profile": np.array(e["profile"])}
+                              for sym, e in data["symbols"].items()}
+        except Exception as e:
+            log_error("Failed to load volume profiles", {"path": self.path, "error": str(e)})
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"symbols": {sym: {"signature": e["signature"], "profile": e["profile"].tolist()}
+                                for sym, e in self._profiles.items()}}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log_error("Failed to save volume profiles", {"path": self.path, "error": str(e)})
+
+
+def window_volumes(profile: np.ndarray, start_ts: float, intervals: int, delay: float) -> np.ndarray:
+    """
+    Expected volume in each slice window [start + i * delay, start + (i + 1)
+    * delay), integrating the minute profile (linearly within a minute,
+    wrapping over midnight).
+    """
+    cumulative = np.concatenate(([0.0], np.cumsum(profile)))
+
+    def volume_until(ts):
+        minutes = np.asarray(ts, dtype=np.float64) / 60.0
+        days = np.floor(minutes / MINUTES_PER_DAY)
+        return days * cumulative[-1] + np.interp(minutes - days * MINUTES_PER_DAY,
+                                                 np.arange(MINUTES_PER_DAY + 1), cumulative)
+
+    edges = start_ts + np.arange(intervals + 1) * float(delay)
+    return np.diff(volume_until(edges))
+
+
+def _decimals(step: float) -> int:
+    text = np.format_float_positional(step, trim="-")
+    return len(text.split(".")[1]) if "." in text else 0
+
+
+def plan_vwap_slices(profile: np.ndarray, total_quantity: float, intervals: int, delay: float,
+                     start_ts: float, step: float = 0.0, participation: Optional[float] = None) -> np.ndarray:
+    """
+    Quantity of each of the `intervals` slices. Proportional to the
+    expected volume of its window (equal if the profile has none), at
+    most `participation` x that volume, multiples of `step` (when > 0)
+    summing to total_quantity floored to the step. Slices may be 0.
+    Raises ValueError if the caps can't absorb the total.
+    """
+    expected = window_volumes(profile, start_ts, intervals, delay)
+    weights = expected if expected.sum() > 0 else np.ones(intervals)
+    target = total_quantity * weights / weights.sum()
+
+    cap = np.full(intervals, np.inf)
+    if participation:
+        cap = participation * expected
+        if cap.sum() < total_quantity * (1 - 1e-12):
+            raise ValueError(f"a {participation:.1%} participation cap allows {cap.sum():.8g} over "
+                             f"{intervals} slices of {delay:g}s, less than {total_quantity:g}; "
+                             f"use more intervals, a longer delay or a higher cap")
+        # water-fill: clip to the cap, hand the excess to the slices below it
+        for _ in range(intervals):
+            over = target > cap
+            if not over.any():
+                break
+            excess = (target[over] - cap[over]).sum()
+            target[over] = cap[over]
+            room = target < cap
+            target[room] += excess * weights[room] / weights[room].sum()
+
+    if not step:
+        return target
+
+    units_total = int(np.floor(total_quantity / step + 1e-9))
+    exact = target / step
+    units = np.floor(exact + 1e-9)
+    cap_units = np.floor(cap / step + 1e-9)
+    units = np.minimum(units, cap_units)
+    # the leftover steps go to the largest remainders that still have room
+    remainder = units_total - int(units.sum())
+    if remainder > 0:
+        order = np.argsort(-(exact - units), kind="stable")
+        order = order[units[order] < cap_units[order]]
+        if len(order) < remainder:
+            raise ValueError("participation cap leaves no room for the step-size remainder; "
+                             "use more intervals or a higher cap")
+        units[order[:remainder]] += 1
+    return np.round(units * step, _decimals(step))
+
+
+_shared: Optional[ProfileCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_profile_cache() -> ProfileCache:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ProfileCache()
+        return _shared
+
+
+def vwap_quantities(client, symbol: str, total_quantity: float, intervals: int, delay: float,
+                    participation: Optional[float] = None, start_ts: Optional[float] = None,
+                    filters=None) -> List[float]:
+    """
+    VWAP slice sizes for a TWAP schedule starting now (or at start_ts),
+    from the symbol's local profile and MARKET step size.
+    """
+    profile = get_profile_cache().get(symbol)
+    if profile is None:
+        raise ValueError(f"no local klines for {symbol}: expected {symbol}-1m-*.csv in "
+                         f"{os.path.abspath(KLINES_DIR)}")
+    step = 0.0
+    if filters is None:
+        from src.symbol_filters import get_filter_cache
+        filters = get_filter_cache()
+    symbol_filters = filters.get(symbol, client)
+    if symbol_filters is not None:
+        step = float(symbol_filters.market_step_size or symbol_filters.step_size)
+    if participation is None:
+        participation = PARTICIPATION
+    quantities = plan_vwap_slices(profile, total_quantity, int(intervals), delay,
+                                  time.time() if start_ts is None else start_ts, step, participation)
+    return quantities.tolist()
@@ -0,0 +1,164 @@
+# /src/batch_orders.py
+# Submit independent orders through the futures batch endpoint
+# (POST /fapi/v1/batchOrders, at most MAX_BATCH_SIZE orders per call).
+# Results come back in request order; each item is either the order or an
+# {"code": ..., "msg": ...} error and is mapped back to its request.
+# Single orders, clients without the batch method and whole-batch API
+# rejections fall back to futures_create_order.
+# A failure without an exchange verdict (lost reply, garbled batch reply)
+# doesn't mean the order wasn't placed: each such order is looked up by its
+# newClientOrderId before the result is returned.
+
+import uuid
+from typing import List, Dict, Any
+
+from src.logger import (
+    log_info,
+    log_error,
+    log_api_request,
+    log_api_response,
+    log_order,
+)
+from src.ledger import record_order
+
+MAX_BATCH_SIZE = 5
+UNKNOWN_ORDER = -2013   # futures_get_order: "Order does not exist."
+
+
+def new_client_order_id(prefix: str = "") -> str:
+    return f"{prefix}{uuid.uuid4().hex[:20]}"
+
+
+def _batch_item(payload: Dict[str, Any]) -> Dict[str, str]:
+    # The endpoint wants every value as a JSON string
+    item = {}
+    for k, v in payload.items():
+        if isinstance(v, bool):
+            v = "true" if v else "false"
+        elif isinstance(v, float):
+            v = repr(v)
+        item[k] = str(v)
+    return item
+
+
+def _ok(payload, response):
+    return {"ok": True, "request": payload, "response": response}
+
+
+def _failed(payload, error, code=None, unknown=False):
+    return {"ok": False, "request": payload, "error": str(error), "code": code, "unknown": unknown}
+
+
+def _submit_single(client, payload, label):
+    try:
+        log_api_request("futures_create_order", payload)
+        response = client.futures_create_order(**payload)
+        log_api_response("futures_create_order", response)
+        log_order(label, response)
+        record_order(label, response, payload)
+        return _ok(payload, response)
+    except Exception as e:
+        log_error(f"{label} order failed", {"error": str(e), "request": payload})
+        code = getattr(e, "code", None)
+        return _failed(payload, e, code, unknown=code is None)
+
+
+def _submit_chunk(client, chunk, label):
+    items = [_batch_item(p) for p in chunk]
+    try:
+        log_api_request("futures_place_batch_order", {"batchOrders": items})
+        responses = client.futures_place_batch_order(batchOrders=items)
+        log_api_response("futures_place_batch_order", responses)
+    except Exception as e:
+        if getattr(e, "code", None) is None:
+            # Transport error: the batch may have reached the exchange, so
+            # resending could duplicate orders
+            log_error(f"{label} batch failed", {"error": str(e), "orders": len(chunk)})
+            return [_failed(p, e, unknown=True) for p in chunk]
+        log_error(f"{label} batch rejected, sending orders one by one", {"error": str(e)})
+        return [_submit_single(client, p, label) for p in chunk]
+
+    if not isinstance(responses, list) or len(responses) != len(chunk):
+        log_error(f"{label} batch returned an unexpected reply", {"response": responses})
+        return [_failed(p, "unexpected batch reply", unknown=True) for p in chunk]
+
+    results = []
+    for payload, response in zip(chunk, responses):
+        if isinstance(response, dict) and "code" in response and "orderId" not in response:
+            log_error(f"{label} order rejected", {"request": payload, "response": response})
+            results.append(_failed(payload, response.get("msg", "rejected"), response.get("code")))
+        else:
+            log_order(label, response)
+            record_order(label, response, payload)
+            results.append(_ok(payload, response))
+    return results
+
+
+def _resolve(client, result, label):
+    # The exchange may or may not have the order: ask it by client order id
+    payload = result["request"]
+    query = {"symbol": payload["symbol"], "origClientOrderId": payload["newClientOrderId"]}
+    try:
+        log_api_request("futures_get_order", query)
+        response = client.futures_get_order(**query)
+        log_api_response("futures_get_order", response)
+    except Exception as e:
+        if getattr(e, "code", None) == UNKNOWN_ORDER:
+            log_info(f"{label} order was not placed", query)
+            return _failed(payload, result["error"])
+        log_error(f"{label} order state unknown", {"error": str(e), **query})
+        return result
+    log_info(f"{label} order was placed despite the error", query)
+    log_order(label, response)
+    record_order(label, response, payload)
+    return _ok(payload, response)
+
+
+def submit_orders(client, payloads: List[Dict[str, Any]], label: str = "BATCH",
+                  batch: bool = True) -> List[Dict[str, Any]]:
+    """
+    Place independent futures orders in as few round trips as possible.
+    Every payload gets a newClientOrderId if it has none.
+    Returns one result per payload, in the same order:
+        {"ok": True,  "request": payload, "response": order}
+        {"ok": False, "request": payload, "error": msg, "code": code, "unknown": bool}
+    "unknown" is True when the request failed without an answer from the
+    exchange and looking the order up failed too: it may have been placed.
+    """
+    if client is None:
+        log_error("Binance client not initialized")
+        raise RuntimeError("Binance client not available")
+
+    payloads = [p if "newClientOrderId" in p else {**p, "newClientOrderId": new_client_order_id()}
+                for p in payloads]
+    use_batch = batch and hasattr(client, "futures_place_batch_order")
+
+    log_info(f"Submitting {label} orders", {"orders": len(payloads), "batch": use_batch})
+
+    results = []
+    for i in range(0, len(payloads), MAX_BATCH_SIZE):
+        chunk = payloads[i:i + MAX_BATCH_SIZE]
+        if use_batch and len(chunk) > 1:
+            results.extend(_submit_chunk(client, chunk, label))
+        else:
+            results.extend(_submit_single(client, p, label) for p in chunk)
+    return [_resolve(client, r, label) if r.get("unknown") else r for r in results]
+
+
+def cancel_orders(client, results: List[Dict[str, Any]]):
+    """
+    Best-effort cancel of the orders in `results` that were placed or may
+    have been (used to roll back a multi-leg order when one leg failed).
+    """
+    for r in results:
+        if not (r["ok"] or r.get("unknown")):
+            continue
+        payload = {"symbol": r["request"]["symbol"],
+                   "origClientOrderId": r["request"]["newClientOrderId"]}
+        try:
+            log_api_request("futures_cancel_order", payload)
+            response = client.futures_cancel_order(**payload)
+            log_api_response("futures_cancel_order", response)
+            record_order(None, response)
+        except Exception as e:
+            log_error("Rollback cancel failed", {"error": str(e), **payload})
@@ -0,0 +1,314 @@
+# /src/batch_validation.py
+# validate() for columns of orders (grid ladders, bulk files, backtests).
+# Same rules and the same rounding as src/validators.py + SymbolFilters,
+# done with NumPy over whole columns:
+#   - numeric columns are coerced in one astype(); a column with bad cells
+#     falls back to per-cell conversion for that column only
+#   - exchange filters are looked up once per distinct symbol and
+#     broadcast back to the rows
+#   - rounding is float arithmetic with a relative guard of 1e-13 (well
+#     above float error, far below any real tick/step), which matches the
+#     Decimal results of SymbolFilters for inputs of up to 12 significant
+#     digits
+# Every row gets a reason code (0 = valid); the first failing check wins,
+# in the order validate() checks them.
+
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.logger import log_info
+from src.symbol_filters import get_filter_cache, _FIELDS, _MARKET_TYPES
+from src.validators import STOP_LIMIT_BAND
+
+# Reason codes
+OK = 0
+MISSING_SYMBOL = 1
+BAD_SIDE = 2
+BAD_QUANTITY = 3
+MISSING_PRICE = 4
+BAD_PRICE = 5
+MISSING_STOP = 6
+BAD_STOP = 7
+PRICE_RELATIONSHIP = 8
+UNKNOWN_SYMBOL = 9
+NOT_TRADING = 10
+QTY_FILTER = 11
+PRICE_FILTER = 12
+STOP_FILTER = 13
+MIN_NOTIONAL = 14
+TWAP_SLICES = 15
+
+REASONS = (
+    "",
+    "missing symbol",
+    "side must be 'BUY' or 'SELL'",
+    "quantity must be a number > 0",
+    "missing required field: price",
+    "price must be a number > 0",
+    "missing required field: stop_price",
+    "stop_price must be a number > 0",
+    "take-profit / stop-loss on the wrong side (oco) or limit outside the stop band (stop_limit)",
+    "unknown symbol",
+    "symbol is not trading",
+    "quantity outside the symbol's lot size limits",
+    "price outside the symbol's price limits",
+    "stop_price outside the symbol's price limits",
+    "order value below the symbol's minimum notional",
+    "TWAP slices would be below the symbol's minimum quantity",
+)
+
+_NEEDS_PRICE = ("limit", "stop_limit", "oco")
+_NEEDS_STOP = ("stop_limit", "oco")
+
+# relative guard against float error when snapping to a tick/step
+_EPS = 1e-13
+
+
+class BatchValidation:
+    """
+    Cleaned columns plus a per-row error mask. Invalid rows keep whatever
+    was computed for them; only rows with error == False are meaningful.
+    Absent prices are NaN.
+    """
+
+    __slots__ = ("order_types", "symbols", "sides", "quantities", "prices", "stop_prices", "reason")
+
+    def __init__(self, order_types, symbols, sides, quantities, prices, stop_prices, reason):
+        self.order_types = order_types
+        self.symbols = symbols
+        self.sides = sides
+        self.quantities = quantities
+        self.prices = prices
+        self.stop_prices = stop_prices
+        self.reason = reason
+
+    def __len__(self):
+        return len(self.reason)
+
+    @property
+    def error(self) -> np.ndarray:
+        return self.reason != OK
+
+    @property
+    def valid(self) -> int:
+        return int(np.count_nonzero(self.reason == OK))
+
+    def errors(self) -> List[Tuple[int, str]]:
+        """
+        (row, message) for every invalid row.
+        """
+        rows = np.flatnonzero(self.reason)
+        return [(int(i), REASONS[self.reason[i]]) for i in rows]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        The valid rows as validate()-style dicts (prices only when present).
+        """
+        out = []
+        for i in np.flatnonzero(self.reason == OK):
+            row = {"order_type": str(self.order_types[i]), "symbol": str(self.symbols[i]),
+                   "side": str(self.sides[i]), "quantity": float(self.quantities[i])}
+            if not np.isnan(self.prices[i]):
+                row["price"] = float(self.prices[i])
+            if not np.isnan(self.stop_prices[i]):
+                row["stop_price"] = float(self.stop_prices[i])
+            out.append(row)
+        return out
+
+
+def _categories(values, n: int, upper: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stripped, upper/lower-cased str column as (distinct values, index of
+    each row's value). Symbols, sides and order types hold few distinct
+    values, so each is normalized and compared once.
+    """
+    if values is None or isinstance(values, str):
+        value = (values or "").strip()
+        return np.array([value.upper() if upper else value.lower()]), np.zeros(n, dtype=np.intp)
+    if isinstance(values, np.ndarray):
+        values = values.tolist()
+    distinct: Dict[str, int] = {}
+    table = {}
+    for v in set(values):
+        text = "" if v is None else str(v).strip()
+        table[v] = distinct.setdefault(text.upper() if upper else text.lower(), len(distinct))
+    index = np.fromiter((table[v] for v in values), dtype=np.intp, count=n)
+    return np.array(list(distinct), dtype=str), index
+
+
+def _floats(values, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    float64 column (None / "" / NaN become NaN) and the mask of cells that
+    were given but are not numbers.
+    """
+    if values is None:
+        return np.full(n, np.nan), np.zeros(n, dtype=bool)
+    if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+        return values.astype(np.float64), np.zeros(n, dtype=bool)
+    try:
+        return np.asarray(values, dtype=np.float64), np.zeros(n, dtype=bool)
+    except (TypeError, ValueError):
+        pass
+    out = np.empty(len(values))
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        try:
+            out[i] = np.nan if v is None or v == "" else float(v)
+        except (TypeError, ValueError):
+            out[i], bad[i] = np.nan, True
+    return out, bad
+
+
+def _flag(reason: np.ndarray, mask: np.ndarray, code: int):
+    # first failing check wins
+    reason[(reason == OK) & mask] = code
+
+
+def _decimals(step: float) -> int:
+    text = np.format_float_positional(step, trim="-")
+    return len(text.split(".")[1]) if "." in text else 0
+
+
+def _snap(values: np.ndarray, steps: np.ndarray, decimals: np.ndarray, up_half: bool) -> np.ndarray:
+    """
+    Round values to multiples of steps (0 = leave as is): floor for
+    quantities, half-up for prices.
+    """
+    out = values.copy()
+    has_step = steps > 0
+    if not has_step.any():
+        return out
+    units = values[has_step] / steps[has_step]
+    units = np.floor(units + 0.5 + np.abs(units) * _EPS) if up_half else np.floor(units * (1 + _EPS))
+    snapped = units * steps[has_step]
+    # clear float residue (0.30000000000000004) at the step's precision
+    dec = decimals[has_step]
+    for d in np.unique(dec):
+        sel = dec == d
+        snapped[sel] = np.round(snapped[sel], int(d))
+    out[has_step] = snapped
+    return out
+
+
+def _filter_table(unique_symbols, client, filters):
+    """
+    Per distinct symbol: filter values as float arrays, plus which are
+    unknown / not trading. None if no exchange info is available.
+    """
+    if filters is None:
+        filters = get_filter_cache()
+    table = {name: np.zeros(len(unique_symbols)) for name in _FIELDS}
+    known = np.zeros(len(unique_symbols), dtype=bool)
+    trading = np.zeros(len(unique_symbols), dtype=bool)
+    for k, symbol in enumerate(unique_symbols):
+        f = filters.get(str(symbol), client)
+        if f is None:
+            continue
+        known[k] = True
+        trading[k] = f.status == "TRADING"
+        for name in _FIELDS:
+            table[name][k] = float(getattr(f, name))
+    if not known.any() and not filters.knows_symbols():
+        return None
+    for name in ("tick_size", "step_size", "market_step_size"):
+        table[name + "_decimals"] = np.array([_decimals(v) for v in table[name]], dtype=np.int64)
+    table["known"], table["trading"] = known, trading
+    return table
+
+
+def validate_batch(symbols: Sequence, sides: Sequence, quantities: Sequence,
+                   prices: Optional[Sequence] = None, stop_prices: Optional[Sequence] = None,
+                   order_types="market", client=None, filters=None,
+                   twap_intervals: Optional[Sequence] = None) -> BatchValidation:
+    """
+    Validate columns of orders. Each argument is one value per row (a list
+    or array; order_types may also be one string for every row; prices /
+    stop_prices / twap_intervals may be None when no row has them, and
+    NaN / None marks an absent value; TWAP rows default to 5 intervals). Returns a BatchValidation with the cleaned columns and
+    a reason code per row; validate() would raise for exactly the rows
+    with error set and return the same values for the others.
+    """
+    n = len(quantities)
+    reason = np.zeros(n, dtype=np.uint8)
+
+    type_values, type_index = _categories(order_types, n, upper=False)
+    type_values[type_values == ""] = "market"
+    symbol_values, symbol_index = _categories(symbols, n, upper=True)
+    side_values, side_index = _categories(sides, n, upper=True)
+
+    def is_type(*names):
+        return np.isin(type_values, names)[type_index]
+
+    qty, _ = _floats(quantities, n)
+    price, bad_price = _floats(prices, n)
+    stop, bad_stop = _floats(stop_prices, n)
+    has_price, has_stop = ~np.isnan(price), ~np.isnan(stop)
+
+    _flag(reason, (symbol_values == "")[symbol_index], MISSING_SYMBOL)
+    _flag(reason, ~np.isin(side_values, ("BUY", "SELL"))[side_index], BAD_SIDE)
+    _flag(reason, ~(qty > 0), BAD_QUANTITY)
+    needs_price = is_type(*_NEEDS_PRICE)
+    needs_stop = is_type(*_NEEDS_STOP)
+    _flag(reason, needs_price & ~has_price & ~bad_price, MISSING_PRICE)
+    _flag(reason, bad_price | (has_price & ~(price > 0)), BAD_PRICE)
+    _flag(reason, needs_stop & ~has_stop & ~bad_stop, MISSING_STOP)
+    _flag(reason, bad_stop | (has_stop & ~(stop > 0)), BAD_STOP)
+
+    buy = (side_values == "BUY")[side_index]
+    both = has_price & has_stop
+    oco, stop_limit = both & is_type("oco"), both & is_type("stop_limit")
+    wrong = (oco & buy & (price <= stop)) | (oco & ~buy & (price >= stop))
+    wrong |= (stop_limit & buy & (price < stop * (1 - STOP_LIMIT_BAND)))
+    wrong |= (stop_limit & ~buy & (price > stop * (1 + STOP_LIMIT_BAND)))
+    _flag(reason, wrong, PRICE_RELATIONSHIP)
+
+    inverse = symbol_index
+    table = _filter_table(symbol_values, client, filters)
+    if table is not None:
+        _flag(reason, ~table["known"][inverse], UNKNOWN_SYMBOL)
+        _flag(reason, ~table["trading"][inverse], NOT_TRADING)
+
+        def col(name):
+            return table[name][inverse]
+
+        market = is_type(*_MARKET_TYPES)
+        market_step = col("market_step_size")
+        use_market = market & (market_step > 0)
+        step = np.where(use_market, market_step, col("step_size"))
+        step_dec = np.where(use_market, table["market_step_size_decimals"][inverse],
+                            table["step_size_decimals"][inverse])
+        qty = _snap(qty, step, step_dec, up_half=False)
+        min_qty = np.where(market & (col("market_min_qty") > 0), col("market_min_qty"), col("min_qty"))
+        max_qty = np.where(market & (col("market_max_qty") > 0), col("market_max_qty"), col("max_qty"))
+        _flag(reason, ~(qty > 0) | (qty < min_qty) | ((max_qty > 0) & (qty > max_qty)), QTY_FILTER)
+
+        tick, tick_dec = col("tick_size"), table["tick_size_decimals"][inverse]
+        min_price, max_price = col("min_price"), col("max_price")
+        price = np.where(has_price, _snap(np.nan_to_num(price, nan=0.0), tick, tick_dec, up_half=True), np.nan)
+        stop = np.where(has_stop, _snap(np.nan_to_num(stop, nan=0.0), tick, tick_dec, up_half=True), np.nan)
+        for values, present, code in ((price, has_price, PRICE_FILTER), (stop, has_stop, STOP_FILTER)):
+            _flag(reason, present & (~(values > 0) | (values < min_price) | ((max_price > 0) & (values > max_price))),
+                  code)
+
+        # MARKET notional depends on the mark price, which only the exchange knows
+        notional_price = np.where(has_price, price, stop)
+        min_notional = col("min_notional")
+        notional = qty * notional_price
+        # same float guard as the snapping: 0.003 * 33333.4 is 100 to Decimal
+        _flag(reason, ~np.isnan(notional) & (min_notional > 0) & (notional * (1 + _EPS) < min_notional),
+              MIN_NOTIONAL)
+
+        # every TWAP slice (qty / intervals floored to the step) has to meet
+        # min_qty on its own, see SymbolFilters.check_slices
+        intervals, _ = _floats(twap_intervals, n)
+        intervals = np.where(np.isnan(intervals), 5, intervals)
+        safe_step = np.where(step > 0, step, 1.0)
+        smallest = np.maximum(np.ceil(min_qty / safe_step * (1 - _EPS)), 1) * safe_step
+        most = np.floor(qty / smallest * (1 + _EPS))
+        _flag(reason, is_type("twap") & (step > 0) & (intervals > most), TWAP_SLICES)
+
+    result = BatchValidation(type_values[type_index], symbol_values[symbol_index], side_values[side_index],
+                             qty, price, stop, reason)
+    log_info("Batch validation", {"orders": n, "valid": result.valid, "symbols": len(symbol_values)})
+    return result
@@ -1,9 +1,72 @@
 # /src/binance_client.py
 
 import os
-from binance.client import Client
+import threading
 
-def get_client(testnet=True):
+
+class LazyClient:
+    """
+    Stand-in for the python-binance Client that builds it on first use.
+    Commands that fail parsing or validation never import python-binance
+    or open a connection.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._client is not None
+
+    def load(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        # Private lookups (copy/pickle probes) must not trigger a connection
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+def _build_client(api_key, api_secret, testnet):
+    from binance.client import Client
+
+    client = Client(api_key, api_secret, testnet=testnet)
+
+    if testnet:
+        client.FUTURES_URL = "https://testnet.binancefuture.com/fapi/"
+
+    return client
+
+
+def _build_mock_client():
+    from src.mock_exchange import MockExchange
+
+    client = MockExchange(latency=float(os.getenv("BOT_MOCK_LATENCY_MS", "0")) / 1000)
+    feed_interval = float(os.getenv("BOT_MOCK_FEED_INTERVAL", "0"))
+    if feed_interval > 0:
+        client.start_feed(feed_interval)
+    return client
+
+
+def get_client(testnet=True, lazy=False):
+    """
+    Returns a Binance Futures client.
+    With lazy=True the keys are checked now but the Client (which pings the
+    exchange on construction) is only built when it is first used.
+    BOT_EXCHANGE=mock returns the offline MockExchange (src/mock_exchange.py)
+    instead; no API keys are needed then. Either way the client is wrapped
+    in the shared rate limiter.
+    """
+
+    if os.getenv("BOT_EXCHANGE", "binance").lower() == "mock":
+        return _rate_limited(_build_mock_client())
 
     api_key = os.getenv("BINANCE_API_KEY")
     api_secret = os.getenv("BINANCE_API_SECRET")
@@ -13,9 +76,19 @@ def get_client(testnet=True):
             "API keys not found. Set BINANCE_API_KEY and BINANCE_API_SECRET "
             "as environment variables before running the bot."
         )
-    client = Client(api_key, api_secret, testnet=testnet)
-    
-    if testnet:
-        client.FUTURES_URL = "https://testnet.binancefuture.com/fapi/"
 
-    return client
+    if lazy:
+        return _rate_limited(LazyClient(lambda: _build_client(api_key, api_secret, testnet)))
+
+    return _rate_limited(_build_client(api_key, api_secret, testnet))
+
+
+def _rate_limited(client):
+    # Every futures call is paced against the exchange limits, shared with
+    # other bot processes (src/rate_limiter.py); BOT_RATE_LIMIT=0 disables it
+    if os.getenv("BOT_RATE_LIMIT", "1") == "0":
+        return client
+
+    from src.rate_limiter import RateLimitedClient, get_rate_limiter
+
+    return RateLimitedClient(client, get_rate_limiter())
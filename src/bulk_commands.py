@@ -0,0 +1,250 @@
+# /src/bulk_commands.py
+# `bot.py bulk`: run a file of commands (one per line) in three passes:
+#   1. parse    fast_parse inline; lines the grammar can't resolve go to the
+#               LLM parser on a bounded thread pool (--parse-workers)
+#   2. validate every parsed order, before anything is sent
+#   3. submit   one lane per symbol, lanes run concurrently (--workers) and
+#               each lane sends its orders in file order, so "buy then
+#               close" on one symbol stays in that order. --unordered gives
+#               every line its own lane. The client's rate limiter paces
+#               the lanes (src/rate_limiter.py).
+# One JSON result per line is written as soon as it is known (parse and
+# validation failures first, then orders as they complete), followed by a
+# summary with per-stage timings, throughput and failure counts.
+#
+#   python bot.py bulk FILE|- [--out results.jsonl] [--workers 8] [--parse-workers 4]
+#                             [--dry-run] [--unordered]
+#
+# Blank lines and lines starting with '#' are skipped. A TWAP holds its
+# lane until its last slice.
+
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.fast_parser import fast_parse
+from src.logger import log_info, log_error
+
+WORKERS = 8
+PARSE_WORKERS = 4
+
+
+def read_commands(stream) -> List[Tuple[int, str]]:
+    """
+    (line number, command) for every non-blank, non-comment line.
+    """
+    commands = []
+    for number, line in enumerate(stream, 1):
+        text = line.strip()
+        if text and not text.startswith("#"):
+            commands.append((number, text))
+    return commands
+
+
+class ResultWriter:
+    """
+    Thread-safe JSONL sink that also keeps the counts for the summary.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.ok = 0
+        self.failed = {"parse": 0, "validate": 0, "execute": 0}
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if record["ok"]:
+                self.ok += 1
+            else:
+                self.failed[record["stage"]] += 1
+            if "ms" in record:
+                self.latencies.append(record["ms"])
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def failure(self, number: int, text: str, stage: str, error):
+        self.write({"line": number, "input": text, "ok": False, "stage": stage, "error": str(error)})
+
+
+def parse_commands(commands, get_parser, workers: int = PARSE_WORKERS):
+    """
+    Returns [(number, text, parsed or exception, path)], in file order.
+    """
+    parsed = [None] * len(commands)
+    pending = []
+    for i, (number, text) in enumerate(commands):
+        result = fast_parse(text)
+        if result is not None:
+            parsed[i] = (number, text, result, "fast")
+        else:
+            pending.append(i)
+    if not pending:
+        return parsed
+
+    def model_parse(i):
+        number, text = commands[i]
+        try:
+            return number, text, get_parser().parse(text), "llm"
+        except Exception as e:
+            return number, text, e, "llm"
+
+    try:
+        get_parser()
+    except Exception as e:
+        # no model configured (HF_API_KEY): those lines fail to parse
+        log_error("Bulk parser unavailable", {"error": str(e), "lines": len(pending)})
+        for i in pending:
+            parsed[i] = (*commands[i], RuntimeError(f"Failed to parse trading command: {e}"), "llm")
+        return parsed
+
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="bulk-parse") as pool:
+        for i, result in zip(pending, pool.map(model_parse, pending)):
+            parsed[i] = result
+    return parsed
+
+
+def _run_lane(lane, client, graph, writer, dry_run):
+    for number, text, order in lane:
+        start = time.perf_counter()
+        record = {"line": number, "input": text, "order_type": order["order_type"], "symbol": order["symbol"]}
+        if dry_run:
+            writer.write({**record, "ok": True, "dry_run": True, "result": order})
+            continue
+        try:
+            result = graph.invoke({**order, "client": client})
+            if isinstance(result, dict):
+                result.pop("client", None)
+            writer.write({**record, "ok": True, "result": result,
+                          "ms": round((time.perf_counter() - start) * 1000, 3)})
+        except Exception as e:
+            log_error("Bulk order failed", {"error": str(e), "line": number, "input": text})
+            writer.write({**record, "ok": False, "stage": "execute", "error": str(e),
+                          "ms": round((time.perf_counter() - start) * 1000, 3)})
+
+
+def run_bulk(commands, out, get_parser, get_graph, connect, workers: int = WORKERS,
+             parse_workers: int = PARSE_WORKERS, dry_run: bool = False, ordered: bool = True) -> Dict[str, Any]:
+    """
+    Parse, validate and submit `commands` ([(line number, text)]), writing
+    one JSON result per line to `out`. get_parser / get_graph / connect
+    build the LLM parser, the graph and the client on first need. Returns
+    the summary.
+    """
+    from src.validators import validate
+
+    writer = ResultWriter(out)
+    start = time.perf_counter()
+
+    parsed = parse_commands(commands, get_parser, parse_workers)
+    paths = {"fast": 0, "llm": 0}
+    for _, _, _, path in parsed:
+        paths[path] += 1
+    parse_s = time.perf_counter() - start
+
+    validate_start = time.perf_counter()
+    client = None
+    lanes: Dict[Any, List[Tuple[int, str, Dict[str, Any]]]] = {}
+    for number, text, result, _ in parsed:
+        if isinstance(result, Exception):
+            writer.failure(number, text, "parse", result)
+            continue
+        if client is None and not dry_run:
+            client = connect()
+        try:
+            order = validate({**result, "client": client})
+        except Exception as e:
+            writer.failure(number, text, "validate", e)
+            continue
+        order.pop("client", None)
+        lanes.setdefault(order["symbol"] if ordered else number, []).append((number, text, order))
+    validate_s = time.perf_counter() - validate_start
+
+    graph = get_graph() if lanes and not dry_run else None
+    submit_start = time.perf_counter()
+    orders = sum(len(lane) for lane in lanes.values())
+    if lanes:
+        # biggest lanes first so one long lane doesn't start last
+        ordered_lanes = sorted(lanes.values(), key=len, reverse=True)
+        with ThreadPoolExecutor(max(1, min(workers, len(lanes))), thread_name_prefix="bulk-submit") as pool:
+            for future in [pool.submit(_run_lane, lane, client, graph, writer, dry_run) for lane in ordered_lanes]:
+                future.result()
+    submit_s = time.perf_counter() - submit_start
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(writer.latencies)
+    summary = {
+        "lines": len(commands),
+        "ok": writer.ok,
+        "failed": dict(writer.failed),
+        "parse_paths": paths,
+        "lanes": len(lanes),
+        "dry_run": dry_run,
+        "parse_s": round(parse_s, 3),
+        "validate_s": round(validate_s, 3),
+        "submit_s": round(submit_s, 3),
+        "elapsed_s": round(elapsed, 3),
+        "lines_per_s": round(len(commands) / elapsed, 1) if elapsed else None,
+        "orders_per_s": round(orders / submit_s, 1) if orders and submit_s else None,
+        "order_ms": ({"p50": latencies[len(latencies) // 2],
+                      "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+                      "max": latencies[-1]} if latencies else None),
+    }
+    log_info("Bulk run finished", summary)
+    return summary
+
+
+def format_summary(s: Dict[str, Any]) -> str:
+    failed = s["failed"]
+    lines = [
+        f"{s['lines']} command(s): {s['ok']} ok, {sum(failed.values())} failed "
+        f"(parse {failed['parse']}, validate {failed['validate']}, execute {failed['execute']})",
+        f"parsed {s['parse_paths']['fast']} locally, {s['parse_paths']['llm']} by the model "
+        f"in {s['parse_s']:.2f} s; validated in {s['validate_s']:.2f} s",
+        f"{'checked' if s['dry_run'] else 'submitted'} on {s['lanes']} lane(s) in {s['submit_s']:.2f} s"
+        + (f" ({s['orders_per_s']:,.0f} orders/s)" if s["orders_per_s"] else ""),
+    ]
+    if s["order_ms"]:
+        lines.append(f"order latency p50 {s['order_ms']['p50']:.1f} ms, p95 {s['order_ms']['p95']:.1f} ms, "
+                     f"max {s['order_ms']['max']:.1f} ms")
+    lines.append(f"total {s['elapsed_s']:.2f} s ({s['lines_per_s']:,.0f} lines/s)")
+    return "\n".join(lines)
+
+
+def main(argv, get_parser, get_graph, connect) -> int:
+    ap = argparse.ArgumentParser(prog="bot.py bulk", description="Run a file of trading commands")
+    ap.add_argument("file", help="one command per line, or - for stdin")
+    ap.add_argument("--out", help="write the JSONL results here instead of stdout")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="symbols submitted at once")
+    ap.add_argument("--parse-workers", type=int, default=PARSE_WORKERS, help="concurrent LLM parses")
+    ap.add_argument("--dry-run", action="store_true", help="parse and validate only, nothing is sent")
+    ap.add_argument("--unordered", action="store_true",
+                    help="don't keep file order within a symbol (every line runs independently)")
+    args = ap.parse_args(argv)
+
+    if args.file == "-":
+        commands = read_commands(sys.stdin)
+    else:
+        try:
+            with open(args.file) as f:
+                commands = read_commands(f)
+        except OSError as e:
+            print("Cannot read commands:", e)
+            return 2
+
+    out: Optional[Any] = open(args.out, "w") if args.out else sys.stdout
+    try:
+        summary = run_bulk(commands, out, get_parser, get_graph, connect, args.workers, args.parse_workers,
+                           args.dry_run, not args.unordered)
+    finally:
+        if args.out:
+            out.close()
+    # keep stdout pure JSONL when the results go there
+    print(format_summary(summary), file=sys.stderr if not args.out else sys.stdout)
+    return 0 if summary["ok"] == summary["lines"] else 1
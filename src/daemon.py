@@ -0,0 +1,217 @@
+# /src/daemon.py
+# Local Unix-socket command server for the long-running bot.
+# One JSON object per line in each direction:
+#   {"op": "run", "command": "buy 2 btc"}  -> {"ok": true, "result": ..., "timings": {...}}
+#   {"op": "stats"}                        -> per-command latency summary
+#   {"op": "<name>", ...}                  -> extra ops registered by the bot
+#                                             (e.g. "twap", "twap_cancel", "oco", "metrics")
+#   {"op": "shutdown"}                     -> stops the server
+#
+# The client side (send / send_main) only uses the standard library so
+# `python bot.py send ...` starts fast.
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any
+
+SOCKET_PATH = os.getenv("BOT_SOCKET", os.path.join(tempfile.gettempdir(), "binance-bot.sock"))
+
+
+class LatencyStats:
+    """
+    Rolling per-command latency window (milliseconds).
+    """
+
+    def __init__(self, window: int = 10000):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, ms: float, ok: bool = True):
+        with self._lock:
+            self.samples.append(ms)
+            self.count += 1
+            if not ok:
+                self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self.samples)
+            count, errors = self.count, self.errors
+        if not lat:
+            return {"count": count, "errors": errors}
+
+        def pct(p):
+            return round(lat[min(len(lat) - 1, int(p / 100 * len(lat)))], 3)
+
+        return {"count": count, "errors": errors, "p50_ms": pct(50),
+                "p95_ms": pct(95), "p99_ms": pct(99), "max_ms": round(lat[-1], 3)}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self._reply({"ok": False, "error": "invalid JSON request"})
+                continue
+
+            op = request.get("op", "run")
+            if op == "run":
+                start = time.perf_counter()
+                outcome = self.server.run_command(str(request.get("command", "")))
+                elapsed = (time.perf_counter() - start) * 1000
+                self.server.stats.add(elapsed, outcome.get("ok", False))
+                outcome.setdefault("timings", {})["server_ms"] = elapsed
+                self._reply(outcome)
+            elif op == "stats":
+                self._reply({"ok": True, "stats": self.server.stats.summary()})
+            elif op in self.server.ops:
+                try:
+                    self._reply({"ok": True, **self.server.ops[op](request)})
+                except Exception as e:
+                    self._reply({"ok": False, "error": str(e)})
+            elif op == "shutdown":
+                self._reply({"ok": True})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            else:
+                self._reply({"ok": False, "error": f"unknown op: {op}"})
+
+    def _reply(self, payload: Dict[str, Any]):
+        self.wfile.write(json.dumps(payload, default=str).encode() + b"\n")
+        self.wfile.flush()
+
+
+class CommandServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves `run_command(text) -> dict` on a Unix socket. Clients may keep
+    the connection open and send many commands.
+    `ops` maps extra op names to `fn(request) -> dict`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, run_command: Callable[[str], Dict[str, Any]], path: str = SOCKET_PATH,
+                 ops: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        if os.path.exists(path):
+            # Refuse to steal the socket of a live server
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(path)
+                raise RuntimeError(f"Bot server already running on {path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.remove(path)
+        self.run_command = run_command
+        self.ops = ops or {}
+        self.stats = LatencyStats()
+        self.path = path
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CommandClient:
+    """
+    Persistent connection to a CommandServer.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH, timeout: float = 600.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        self.file.write(json.dumps(payload).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Bot server closed the connection")
+        return json.loads(line)
+
+    def run(self, command: str) -> Dict[str, Any]:
+        return self.request({"op": "run", "command": command})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def send_main(argv=None) -> int:
+    """
+    python bot.py send [--socket PATH] [--stats | --shutdown | --twap [ID] | --twap-cancel ID | --oco |
+                        --grid [ID] | --grid-cancel ID | --book SYMBOL [QTY] | --metrics [LABEL ...]] "command"
+    """
+    ap = argparse.ArgumentParser(prog="bot.py send", description="Send a command to a running bot server")
+    ap.add_argument("--socket", default=SOCKET_PATH)
+    ap.add_argument("--stats", action="store_true")
+    ap.add_argument("--shutdown", action="store_true")
+    ap.add_argument("--twap", nargs="?", const="", metavar="ID", help="TWAP progress (all plans or one)")
+    ap.add_argument("--twap-cancel", metavar="ID")
+    ap.add_argument("--oco", action="store_true", help="OCO watcher status")
+    ap.add_argument("--grid", nargs="?", const="", metavar="ID", help="grid progress (all grids or one)")
+    ap.add_argument("--grid-cancel", metavar="ID")
+    ap.add_argument("--book", nargs="+", metavar="SYMBOL [QTY]", help="mirrored order book: depth and fill estimates")
+    ap.add_argument("--metrics", nargs="*", metavar="LABEL",
+                    help="per-node timings, grouped by node or by the given labels (node order_type symbol outcome)")
+    ap.add_argument("command", nargs="*")
+    args = ap.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        client = CommandClient(args.socket)
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"No bot server on {args.socket}. Start one with: python bot.py serve")
+        return 1
+
+    try:
+        if args.stats:
+            reply = client.request({"op": "stats"})
+        elif args.shutdown:
+            reply = client.request({"op": "shutdown"})
+        elif args.twap is not None:
+            reply = client.request({"op": "twap", "plan_id": args.twap or None})
+        elif args.twap_cancel:
+            reply = client.request({"op": "twap_cancel", "plan_id": args.twap_cancel})
+        elif args.oco:
+            reply = client.request({"op": "oco"})
+        elif args.grid is not None:
+            reply = client.request({"op": "grid", "grid_id": args.grid or None})
+        elif args.grid_cancel:
+            reply = client.request({"op": "grid_cancel", "grid_id": args.grid_cancel})
+        elif args.book:
+            reply = client.request({"op": "book", "symbol": args.book[0],
+                                    "quantity": float(args.book[1]) if len(args.book) > 1 else None})
+        elif args.metrics is not None:
+            reply = client.request({"op": "metrics", "by": args.metrics or None})
+        elif args.command:
+            reply = client.run(" ".join(args.command))
+        else:
+            ap.print_usage()
+            return 2
+    finally:
+        client.close()
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(json.dumps(reply, indent=2))
+    if "timings" in reply:
+        print(f"round trip {elapsed:.2f} ms (server {reply['timings']['server_ms']:.2f} ms)")
+    return 0 if reply.get("ok") else 1
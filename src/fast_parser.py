@@ -0,0 +1,294 @@
+# /src/fast_parser.py
+# Deterministic parser for the common command phrasings.
+# Resolves simple commands locally so LLMParser only calls the model
+# when the input is ambiguous or uses wording this grammar doesn't know.
+
+import re
+from typing import Optional, Dict, Any
+
+from src.validators import _required_fields_for_order_type
+
+
+# Base asset aliases -> Binance USDT-M futures pair
+ASSET_ALIASES = {
+    "btc": "BTCUSDT", "bitcoin": "BTCUSDT", "xbt": "BTCUSDT",
+    "eth": "ETHUSDT", "ether": "ETHUSDT", "ethereum": "ETHUSDT",
+    "sol": "SOLUSDT", "solana": "SOLUSDT",
+    "bnb": "BNBUSDT",
+    "xrp": "XRPUSDT", "ripple": "XRPUSDT",
+    "doge": "DOGEUSDT", "dogecoin": "DOGEUSDT",
+    "ada": "ADAUSDT", "cardano": "ADAUSDT",
+    "ltc": "LTCUSDT", "litecoin": "LTCUSDT",
+    "dot": "DOTUSDT",
+    "avax": "AVAXUSDT",
+    "link": "LINKUSDT",
+    "matic": "MATICUSDT",
+    "trx": "TRXUSDT",
+}
+
+SIDES = {"buy": "BUY", "long": "BUY", "sell": "SELL", "short": "SELL"}
+
+# Explicit order type keywords (multi-word forms are joined by _normalize)
+ORDER_TYPE_WORDS = {
+    "market": "market",
+    "limit": "limit",
+    "stop_limit": "stop_limit",
+    "oco": "oco",
+    "twap": "twap",
+    "vwap": "vwap",
+    "grid": "grid",
+}
+
+# Words that label the NEXT number
+LABELS = {
+    "price": "price",
+    "at": "price",
+    "for": "price",
+    "@": "price",
+    "take_profit": "price",
+    "tp": "price",
+    "target": "price",
+    "stop_price": "stop_price",
+    "stop": "stop_price",
+    "stop_loss": "stop_price",
+    "sl": "stop_price",
+    "trigger": "stop_price",
+    "hits": "stop_price",
+    "reaches": "stop_price",
+    "qty": "quantity",
+    "quantity": "quantity",
+    "amount": "quantity",
+    "size": "quantity",
+    "intervals": "twap_intervals",
+    "slices": "twap_intervals",
+    "delay": "twap_delay",
+    "every": "twap_delay",
+    "participation": "participation",
+    "pov": "participation",
+    "from": "grid_lower",
+    "between": "grid_lower",
+    "lower": "grid_lower",
+    "upper": "grid_upper",
+    "levels": "grid_levels",
+    "grids": "grid_levels",
+}
+
+# Labels that only make sense for an OCO (take-profit) or an OCO / stop order (stop-loss)
+TAKE_PROFIT_LABELS = {"take_profit", "tp", "target"}
+STOP_LOSS_LABELS = {"stop_loss", "sl"}
+
+# Quote currencies: "100 usdt of btc" is a notional, not a quantity
+QUOTE_UNITS = {"usdt", "usd", "usdc", "busd", "dollars"}
+
+# Words that label the PREVIOUS number
+INTERVAL_UNITS = {"intervals", "interval", "slices", "chunks", "orders", "parts"}
+LEVEL_UNITS = {"levels", "level", "grids", "lines"}
+DELAY_UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+}
+
+GRID_MODES = {"arithmetic": "arithmetic", "linear": "arithmetic", "geometric": "geometric"}
+
+# Words that carry no information for the grammar
+FILLERS = {
+    "a", "an", "the", "is", "of", "with", "and", "on", "to", "in", "me",
+    "my", "please", "place", "set", "put", "open", "order", "orders",
+    "if", "when", "then", "usdt", "coin", "coins", "contracts", "units",
+    "over", "by", "as", "=", ":", "python", "bot", "py", "type",
+}
+
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|\.\d+|[a-z_]+|[@=:]")
+# A signed or currency-prefixed number ("-5", "+2", "$100") needs the LLM
+_SIGNED_RE = re.compile(r"[-+$]\s*\.?\d")
+# Well-formed thousands grouping only: "86,000", "1,250,000". "0,500" or
+# "1,5000" could be a decimal comma or a typo, so they are left as they are
+THOUSANDS_RE = re.compile(r"(?<![\d.])(?<!\d,)[1-9]\d{0,2}(?:,\d{3})+(?!\d|,\d)")
+# A comma between digits that survived _normalize is ambiguous
+_COMMA_RE = re.compile(r"\d,\d")
+
+
+def _normalize(text: str) -> str:
+    t = text.lower()
+    t = THOUSANDS_RE.sub(lambda m: m.group(0).replace(",", ""), t)   # 86,000 -> 86000
+    t = re.sub(r"stop[\s_-]*limit", " stop_limit ", t)
+    t = re.sub(r"stop[\s_-]*price", " stop_price ", t)
+    t = re.sub(r"stop[\s_-]*loss", " stop_loss ", t)
+    t = re.sub(r"take[\s_-]*profit", " take_profit ", t)
+    return t
+
+
+def _is_number(token: str) -> bool:
+    return token[0].isdigit() or token[0] == "."
+
+
+def fast_parse(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a trading command without the LLM.
+    Returns the same dict shape as LLMParser.parse, or None when the
+    command is not an unambiguous match for the grammar.
+    """
+    if not text or not text.strip():
+        return None
+
+    normalized = _normalize(text)
+    if _SIGNED_RE.search(normalized) or _COMMA_RE.search(normalized):
+        return None
+    tokens = _TOKEN_RE.findall(normalized)
+
+    side = None
+    symbol = None
+    order_type = None
+    fields: Dict[str, float] = {}
+    grid_mode = None
+    pending = None
+    labels = set()
+
+    def assign(field, value):
+        if field in fields:
+            return False
+        fields[field] = value
+        return True
+
+    i = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        nxt = tokens[i + 1] if i + 1 < n else None
+
+        if _is_number(tok):
+            if nxt in QUOTE_UNITS:
+                return None
+            value = float(tok)
+            if pending is None and nxt in INTERVAL_UNITS:
+                field = "twap_intervals"
+                i += 1
+            elif pending is None and nxt in LEVEL_UNITS:
+                field = "grid_levels"
+                i += 1
+            elif nxt in DELAY_UNITS and pending in (None, "twap_delay"):
+                field = "twap_delay"
+                value *= DELAY_UNITS[nxt]
+                i += 1
+            else:
+                field = pending or "quantity"
+            if not assign(field, value):
+                return None
+            pending = None
+
+        elif tok in SIDES:
+            if side is not None and side != SIDES[tok]:
+                return None
+            side = SIDES[tok]
+            pending = None
+
+        elif tok in ASSET_ALIASES or (tok.endswith("usdt") and len(tok) > 4):
+            sym = ASSET_ALIASES.get(tok, tok.upper())
+            if symbol is not None and symbol != sym:
+                return None
+            symbol = sym
+            pending = None
+
+        elif tok == "limit" and nxt is not None and _is_number(nxt):
+            # "with limit 85950" labels the limit price
+            pending = "price"
+
+        elif tok in ORDER_TYPE_WORDS:
+            ot = ORDER_TYPE_WORDS[tok]
+            if order_type is not None and order_type != ot:
+                return None
+            order_type = ot
+            pending = None
+
+        elif tok in ("to", "and") and "grid_lower" in fields and "grid_upper" not in fields \
+                and nxt is not None and _is_number(nxt):
+            # "from 80000 to 90000": the grid's upper bound
+            pending = "grid_upper"
+
+        elif tok in GRID_MODES:
+            if grid_mode is not None and grid_mode != GRID_MODES[tok]:
+                return None
+            grid_mode = GRID_MODES[tok]
+            pending = None
+
+        elif tok == "over" and nxt is not None and _is_number(nxt) and i + 2 < n and tokens[i + 2] in DELAY_UNITS:
+            # "over 10 minutes" is a total duration, not the delay between slices
+            return None
+
+        elif tok in LABELS:
+            # "intervals 5" labels the next number; "5 intervals" is handled above
+            pending = LABELS[tok]
+            labels.add(tok)
+
+        elif tok in FILLERS:
+            pass
+
+        else:
+            # Unknown word: leave it to the LLM
+            return None
+
+        i += 1
+
+    if side is None or symbol is None or "quantity" not in fields:
+        return None
+
+    if grid_mode is not None and order_type not in (None, "grid"):
+        return None
+
+    take_profit = bool(labels & TAKE_PROFIT_LABELS)
+    stop_loss = bool(labels & STOP_LOSS_LABELS)
+    if order_type is None and take_profit and stop_loss:
+        order_type = "oco"
+    if take_profit and order_type != "oco":
+        return None
+    if stop_loss and order_type not in ("oco", "stop_limit"):
+        return None
+
+    if order_type is None:
+        if grid_mode is not None or any(f.startswith("grid_") for f in fields):
+            order_type = "grid"
+        elif "participation" in fields:
+            order_type = "vwap"
+        elif "twap_intervals" in fields or "twap_delay" in fields:
+            order_type = "twap"
+        elif "stop_price" in fields and "price" in fields:
+            order_type = "stop_limit"
+        elif "stop_price" in fields:
+            return None
+        elif "price" in fields:
+            order_type = "limit"
+        else:
+            order_type = "market"
+
+    allowed = set(_required_fields_for_order_type(order_type))
+    if order_type == "twap":
+        allowed |= {"twap_intervals", "twap_delay"}
+    elif order_type == "vwap":
+        allowed |= {"twap_intervals", "twap_delay", "participation"}
+    elif order_type == "grid":
+        allowed.add("grid_mode")
+
+    for field in _required_fields_for_order_type(order_type):
+        if field not in ("symbol", "side") and field not in fields:
+            return None
+    for field in fields:
+        if field not in allowed:
+            return None
+
+    parsed = {
+        "order_type": order_type,
+        "symbol": symbol,
+        "side": side,
+    }
+    for field, value in fields.items():
+        if field in ("twap_intervals", "grid_levels"):
+            if value != int(value):
+                return None
+            value = int(value)
+        elif field == "participation" and value > 1:
+            value /= 100   # "participation 5" means 5%
+        parsed[field] = value
+    if grid_mode is not None:
+        parsed["grid_mode"] = grid_mode
+
+    return parsed
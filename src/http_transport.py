@@ -0,0 +1,142 @@
+# /src/http_transport.py
+# Shared HTTP transport for the LLM client:
+# pooled keep-alive session, connect/read timeouts,
+# bounded retries with jittered exponential backoff on 429/5xx,
+# and per-call latency metrics.
+# `requests` is imported on first construction so the fast-path CLI
+# never pays for it.
+
+import random
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, TYPE_CHECKING
+
+from src.logger import log_error
+
+if TYPE_CHECKING:
+    import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpTransport:
+    """
+    Thin wrapper around a requests.Session.
+    One instance is meant to be shared by every LLM call in the process.
+    """
+
+    def __init__(self, connect_timeout: float = 3.05, read_timeout: float = 30.0,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 pool_size: int = 10, metrics_window: int = 1000):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._requests = requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=metrics_window)  # seconds, one per call incl. retries
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # "full jitter": uniform(0, base * 2^attempt)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """
+        Send a request, retrying on 429/5xx, connection errors and timeouts.
+        Returns the last response (which may still be an error status)
+        or raises the last network exception once retries are exhausted.
+        """
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        start = time.perf_counter()
+        attempt = 0
+        requests = self._requests
+
+        try:
+            while True:
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt >= self.max_retries:
+                        with self._lock:
+                            self.failures += 1
+                        log_error("HTTP request failed", {"url": url, "error": str(e), "attempts": attempt + 1})
+                        raise
+                    delay = self._backoff(attempt)
+                else:
+                    if response.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                        if response.status_code >= 400:
+                            with self._lock:
+                                self.failures += 1
+                        return response
+                    delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                    response.close()
+
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.latencies.append(time.perf_counter() - start)
+
+    def post_json(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        response = self.request("POST", url, json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self.latencies)
+            calls, retries, failures = self.calls, self.retries, self.failures
+
+        def pct(p):
+            if not lat:
+                return None
+            return lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000
+
+        return {
+            "calls": calls,
+            "retries": retries,
+            "failures": failures,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": lat[-1] * 1000 if lat else None,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_shared: Optional[HttpTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """
+    Process-wide transport so every caller reuses the same connection pool.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpTransport()
+        return _shared
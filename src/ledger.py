@@ -0,0 +1,572 @@
+# /src/ledger.py
+# Local order ledger: every order the executors place (market, limit,
+# stop-limit, batch, OCO legs, TWAP / VWAP slices, grid levels) and every
+# fill seen on the user-data stream, in a SQLite file.
+#   - WAL mode, so `bot.py ledger ...` can query while a repl / serve
+#     process keeps writing
+#   - producers only append to a buffer; a writer thread upserts it in one
+#     transaction per batch (BATCH_SIZE rows or FLUSH_INTERVAL seconds)
+#   - the strategy and group (OCO group, TWAP / VWAP plan, grid id) are
+#     derived from the clientOrderId the executors already assign
+#   - an order never moves back to an earlier state, so a REST reply that
+#     arrives after the stream's FILLED event does not reopen it
+#   - reconcile() syncs the open rows with the exchange: one open-orders
+#     call, then allOrders pages per symbol for the rows no longer open
+# BOT_LEDGER_FILE picks the file; set it to "" to turn the ledger off.
+
+import argparse
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Optional, Dict, Any, List
+
+from src.logger import log_info, log_error
+
+# Anchored to the project root like bot.log, so `bot.py ledger` finds it from any directory
+LEDGER_FILE = os.getenv(
+    "BOT_LEDGER_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ledger.db"),
+)
+BATCH_SIZE = 1000         # rows per write transaction before the writer is woken
+FLUSH_INTERVAL = 0.2      # seconds between writes of a partial batch
+QUEUE_SIZE = 100000       # pending rows before producers wait for the writer
+ALL_ORDERS_LIMIT = 1000   # page size of futures_get_all_orders
+
+OPEN = ("NEW", "PARTIALLY_FILLED")
+_OPEN_SQL = "('NEW', 'PARTIALLY_FILLED')"
+
+# clientOrderId -> (strategy, group id)
+_GROUPS = (
+    (re.compile(r"^(?:TP|SL)-([^.]+)(?:\.\d+)?$"), "oco"),
+    (re.compile(r"^TWAP-(\w+)-\d+$"), "twap"),
+    (re.compile(r"^VWAP-(\w+)-\d+$"), "vwap"),
+    (re.compile(r"^GRID-(\w+)-\d+-\d+$"), "grid"),
+)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS orders ("
+    " client_order_id TEXT PRIMARY KEY,"
+    " order_id INTEGER,"
+    " symbol TEXT NOT NULL,"
+    " side TEXT,"
+    " type TEXT,"
+    " strategy TEXT,"
+    " group_id TEXT,"
+    " quantity REAL,"
+    " price REAL,"
+    " stop_price REAL,"
+    " status TEXT NOT NULL,"
+    " executed_qty REAL NOT NULL DEFAULT 0,"
+    " avg_price REAL,"
+    " created_at INTEGER NOT NULL,"
+    " updated_at INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_symbol ON orders(symbol, status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_group ON orders(group_id)",
+    # Open orders are a small tail of the history: partial indexes keep
+    # "what is still open" queries off the filled / cancelled rows
+    f"CREATE INDEX IF NOT EXISTS idx_orders_open ON orders(symbol, created_at) WHERE status IN {_OPEN_SQL}",
+    "CREATE INDEX IF NOT EXISTS idx_orders_open_groups ON orders(strategy, group_id, symbol, client_order_id, status)"
+    f" WHERE status IN {_OPEN_SQL}",
+    # cum_qty grows with every trade of an order, so it dedupes replayed events
+    "CREATE TABLE IF NOT EXISTS fills ("
+    " client_order_id TEXT NOT NULL,"
+    " cum_qty REAL NOT NULL,"
+    " quantity REAL NOT NULL,"
+    " price REAL NOT NULL,"
+    " trade_id INTEGER,"
+    " ts INTEGER NOT NULL,"
+    " PRIMARY KEY (client_order_id, cum_qty)) WITHOUT ROWID",
+)
+
+_COLUMNS = ("client_order_id", "order_id", "symbol", "side", "type", "strategy", "group_id", "quantity",
+            "price", "stop_price", "status", "executed_qty", "avg_price", "created_at", "updated_at")
+
+# NEW < PARTIALLY_FILLED < anything final
+_RANK = "CASE {} WHEN 'NEW' THEN 0 WHEN 'PARTIALLY_FILLED' THEN 1 ELSE 2 END"
+
+_UPSERT = (
+    f"INSERT INTO orders VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT(client_order_id) DO UPDATE SET"
+    " order_id = COALESCE(excluded.order_id, orders.order_id),"
+    " side = COALESCE(orders.side, excluded.side),"
+    " type = COALESCE(orders.type, excluded.type),"
+    " strategy = COALESCE(orders.strategy, excluded.strategy),"
+    " quantity = COALESCE(excluded.quantity, orders.quantity),"
+    " price = COALESCE(orders.price, excluded.price),"
+    " stop_price = COALESCE(orders.stop_price, excluded.stop_price),"
+    f" status = CASE WHEN {_RANK.format('orders.status')} < 2"
+    f" AND {_RANK.format('excluded.status')} >= {_RANK.format('orders.status')}"
+    " THEN excluded.status ELSE orders.status END,"
+    " avg_price = CASE WHEN excluded.executed_qty >= orders.executed_qty"
+    " THEN COALESCE(excluded.avg_price, orders.avg_price) ELSE orders.avg_price END,"
+    " executed_qty = MAX(orders.executed_qty, excluded.executed_qty),"
+    " created_at = MIN(orders.created_at, excluded.created_at),"
+    " updated_at = MAX(orders.updated_at, excluded.updated_at)"
+)
+
+
+def configure(path=..., batch_size=None, flush_interval=None, queue_size=None):
+    """
+    Change the ledger settings; a new path takes effect for ledgers opened
+    afterwards (pass path="" to turn recording off).
+    """
+    global LEDGER_FILE, BATCH_SIZE, FLUSH_INTERVAL, QUEUE_SIZE
+    if path is not ...:
+        LEDGER_FILE = path
+    if batch_size is not None:
+        BATCH_SIZE = batch_size
+    if flush_interval is not None:
+        FLUSH_INTERVAL = flush_interval
+    if queue_size is not None:
+        QUEUE_SIZE = queue_size
+
+
+def classify(client_order_id: str, label: Optional[str] = None):
+    """
+    clientOrderId (+ the executor's label) -> (strategy, group id).
+    "TP-<group>.1" -> ("oco", group), "TWAP-<plan>-3" -> ("twap", plan),
+    anything else -> (label in lower case, None).
+    """
+    for pattern, strategy in _GROUPS:
+        m = pattern.match(client_order_id)
+        if m:
+            return strategy, m.group(1)
+    return (label.lower().replace("-", "_") if label else None), None
+
+
+def _num(value) -> Optional[float]:
+    # the API sends numbers as strings and "0" for "not set"
+    if value in (None, ""):
+        return None
+    value = float(value)
+    return value or None
+
+
+def _order_row(label, order, request, now):
+    client_id = order.get("clientOrderId") or request.get("newClientOrderId")
+    if not client_id or not (order.get("symbol") or request.get("symbol")):
+        return None
+    strategy, group_id = classify(client_id, label)
+    order_id = order.get("orderId")
+    return (client_id, int(order_id) if order_id is not None else None,
+            order.get("symbol") or request.get("symbol"), order.get("side") or request.get("side"),
+            order.get("origType") or order.get("type") or request.get("type"), strategy, group_id,
+            _num(order.get("origQty") or request.get("quantity")),
+            _num(order.get("price") or request.get("price")),
+            _num(order.get("stopPrice") or request.get("stopPrice")),
+            order.get("status") or "NEW", _num(order.get("executedQty")) or 0.0, _num(order.get("avgPrice")),
+            int(order.get("time") or order.get("updateTime") or now), int(order.get("updateTime") or now))
+
+
+class Ledger:
+    """
+    SQLite order ledger. record_order / record_event only queue rows (cheap,
+    thread-safe); flush() waits until they are written. Queries see
+    everything recorded before them.
+    """
+
+    def __init__(self, path: str = LEDGER_FILE):
+        self.path = path
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._writing = threading.Lock()   # held while a batch is taken off the queue and written
+        self._wakeup = threading.Event()
+        self._space = threading.Condition()
+        self._thread = None
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: a crash keeps the file consistent, a power cut may lose the last batch
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+
+    # ------------------------------
+    # Recording
+    # ------------------------------
+    def record_order(self, label: Optional[str], order: Dict[str, Any], request: Optional[Dict[str, Any]] = None):
+        """
+        Queue a REST order (create / cancel / query reply); `request` fills
+        in what the reply leaves out.
+        """
+        row = _order_row(label, order or {}, request or {}, int(time.time() * 1000))
+        if row is not None:
+            self._put(("order", row))
+
+    def record_orders(self, label: Optional[str], orders: List[Dict[str, Any]]):
+        now = int(time.time() * 1000)
+        for order in orders:
+            row = _order_row(label, order, {}, now)
+            if row is not None:
+                self._put(("order", row))
+
+    def record_event(self, event: Dict[str, Any], received: Optional[float] = None):
+        """
+        ORDER_TRADE_UPDATE hook (OcoWatcher.add_listener / MockExchange.subscribe):
+        updates the order and stores the trade, if the event is one.
+        """
+        if event.get("e") != "ORDER_TRADE_UPDATE":
+            return
+        o = event["o"]
+        client_id = o.get("c")
+        if not client_id:
+            return
+        ts = int(o.get("T") or event.get("E") or time.time() * 1000)
+        strategy, group_id = classify(client_id)
+        self._put(("order", (client_id, o.get("i"), o["s"], o.get("S"), o.get("ot") or o.get("o"), strategy,
+                             group_id, _num(o.get("q")), _num(o.get("p")), _num(o.get("sp")), o.get("X") or "NEW",
+                             _num(o.get("z")) or 0.0, _num(o.get("ap")), ts, ts)))
+        if o.get("x") == "TRADE" and _num(o.get("l")):
+            self._put(("fill", (client_id, float(o["z"]), float(o["l"]), float(o["L"]), o.get("t"), ts)))
+
+    def _put(self, item):
+        if self._thread is None or not self._thread.is_alive():
+            self._start()
+        if len(self._pending) >= QUEUE_SIZE:
+            # Backpressure instead of dropping: the ledger must not lose orders
+            self._wakeup.set()
+            with self._space:
+                self._space.wait_for(lambda: len(self._pending) < QUEUE_SIZE, 5.0)
+        self._pending.append(item)
+        if len(self._pending) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    def flush(self, timeout: float = 30.0):
+        """
+        Block until everything queued so far is written.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        if not self._pending:
+            with self._writing:   # a batch may be in flight
+                return
+        done = threading.Event()
+        self._pending.append(("flush", done))
+        self._wakeup.set()
+        done.wait(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            while self._pending:
+                self._write_batch()
+
+    def _write_batch(self):
+        with self._writing:
+            done = self._write_locked()
+        with self._space:
+            self._space.notify_all()
+        for event in done:
+            event.set()
+
+    def _write_locked(self):
+        orders, fills, done = [], [], []
+        while self._pending and len(orders) + len(fills) < BATCH_SIZE:
+            kind, item = self._pending.popleft()
+            if kind == "order":
+                orders.append(item)
+            elif kind == "fill":
+                fills.append(item)
+            else:
+                done.append(item)
+        try:
+            with self._db:
+                self._db.executemany(_UPSERT, orders)
+                self._db.executemany("INSERT OR IGNORE INTO fills VALUES (?, ?, ?, ?, ?, ?)", fills)
+            self.written += len(orders) + len(fills)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.errors += len(orders) + len(fills)
+            log_error("Ledger write failed", {"error": str(e), "orders": len(orders), "fills": len(fills)})
+        return done
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def _query(self, sql: str, params=()) -> List[Dict[str, Any]]:
+        self.flush()
+        with self._read_lock:
+            return [dict(r) for r in self._reader.execute(sql, params)]
+
+    def order(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM orders WHERE client_order_id = ?", (client_order_id,))
+        return rows[0] if rows else None
+
+    def orders(self, symbol: Optional[str] = None, status: Optional[str] = None, strategy: Optional[str] = None,
+               group_id: Optional[str] = None, open_only: bool = False, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Latest orders matching every given filter, newest first.
+        """
+        where, params = [], []
+        for column, value in (("symbol", symbol), ("status", status), ("strategy", strategy),
+                              ("group_id", group_id)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if open_only:
+            where.append(f"status IN {_OPEN_SQL}")
+        sql = "SELECT * FROM orders"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._query(sql + " ORDER BY created_at DESC LIMIT ?", (*params, limit))
+
+    def open_groups(self, strategy: str = "oco", symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Groups of `strategy` (oco, twap, vwap, grid) with at least one open order.
+        """
+        sql = ("SELECT group_id, strategy, symbol, COUNT(*) AS open_orders,"
+               " GROUP_CONCAT(client_order_id) AS client_order_ids FROM orders"
+               f" WHERE status IN {_OPEN_SQL} AND strategy = ?")
+        params = [strategy]
+        if symbol is not None:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        rows = self._query(sql + " GROUP BY group_id ORDER BY group_id", params)
+        for r in rows:
+            r["client_order_ids"] = r["client_order_ids"].split(",")
+        return rows
+
+    def group(self, group_id: str, fills: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        One OCO group / TWAP job / grid: its orders and what they filled.
+        """
+        orders = self._query("SELECT * FROM orders WHERE group_id = ? ORDER BY created_at, client_order_id",
+                             (group_id,))
+        if not orders:
+            return None
+        executed = sum(o["executed_qty"] for o in orders)
+        notional = sum(o["executed_qty"] * (o["avg_price"] or 0) for o in orders)
+        statuses: Dict[str, int] = {}
+        for o in orders:
+            statuses[o["status"]] = statuses.get(o["status"], 0) + 1
+        out = {
+            "group_id": group_id, "strategy": orders[0]["strategy"], "symbol": orders[0]["symbol"],
+            "orders": len(orders), "open_orders": sum(statuses.get(s, 0) for s in OPEN), "statuses": statuses,
+            "quantity": sum(o["quantity"] or 0 for o in orders), "executed_qty": executed,
+            "avg_price": notional / executed if executed else None, "notional": notional,
+            "order_list": orders,
+        }
+        if fills:
+            out["fills"] = self._query(
+                "SELECT f.* FROM orders o JOIN fills f ON f.client_order_id = o.client_order_id"
+                " WHERE o.group_id = ? ORDER BY f.ts, f.client_order_id, f.cum_qty", (group_id,))
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        by_status = {r["status"]: r["n"] for r in
+                     self._query("SELECT status, COUNT(*) AS n FROM orders GROUP BY status")}
+        return {
+            "path": self.path,
+            "orders": sum(by_status.values()),
+            "by_status": by_status,
+            "fills": self._query("SELECT COUNT(*) AS n FROM fills")[0]["n"],
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+        }
+
+    # ------------------------------
+    # Reconciliation
+    # ------------------------------
+    def reconcile(self, client, symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Sync the ledger with the exchange in bulk: every open order from one
+        futures_get_open_orders call, then, per symbol, allOrders pages from
+        the oldest row that is open here but not there. Rows allOrders does
+        not return (older than its window) are asked one by one.
+        """
+        start = time.perf_counter()
+        requests = 0
+        if symbols:
+            open_orders = []
+            for symbol in symbols:
+                open_orders.extend(client.futures_get_open_orders(symbol=symbol))
+                requests += 1
+        else:
+            open_orders = client.futures_get_open_orders()
+            requests += 1
+        self.record_orders(None, open_orders)
+        still_open = {o["clientOrderId"] for o in open_orders}
+
+        stale: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for row in self._query(f"SELECT client_order_id, order_id, symbol, created_at FROM orders"
+                               f" WHERE status IN {_OPEN_SQL}"):
+            if row["client_order_id"] not in still_open and (not symbols or row["symbol"] in symbols):
+                stale.setdefault(row["symbol"], {})[row["client_order_id"]] = row
+
+        updated, missing = 0, []
+        for symbol, rows in stale.items():
+            if hasattr(client, "futures_get_all_orders"):
+                ids = [r["order_id"] for r in rows.values() if r["order_id"] is not None]
+                page = {"orderId": min(ids)} if ids else {"startTime": min(r["created_at"] for r in rows.values())}
+                while rows:
+                    batch = client.futures_get_all_orders(symbol=symbol, limit=ALL_ORDERS_LIMIT, **page)
+                    requests += 1
+                    found = [o for o in batch if o.get("clientOrderId") in rows]
+                    for o in found:
+                        del rows[o["clientOrderId"]]
+                    self.record_orders(None, found)
+                    updated += len(found)
+                    if len(batch) < ALL_ORDERS_LIMIT:
+                        break
+                    page = {"orderId": int(batch[-1]["orderId"]) + 1}
+            for client_id in rows:
+                try:
+                    self.record_order(None, client.futures_get_order(symbol=symbol, origClientOrderId=client_id))
+                    updated += 1
+                except Exception as e:
+                    log_error("Ledger reconcile lookup failed", {"order": client_id, "error": str(e)})
+                    missing.append(client_id)
+                requests += 1
+
+        self.flush()
+        summary = {"open": len(open_orders), "updated": updated, "missing": missing, "requests": requests,
+                   "ms": round((time.perf_counter() - start) * 1000, 1)}
+        log_info("Ledger reconciled", summary)
+        return summary
+
+    def close(self):
+        self.flush()
+        self._db.close()
+        self._reader.close()
+
+
+_shared: Optional[Ledger] = None
+_shared_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """
+    Process-wide ledger on LEDGER_FILE, opened on first use.
+    """
+    global _shared
+    if _shared is None or _shared.path != LEDGER_FILE:
+        with _shared_lock:
+            if _shared is None or _shared.path != LEDGER_FILE:
+                if _shared is not None:
+                    _shared.flush()
+                _shared = Ledger(LEDGER_FILE)
+    return _shared
+
+
+def record_order(label: Optional[str], order: Dict[str, Any], request: Optional[Dict[str, Any]] = None):
+    """
+    Executor hook; a ledger that cannot be opened never fails the order.
+    """
+    if not LEDGER_FILE:
+        return
+    try:
+        get_ledger().record_order(label, order, request)
+    except sqlite3.Error as e:
+        log_error("Ledger unavailable", {"error": str(e), "path": LEDGER_FILE})
+
+
+def record_event(event: Dict[str, Any], received: Optional[float] = None):
+    if not LEDGER_FILE:
+        return
+    try:
+        get_ledger().record_event(event, received)
+    except sqlite3.Error as e:
+        log_error("Ledger unavailable", {"error": str(e), "path": LEDGER_FILE})
+
+
+def flush():
+    """
+    Write out every queued row of the shared ledger.
+    """
+    if _shared is not None:
+        _shared.flush()
+
+
+atexit.register(flush)
+
+
+# ------------------------------
+# CLI: python bot.py ledger ...
+# ------------------------------
+def _format_order(o: Dict[str, Any]) -> str:
+    group = f" {o['strategy']}:{o['group_id']}" if o["group_id"] else f" {o['strategy'] or '-'}"
+    price = o["avg_price"] or o["price"] or o["stop_price"]
+    return (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(o['created_at'] / 1000))}  {o['symbol']:<10} "
+            f"{o['side'] or '-':<4} {o['type'] or '-':<18} {o['executed_qty']:g}/{o['quantity'] or 0:g} "
+            f"@ {price or '-'}  {o['status']:<16} {o['client_order_id']}{group}")
+
+
+def main(argv, connect) -> int:
+    ap = argparse.ArgumentParser(prog="bot.py ledger", description="Query the local order ledger")
+    ap.add_argument("--file", default=LEDGER_FILE)
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    orders = sub.add_parser("orders", help="list orders, newest first")
+    orders.add_argument("--symbol")
+    orders.add_argument("--status")
+    orders.add_argument("--strategy", help="market, limit, stop_limit, oco, twap, vwap, grid, ...")
+    orders.add_argument("--group", help="OCO group / TWAP plan / grid id")
+    orders.add_argument("--open", action="store_true", help="only NEW / PARTIALLY_FILLED")
+    orders.add_argument("--limit", type=int, default=50)
+    orders.add_argument("--json", action="store_true")
+
+    groups = sub.add_parser("open", help="groups with open orders (default: OCO)")
+    groups.add_argument("--strategy", default="oco")
+    groups.add_argument("--symbol")
+
+    group = sub.add_parser("group", help="orders and fills of one OCO group / TWAP job / grid")
+    group.add_argument("group_id")
+    group.add_argument("--fills", action="store_true")
+
+    rec = sub.add_parser("reconcile", help="sync open orders with the exchange")
+    rec.add_argument("--symbol", action="append", help="only these symbols (repeatable)")
+
+    sub.add_parser("stats", help="row counts")
+    args = ap.parse_args(argv)
+
+    if not args.file:
+        print("Ledger disabled (BOT_LEDGER_FILE is empty)")
+        return 2
+    try:
+        ledger = Ledger(args.file)
+    except sqlite3.Error as e:
+        print("Cannot open ledger:", e)
+        return 2
+
+    if args.command == "orders":
+        rows = ledger.orders(args.symbol, args.status, args.strategy, args.group, args.open, args.limit)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            for row in rows:
+                print(_format_order(row))
+    elif args.command == "open":
+        print(json.dumps(ledger.open_groups(args.strategy, args.symbol), indent=2))
+    elif args.command == "group":
+        report = ledger.group(args.group_id, args.fills)
+        if report is None:
+            print("No orders in group", args.group_id)
+            return 1
+        print(json.dumps(report, indent=2))
+    elif args.command == "reconcile":
+        print(json.dumps(ledger.reconcile(connect(), args.symbol), indent=2))
+    else:
+        print(json.dumps(ledger.stats(), indent=2))
+    ledger.close()
+    return 0
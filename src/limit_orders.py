@@ -1,6 +1,7 @@
 # /src/limit_orders.py
 
 from src.logger import log_info, log_error, log_api_request, log_api_response, log_order
+from src.ledger import record_order
 
 def execute_limit_order(client, symbol, side, quantity, price, time_in_force="GTC"):
     """
@@ -27,6 +28,7 @@ def execute_limit_order(client, symbol, side, quantity, price, time_in_force="GT
 
         log_api_response("LIMIT order executed", response)
         log_order("LIMIT", response)
+        record_order("LIMIT", response, request_payload)
 
         return response
 
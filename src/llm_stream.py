@@ -0,0 +1,119 @@
+# /src/llm_stream.py
+# Incremental JSON extraction for LLM output.
+# JsonObjectScanner finds the first balanced top-level {...} in text fed
+# piece by piece, so a streamed completion can be cut off as soon as the
+# object closes and trailing chatter never reaches json.loads.
+
+import json
+import time
+from typing import Optional, Dict, Any, Tuple
+
+
+class JsonObjectScanner:
+    """
+    Feed text chunks; `feed` returns the complete JSON object text once the
+    first top-level object is balanced, else None. Braces inside strings
+    are ignored.
+    """
+
+    def __init__(self):
+        self._buf = []
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.result = None
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.done:
+            return self.result
+
+        start = 0 if self._started else None
+        for i, ch in enumerate(chunk):
+            if start is None:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                    start = i
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._buf.append(chunk[start:i + 1])
+                    self.done = True
+                    self.result = "".join(self._buf)
+                    return self.result
+
+        if start is not None:
+            self._buf.append(chunk[start:])
+        return None
+
+
+def extract_first_json(text: str) -> Dict[str, Any]:
+    """
+    Parse the first balanced JSON object found in a complete model reply.
+    """
+    scanner = JsonObjectScanner()
+    obj = scanner.feed(text or "")
+    if obj is None:
+        raise ValueError("No JSON object found in model output.")
+    return json.loads(obj)
+
+
+def stream_first_json(transport, url: str, payload: Dict[str, Any],
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    POST a chat completion with stream=True, read server-sent events until
+    the first JSON object is complete, then close the connection.
+    Returns (parsed object, timings in ms).
+    """
+    payload = {**payload, "stream": True}
+    start = time.perf_counter()
+    timings = {"ttft_ms": None, "json_ms": None, "chunks": 0}
+
+    response = transport.request("POST", url, json=payload, headers=headers, stream=True)
+    try:
+        response.raise_for_status()
+        scanner = JsonObjectScanner()
+
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+
+            event = json.loads(data)
+            choices = event.get("choices") or []
+            if not choices:
+                continue
+            piece = (choices[0].get("delta") or {}).get("content") or ""
+            if not piece:
+                continue
+
+            timings["chunks"] += 1
+            if timings["ttft_ms"] is None:
+                timings["ttft_ms"] = (time.perf_counter() - start) * 1000
+
+            obj = scanner.feed(piece)
+            if obj is not None:
+                timings["json_ms"] = (time.perf_counter() - start) * 1000
+                return json.loads(obj), timings
+
+        raise ValueError("No JSON object found in model output.")
+    finally:
+        # Closing mid-stream drops the connection instead of draining the rest
+        response.close()
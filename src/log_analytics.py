@@ -0,0 +1,366 @@
+# /src/log_analytics.py
+# Streaming analytics over bot.log (and its rotated segments).
+# The active log is memory-mapped in fixed windows and split into lines
+# without loading it; type, message and timestamp are matched on raw bytes
+# (the logger always writes "type" then the message key first), and only
+# ERROR and "Command parsed" records are JSON-decoded. Memory stays bounded
+# by the number of distinct messages/error categories, not by the log size.
+#
+#   python bot.py logs [--type ERROR] [--message "LLM parsing"] [--since 24h] [--until ...]
+#                      [--segments] [--json] [--file bot.log]
+
+import argparse
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, Optional
+
+from src.log_rotation import list_segments, load_index
+
+_HEAD_RE = re.compile(rb'^\{"type": "([A-Z_]+)"(?:, "(?:message|endpoint|order_type)": "((?:[^"\\]|\\.)*)")?')
+_TS_KEY = b'"timestamp": "'
+
+_DIGITS_RE = re.compile(r"\d+")
+
+# Request/response pairing: by client order id when the request carries
+# one, else by endpoint label (oldest first). Only errors the exchange
+# returned (python-binance / MockExchange "APIError(code=...)") close a
+# pending request; anything left longer than STALE_REQUEST_S is given up.
+_CID_RE = re.compile(rb'"(?:newClientOrderId|clientOrderId)": "([^"]+)"')
+_API_ERROR_RE = re.compile(rb'APIError\(code=-?\d+\)')
+_REQUEST_LABEL = {b"LIMIT order executed": b"Placing LIMIT order",
+                  b"STOP-LIMIT order executed": b"Placing STOP-LIMIT order"}
+STALE_REQUEST_S = 120.0
+MAX_PENDING = 10000
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed histogram (~5% resolution) so percentiles over
+    millions of samples need constant memory.
+    """
+
+    GROWTH = 1.05
+    MIN_MS = 0.01
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, ms: float):
+        ms = max(ms, self.MIN_MS)
+        self.buckets[int(math.log(ms / self.MIN_MS, self.GROWTH))] += 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= target:
+                return min(self.max, self.MIN_MS * self.GROWTH ** (bucket + 1))
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+def iter_lines_mmap(path: str, window: int = 16 * 1024 * 1024) -> Iterator[bytes]:
+    """
+    Yield the lines of a file (no trailing newline) through a sliding mmap
+    window, so resident memory stays around `window` bytes for any file size.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    window -= window % mmap.ALLOCATIONGRANULARITY
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        carry = b""
+        while offset < size:
+            length = min(window, size - offset)
+            with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as mm:
+                pos = 0
+                find = mm.find
+                first = mm.find(b"\n")
+                if carry:
+                    if first == -1:
+                        carry += mm[:]
+                        offset += length
+                        continue
+                    yield carry + mm[:first]
+                    carry = b""
+                    pos = first + 1
+                while pos < length:
+                    end = find(b"\n", pos)
+                    if end == -1:
+                        carry = mm[pos:length]
+                        break
+                    if end > pos:
+                        yield mm[pos:end]
+                    pos = end + 1
+            offset += length
+        if carry:
+            yield carry
+
+
+def iter_lines_gzip(path: str) -> Iterator[bytes]:
+    with gzip.open(path, "rb") as f:
+        for line in f:
+            yield line.rstrip(b"\n")
+
+
+def parse_time(value: Optional[str], now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Accepts ISO timestamps, "yesterday", "today" or relative "30m" / "24h" / "7d".
+    Returns an ISO string comparable with the log timestamps (UTC).
+    """
+    if not value:
+        return None
+    now = now or datetime.utcnow()
+    v = value.strip().lower()
+    if v == "today":
+        return now.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+    if v == "yesterday":
+        return (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd])", v)
+    if m:
+        unit = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[m.group(2)]
+        return (now - timedelta(**{unit: float(m.group(1))})).isoformat()
+    return datetime.fromisoformat(value).isoformat()
+
+
+def error_category(entry: Dict[str, Any]) -> str:
+    """
+    "LLM parsing failed: Extra data: line 7 column 1 (char 96)"
+      -> "LLM parsing failed: Extra data: line N column N (char N)"
+    """
+    error = str((entry.get("data") or {}).get("error", ""))
+    return f"{entry.get('message', '')}: {_DIGITS_RE.sub('N', error)[:120]}"
+
+
+def _sources(path: str, include_segments: bool, since: Optional[str], until: Optional[str]):
+    if include_segments:
+        for seg in list_segments(path):
+            try:
+                idx = load_index(seg)
+                if since and idx.get("last_timestamp") and idx["last_timestamp"] < since:
+                    continue
+                if until and idx.get("first_timestamp") and idx["first_timestamp"] > until:
+                    continue
+            except (OSError, ValueError):
+                pass
+            yield seg, iter_lines_gzip(seg)
+    yield path, iter_lines_mmap(path)
+
+
+def analyze(path: str, types=None, message: Optional[str] = None, since: Optional[str] = None,
+            until: Optional[str] = None, include_segments: bool = False) -> Dict[str, Any]:
+    """
+    Single streaming pass over the log. Returns aggregated counts, error
+    categories, parse-path stats and API request->response latencies.
+    """
+    wanted_types = {t.upper() for t in types} if types else None
+    wanted_bytes = {t.encode() for t in wanted_types} if wanted_types else None
+    since_b = since.encode() if since else None
+    until_b = until.encode() if until else None
+
+    counts = Counter()
+    messages = Counter()
+    errors = Counter()
+    parse_paths = Counter()
+    llm_parse = LatencyHistogram()
+    api = LatencyHistogram()
+    pending_ids: Dict[bytes, datetime] = {}        # client order id -> request time
+    pending_labels: Dict[bytes, deque] = {}       # endpoint label -> request times
+    unanswered = 0
+    first_ts = last_ts = None
+    scanned = 0
+    matched = 0
+
+    for _, lines in _sources(path, include_segments, since, until):
+        for line in lines:
+            scanned += 1
+            # timestamp is the last key the logger writes
+            i = line.rfind(_TS_KEY)
+            ts = line[i + 14:line.index(b'"', i + 14)] if i != -1 else None
+            if ts is not None:
+                if since_b and ts < since_b:
+                    continue
+                if until_b and ts > until_b:
+                    continue
+
+            head = _HEAD_RE.match(line)
+            if head is None:
+                continue
+            entry_type = head.group(1)
+
+            # Request/response pairing needs every API record in the window
+            is_api = entry_type in (b"API_REQUEST", b"API_RESPONSE")
+            is_error = entry_type == b"ERROR"
+            if is_api and ts is not None:
+                t = datetime.fromisoformat(ts.decode())
+                label = head.group(2) or b""
+                cid = _CID_RE.search(line)
+                cid = cid.group(1) if cid else None
+                if entry_type == b"API_REQUEST":
+                    if cid is not None:
+                        if len(pending_ids) >= MAX_PENDING:
+                            del pending_ids[next(iter(pending_ids))]
+                            unanswered += 1
+                        pending_ids[cid] = t
+                    else:
+                        pending_labels.setdefault(label, deque(maxlen=MAX_PENDING)).append(t)
+                else:
+                    start = pending_ids.pop(cid, None) if cid is not None else None
+                    if start is None:
+                        waiting = pending_labels.get(_REQUEST_LABEL.get(label, label))
+                        while waiting and (t - waiting[0]).total_seconds() > STALE_REQUEST_S:
+                            waiting.popleft()
+                            unanswered += 1
+                        if waiting:
+                            start = waiting.popleft()
+                    if start is not None:
+                        api.add((t - start).total_seconds() * 1000)
+            elif is_error and _API_ERROR_RE.search(line):
+                # a call the exchange refused never gets its response
+                cid = _CID_RE.search(line)
+                if cid is not None:
+                    if pending_ids.pop(cid.group(1), None) is not None:
+                        unanswered += 1
+                else:
+                    oldest = min((q for q in pending_labels.values() if q), key=lambda q: q[0], default=None)
+                    if oldest is not None:
+                        oldest.popleft()
+                        unanswered += 1
+
+            if wanted_bytes and entry_type not in wanted_bytes:
+                continue
+            raw_msg = head.group(2) or b""
+            msg = raw_msg.decode("utf-8", "replace")
+            if "\\" in msg:
+                msg = json.loads(b'"' + raw_msg + b'"')
+            if message and message.lower() not in msg.lower():
+                continue
+
+            matched += 1
+            counts[entry_type.decode()] += 1
+            messages[msg] += 1
+            if is_error:
+                try:
+                    errors[error_category(json.loads(line))] += 1
+                except ValueError:
+                    errors[f"{msg}: <unreadable>"] += 1
+            if msg == "Command parsed":
+                try:
+                    data = json.loads(line).get("data") or {}
+                except ValueError:
+                    data = {}
+                parse_paths[data.get("path", "?")] += 1
+                if data.get("path") == "llm" and data.get("json_ms") is not None:
+                    llm_parse.add(float(data["json_ms"]))
+
+            if ts is not None:
+                if first_ts is None or ts < first_ts:
+                    first_ts = ts
+                if last_ts is None or ts > last_ts:
+                    last_ts = ts
+
+    llm_failed = sum(n for cat, n in errors.items() if cat.startswith("LLM parsing failed"))
+    llm_attempts = llm_failed + parse_paths.get("llm", 0)
+
+    return {
+        "scanned": scanned,
+        "matched": matched,
+        "first_timestamp": first_ts.decode() if first_ts else None,
+        "last_timestamp": last_ts.decode() if last_ts else None,
+        "counts_by_type": dict(counts.most_common()),
+        "top_messages": dict(messages.most_common(15)),
+        "error_categories": dict(errors.most_common(20)),
+        "parsing": {
+            "paths": dict(parse_paths),
+            "llm_attempts": llm_attempts,
+            "llm_failed": llm_failed,
+            "llm_failure_rate": round(llm_failed / llm_attempts, 4) if llm_attempts else None,
+            "llm_latency": llm_parse.summary(),
+        },
+        "api_latency": api.summary(),
+        "api_unanswered": unanswered + len(pending_ids) + sum(len(q) for q in pending_labels.values()),
+    }
+
+
+def _print_report(report: Dict[str, Any]):
+    print(f"records scanned: {report['scanned']}, matched: {report['matched']}")
+    print(f"time range: {report['first_timestamp']} -> {report['last_timestamp']}")
+
+    def section(title, mapping):
+        if not mapping:
+            return
+        print(f"\n{title}:")
+        for k, v in mapping.items():
+            print(f"  {v:>8}  {k}")
+
+    section("counts by type", report["counts_by_type"])
+    section("top messages", report["top_messages"])
+    section("error categories", report["error_categories"])
+
+    p = report["parsing"]
+    print("\nparsing:")
+    print(f"  paths: {p['paths']}")
+    print(f"  LLM failures: {p['llm_failed']}/{p['llm_attempts']} (rate {p['llm_failure_rate']})")
+    print(f"  LLM latency: {p['llm_latency']}")
+    print(f"\nAPI request->response latency: {report['api_latency']}")
+    print(f"API requests without response: {report['api_unanswered']}")
+
+
+def main(argv=None) -> int:
+    from src.logger import LOG_FILE
+
+    ap = argparse.ArgumentParser(prog="bot.py logs", description="Analyze bot.log")
+    ap.add_argument("--file", default=LOG_FILE)
+    ap.add_argument("--type", action="append", help="record type (repeatable), e.g. ERROR")
+    ap.add_argument("--message", help="case-insensitive substring of message/endpoint")
+    ap.add_argument("--since", help="ISO time, today, yesterday, or relative like 24h")
+    ap.add_argument("--until", help="ISO time, today, yesterday, or relative like 1h")
+    ap.add_argument("--segments", action="store_true", help="include rotated .gz segments")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args(argv)
+
+    try:
+        since, until = parse_time(args.since), parse_time(args.until)
+    except ValueError as e:
+        print("Invalid time:", e)
+        return 2
+
+    report = analyze(args.file, args.type, args.message, since, until, args.segments)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
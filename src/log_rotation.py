@@ -0,0 +1,178 @@
+# /src/log_rotation.py
+# Log segments and their sidecar indexes.
+#
+# When the active log is rotated it becomes a closed segment:
+#   bot.log.<stamp>.gz        gzip, written as independent ~64 KB members
+#   bot.log.<stamp>.idx.json  time range, counts per type, and the location of
+#                             every ORDER_EXECUTION / ERROR record as
+#                             [member offset, offset in member]
+# <stamp> is YYYYmmddTHHMMSSffffff (UTC) so names sort chronologically.
+#
+# Concatenated gzip members are still a normal .gz file (zcat works), and a
+# reader can seek to one member and decompress only that block.
+
+import glob
+import gzip
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from typing import Dict, Any, Iterator, Iterable, List, Optional
+
+INDEXED_TYPES = ("ORDER_EXECUTION", "ERROR")
+BLOCK_SIZE = 64 * 1024
+
+_TYPE_RE = re.compile(rb'"type": "([A-Z_]+)"')
+_TS_RE = re.compile(rb'"timestamp": "([0-9T:.\-]+)"')
+
+
+class SegmentIndex:
+    """
+    Running index of one log file, updated as lines are appended.
+    Offsets are into the uncompressed file.
+    """
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.first_ts: Optional[str] = None
+        self.last_ts: Optional[str] = None
+        self.offsets: Dict[str, List[int]] = {t: [] for t in INDEXED_TYPES}
+        self.size = 0
+        self.records = 0
+
+    def add(self, entry_type: Optional[str], timestamp: Optional[str], length: int):
+        if entry_type:
+            self.counts[entry_type] = self.counts.get(entry_type, 0) + 1
+            if entry_type in self.offsets:
+                self.offsets[entry_type].append(self.size)
+        if timestamp:
+            if self.first_ts is None:
+                self.first_ts = timestamp
+            self.last_ts = timestamp
+        self.size += length
+        self.records += 1
+
+    def update_from_file(self, path: str):
+        """
+        Index the lines appended to `path` past self.size (by this or
+        another process).
+        """
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            f.seek(self.size)
+            for line in f:
+                t = _TYPE_RE.search(line)
+                ts = _TS_RE.search(line)
+                self.add(t.group(1).decode() if t else None,
+                         ts.group(1).decode() if ts else None,
+                         len(line))
+
+    @classmethod
+    def from_file(cls, path: str) -> "SegmentIndex":
+        """
+        Rebuild the index of an existing (uncompressed) log file.
+        """
+        index = cls()
+        index.update_from_file(path)
+        return index
+
+
+def segment_name(log_path: str, when: Optional[datetime] = None) -> str:
+    when = when or datetime.utcnow()
+    while True:
+        candidate = f"{log_path}.{when.strftime('%Y%m%dT%H%M%S%f')}"
+        if not os.path.exists(candidate + ".gz"):
+            return candidate
+        when = when.replace(microsecond=(when.microsecond + 1) % 1000000)
+
+
+def compress_segment(path: str, index: SegmentIndex, segment: str) -> str:
+    """
+    Compress the closed log file `path` into `segment`.gz as independent
+    gzip members cut on line boundaries, write `segment`.idx.json, and
+    remove `path`. Returns the .gz path.
+    """
+    gz_path = segment + ".gz"
+    blocks = []   # [uncompressed start, compressed start]
+
+    with open(path, "rb") as src, open(gz_path, "wb") as dst:
+        raw_pos = 0
+        while True:
+            chunk = src.read(BLOCK_SIZE)
+            if not chunk:
+                break
+            if not chunk.endswith(b"\n"):
+                chunk += src.readline()
+            blocks.append([raw_pos, dst.tell()])
+            dst.write(gzip.compress(chunk, compresslevel=6, mtime=0))
+            raw_pos += len(chunk)
+
+    def locate(offset):
+        # binary search for the block containing offset
+        lo, hi = 0, len(blocks) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if blocks[mid][0] <= offset:
+                lo = mid
+            else:
+                hi = mid - 1
+        return [blocks[lo][1], offset - blocks[lo][0]]
+
+    sidecar = {
+        "segment": os.path.basename(gz_path),
+        "first_timestamp": index.first_ts,
+        "last_timestamp": index.last_ts,
+        "records": index.records,
+        "bytes": index.size,
+        "counts": index.counts,
+        "blocks": blocks,
+        "offsets": {t: [locate(o) for o in offs] for t, offs in index.offsets.items()},
+    }
+    tmp = segment + ".idx.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump(sidecar, f)
+    os.replace(tmp, segment + ".idx.json")
+    os.remove(path)
+    return gz_path
+
+
+def list_segments(log_path: str) -> List[str]:
+    """
+    Closed segments of `log_path`, oldest first.
+    """
+    return sorted(glob.glob(glob.escape(log_path) + ".*.gz"))
+
+
+def load_index(gz_path: str) -> Dict[str, Any]:
+    with open(gz_path[:-3] + ".idx.json") as f:
+        return json.load(f)
+
+
+def _read_member(f, compressed_offset: int) -> bytes:
+    f.seek(compressed_offset)
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    out = []
+    while not d.eof:
+        data = f.read(16 * 1024)
+        if not data:
+            break
+        out.append(d.decompress(data))
+    return b"".join(out)
+
+
+def read_indexed(gz_path: str, types: Iterable[str] = INDEXED_TYPES) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the indexed records of the given types from a closed segment,
+    decompressing only the blocks that contain them.
+    """
+    index = load_index(gz_path)
+    wanted = sorted(loc for t in types for loc in index["offsets"].get(t, []))
+    block_data, block_at = None, None
+    with open(gz_path, "rb") as f:
+        for member, inner in wanted:
+            if member != block_at:
+                block_data, block_at = _read_member(f, member), member
+            end = block_data.index(b"\n", inner)
+            yield json.loads(block_data[inner:end])
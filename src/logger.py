@@ -1,21 +1,290 @@
 # src/logger.py
 
+import atexit
 import json
+import os
+import threading
+from collections import deque
 from datetime import datetime
 
-LOG_FILE = "bot.log"   # correct relative path
+from src.log_rotation import SegmentIndex, compress_segment, segment_name
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Anchored to the project root so the log doesn't depend on the working directory
+LOG_FILE = os.getenv(
+    "BOT_LOG_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bot.log"),
+)
+
+# Buffered writer settings (see configure)
+ASYNC_LOGGING = True
+FLUSH_INTERVAL = 0.2      # seconds between flushes of a partial batch
+FLUSH_SIZE = 64           # entries per write batch
+QUEUE_SIZE = 10000        # pending entries before the full-queue policy applies
+QUEUE_FULL_POLICY = "block"   # "block" (backpressure) or "drop"
+BLOCK_TIMEOUT = 1.0       # max seconds a producer waits on a full queue before dropping
+
+# Rotation (see src/log_rotation.py); None disables that trigger.
+# Every process appending to LOG_FILE takes an flock on LOG_FILE.lock for
+# each write and for rotation, catches its index up on lines the others
+# appended and reopens the file once another process has rotated it away.
+# The age trigger counts from when the active file was started, recorded in
+# LOG_FILE.opened (its first record may be older, e.g. a log kept from an
+# earlier version of the bot).
+ROTATE_BYTES = 10 * 1024 * 1024
+ROTATE_SECONDS = 24 * 3600
+
+
+class _LogWriter:
+    """
+    Background thread that owns the log file handle.
+    Producers append serialized records (line, type, timestamp) to an
+    in-memory buffer; the thread writes them in batches every FLUSH_INTERVAL
+    seconds, or as soon as FLUSH_SIZE records are pending or someone waits
+    for a flush.
+    """
+
+    def __init__(self):
+        self.buffer = deque()
+        self.dropped = 0
+        self.written = 0
+        self._file = None
+        self._path = None
+        self._index = None
+        self._opened_at = None
+        self._lock_fd = None
+        self._lock_path = None
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()   # writer thread vs sync writes
+        self._wakeup = threading.Event()
+        self._space = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+
+    def put(self, record: tuple, wait: bool = False):
+        self.start()
+        if len(self.buffer) >= QUEUE_SIZE:
+            if QUEUE_FULL_POLICY == "drop" and not wait:
+                self.dropped += 1
+                return
+            # Backpressure: wait for the writer to drain
+            self._wakeup.set()
+            with self._space:
+                self._space.wait_for(lambda: len(self.buffer) < QUEUE_SIZE, BLOCK_TIMEOUT)
+            if len(self.buffer) >= QUEUE_SIZE and not wait:
+                self.dropped += 1
+                return
+
+        done = threading.Event() if wait else None
+        self.buffer.append((record, done))
+        if done is not None or len(self.buffer) >= FLUSH_SIZE:
+            self._wakeup.set()
+        if done is not None:
+            done.wait(BLOCK_TIMEOUT)
+
+    def flush(self, timeout: float = 5.0):
+        """
+        Block until everything buffered so far is on disk.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self.buffer.append((None, done))
+        self._wakeup.set()
+        done.wait(timeout)
+
+    def _lock_file(self):
+        if fcntl is None:
+            return
+        path = f"{LOG_FILE}.lock"
+        if self._lock_path != path:
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+            self._lock_fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._lock_path = path
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def _unlock_file(self):
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _current(self) -> bool:
+        # False once another process rotated (removed) the file we hold open
+        try:
+            return os.stat(self._path).st_ino == os.fstat(self._file.fileno()).st_ino
+        except OSError:
+            return False
+
+    def _open(self):
+        # Called with the file lock held
+        if self._file is not None and self._path == LOG_FILE and self._current():
+            if os.fstat(self._file.fileno()).st_size != self._index.size:
+                self._index.update_from_file(self._path)
+            return self._file
+        if self._file is not None:
+            self._file.close()
+        self._path = LOG_FILE
+        self._index = SegmentIndex.from_file(LOG_FILE)
+        self._opened_at = self._segment_opened()
+        self._file = open(LOG_FILE, "a")
+        return self._file
+
+    def _segment_opened(self) -> datetime:
+        # Called with the file lock held. An empty file, or one no process
+        # has recorded a start for yet, starts its segment now
+        path = f"{LOG_FILE}.opened"
+        if self._index.records:
+            try:
+                with open(path) as f:
+                    return datetime.fromisoformat(f.read().strip())
+            except (OSError, ValueError):
+                pass
+        now = datetime.utcnow()
+        try:
+            with open(path, "w") as f:
+                f.write(now.isoformat())
+        except OSError as e:
+            print("Failed to write log:", e)
+        return now
+
+    def _should_rotate(self) -> bool:
+        if self._index is None or self._index.records == 0:
+            return False
+        if ROTATE_BYTES is not None and self._index.size >= ROTATE_BYTES:
+            return True
+        if ROTATE_SECONDS is not None:
+            age = (datetime.utcnow() - self._opened_at).total_seconds()
+            return age >= ROTATE_SECONDS
+        return False
+
+    def rotate(self):
+        """
+        Close the active file and turn it into a compressed, indexed segment.
+        Runs with the file lock held, right after _open() caught the index up.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            compress_segment(self._path, self._index, segment_name(self._path))
+        except Exception as e:
+            print("Failed to rotate log:", e)
+        self._index = None
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(FLUSH_INTERVAL)
+            self._wakeup.clear()
+            while self.buffer:
+                batch = []
+                while self.buffer and len(batch) < FLUSH_SIZE:
+                    batch.append(self.buffer.popleft())
+                self._write_batch(batch)
+                with self._space:
+                    self._space.notify_all()
+
+    def _write_batch(self, batch):
+        lines = [record for record, _ in batch if record is not None]
+        try:
+            if lines:
+                with self._io_lock:
+                    self._lock_file()
+                    try:
+                        f = self._open()
+                        if self._should_rotate():
+                            self.rotate()
+                            f = self._open()
+                        for line, entry_type, timestamp in lines:
+                            self._index.add(entry_type, timestamp, len(line.encode("utf-8")))
+                        f.write("".join(line for line, _, _ in lines))
+                        f.flush()
+                    finally:
+                        self._unlock_file()
+                self.written += len(lines)
+        except Exception as e:
+            print("Failed to write log:", e)
+        finally:
+            for _, done in batch:
+                if done is not None:
+                    done.set()
+
+
+_writer = _LogWriter()
+
+
+def configure(async_logging=None, flush_interval=None, flush_size=None,
+              queue_size=None, queue_full_policy=None, rotate_bytes=..., rotate_seconds=...):
+    """
+    Adjust the buffered writer and rotation. Settings apply immediately;
+    pass rotate_bytes=None / rotate_seconds=None to disable that trigger.
+    """
+    global ASYNC_LOGGING, FLUSH_INTERVAL, FLUSH_SIZE, QUEUE_SIZE, QUEUE_FULL_POLICY
+    global ROTATE_BYTES, ROTATE_SECONDS
+    if rotate_bytes is not ...:
+        ROTATE_BYTES = rotate_bytes
+    if rotate_seconds is not ...:
+        ROTATE_SECONDS = rotate_seconds
+    if async_logging is not None:
+        if not async_logging:
+            _writer.flush()
+        ASYNC_LOGGING = async_logging
+    if flush_interval is not None:
+        FLUSH_INTERVAL = flush_interval
+    if flush_size is not None:
+        FLUSH_SIZE = flush_size
+    if queue_full_policy is not None:
+        if queue_full_policy not in ("block", "drop"):
+            raise ValueError("queue_full_policy must be 'block' or 'drop'")
+        QUEUE_FULL_POLICY = queue_full_policy
+    if queue_size is not None:
+        QUEUE_SIZE = queue_size
+
+
+def flush():
+    """
+    Write out every pending log entry.
+    """
+    _writer.flush()
+
+
+atexit.register(flush)
+
+
+def _write_log_sync(record: tuple):
+    # Same file handle, index and rotation as the background writer
+    _writer._write_batch([(record, None)])
 
 
 def _write_log(entry: dict):
     """
     Write a single log entry in JSON format.
+    Entries are buffered for the background writer; ERROR entries wait until
+    they are on disk so a crash right after can't lose them.
     """
+    entry["timestamp"] = datetime.utcnow().isoformat()
+    # Serialized on the caller's thread: callers may change the dicts they
+    # logged as soon as this returns
     try:
-        entry["timestamp"] = datetime.utcnow().isoformat()
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        record = (json.dumps(entry) + "\n", entry.get("type"), entry["timestamp"])
     except Exception as e:
         print("Failed to write log:", e)
+        return
+    if not ASYNC_LOGGING:
+        _write_log_sync(record)
+        return
+    _writer.put(record, wait=record[1] == "ERROR")
 
 
 def log_info(message: str, data: dict = None):
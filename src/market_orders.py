@@ -7,6 +7,7 @@ from src.logger import (
     log_api_response,
     log_order
 )
+from src.ledger import record_order
 
 def execute_market_order(client, symbol, side, quantity):
     order_payload = {
@@ -29,6 +30,7 @@ def execute_market_order(client, symbol, side, quantity):
             "quantity": quantity,
             "response": response
         })
+        record_order("MARKET", response, order_payload)
 
         return response
 
@@ -0,0 +1,205 @@
+# /src/metrics.py
+# Per-node timing for the LangGraph workflow.
+# build_bot_graph wraps every node with timed(), which records the node's
+# wall time into a histogram labelled by node, order type, symbol and
+# outcome ("ok" / "error"). Recording costs two perf_counter() calls, one
+# dict lookup and a bisect (see benchmarks/bench_metrics.py).
+#
+# Exposed as Prometheus text (render(), served by `bot.py serve
+# --metrics-port`), as a dict (summary(), `bot.py send --metrics`) and as a
+# one-line dump after a one-shot CLI command (format_summary()).
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+
+ENABLED = True
+
+# Upper bounds in seconds; nodes range from microseconds (route) to
+# minutes (a waiting TWAP)
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0, 300.0)
+
+METRIC = "bot_node_duration_seconds"
+LABELS = ("node", "order_type", "symbol", "outcome")
+
+
+def configure(enabled=None):
+    global ENABLED
+    if enabled is not None:
+        ENABLED = enabled
+
+
+class Histogram:
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q-quantile (the max for the
+        overflow bucket).
+        """
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class NodeMetrics:
+
+    def __init__(self):
+        self._series: Dict[Tuple[str, str, str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, node: str, order_type, symbol, outcome: str, seconds: float):
+        key = (node, order_type or "", symbol or "", outcome)
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = Histogram()
+            hist.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def _snapshot(self):
+        with self._lock:
+            return [(key, list(h.counts), h.count, h.sum, h.max) for key, h in self._series.items()]
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format.
+        """
+        lines = [f"# HELP {METRIC} Wall time of each LangGraph node.", f"# TYPE {METRIC} histogram"]
+        for key, counts, count, total, _ in self._snapshot():
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(LABELS, key))
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{METRIC}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{METRIC}_sum{{{labels}}} {total:.9f}")
+            lines.append(f"{METRIC}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, by: Tuple[str, ...] = ("node",)) -> Dict[str, Dict[str, Any]]:
+        """
+        Series merged over every label not in `by`:
+        {"validate_node": {"count", "errors", "mean_ms", "p50_ms", "p95_ms", "max_ms"}}.
+        p50 / p95 are bucket upper bounds.
+        """
+        merged: Dict[str, Histogram] = {}
+        errors: Dict[str, int] = {}
+        positions = [LABELS.index(name) for name in by]
+        for key, counts, count, total, peak in self._snapshot():
+            name = "/".join(key[i] or "-" for i in positions)
+            hist = merged.get(name)
+            if hist is None:
+                hist = merged[name] = Histogram()
+            hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+            hist.count += count
+            hist.sum += total
+            hist.max = max(hist.max, peak)
+            if key[3] != "ok":
+                errors[name] = errors.get(name, 0) + count
+        return {name: {"count": h.count, "errors": errors.get(name, 0),
+                       "mean_ms": round(h.sum / h.count * 1000, 3),
+                       "p50_ms": round(h.quantile(0.5) * 1000, 3),
+                       "p95_ms": round(h.quantile(0.95) * 1000, 3),
+                       "max_ms": round(h.max * 1000, 3)}
+                for name, h in merged.items() if h.count}
+
+    def format_summary(self) -> str:
+        parts = [f"{name} {s['mean_ms']:.2f} ms" + (f" x{s['count']}" if s["count"] > 1 else "")
+                 + (f" ({s['errors']} failed)" if s["errors"] else "")
+                 for name, s in self.summary().items()]
+        return ", ".join(parts)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_shared = NodeMetrics()
+
+
+def get_metrics() -> NodeMetrics:
+    return _shared
+
+
+def timed(node: str, fn, metrics: Optional[NodeMetrics] = None):
+    """
+    Wrap a graph node so each call is recorded under `node`. Order type and
+    symbol come from the state the node receives (done_node receives the
+    executor's response, so its labels are often empty, and for a TWAP it
+    is a list).
+    """
+    metrics = metrics or _shared
+    clock = time.perf_counter
+
+    def wrapper(state):
+        if not ENABLED:
+            return fn(state)
+        outcome = "error"
+        start = clock()
+        try:
+            out = fn(state)
+            outcome = "ok"
+            return out
+        finally:
+            if isinstance(state, dict):
+                metrics.observe(node, state.get("order_type"), state.get("symbol"), outcome, clock() - start)
+            else:
+                # done_node after a TWAP receives the list of slice responses
+                metrics.observe(node, None, None, outcome, clock() - start)
+
+    wrapper.__name__ = node
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1", metrics: Optional[NodeMetrics] = None):
+    """
+    Serve GET /metrics on a daemon thread; returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics or _shared
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,820 @@
+# /src/mock_exchange.py
+# In-process stand-in for the Binance USDT-M Futures REST API, for offline
+# testing and benchmarks. Implements the subset of python-binance's Client
+# the bot uses:
+#   futures_create_order (MARKET, LIMIT, STOP, STOP_MARKET, TAKE_PROFIT,
+#   TAKE_PROFIT_MARKET), futures_place_batch_order, futures_cancel_order,
+#   futures_get_order, futures_get_open_orders, futures_get_all_orders,
+#   futures_symbol_ticker, futures_exchange_info,
+#   futures_stream_get_listen_key / futures_stream_keepalive
+# backed by a price-time-priority order book per symbol.
+#
+# Liquidity: besides resting orders, a configurable price feed (set_price)
+# acts as the rest of the market, quoting feed price +/- spread_bps / 2.
+# Taker orders match resting orders first and then the feed; resting limit
+# orders fill when the feed crosses them; STOP / TAKE_PROFIT orders trigger
+# on feed moves.
+#
+# Latency injection (latency + jitter seconds per call) and rate-limit
+# emulation (REQUEST_WEIGHT per minute, ORDERS per 10 s / minute, HTTP 429
+# with code -1003) make it usable for load tests. Order updates are pushed
+# to subscribers as ORDER_TRADE_UPDATE events, and serve_user_stream()
+# exposes them on a local websocket like the real user-data stream.
+#
+# get_client() returns one when BOT_EXCHANGE=mock (see binance_client.py).
+#
+# DepthReplay plays recorded depth snapshot + diff messages for one symbol
+# (REST futures_order_book and a local diff-depth websocket), as the feed
+# for the order-book mirror (order_book.py).
+
+import bisect
+import itertools
+import json
+import random
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Callable
+
+from src.rate_limiter import DEFAULT_RATE_LIMITS
+from src.symbol_filters import SymbolFilters
+
+DEFAULT_SYMBOLS = {
+    # symbol: (price, tickSize, stepSize, minQty, maxQty, minNotional)
+    "BTCUSDT": (86000.0, "0.10", "0.001", "0.001", "1000", "100"),
+    "ETHUSDT": (3200.0, "0.01", "0.001", "0.001", "10000", "20"),
+    "SOLUSDT": (140.0, "0.01", "1", "1", "1000000", "5"),
+    "BNBUSDT": (600.0, "0.010", "0.01", "0.01", "100000", "5"),
+}
+
+_INTERVAL_SECONDS = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+
+_OPEN = ("NEW", "PARTIALLY_FILLED")
+_CONDITIONAL = ("STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET")
+
+
+class MockAPIError(Exception):
+    """
+    Same attributes as python-binance's BinanceAPIException.
+    """
+
+    def __init__(self, code: int, message: str, status_code: int = 400):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+        self.status_code = status_code
+
+
+class MockResponse:
+    # python-binance keeps the last requests.Response on client.response
+
+    def __init__(self, status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _fmt(x: float) -> str:
+    return format(Decimal(repr(float(x))).normalize(), "f")
+
+
+class _Order:
+
+    __slots__ = ("order_id", "client_id", "symbol", "side", "type", "orig_type", "status", "price",
+                 "stop_price", "qty", "filled", "quote", "tif", "reduce_only", "time", "update_time",
+                 "triggered")
+
+    def __init__(self, order_id, client_id, symbol, side, order_type, qty, price, stop_price, tif,
+                 reduce_only, now):
+        self.order_id = order_id
+        self.client_id = client_id
+        self.symbol = symbol
+        self.side = side
+        self.type = order_type
+        self.orig_type = order_type
+        self.status = "NEW"
+        self.price = price
+        self.stop_price = stop_price
+        self.qty = qty
+        self.filled = 0.0
+        self.quote = 0.0
+        self.tif = tif
+        self.reduce_only = reduce_only
+        self.time = now
+        self.update_time = now
+        self.triggered = False
+
+    @property
+    def remaining(self) -> float:
+        # quantities are step-size multiples; rounding drops float residue
+        return round(self.qty - self.filled, 12)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "orderId": self.order_id,
+            "symbol": self.symbol,
+            "status": self.status,
+            "clientOrderId": self.client_id,
+            "price": _fmt(self.price or 0),
+            "avgPrice": _fmt(self.quote / self.filled) if self.filled else "0",
+            "origQty": _fmt(self.qty),
+            "executedQty": _fmt(self.filled),
+            "cumQuote": _fmt(self.quote),
+            "timeInForce": self.tif,
+            "type": self.type,
+            "origType": self.orig_type,
+            "reduceOnly": self.reduce_only,
+            "side": self.side,
+            "stopPrice": _fmt(self.stop_price or 0),
+            "time": self.time,
+            "updateTime": self.update_time,
+        }
+
+
+class _Book:
+    """
+    Resting limit orders of one symbol. Each side keeps a sorted list of
+    price keys (negated for bids, so index 0 is always the best price) and
+    a FIFO queue per price level.
+    """
+
+    def __init__(self):
+        self.keys = {"BUY": [], "SELL": []}
+        self.levels = {"BUY": {}, "SELL": {}}
+
+    @staticmethod
+    def _key(side, price):
+        return -price if side == "BUY" else price
+
+    def add(self, order: _Order):
+        key = self._key(order.side, order.price)
+        levels = self.levels[order.side]
+        level = levels.get(key)
+        if level is None:
+            level = levels[key] = deque()
+            bisect.insort(self.keys[order.side], key)
+        level.append(order)
+
+    def remove(self, order: _Order):
+        key = self._key(order.side, order.price)
+        level = self.levels[order.side].get(key)
+        if level is None:
+            return
+        try:
+            level.remove(order)
+        except ValueError:
+            return
+        if not level:
+            self._drop_level(order.side, key)
+
+    def _drop_level(self, side, key):
+        del self.levels[side][key]
+        keys = self.keys[side]
+        del keys[bisect.bisect_left(keys, key)]
+
+    def best(self, side) -> Optional[float]:
+        keys = self.keys[side]
+        if not keys:
+            return None
+        return -keys[0] if side == "BUY" else keys[0]
+
+    def head(self, side, limit: Optional[float]) -> Optional[_Order]:
+        """
+        Oldest order at the best price on `side`, if that price is within
+        `limit` (None = any price).
+        """
+        keys = self.keys[side]
+        if not keys:
+            return None
+        key = keys[0]
+        price = -key if side == "BUY" else key
+        if limit is not None and (price < limit if side == "BUY" else price > limit):
+            return None
+        return self.levels[side][key][0]
+
+    def pop_head(self, side):
+        key = self.keys[side][0]
+        level = self.levels[side][key]
+        level.popleft()
+        if not level:
+            self._drop_level(side, key)
+
+    def depth(self, side, limit: int):
+        out = []
+        for key in self.keys[side][:limit]:
+            price = -key if side == "BUY" else key
+            out.append((price, sum(o.remaining for o in self.levels[side][key])))
+        return out
+
+
+class _RateLimiter:
+    """
+    Sliding-window counters for the exchange's REQUEST_WEIGHT / ORDERS limits.
+    """
+
+    def __init__(self, rate_limits, clock):
+        self.clock = clock
+        self.windows = []   # (type, seconds, limit, label, deque of (ts, n), [total])
+        for rl in rate_limits:
+            seconds = _INTERVAL_SECONDS[rl["interval"]] * rl["intervalNum"]
+            label = f"{rl['intervalNum']}{rl['interval'][0].lower()}"
+            self.windows.append((rl["rateLimitType"], seconds, rl["limit"], label, deque(), [0]))
+
+    def _used(self, seconds, events, total, now):
+        while events and events[0][0] <= now - seconds:
+            total[0] -= events.popleft()[1]
+        return total[0]
+
+    def acquire(self, weight: int, orders: int):
+        """
+        Count a request, or raise a 429 MockAPIError (with retry_after set)
+        if any window would go over its limit.
+        """
+        now = self.clock()
+        for kind, seconds, limit, label, events, total in self.windows:
+            n = weight if kind == "REQUEST_WEIGHT" else orders
+            if n and self._used(seconds, events, total, now) + n > limit:
+                if kind == "REQUEST_WEIGHT":
+                    error = MockAPIError(-1003, f"Too many requests; current limit is {limit} "
+                                                f"request weight per {label}.", 429)
+                else:
+                    error = MockAPIError(-1015, f"Too many new orders; current limit is {limit} "
+                                                f"orders per {label}.", 429)
+                error.retry_after = max(0.0, events[0][0] + seconds - now) if events else float(seconds)
+                raise error
+        for kind, seconds, limit, label, events, total in self.windows:
+            n = weight if kind == "REQUEST_WEIGHT" else orders
+            if n:
+                events.append((now, n))
+                total[0] += n
+
+    def headers(self) -> Dict[str, str]:
+        now = self.clock()
+        out = {}
+        for kind, seconds, limit, label, events, total in self.windows:
+            used = self._used(seconds, events, total, now)
+            if kind == "REQUEST_WEIGHT":
+                out[f"X-MBX-USED-WEIGHT-{label.upper()}"] = str(used)
+            else:
+                out[f"X-MBX-ORDER-COUNT-{label.upper()}"] = str(used)
+        return out
+
+
+class MockExchange:
+    """
+    Drop-in for python-binance's Client (futures subset).
+
+    symbols      {symbol: (price, tickSize, stepSize, minQty, maxQty, minNotional)}
+    spread_bps   quoted spread of the price feed
+    latency      seconds added to every REST call (+ uniform jitter)
+    rate_limits  exchange rate limits to enforce; None disables them
+    """
+
+    def __init__(self, symbols=None, spread_bps: float = 2.0, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limits=DEFAULT_RATE_LIMITS, seed: int = 0, clock: Callable[[], float] = time.monotonic):
+        self.symbols = dict(symbols or DEFAULT_SYMBOLS)
+        self.spread_bps = spread_bps
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limits = rate_limits or []
+        self.limiter = _RateLimiter(self.rate_limits, clock) if rate_limits else None
+        self._responses = threading.local()
+        self.calls = 0
+        self.rejected = 0
+
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._prices = {s: float(cfg[0]) for s, cfg in self.symbols.items()}
+        self._filters = {s: SymbolFilters.from_exchange_info(i) for s, i in
+                         ((i["symbol"], i) for i in self._exchange_info()["symbols"])}
+        self._books = {s: _Book() for s in self.symbols}
+        self._conditional: Dict[str, List[_Order]] = {s: [] for s in self.symbols}
+        self._orders: Dict[int, _Order] = {}
+        self._by_client_id: Dict[str, _Order] = {}
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+
+    # ------------------------------
+    # Plumbing
+    # ------------------------------
+    @property
+    def response(self) -> MockResponse:
+        # Last response of the calling thread, i.e. of this thread's call
+        return getattr(self._responses, "last", None) or MockResponse()
+
+    @response.setter
+    def response(self, value: MockResponse):
+        self._responses.last = value
+
+    def _call(self, weight: int, orders: int = 0):
+        self.calls += 1
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._rng.uniform(0, self.jitter))
+        if self.limiter is None:
+            return
+        with self._lock:
+            try:
+                self.limiter.acquire(weight, orders)
+            except MockAPIError as e:
+                self.rejected += 1
+                self.response = MockResponse(e.status_code, {"Retry-After": str(int(e.retry_after) + 1),
+                                                             **self.limiter.headers()})
+                raise
+            self.response = MockResponse(200, self.limiter.headers())
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Receive every ORDER_TRADE_UPDATE event (called under the engine lock).
+        """
+        self._subscribers.append(callback)
+
+    def _emit(self, order: _Order, exec_type: str, last_qty: float = 0.0, last_price: float = 0.0):
+        if not self._subscribers:
+            return
+        now = self._now_ms()
+        event = {"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+            "s": order.symbol, "c": order.client_id, "S": order.side, "o": order.type,
+            "f": order.tif, "q": _fmt(order.qty), "p": _fmt(order.price or 0),
+            "ap": _fmt(order.quote / order.filled) if order.filled else "0",
+            "sp": _fmt(order.stop_price or 0), "x": exec_type, "X": order.status, "i": order.order_id,
+            "l": _fmt(last_qty), "z": _fmt(order.filled), "L": _fmt(last_price), "T": now,
+            "R": order.reduce_only, "ot": order.orig_type}}
+        for callback in list(self._subscribers):
+            callback(event)
+
+    # ------------------------------
+    # Price feed
+    # ------------------------------
+    def price(self, symbol: str) -> float:
+        return self._prices[symbol]
+
+    def quotes(self, symbol: str):
+        p = self._prices[symbol]
+        half = p * self.spread_bps / 20000
+        return p - half, p + half
+
+    def set_price(self, symbol: str, price: float):
+        """
+        Move the feed: trigger conditional orders, then fill resting limit
+        orders the new quotes cross.
+        """
+        with self._lock:
+            self._prices[symbol] = float(price)
+            self._trigger(symbol)
+            bid, ask = self.quotes(symbol)
+            book = self._books[symbol]
+            for side, limit in (("BUY", ask), ("SELL", bid)):
+                while True:
+                    order = book.head(side, limit)
+                    if order is None:
+                        break
+                    book.pop_head(side)
+                    self._fill(order, order.remaining, order.price)
+
+    def start_feed(self, interval: float = 1.0, vol_bps: float = 5.0) -> threading.Thread:
+        """
+        Random-walk every symbol once per `interval` seconds on a daemon
+        thread, so resting and conditional orders fill on their own.
+        """
+        def run():
+            while True:
+                time.sleep(interval)
+                for symbol in self.symbols:
+                    self.random_walk(symbol, 1, vol_bps)
+
+        thread = threading.Thread(target=run, name="mock-price-feed", daemon=True)
+        thread.start()
+        return thread
+
+    def replay(self, symbol: str, prices):
+        for p in prices:
+            self.set_price(symbol, p)
+
+    def random_walk(self, symbol: str, steps: int, vol_bps: float = 5.0):
+        p = self._prices[symbol]
+        for _ in range(steps):
+            p *= 1 + self._rng.gauss(0, vol_bps / 10000)
+            self.set_price(symbol, p)
+
+    # ------------------------------
+    # Matching
+    # ------------------------------
+    def _fill(self, order: _Order, qty: float, price: float):
+        order.filled = round(order.filled + qty, 12)
+        order.quote += qty * price
+        order.update_time = self._now_ms()
+        if order.remaining <= 0:
+            order.status = "FILLED"
+        else:
+            order.status = "PARTIALLY_FILLED"
+        self._emit(order, "TRADE", qty, price)
+
+    def _match(self, order: _Order, limit: Optional[float]):
+        """
+        Take liquidity for `order` up to `limit`: resting orders priced at
+        or better than the feed first (price-time priority, at their
+        price), then the feed.
+        """
+        opposite = "SELL" if order.side == "BUY" else "BUY"
+        book = self._books[order.symbol]
+        bid, ask = self.quotes(order.symbol)
+        feed = ask if order.side == "BUY" else bid
+        while True:
+            # the feed quotes unlimited size, so makers priced worse never trade
+            maker = book.head(opposite, limit)
+            if maker is None or (maker.price > feed if order.side == "BUY" else maker.price < feed):
+                break
+            qty = min(order.remaining, maker.remaining)
+            self._fill(maker, qty, maker.price)
+            self._fill(order, qty, maker.price)
+            if maker.status == "FILLED":
+                book.pop_head(opposite)
+            if order.status == "FILLED":
+                return
+
+        if limit is None or (feed <= limit if order.side == "BUY" else feed >= limit):
+            self._fill(order, order.remaining, feed)
+
+    def _execute(self, order: _Order, kind: str):
+        if kind == "MARKET":
+            self._match(order, None)
+            return
+        # LIMIT
+        bid, ask = self.quotes(order.symbol)
+        book = self._books[order.symbol]
+        best_opposite = book.best("SELL" if order.side == "BUY" else "BUY")
+        crosses_feed = order.price >= ask if order.side == "BUY" else order.price <= bid
+        crosses_book = best_opposite is not None and (
+            order.price >= best_opposite if order.side == "BUY" else order.price <= best_opposite)
+
+        if order.tif == "GTX" and (crosses_feed or crosses_book):
+            order.status = "EXPIRED"
+            self._emit(order, "EXPIRED")
+            return
+        if order.tif == "FOK" and not crosses_feed:
+            available = sum(q for p, q in book.depth("SELL" if order.side == "BUY" else "BUY", 10 ** 9)
+                            if (p <= order.price if order.side == "BUY" else p >= order.price))
+            if available < order.qty:
+                order.status = "EXPIRED"
+                self._emit(order, "EXPIRED")
+                return
+
+        self._match(order, order.price)
+        if order.status != "FILLED":
+            if order.tif in ("IOC", "FOK"):
+                order.status = "EXPIRED"
+                self._emit(order, "EXPIRED")
+            else:
+                book.add(order)
+
+    def _should_trigger(self, order: _Order, price: float) -> bool:
+        stop_type = order.orig_type in ("STOP", "STOP_MARKET")
+        if order.side == "BUY":
+            return price >= order.stop_price if stop_type else price <= order.stop_price
+        return price <= order.stop_price if stop_type else price >= order.stop_price
+
+    def _trigger(self, symbol: str):
+        price = self._prices[symbol]
+        pending = self._conditional[symbol]
+        fired = [o for o in pending if self._should_trigger(o, price)]
+        if not fired:
+            return
+        fired_ids = {o.order_id for o in fired}
+        self._conditional[symbol] = [o for o in pending if o.order_id not in fired_ids]
+        for order in fired:
+            order.triggered = True
+            self._execute(order, "MARKET" if order.type.endswith("MARKET") else "LIMIT")
+
+    # ------------------------------
+    # Order validation
+    # ------------------------------
+    def _check(self, p: Dict[str, Any]):
+        for key in ("symbol", "side", "type"):
+            if key not in p:
+                raise MockAPIError(-1102, f"Mandatory parameter '{key}' was not sent, was empty/null, "
+                                          f"or malformed.")
+        symbol = p["symbol"]
+        if symbol not in self.symbols:
+            raise MockAPIError(-1121, "Invalid symbol.")
+        if p["side"] not in ("BUY", "SELL"):
+            raise MockAPIError(-1117, "Invalid side.")
+        order_type = p["type"]
+        if order_type not in ("MARKET", "LIMIT") + _CONDITIONAL:
+            raise MockAPIError(-1116, "Invalid orderType.")
+        if "quantity" not in p:
+            raise MockAPIError(-1102, "Mandatory parameter 'quantity' was not sent, was empty/null, or malformed.")
+
+        f = self._filters[symbol]
+        qty = Decimal(str(p["quantity"]))
+        if qty <= 0:
+            raise MockAPIError(-4003, "Quantity less than or equal to zero.")
+        if f.round_quantity(qty) != qty:
+            raise MockAPIError(-1111, "Precision is over the maximum defined for this asset.")
+        try:
+            f.check_quantity(qty, market=order_type in ("MARKET", "STOP_MARKET", "TAKE_PROFIT_MARKET"))
+        except ValueError as e:
+            raise MockAPIError(-4005 if "<=" in str(e) else -4004, str(e))
+
+        needs_price = order_type in ("LIMIT", "STOP", "TAKE_PROFIT")
+        needs_stop = order_type in _CONDITIONAL
+        price = stop = None
+        if needs_price:
+            if "price" not in p:
+                raise MockAPIError(-1102, "Mandatory parameter 'price' was not sent, was empty/null, or malformed.")
+            dp = Decimal(str(p["price"]))
+            if f.round_price(dp) != dp:
+                raise MockAPIError(-1111, "Precision is over the maximum defined for this asset.")
+            try:
+                f.check_price(dp)
+            except ValueError as e:
+                raise MockAPIError(-4014, str(e))
+            price = float(dp)
+            if f.min_notional and qty * dp < f.min_notional:
+                raise MockAPIError(-4164, f"Order's notional must be no smaller than {f.min_notional}.")
+        if needs_stop:
+            if "stopPrice" not in p:
+                raise MockAPIError(-1102, "Mandatory parameter 'stopPrice' was not sent, was empty/null, "
+                                          "or malformed.")
+            stop = float(Decimal(str(p["stopPrice"])))
+        return float(qty), price, stop
+
+    # ------------------------------
+    # REST subset
+    # ------------------------------
+    def _create(self, p: Dict[str, Any]) -> Dict[str, Any]:
+        qty, price, stop = self._check(p)
+        client_id = p.get("newClientOrderId") or f"mock_{next(self._ids)}_{self._rng.getrandbits(32):08x}"
+        with self._lock:
+            existing = self._by_client_id.get(client_id)
+            if existing is not None and existing.status in _OPEN:
+                raise MockAPIError(-4116, "ClientOrderId is duplicated.")
+            tif = p.get("timeInForce") or "GTC"
+            order = _Order(next(self._ids), client_id, p["symbol"], p["side"], p["type"], qty, price, stop,
+                           tif, str(p.get("reduceOnly", "false")).lower() == "true", self._now_ms())
+
+            if order.type in _CONDITIONAL:
+                if self._should_trigger(order, self._prices[order.symbol]):
+                    raise MockAPIError(-2021, "Order would immediately trigger.")
+                self._conditional[order.symbol].append(order)
+            self._orders[order.order_id] = order
+            self._by_client_id[client_id] = order
+            self._emit(order, "NEW")
+            if order.type not in _CONDITIONAL:
+                self._execute(order, order.type)
+            return order.to_dict()
+
+    def futures_create_order(self, **params) -> Dict[str, Any]:
+        self._call(weight=0, orders=1)
+        try:
+            return self._create(params)
+        except MockAPIError:
+            self.rejected += 1
+            raise
+
+    def futures_place_batch_order(self, **params) -> List[Dict[str, Any]]:
+        batch = params["batchOrders"]
+        if isinstance(batch, str):
+            batch = json.loads(batch)
+        if len(batch) > 5:
+            raise MockAPIError(-1102, "batchOrders can not be more than 5.")
+        self._call(weight=5, orders=len(batch))
+        results = []
+        for p in batch:
+            try:
+                results.append(self._create(p))
+            except MockAPIError as e:
+                self.rejected += 1
+                results.append({"code": e.code, "msg": e.message})
+        return results
+
+    def _find(self, params, code=-2013, msg="Order does not exist.") -> _Order:
+        order = None
+        if "orderId" in params:
+            order = self._orders.get(int(params["orderId"]))
+        elif "origClientOrderId" in params:
+            order = self._by_client_id.get(params["origClientOrderId"])
+        if order is None or order.symbol != params.get("symbol", order.symbol):
+            raise MockAPIError(code, msg)
+        return order
+
+    def futures_cancel_order(self, **params) -> Dict[str, Any]:
+        self._call(weight=1)
+        with self._lock:
+            order = self._find(params, -2011, "Unknown order sent.")
+            if order.status not in _OPEN:
+                raise MockAPIError(-2011, "Unknown order sent.")
+            if order in self._conditional[order.symbol]:
+                self._conditional[order.symbol].remove(order)
+            else:
+                self._books[order.symbol].remove(order)
+            order.status = "CANCELED"
+            order.update_time = self._now_ms()
+            self._emit(order, "CANCELED")
+            return order.to_dict()
+
+    def futures_get_order(self, **params) -> Dict[str, Any]:
+        self._call(weight=1)
+        with self._lock:
+            return self._find(params).to_dict()
+
+    def futures_get_open_orders(self, **params) -> List[Dict[str, Any]]:
+        symbol = params.get("symbol")
+        self._call(weight=1 if symbol else 40)
+        with self._lock:
+            return [o.to_dict() for o in self._orders.values()
+                    if o.status in _OPEN and (symbol is None or o.symbol == symbol)]
+
+    def futures_get_all_orders(self, **params) -> List[Dict[str, Any]]:
+        # GET /fapi/v1/allOrders: one symbol, ascending orderId, from orderId / startTime on
+        self._call(weight=5)
+        symbol = params["symbol"]
+        from_id = int(params.get("orderId") or 0)
+        start = int(params.get("startTime") or 0)
+        limit = min(int(params.get("limit") or 500), 1000)
+        with self._lock:
+            orders = [o for o in self._orders.values()
+                      if o.symbol == symbol and o.order_id >= from_id and o.time >= start]
+            return [o.to_dict() for o in sorted(orders, key=lambda o: o.order_id)[:limit]]
+
+    def futures_symbol_ticker(self, **params):
+        symbol = params.get("symbol")
+        self._call(weight=1 if symbol else 2)
+        now = self._now_ms()
+        if symbol is not None:
+            if symbol not in self.symbols:
+                raise MockAPIError(-1121, "Invalid symbol.")
+            return {"symbol": symbol, "price": _fmt(self._prices[symbol]), "time": now}
+        return [{"symbol": s, "price": _fmt(p), "time": now} for s, p in self._prices.items()]
+
+    def _exchange_info(self) -> Dict[str, Any]:
+        symbols = []
+        for s, (price, tick, step, min_qty, max_qty, notional) in self.symbols.items():
+            symbols.append({
+                "symbol": s, "pair": s, "contractType": "PERPETUAL", "status": "TRADING",
+                "baseAsset": s[:-4], "quoteAsset": "USDT", "marginAsset": "USDT",
+                "orderTypes": ["LIMIT", "MARKET", "STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET"],
+                "timeInForce": ["GTC", "IOC", "FOK", "GTX"],
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": tick, "maxPrice": "10000000", "tickSize": tick},
+                    {"filterType": "LOT_SIZE", "stepSize": step, "minQty": min_qty, "maxQty": max_qty},
+                    {"filterType": "MARKET_LOT_SIZE", "stepSize": step, "minQty": min_qty, "maxQty": max_qty},
+                    {"filterType": "MIN_NOTIONAL", "notional": notional},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": self._now_ms(), "rateLimits": self.rate_limits,
+                "exchangeFilters": [], "symbols": symbols}
+
+    def futures_exchange_info(self) -> Dict[str, Any]:
+        self._call(weight=1)
+        return self._exchange_info()
+
+    def futures_stream_get_listen_key(self) -> str:
+        self._call(weight=1)
+        return "mock-listen-key"
+
+    def futures_stream_keepalive(self, **params) -> Dict[str, Any]:
+        self._call(weight=1)
+        return {}
+
+    # ------------------------------
+    # User-data stream over a local websocket
+    # ------------------------------
+    def serve_user_stream(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start a websocket server that pushes every ORDER_TRADE_UPDATE to
+        connected clients. Returns the base URL to use as the watcher's
+        stream_url (the listen key is appended to it).
+        """
+        import asyncio
+        from websockets.asyncio.server import serve
+
+        clients = set()
+        ready = threading.Event()
+        state = {}
+
+        async def handler(ws):
+            clients.add(ws)
+            try:
+                await ws.wait_closed()
+            finally:
+                clients.discard(ws)
+
+        async def main():
+            state["loop"] = asyncio.get_running_loop()
+            async with serve(handler, host, port) as server:
+                state["port"] = server.sockets[0].getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+
+        def push(event):
+            message = json.dumps(event)
+            for ws in list(clients):
+                asyncio.run_coroutine_threadsafe(ws.send(message), state["loop"])
+
+        threading.Thread(target=lambda: asyncio.run(main()), name="mock-user-stream", daemon=True).start()
+        ready.wait()
+        self.subscribe(push)
+        self._stream_clients = clients
+        return f"ws://{host}:{state['port']}/ws/"
+
+
+class DepthReplay:
+    """
+    Stand-in for one symbol's depth endpoints, driven by recorded messages:
+    a REST snapshot followed by depthUpdate events (JSON lines, snapshot
+    first). serve() plays the events on a local websocket in the
+    combined-stream format, and futures_order_book() answers with the book
+    as of the last event played, like the exchange would. Events listed in
+    `drop` are played but never sent (a lost message).
+    """
+
+    def __init__(self, snapshot: Dict[str, Any], events: List[Dict[str, Any]], drop=()):
+        self.symbol = events[0]["s"] if events else snapshot.get("symbol")
+        self.events = events
+        self.drop = set(drop)
+        self.book = {side: {float(p): float(q) for p, q in snapshot[side] if float(q) > 0}
+                     for side in ("bids", "asks")}
+        self.last_update_id = snapshot["lastUpdateId"]
+        self.position = 0
+        self.snapshots = 0
+        self.connections = 0
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, drop=()) -> "DepthReplay":
+        with open(path) as f:
+            messages = [json.loads(line) for line in f if line.strip()]
+        return cls(messages[0], messages[1:], drop)
+
+    def _play(self, i: int):
+        event = self.events[i]
+        with self._lock:
+            for side, key in (("bids", "b"), ("asks", "a")):
+                levels = self.book[side]
+                for p, q in event[key]:
+                    if float(q) > 0:
+                        levels[float(p)] = float(q)
+                    else:
+                        levels.pop(float(p), None)
+            self.last_update_id = event["u"]
+            self.position = i + 1
+
+    def levels(self, side: str) -> List[List[float]]:
+        with self._lock:
+            return [[p, q] for p, q in sorted(self.book[side].items(), reverse=side == "bids")]
+
+    def futures_order_book(self, **params) -> Dict[str, Any]:
+        limit = int(params.get("limit", 500))
+        now = int(time.time() * 1000)
+        with self._lock:
+            self.snapshots += 1
+            bids = sorted(self.book["bids"].items(), reverse=True)[:limit]
+            asks = sorted(self.book["asks"].items())[:limit]
+            return {"lastUpdateId": self.last_update_id, "E": now, "T": now,
+                    "bids": [[_fmt(p), _fmt(q)] for p, q in bids],
+                    "asks": [[_fmt(p), _fmt(q)] for p, q in asks]}
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0, interval: float = 0.0,
+              disconnect_at: Optional[int] = None) -> str:
+        """
+        Start the websocket server; every connection continues the replay
+        from where the last one stopped. `disconnect_at` closes the
+        connection once after that event. Returns the base URL (the stream
+        names are appended to it).
+        """
+        import asyncio
+        from websockets.asyncio.server import serve
+
+        ready = threading.Event()
+        state = {"disconnect_at": disconnect_at}
+        stream = f"{self.symbol.lower()}@depth@100ms"
+
+        async def handler(ws):
+            self.connections += 1
+            while self.position < len(self.events):
+                i = self.position
+                self._play(i)
+                if i not in self.drop:
+                    await ws.send(json.dumps({"stream": stream, "data": self.events[i]}))
+                if i == state["disconnect_at"]:
+                    state["disconnect_at"] = None
+                    await ws.close()
+                    return
+                # give the client's snapshot requests a chance to land mid-replay
+                await asyncio.sleep(interval)
+            self.done.set()
+            await ws.wait_closed()
+
+        async def main():
+            async with serve(handler, host, port) as server:
+                state["port"] = server.sockets[0].getsockname()[1]
+                ready.set()
+                await asyncio.Future()
+
+        threading.Thread(target=lambda: asyncio.run(main()), name="depth-replay", daemon=True).start()
+        ready.wait()
+        return f"ws://{host}:{state['port']}/stream?streams="
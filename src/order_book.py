@@ -0,0 +1,503 @@
+# /src/order_book.py
+# Local order-book mirror for pre-trade slippage estimates.
+#   - each symbol's book is a REST depth snapshot plus the diff-depth stream
+#     (<symbol>@depth@100ms). Diffs are sequence-checked the way Binance
+#     documents it: the first one after the snapshot must span its
+#     lastUpdateId, and each later one's pu must be the previous one's u. A
+#     gap marks the book out of sync; diffs are buffered and a new snapshot
+#     is fetched
+#   - a side of the book is two NumPy arrays (sorted price keys, quantities);
+#     a diff is merged with one searchsorted / insert / compress pass
+#   - prefix sums of quantity and notional are rebuilt once per update (on the
+#     first query after it), so "average fill price for Q", "depth within X
+#     bps" and "largest quantity within X bps" are binary searches
+#   - slippage_guard() is called by validate() when a mirror runs in this
+#     process: a MARKET order estimated to slip more than MAX_SLIPPAGE_BPS is
+#     rejected, or in "slice" mode turned into a TWAP of slices that each fit
+# The websocket client (`websockets`) is only imported when the stream starts.
+
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
+
+import numpy as np
+
+from src.logger import log_info, log_error
+from src.symbol_filters import get_filter_cache
+
+STREAM_URL = "wss://stream.binancefuture.com/stream?streams="   # testnet; mainnet: wss://fstream.binance.com/stream?streams=
+UPDATE_SPEED = "100ms"
+SNAPSHOT_LIMIT = 1000
+RESYNC_DELAY = 0.2
+RECONNECT_MAX_DELAY = 30.0
+
+# Slippage guard (off unless a limit is set)
+_max_bps = os.getenv("BOT_MAX_SLIPPAGE_BPS")
+MAX_SLIPPAGE_BPS = float(_max_bps) if _max_bps else None
+GUARD_MODE = os.getenv("BOT_SLIPPAGE_GUARD", "reject")   # "reject" or "slice"
+SLICE_DELAY = 5.0
+MAX_SLICES = 20
+
+_SIDES = (("bids", -1), ("asks", 1))   # keys are -price for bids, so both sides sort best first
+
+
+def configure(max_slippage_bps=None, guard_mode=None, slice_delay=None, max_slices=None):
+    global MAX_SLIPPAGE_BPS, GUARD_MODE, SLICE_DELAY, MAX_SLICES
+    if max_slippage_bps is not None:
+        MAX_SLIPPAGE_BPS = max_slippage_bps if max_slippage_bps > 0 else None
+    if guard_mode is not None:
+        if guard_mode not in ("reject", "slice"):
+            raise ValueError("guard_mode must be 'reject' or 'slice'")
+        GUARD_MODE = guard_mode
+    if slice_delay is not None:
+        SLICE_DELAY = slice_delay
+    if max_slices is not None:
+        MAX_SLICES = max_slices
+
+
+def _levels(rows) -> np.ndarray:
+    # [["price", "qty"], ...] as sent by the exchange -> (n, 2) float64
+    return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+
+class OrderBook:
+    """
+    One symbol's mirrored book. Queries take the side of the taker order
+    (BUY walks the asks, SELL the bids) and return None until the book is
+    synced.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_update_id: Optional[int] = None   # None = out of sync
+        self.event_time: Optional[int] = None
+        self.updates = 0
+        self._first = True
+        self._keys = {side: np.empty(0) for side, _ in _SIDES}
+        self._qty = {side: np.empty(0) for side, _ in _SIDES}
+        self._sums: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def synced(self) -> bool:
+        return self.last_update_id is not None
+
+    def invalidate(self):
+        with self._lock:
+            self.last_update_id = None
+
+    def load_snapshot(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            for side, sign in _SIDES:
+                levels = _levels(snapshot[side])
+                levels = levels[levels[:, 1] > 0]
+                keys = sign * levels[:, 0]
+                order = np.argsort(keys, kind="stable")
+                self._keys[side], self._qty[side] = keys[order], levels[order, 1]
+            self.last_update_id = int(snapshot["lastUpdateId"])
+            self.event_time = snapshot.get("E")
+            self._first = True
+            self._sums.clear()
+
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply one depthUpdate. False when it doesn't follow on from the
+        book (a gap): the book is then out of sync until the next snapshot.
+        """
+        with self._lock:
+            if self.last_update_id is None:
+                return False
+            if event["u"] < self.last_update_id:
+                return True   # already in the snapshot
+            if self._first:
+                # the first diff must cover the snapshot (futures ids may fall inside a diff)
+                follows = event["U"] <= self.last_update_id + 1
+            else:
+                follows = event.get("pu") == self.last_update_id
+            if not follows:
+                self.last_update_id = None
+                return False
+            self._merge("bids", -1, _levels(event["b"]))
+            self._merge("asks", 1, _levels(event["a"]))
+            self.last_update_id = int(event["u"])
+            self.event_time = event.get("E")
+            self._first = False
+            self.updates += 1
+            self._sums.clear()
+            return True
+
+    def _merge(self, side: str, sign: int, levels: np.ndarray):
+        if not levels.size:
+            return
+        keys, qty = self._keys[side], self._qty[side]
+        # one change per price, the last one wins
+        new_keys, last = np.unique(sign * levels[::-1, 0], return_index=True)
+        new_qty = levels[::-1, 1][last]
+        at = np.searchsorted(keys, new_keys)
+        found = at < keys.size
+        found[found] = keys[at[found]] == new_keys[found]
+        qty[at[found]] = new_qty[found]
+        add = ~found & (new_qty > 0)
+        if add.any():
+            keys = np.insert(keys, at[add], new_keys[add])
+            qty = np.insert(qty, at[add], new_qty[add])
+        keep = qty > 0
+        if not keep.all():
+            keys, qty = keys[keep], qty[keep]
+        self._keys[side], self._qty[side] = keys, qty
+
+    def _side(self, order_side: str):
+        # (keys, prices, cumulative qty, cumulative notional, average price
+        # after each whole level) of the side a taker order on `order_side`
+        # consumes, best level first
+        side = "asks" if order_side == "BUY" else "bids"
+        sums = self._sums.get(side)
+        if sums is None:
+            keys, qty = self._keys[side], self._qty[side]
+            prices = np.abs(keys)
+            cum_qty = np.concatenate(([0.0], np.cumsum(qty)))
+            cum_notional = np.concatenate(([0.0], np.cumsum(prices * qty)))
+            sums = (keys, prices, cum_qty, cum_notional, cum_notional[1:] / cum_qty[1:])
+            self._sums[side] = sums
+        return sums
+
+    def _mid(self) -> Optional[float]:
+        bids, asks = self._keys["bids"], self._keys["asks"]
+        if not (self.synced and bids.size and asks.size):
+            return None
+        return (asks[0] - bids[0]) / 2
+
+    def best(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            mid = self._mid()
+            if mid is None:
+                return None
+            return {"bid": float(-self._keys["bids"][0]), "ask": float(self._keys["asks"][0]), "mid": float(mid)}
+
+    def levels(self, side: str) -> List[List[float]]:
+        """
+        [[price, qty], ...] of "bids" or "asks", best first.
+        """
+        with self._lock:
+            return np.column_stack((np.abs(self._keys[side]), self._qty[side])).tolist()
+
+    def estimate(self, side: str, quantity: float) -> Optional[Dict[str, Any]]:
+        """
+        Expected fill of a MARKET order walking the book: average and worst
+        price, levels touched, slippage of the average against the mid in
+        bps (positive = worse), and how much the mirrored depth can fill.
+        """
+        with self._lock:
+            mid = self._mid()
+            if mid is None:
+                return None
+            _, prices, cum_qty, cum_notional, _ = self._side(side)
+            filled = min(float(quantity), float(cum_qty[-1]))
+            if filled <= 0:
+                return None
+            j = max(int(np.searchsorted(cum_qty, filled)), 1)
+            avg = (cum_notional[j - 1] + (filled - cum_qty[j - 1]) * prices[j - 1]) / filled
+            sign = 1 if side == "BUY" else -1
+            return {"avg_price": float(avg), "worst_price": float(prices[j - 1]), "levels": j,
+                    "filled": filled, "complete": filled >= float(quantity),
+                    "slippage_bps": float(sign * (avg - mid) / mid * 1e4), "mid": float(mid)}
+
+    def depth_within(self, side: str, bps: float) -> Optional[Dict[str, float]]:
+        """
+        Quantity and notional resting within `bps` of the mid on the side a
+        `side` order takes.
+        """
+        with self._lock:
+            mid = self._mid()
+            if mid is None:
+                return None
+            keys, _, cum_qty, cum_notional, _ = self._side(side)
+            sign = 1 if side == "BUY" else -1
+            n = int(np.searchsorted(keys, sign * mid * (1 + sign * bps / 1e4), side="right"))
+            return {"quantity": float(cum_qty[n]), "notional": float(cum_notional[n]), "levels": n}
+
+    def max_quantity(self, side: str, bps: float) -> Optional[float]:
+        """
+        Largest quantity whose average fill stays within `bps` of the mid
+        (all of the mirrored depth if even that does).
+        """
+        with self._lock:
+            mid = self._mid()
+            if mid is None:
+                return None
+            _, prices, cum_qty, cum_notional, averages = self._side(side)
+            if prices.size == 0:
+                return 0.0
+            sign = 1 if side == "BUY" else -1
+            limit = mid * (1 + sign * bps / 1e4)
+            # the average only gets worse level by level: find the first whole
+            # level that takes it past the limit, then solve for the part of it
+            j = int(np.searchsorted(sign * averages, sign * limit, side="right"))
+            if j == prices.size:
+                return float(cum_qty[-1])
+            q, notional, p = cum_qty[j], cum_notional[j], prices[j]
+            return float(q + max(0.0, (limit * q - notional) / (p - limit)))
+
+
+class BookMirror:
+    """
+    Keeps an OrderBook per symbol in sync from one combined depth stream.
+    """
+
+    def __init__(self, client, symbols: List[str], stream_url: str = STREAM_URL,
+                 snapshot_limit: int = SNAPSHOT_LIMIT, max_workers: int = 4):
+        self.client = client
+        self.books = {s.upper(): OrderBook(s.upper()) for s in symbols}
+        self.stream_url = stream_url
+        self.snapshot_limit = snapshot_limit
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="book-rest")
+        self.connected = threading.Event()
+        self.events = 0
+        self.gaps = 0
+        self.snapshots = 0
+        self.reconnects = 0
+        self._buffers: Dict[str, List[Dict[str, Any]]] = {s: [] for s in self.books}
+        self._syncing = set()
+        self._loop = None
+        self._task = None
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            ready.set()
+            self._loop.run_until_complete(self.run())
+
+        self._thread = threading.Thread(target=run, name="book-mirror", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        if self._loop is not None and self._task is not None:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def wait_synced(self, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(b.synced for b in self.books.values()):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "connected": self.connected.is_set(),
+            "synced": {s: b.synced for s, b in self.books.items()},
+            "events": self.events,
+            "gaps": self.gaps,
+            "snapshots": self.snapshots,
+            "reconnects": self.reconnects,
+        }
+
+    # ------------------------------
+    # Stream
+    # ------------------------------
+    async def run(self):
+        self._task = asyncio.current_task()
+        delay = 0.5
+        while not self._stopping:
+            try:
+                await self._session()
+                delay = 0.5
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                log_error("Order book stream error", {"error": str(e)})
+            finally:
+                self.connected.clear()
+            if self._stopping:
+                break
+            self.reconnects += 1
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                break
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _session(self):
+        from websockets.asyncio.client import connect
+
+        streams = "/".join(f"{s.lower()}@depth@{UPDATE_SPEED}" for s in self.books)
+        async with connect(self.stream_url + streams, max_size=None) as ws:
+            self.connected.set()
+            log_info("Order book stream connected", {"symbols": list(self.books)})
+            # Whatever was mirrored before the reconnect may have missed diffs
+            for book in self.books.values():
+                book.invalidate()
+            async for message in ws:
+                data = json.loads(message)
+                self.on_event(data.get("data", data))
+
+    def on_event(self, event: Dict[str, Any]):
+        if event.get("e") != "depthUpdate":
+            return
+        symbol = event["s"]
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        self.events += 1
+        if book.synced:
+            if book.apply(event):
+                return
+            self.gaps += 1
+            log_info("Order book gap, resyncing", {"symbol": symbol, "U": event["U"], "pu": event.get("pu")})
+        self._buffers[symbol].append(event)
+        if symbol not in self._syncing:
+            self._syncing.add(symbol)
+            asyncio.get_running_loop().create_task(self._resync(symbol))
+
+    async def _resync(self, symbol: str):
+        """
+        Snapshot, then the buffered diffs; again until they line up.
+        """
+        book = self.books[symbol]
+        try:
+            while not self._stopping:
+                start = time.perf_counter()
+                try:
+                    snapshot = await self._rest(self.client.futures_order_book, symbol=symbol,
+                                                limit=self.snapshot_limit)
+                except Exception as e:
+                    log_error("Order book snapshot failed", {"symbol": symbol, "error": str(e)})
+                    await asyncio.sleep(RESYNC_DELAY)
+                    continue
+                self.snapshots += 1
+                book.load_snapshot(snapshot)
+                buffered, self._buffers[symbol] = self._buffers[symbol], []
+                if all(book.apply(e) for e in buffered):
+                    log_info("Order book synced", {
+                        "symbol": symbol, "lastUpdateId": book.last_update_id, "buffered": len(buffered),
+                        "ms": round((time.perf_counter() - start) * 1000, 2)})
+                    return
+                # snapshot older than the buffered diffs, or a gap among them: the
+                # next snapshot drops whatever it already covers
+                self._buffers[symbol] = buffered + self._buffers[symbol]
+                await asyncio.sleep(RESYNC_DELAY)
+        finally:
+            self._syncing.discard(symbol)
+
+    async def _rest(self, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, lambda: fn(*args, **kwargs))
+
+
+_shared: Optional[BookMirror] = None
+_shared_lock = threading.Lock()
+
+
+def start_mirror(client, symbols: List[str], stream_url: str = STREAM_URL) -> BookMirror:
+    """
+    Start the process-wide mirror (repl / serve).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = BookMirror(client, symbols, stream_url)
+        return _shared.start()
+
+
+def get_mirror() -> Optional[BookMirror]:
+    return _shared
+
+
+def slippage_guard(cleaned: Dict[str, Any], mirror: Optional[BookMirror] = None,
+                   filters=None) -> Dict[str, Any]:
+    """
+    Changes validate() makes to a MARKET order the mirrored book says would
+    slip more than MAX_SLIPPAGE_BPS: in "reject" mode a ValueError, in
+    "slice" mode a TWAP of the fewest slices that each stay within the
+    limit on the current book. {} when the guard is off, the order fits or
+    the symbol's book isn't mirrored / synced.
+
+    Slices are whole MARKET steps of the symbol (see twap_quantities in
+    src/advanced/twap.py), so the per-slice limit is floored to the step
+    before the slices are counted.
+    """
+    mirror = mirror or _shared
+    if MAX_SLIPPAGE_BPS is None or mirror is None or cleaned.get("order_type") != "market":
+        return {}
+    book = mirror.books.get(cleaned["symbol"])
+    if book is None:
+        return {}
+    side, quantity = cleaned["side"], float(cleaned["quantity"])
+    estimate = book.estimate(side, quantity)
+    if estimate is None or (estimate["complete"] and estimate["slippage_bps"] <= MAX_SLIPPAGE_BPS):
+        return {}
+
+    if GUARD_MODE == "slice":
+        per_slice = book.max_quantity(side, MAX_SLIPPAGE_BPS) or 0.0
+        step = _market_step(cleaned["symbol"], filters)
+        if step:
+            per_slice = math.floor(per_slice / step + 1e-9) * step
+        slices = math.ceil(quantity / per_slice - 1e-9) if per_slice > 0 else None
+        if slices is not None and slices <= MAX_SLICES and _slices_fit(cleaned, slices, filters):
+            log_info("Market order sliced by slippage guard", {
+                "symbol": cleaned["symbol"], "side": side, "quantity": quantity, "slices": slices,
+                "estimated_bps": round(estimate["slippage_bps"], 2), "limit_bps": MAX_SLIPPAGE_BPS})
+            return {"order_type": "twap", "twap_intervals": slices, "twap_delay": SLICE_DELAY}
+
+    depth = "" if estimate["complete"] else f", only {estimate['filled']:g} on the mirrored book"
+    raise ValueError(f"estimated slippage {estimate['slippage_bps']:.1f} bps for {side} {quantity:g} "
+                     f"{cleaned['symbol']} exceeds {MAX_SLIPPAGE_BPS:g} bps{depth}")
+
+
+def _slices_fit(cleaned: Dict[str, Any], slices: int, filters=None) -> bool:
+    # Every slice also has to meet the symbol's minimum quantity
+    if filters is None:
+        filters = get_filter_cache()
+    symbol_filters = filters.get(cleaned["symbol"])
+    if symbol_filters is None:
+        return True
+    try:
+        symbol_filters.check_slices(cleaned["quantity"], slices)
+    except ValueError:
+        return False
+    return True
+
+
+def _market_step(symbol: str, filters=None) -> float:
+    if filters is None:
+        filters = get_filter_cache()
+    symbol_filters = filters.get(symbol)
+    if symbol_filters is None:
+        return 0.0
+    return float(symbol_filters.market_step_size or symbol_filters.step_size)
+
+
+def book_report(symbol: str, quantity: Optional[float] = None, bps: float = 10.0,
+                mirror: Optional[BookMirror] = None) -> Dict[str, Any]:
+    """
+    Best bid / ask, depth within `bps` of the mid on both sides and, given
+    a quantity, the BUY and SELL fill estimates (repl `book`, `send --book`).
+    """
+    mirror = mirror or _shared
+    if mirror is None:
+        return {"error": "no order book mirror running (set BOT_BOOK_SYMBOLS)"}
+    book = mirror.books.get(symbol.upper())
+    if book is None:
+        return {"error": f"{symbol.upper()} is not mirrored", "symbols": list(mirror.books)}
+    if not book.synced:
+        return {"symbol": book.symbol, "synced": False}
+    report = {"symbol": book.symbol, "synced": True, "last_update_id": book.last_update_id, **(book.best() or {}),
+              f"depth_{bps:g}bps": {"asks": book.depth_within("BUY", bps), "bids": book.depth_within("SELL", bps)}}
+    if quantity:
+        report["estimate"] = {side: book.estimate(side, quantity) for side in ("BUY", "SELL")}
+    return report
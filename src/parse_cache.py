@@ -0,0 +1,211 @@
+# /src/parse_cache.py
+# Two-tier cache for LLM parse results:
+#   1) in-memory LRU (per process)
+#   2) SQLite file (survives restarts)
+# Keys are built from the normalized command + model + prompt version, so
+# changing the model or the system prompt never serves a stale parse.
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from src.fast_parser import ASSET_ALIASES, THOUSANDS_RE
+from src.logger import log_error
+
+# Anchored to the project root like bot.log, so every process shares one cache
+CACHE_FILE = os.getenv(
+    "BOT_PARSE_CACHE_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "parse_cache.db"),
+)
+STALE_VERSION_AGE = 7 * 24 * 3600   # idle seconds before another prompt version's entries are dropped
+
+
+def prompt_version(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+# Well-formed thousands first; any other digit run with a comma in it
+# ("0,500", "1,05") is kept verbatim so it can't collide with another number
+_NUMBER_RE = re.compile(
+    THOUSANDS_RE.pattern + r"(?:\.\d+)?|(?P<ambiguous>[\d.]*\d,[\d.,]*\d)|\d+(?:\.\d+)?|\.\d+"
+)
+
+
+def _format_number(match) -> str:
+    if match.group("ambiguous"):
+        return match.group(0)
+    num = match.group(0).replace(",", "")
+    try:
+        value = float(num)
+    except ValueError:
+        return num
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def normalize_command(text: str) -> str:
+    """
+    Canonical form of a command used as cache key:
+    lowercase, single spaces, canonical numbers (0.50 -> 0.5, 1,000 -> 1000)
+    and asset aliases mapped to their pair (bitcoin / btc -> btcusdt).
+    """
+    t = text.strip().lower()
+    # Only real thousands separators are dropped: "1,5" / "0,500" keep their comma
+    t = _NUMBER_RE.sub(_format_number, t)
+    words = []
+    for word in t.split():
+        pair = ASSET_ALIASES.get(word)
+        words.append(pair.lower() if pair else word)
+    return " ".join(words)
+
+
+class ParseCache:
+    """
+    LRU + SQLite cache with TTL and size bounds.
+    ttl=None keeps entries until evicted by size.
+    path=None disables the disk tier.
+    """
+
+    def __init__(self, model: str, prompt: str, path: Optional[str] = CACHE_FILE,
+                 max_memory: int = 256, max_disk: int = 10000, ttl: Optional[float] = 7 * 24 * 3600):
+        self.model = model
+        self.version = prompt_version(prompt)
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.ttl = ttl
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS parse_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " model TEXT NOT NULL,"
+                    " prompt_version TEXT NOT NULL,"
+                    " value TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " last_used REAL NOT NULL)"
+                )
+                self._db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache(last_used)"
+                )
+                # Other prompt versions may belong to another process (compact vs
+                # full prompt), so they are only dropped once idle for a while;
+                # the max_disk LRU bound in put() covers the rest
+                self._db.execute(
+                    "DELETE FROM parse_cache WHERE prompt_version != ? AND last_used < ?",
+                    (self.version, time.time() - STALE_VERSION_AGE),
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                log_error("Parse cache disabled", {"error": str(e), "path": path})
+                self._db = None
+
+    def key(self, text: str) -> str:
+        raw = f"{self.model}\x00{self.version}\x00{normalize_command(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        key = self.key(text)
+        now = time.time()
+
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                value, created_at = item
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return dict(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT value, created_at FROM parse_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        if self._expired(row[1], now):
+                            self._db.execute("DELETE FROM parse_cache WHERE key = ?", (key,))
+                        else:
+                            self._db.execute(
+                                "UPDATE parse_cache SET last_used = ? WHERE key = ?", (now, key)
+                            )
+                            self._db.commit()
+                            value = json.loads(row[0])
+                            self._remember(key, value, row[1])
+                            self.hits += 1
+                            self.disk_hits += 1
+                            return dict(value)
+                        self._db.commit()
+                except sqlite3.Error as e:
+                    log_error("Parse cache read failed", {"error": str(e)})
+
+            self.misses += 1
+            return None
+
+    def put(self, text: str, value: Dict[str, Any]):
+        key = self.key(text)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, dict(value), now)
+
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, self.model, self.version, json.dumps(value), now, now),
+                    )
+                    self._db.execute(
+                        "DELETE FROM parse_cache WHERE key IN ("
+                        " SELECT key FROM parse_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk,),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    log_error("Parse cache write failed", {"error": str(e)})
+
+    def _remember(self, key, value, created_at):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM parse_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
@@ -0,0 +1,171 @@
+# /src/prompt_builder.py
+# Compact per-order-type system prompts for LLMParser.
+# A cheap keyword pass guesses which order types a command can be, and only
+# those schemas + few-shot examples are sent to the model. Prompts are kept
+# under a token budget by dropping examples, then descriptions.
+
+import re
+from typing import List, Optional, Tuple
+
+from src.fast_parser import _normalize
+
+ORDER_TYPES = ["market", "limit", "stop_limit", "oco", "twap", "vwap", "grid"]
+
+HEADER = """You parse Binance USDT-M Futures trading commands into JSON.
+Return ONLY one JSON object, no text outside it.
+Keys: order_type (one of market, limit, stop_limit, oco, twap, vwap, grid), symbol (Binance USDT pair: BTC->BTCUSDT), side (BUY or SELL), quantity (number)."""
+
+SCHEMAS = {
+    "market": {
+        "keys": '{"order_type": "market", "symbol", "side", "quantity"}',
+        "about": "market: buy/sell immediately at the current price. No price.",
+        "examples": [
+            ("buy 2 btc", '{"order_type": "market", "symbol": "BTCUSDT", "side": "BUY", "quantity": 2}'),
+        ],
+    },
+    "limit": {
+        "keys": '{"order_type": "limit", "symbol", "side", "quantity", "price"}',
+        "about": "limit: rest an order at a given price.",
+        "examples": [
+            ("sell 1 eth limit at 3200",
+             '{"order_type": "limit", "symbol": "ETHUSDT", "side": "SELL", "quantity": 1, "price": 3200}'),
+        ],
+    },
+    "stop_limit": {
+        "keys": '{"order_type": "stop_limit", "symbol", "side", "quantity", "stop_price", "price"}',
+        "about": "stop_limit: when stop_price (trigger) is reached, place a limit order at price.",
+        "examples": [
+            ("buy 0.01 btc if price hits 86000 with limit 85950",
+             '{"order_type": "stop_limit", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.01, '
+             '"stop_price": 86000, "price": 85950}'),
+        ],
+    },
+    "oco": {
+        "keys": '{"order_type": "oco", "symbol", "side", "quantity", "price", "stop_price"}',
+        "about": "oco: take-profit at price plus stop-loss at stop_price; one cancels the other.",
+        "examples": [
+            ("sell 0.5 eth oco for 2700 stop_price 3200",
+             '{"order_type": "oco", "symbol": "ETHUSDT", "side": "SELL", "quantity": 0.5, '
+             '"price": 2700, "stop_price": 3200}'),
+        ],
+    },
+    "twap": {
+        "keys": '{"order_type": "twap", "symbol", "side", "quantity", "twap_intervals"?, "twap_delay"?}',
+        "about": "twap: split quantity into twap_intervals market orders, twap_delay seconds apart.",
+        "examples": [
+            ("twap buy btc amount 0.3 over 5 intervals every 60s",
+             '{"order_type": "twap", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.3, '
+             '"twap_intervals": 5, "twap_delay": 60}'),
+        ],
+    },
+    "vwap": {
+        "keys": '{"order_type": "vwap", "symbol", "side", "quantity", "twap_intervals"?, "twap_delay"?, '
+                '"participation"?}',
+        "about": "vwap: like twap, but slices follow the usual trading volume; participation is the max "
+                 "fraction of market volume per slice (5% -> 0.05).",
+        "examples": [
+            ("vwap sell 2 eth over 12 intervals every 300s participation 5%",
+             '{"order_type": "vwap", "symbol": "ETHUSDT", "side": "SELL", "quantity": 2, '
+             '"twap_intervals": 12, "twap_delay": 300, "participation": 0.05}'),
+        ],
+    },
+    "grid": {
+        "keys": '{"order_type": "grid", "symbol", "side", "quantity", "grid_lower", "grid_upper", "grid_levels", '
+                '"grid_mode"?}',
+        "about": "grid: limit orders on grid_levels prices from grid_lower to grid_upper, quantity per order; "
+                 "grid_mode arithmetic or geometric.",
+        "examples": [
+            ("grid buy 0.002 btc from 80000 to 90000 20 levels",
+             '{"order_type": "grid", "symbol": "BTCUSDT", "side": "BUY", "quantity": 0.002, '
+             '"grid_lower": 80000, "grid_upper": 90000, "grid_levels": 20}'),
+        ],
+    },
+}
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough BPE token count: words and punctuation, long words counted per
+    4 characters. Good enough for budgeting, not for billing.
+    """
+    total = 0
+    for tok in _TOKEN_RE.findall(text):
+        total += max(1, (len(tok) + 3) // 4)
+    return total
+
+
+def classify_order_type(text: str) -> List[str]:
+    """
+    Cheap keyword guess of the order types a command could be.
+    Returns all types when nothing matches.
+    """
+    normalized = _normalize(text)
+    words = set(re.findall(r"[a-z_]+", normalized))
+    numbers = re.findall(r"\d+(?:\.\d+)?", normalized)
+
+    candidates = []
+    if "vwap" in words or words & {"participation", "pov", "volume"}:
+        candidates.append("vwap")
+    elif words & {"twap", "intervals", "interval", "slices", "chunks", "every"}:
+        candidates.append("twap")
+    if words & {"grid", "grids", "levels", "ladder", "geometric", "arithmetic"}:
+        candidates.append("grid")
+    if words & {"oco", "take_profit", "tp", "stop_loss", "sl", "target"}:
+        candidates.append("oco")
+    elif words & {"stop_limit", "stop", "stop_price", "hits", "trigger", "reaches", "drops", "rises", "falls"}:
+        candidates.append("stop_limit")
+    if not candidates and (words & {"limit", "price", "at"} or "@" in normalized):
+        candidates.append("limit")
+    if "market" in words and "market" not in candidates:
+        candidates.append("market")
+
+    if not candidates:
+        # "buy 2 btc": one number and no order wording -> market
+        candidates = ["market"] if len(numbers) == 1 else list(ORDER_TYPES)
+    return candidates
+
+
+def build_parse_prompt(text: str, budget: Optional[int] = None) -> Tuple[str, List[str], int]:
+    """
+    Build the system prompt for `text`.
+    Returns (prompt, candidate order types, estimated tokens).
+    """
+    candidates = classify_order_type(text)
+
+    def render(with_about=True, with_examples=True):
+        parts = [HEADER, "Schemas:"]
+        for ot in candidates:
+            schema = SCHEMAS[ot]
+            parts.append(schema["keys"])
+            if with_about:
+                parts.append("  " + schema["about"])
+        if with_examples:
+            parts.append("Examples:")
+            for ot in candidates:
+                for command, output in SCHEMAS[ot]["examples"]:
+                    parts.append(f"{command} -> {output}")
+        return "\n".join(parts)
+
+    prompt = render()
+    tokens = estimate_tokens(prompt)
+    if budget is not None:
+        for with_about, with_examples in ((True, False), (False, False)):
+            if tokens <= budget:
+                break
+            prompt = render(with_about, with_examples)
+            tokens = estimate_tokens(prompt)
+
+    return prompt, candidates, tokens
+
+
+def prompt_source() -> str:
+    """
+    Everything the compact prompts are built from; used as cache version.
+    """
+    parts = [HEADER]
+    for ot in ORDER_TYPES:
+        schema = SCHEMAS[ot]
+        parts += [schema["keys"], schema["about"]] + [c + o for c, o in schema["examples"]]
+    return "\n".join(parts)
@@ -0,0 +1,468 @@
+# /src/rate_limiter.py
+# Client-side pacing for the exchange rate limits, shared by every executor.
+#
+# get_client() wraps the python-binance client in RateLimitedClient, so every
+# futures_* call (executors, batch orders, TWAP slices, the OCO watcher)
+# first takes tokens from one token bucket per exchange limit
+# (REQUEST_WEIGHT per minute, ORDERS per 10 s and per minute):
+#   - capacity = limit * (1 - MARGIN); a spent token comes back when it
+#     leaves the exchange's window (a bucket refilled at a constant rate
+#     could spend up to twice its size inside one window)
+#   - after every response, usage the exchange reports beyond ours
+#     (X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-10S / -1M headers; other
+#     machines on the same IP or account) is charged to the bucket
+#   - a 429 / 418 blocks every request until its Retry-After has passed
+#   - waiting requests are served by priority (CANCEL, PROTECT, NEW, BULK)
+#     and each priority may only use the bucket down to its RESERVE, so
+#     cancels and stop-losses still get through while entries are throttled
+#
+# The bucket state lives in a small mmap'd file guarded by flock, so several
+# bot processes on one machine (one-shot CLI runs, repl, serve) share a
+# single budget; without fcntl (Windows) the budget is per process.
+
+import heapq
+import itertools
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from src.logger import log_info, log_error
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+STATE_FILE = os.getenv("BOT_RATE_LIMIT_FILE", os.path.join(tempfile.gettempdir(), "binance-bot-ratelimit.bin"))
+MARGIN = 0.05            # stay this far below each exchange limit
+MAX_WAIT_SLICE = 0.25    # seconds between re-checks while waiting (other processes refill too)
+
+DEFAULT_RATE_LIMITS = [
+    {"rateLimitType": "REQUEST_WEIGHT", "interval": "MINUTE", "intervalNum": 1, "limit": 2400},
+    {"rateLimitType": "ORDERS", "interval": "MINUTE", "intervalNum": 1, "limit": 1200},
+    {"rateLimitType": "ORDERS", "interval": "SECOND", "intervalNum": 10, "limit": 300},
+]
+
+CANCEL, PROTECT, NEW, BULK = 0, 1, 2, 3
+PRIORITY_NAMES = {CANCEL: "cancel", PROTECT: "protect", NEW: "new", BULK: "bulk"}
+# Share of each bucket a priority must leave untouched
+RESERVE = {CANCEL: 0.0, PROTECT: 0.05, NEW: 0.15, BULK: 0.3}
+
+# method -> request weight, or callable(params) -> weight
+WEIGHTS = {
+    "futures_create_order": 0,
+    "futures_place_batch_order": 5,
+    "futures_cancel_order": 1,
+    "futures_get_order": 1,
+    "futures_get_open_orders": lambda p: 1 if p.get("symbol") else 40,
+    "futures_get_all_orders": 5,
+    "futures_exchange_info": 1,
+    "futures_symbol_ticker": lambda p: 1 if p.get("symbol") else 2,
+    "futures_stream_get_listen_key": 1,
+    "futures_stream_keepalive": 1,
+    "futures_order_book": lambda p: {5: 2, 10: 2, 20: 2, 50: 2, 100: 5, 500: 10}.get(int(p.get("limit", 500)), 20),
+    "futures_klines": lambda p: 1 if int(p.get("limit", 500)) < 100 else 2 if int(p.get("limit", 500)) < 500
+    else 5 if int(p.get("limit", 500)) <= 1000 else 10,
+}
+
+_INTERVAL_SECONDS = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+
+_MAGIC = 0x42524C32   # "BRL2"
+_HEADER = struct.Struct("<IId")     # magic, bucket count, blocked_until
+_RING = struct.Struct("<dqqd")      # limit, head, entries, total cost in window
+_ENTRY = struct.Struct("<dd")       # spent at (wall clock), cost
+
+
+class RateLimitError(RuntimeError):
+    """
+    Raised when a request could not get its tokens within the timeout.
+    """
+
+
+def priority_for(method: str, params: Dict[str, Any]) -> int:
+    if method == "futures_cancel_order":
+        return CANCEL
+    if method == "futures_stream_keepalive":
+        return PROTECT
+    orders = params.get("batchOrders") if method == "futures_place_batch_order" else [params]
+    if method not in ("futures_create_order", "futures_place_batch_order") or not isinstance(orders, list):
+        return NEW
+    return min((_order_priority(o) for o in orders), default=NEW)
+
+
+def _order_priority(order: Dict[str, Any]) -> int:
+    client_id = str(order.get("newClientOrderId", ""))
+    if (client_id.startswith("SL-") or str(order.get("reduceOnly", "")).lower() == "true"
+            or str(order.get("closePosition", "")).lower() == "true"):
+        return PROTECT
+    if client_id.startswith(("TWAP-", "GRID-", "VWAP-", "BULK-")):
+        return BULK
+    return NEW
+
+
+class _Bucket:
+
+    __slots__ = ("kind", "seconds", "limit", "capacity", "slots", "header")
+
+    def __init__(self, rate_limit: Dict[str, Any], margin: float):
+        self.kind = rate_limit["rateLimitType"]
+        self.seconds = _INTERVAL_SECONDS[rate_limit["interval"]] * rate_limit["intervalNum"]
+        self.limit = rate_limit["limit"]
+        self.capacity = self.limit * (1 - margin)
+        self.slots = int(self.limit) + 1   # every entry costs >= 1
+        label = f"{rate_limit['intervalNum']}{rate_limit['interval'][0]}"
+        self.header = (f"X-MBX-USED-WEIGHT-{label}" if self.kind == "REQUEST_WEIGHT"
+                       else f"X-MBX-ORDER-COUNT-{label}")
+
+    def cost(self, weight: int, orders: int) -> int:
+        return weight if self.kind == "REQUEST_WEIGHT" else orders
+
+
+class _State:
+    """
+    Per bucket, a ring of (time, cost) for the tokens spent inside its
+    window, plus blocked_until. Lives in a shared file (mmap + flock) or,
+    with path=None, in process memory.
+    """
+
+    def __init__(self, buckets: List[_Bucket], path: Optional[str], clock=time.time):
+        self.buckets = buckets
+        self._offsets = []
+        offset = _HEADER.size
+        for b in buckets:
+            self._offsets.append(offset)
+            offset += _RING.size + _ENTRY.size * b.slots
+        self.size = offset
+        self._fd = None
+        self._lock = threading.Lock()
+        if path and fcntl is not None:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(self._fd).st_size < self.size:
+                os.ftruncate(self._fd, self.size)
+            self._map = mmap.mmap(self._fd, self.size)
+        else:
+            self._map = bytearray(self.size)
+        with self:
+            magic, count, _ = _HEADER.unpack_from(self._map, 0)
+            same = magic == _MAGIC and count == len(buckets)
+            if not same or [self._ring(i)[0] for i in range(count)] != [b.limit for b in buckets]:
+                # new file, or written with other limits: start empty
+                _HEADER.pack_into(self._map, 0, _MAGIC, len(buckets), 0.0)
+                for i, b in enumerate(buckets):
+                    _RING.pack_into(self._map, self._offsets[i], b.limit, 0, 0, 0.0)
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def _ring(self, i: int):
+        return _RING.unpack_from(self._map, self._offsets[i])
+
+    def _entry_offset(self, i: int, slot: int) -> int:
+        return self._offsets[i] + _RING.size + _ENTRY.size * (slot % self.buckets[i].slots)
+
+    def used(self, i: int, now: float) -> float:
+        """
+        Cost spent inside the window ending now (expired entries dropped).
+        """
+        b = self.buckets[i]
+        limit, head, entries, total = self._ring(i)
+        changed = False
+        while entries:
+            at, cost = _ENTRY.unpack_from(self._map, self._entry_offset(i, head))
+            if at > now - b.seconds:
+                break
+            total -= cost
+            head = (head + 1) % b.slots
+            entries -= 1
+            changed = True
+        if changed:
+            total = max(0.0, total) if entries else 0.0
+            _RING.pack_into(self._map, self._offsets[i], limit, head, entries, total)
+        return total
+
+    def spend(self, i: int, cost: float, now: float):
+        b = self.buckets[i]
+        limit, head, entries, total = self._ring(i)
+        if entries == b.slots:
+            # full (only with fractional header charges): fold into the newest
+            last = self._entry_offset(i, head + entries - 1)
+            _, old = _ENTRY.unpack_from(self._map, last)
+            _ENTRY.pack_into(self._map, last, now, old + cost)
+        else:
+            _ENTRY.pack_into(self._map, self._entry_offset(i, head + entries), now, cost)
+            entries += 1
+        _RING.pack_into(self._map, self._offsets[i], limit, head, entries, total + cost)
+
+    def freed_at(self, i: int, amount: float) -> float:
+        """
+        Time at which at least `amount` of the spent cost will have expired.
+        """
+        b = self.buckets[i]
+        _, head, entries, _ = self._ring(i)
+        freed = 0.0
+        at = 0.0
+        for k in range(entries):
+            at, cost = _ENTRY.unpack_from(self._map, self._entry_offset(i, head + k))
+            freed += cost
+            if freed >= amount:
+                break
+        return at + b.seconds
+
+    @property
+    def blocked_until(self) -> float:
+        return _HEADER.unpack_from(self._map, 0)[2]
+
+    @blocked_until.setter
+    def blocked_until(self, value: float):
+        _HEADER.pack_into(self._map, 0, _MAGIC, len(self.buckets), value)
+
+    def close(self):
+        if self._fd is not None:
+            self._map.close()
+            os.close(self._fd)
+            self._fd = None
+
+
+class RateLimiter:
+    """
+    Token buckets for the exchange limits. acquire() blocks until the
+    request may be sent; observe() / penalize() feed back what the exchange
+    answered.
+    """
+
+    def __init__(self, rate_limits: Optional[List[Dict[str, Any]]] = None, path: Optional[str] = STATE_FILE,
+                 margin: float = MARGIN, clock=time.time):
+        self.buckets = [_Bucket(rl, margin) for rl in (rate_limits or DEFAULT_RATE_LIMITS)
+                        if rl["rateLimitType"] in ("REQUEST_WEIGHT", "ORDERS")]
+        self.clock = clock
+        self.state = _State(self.buckets, path, clock)
+        self.path = path if self.state._fd is not None else None
+        self.waited = {p: 0.0 for p in PRIORITY_NAMES}
+        self.granted = {p: 0 for p in PRIORITY_NAMES}
+        self.throttled = 0
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[int, int]] = []   # (priority, seq) of waiting requests
+        self._seq = itertools.count()
+
+    def _try_take(self, weight: int, orders: int, priority: int) -> float:
+        """
+        Take the tokens if every bucket has them above the priority's
+        reserve. Returns 0 on success, else seconds until worth retrying.
+        """
+        now = self.clock()
+        with self.state as st:
+            blocked = st.blocked_until - now
+            if blocked > 0:
+                return blocked
+            wait = 0.0
+            for i, b in enumerate(self.buckets):
+                need = b.cost(weight, orders)
+                if not need:
+                    continue
+                # a request bigger than what the priority may use goes out
+                # once that much is free and leaves the bucket in debt
+                allowed = b.capacity * (1 - RESERVE[priority])
+                excess = st.used(i, now) + min(need, allowed) - allowed
+                if excess > 0:
+                    wait = max(wait, st.freed_at(i, excess) - now, 0.001)
+            if wait:
+                return wait
+            for i, b in enumerate(self.buckets):
+                need = b.cost(weight, orders)
+                if need:
+                    st.spend(i, need, now)
+            return 0.0
+
+    def acquire(self, weight: int = 1, orders: int = 0, priority: int = NEW, timeout: Optional[float] = None):
+        """
+        Block until the request fits. Requests in this process are served
+        in priority order (FIFO within a priority).
+        """
+        start = time.monotonic()
+        me = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, me)
+            try:
+                while True:
+                    if self._queue[0] == me:
+                        wait = self._try_take(weight, orders, priority)
+                        if not wait:
+                            break
+                    else:
+                        wait = MAX_WAIT_SLICE
+                    if timeout is not None and time.monotonic() - start + wait > timeout:
+                        raise RateLimitError(f"rate limit: no capacity for weight {weight} / {orders} "
+                                             f"order(s) within {timeout} s")
+                    self.throttled += 1
+                    self._cond.wait(min(wait, MAX_WAIT_SLICE))
+            finally:
+                self._queue.remove(me)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+        self.granted[priority] += 1
+        self.waited[priority] += time.monotonic() - start
+
+    def observe(self, headers):
+        """
+        Charge usage the exchange reports beyond what the buckets hold.
+        """
+        if not headers:
+            return
+        now = self.clock()
+        with self.state as st:
+            for i, b in enumerate(self.buckets):
+                used = headers.get(b.header)
+                if used is None:
+                    continue
+                try:
+                    extra = float(used) - st.used(i, now)
+                except ValueError:
+                    continue
+                if extra >= 1:
+                    st.spend(i, extra, now)
+
+    def penalize(self, retry_after: float):
+        """
+        429 / 418: nothing goes out (in any process) for `retry_after` s.
+        """
+        until = self.clock() + retry_after
+        with self.state as st:
+            if until > st.blocked_until:
+                st.blocked_until = until
+        log_error("Exchange rate limit hit, pausing requests", {"retry_after": retry_after})
+
+    def status(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self.state as st:
+            buckets = []
+            for i, b in enumerate(self.buckets):
+                buckets.append({"limit": b.header, "available": round(b.capacity - st.used(i, now), 1),
+                                "capacity": round(b.capacity, 1)})
+            blocked = max(0.0, st.blocked_until - now)
+        return {"buckets": buckets, "blocked_s": round(blocked, 3), "shared": self.path is not None,
+                "throttled": self.throttled,
+                "granted": {PRIORITY_NAMES[p]: n for p, n in self.granted.items()},
+                "waited_s": {PRIORITY_NAMES[p]: round(w, 3) for p, w in self.waited.items()}}
+
+    def close(self):
+        self.state.close()
+
+
+def _retry_after(error, headers) -> Optional[float]:
+    status = getattr(error, "status_code", None)
+    if status not in (418, 429) and getattr(error, "code", None) not in (-1003, -1015):
+        return None
+    value = (headers or {}).get("Retry-After") or getattr(error, "retry_after", None)
+    try:
+        return max(1.0, float(value))
+    except (TypeError, ValueError):
+        return 60.0 if status == 418 else 5.0
+
+
+class RateLimitedClient:
+    """
+    Proxy around a python-binance Client (or MockExchange / LazyClient):
+    the futures calls in WEIGHTS go through the limiter, everything else
+    is passed through.
+    """
+
+    def __init__(self, client, limiter: RateLimiter, timeout: Optional[float] = None):
+        self.client = client
+        self.limiter = limiter
+        self.timeout = timeout
+        self._local = threading.local()   # headers of this thread's last response
+        self._hooked = None
+
+    def _hook_session(self) -> bool:
+        # python-binance keeps only the last response on client.response,
+        # shared by every thread; a requests response hook runs in the
+        # calling thread and sees this call's own response
+        hooks = getattr(getattr(self.client, "session", None), "hooks", None)
+        if not isinstance(hooks, dict):
+            return False
+        local = self._local
+
+        def record(response, *args, **kwargs):
+            local.headers = response.headers
+
+        hooks.setdefault("response", []).append(record)
+        return True
+
+    def _headers(self):
+        if self._hooked:
+            headers, self._local.headers = getattr(self._local, "headers", None), None
+            return headers
+        # MockExchange keeps its response per thread
+        return getattr(getattr(self.client, "response", None), "headers", None)
+
+    def __getattr__(self, name):
+        # Private lookups (copy/pickle probes) must not reach the client
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self.client, name)
+        weight = WEIGHTS.get(name)
+        if weight is None or not callable(attr):
+            return attr
+
+        def call(*args, **params):
+            w = weight(params) if callable(weight) else weight
+            orders = 0
+            if name == "futures_create_order":
+                orders = 1
+            elif name == "futures_place_batch_order":
+                orders = len(params.get("batchOrders") or [])
+            self.limiter.acquire(w, orders, priority_for(name, params), self.timeout)
+            if self._hooked is None:
+                self._hooked = self._hook_session()
+            try:
+                result = attr(*args, **params)
+            except Exception as e:
+                headers = self._headers()
+                retry_after = _retry_after(e, headers)
+                if retry_after is not None:
+                    self.limiter.penalize(retry_after)
+                self.limiter.observe(headers)
+                raise
+            self.limiter.observe(self._headers())
+            return result
+
+        call.__name__ = name
+        setattr(self, name, call)   # later lookups skip __getattr__
+        return call
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter on the shared state file. Limits come from the
+    cached exchange info when there is one.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            from src.symbol_filters import get_filter_cache
+
+            # the cache is only read lazily; its rate limits are needed now
+            filters = get_filter_cache()
+            if not filters.rate_limits:
+                filters.load()
+            limits = filters.rate_limits or DEFAULT_RATE_LIMITS
+            _shared = RateLimiter(limits)
+            log_info("Rate limiter ready", {"limits": [b.header for b in _shared.buckets],
+                                            "shared_file": _shared.path})
+        return _shared
@@ -7,6 +7,7 @@ from src.logger import (
     log_api_response,
     log_order,
 )
+from src.ledger import record_order
 
 def execute_stop_limit_order(client, symbol, side, quantity, stop_price, limit_price):
 
@@ -31,6 +32,7 @@ def execute_stop_limit_order(client, symbol, side, quantity, stop_price, limit_p
 
         log_api_response("STOP-LIMIT order executed", response)
         log_order("STOP-LIMIT", response)
+        record_order("STOP-LIMIT", response, request_payload)
 
         return response
 
@@ -0,0 +1,325 @@
+# /src/symbol_filters.py
+# Per-symbol exchange filters (tickSize, stepSize, minQty, minNotional, ...)
+# taken from one bulk `futures_exchange_info` call.
+#   - kept in a dict keyed by symbol (O(1) lookup per order)
+#   - persisted to FILTERS_FILE with the fetch time; entries older than the
+#     TTL are still served while a background thread refreshes them
+#   - all rounding is done with Decimal on the string form of the value, so
+#     0.1 + 0.2 style float artifacts never reach the exchange
+
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP, ROUND_UP, InvalidOperation
+from typing import Optional, Dict, Any
+
+from src.logger import log_info, log_error
+
+# Anchored to the project root like bot.log, so every process shares one file
+FILTERS_FILE = os.getenv(
+    "BOT_SYMBOL_FILTERS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "symbol_filters.json"),
+)
+FILTERS_TTL = 24 * 3600
+RETRY_AFTER = 60  # seconds between attempts after a failed refresh
+
+_FIELDS = ("tick_size", "min_price", "max_price", "step_size", "min_qty", "max_qty",
+           "market_step_size", "market_min_qty", "market_max_qty", "min_notional")
+
+# Order types that execute as MARKET orders (MARKET_LOT_SIZE applies)
+_MARKET_TYPES = ("market", "twap", "vwap")
+
+
+def _dec(value) -> Decimal:
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Invalid number: {value!r}")
+
+
+def _snap(value: Decimal, step: Decimal, rounding) -> Decimal:
+    if not step:
+        return value
+    return (value / step).to_integral_value(rounding=rounding) * step
+
+
+def _plain(value: Decimal) -> float:
+    # float(Decimal("0.003")) reprs as 0.003, so logs/payloads stay clean
+    return float(value.normalize())
+
+
+class SymbolFilters:
+    """
+    Trading rules for one symbol. Zero means "no limit" (the exchange uses
+    "0" for unbounded maxima as well).
+    """
+
+    __slots__ = ("symbol", "status") + _FIELDS
+
+    def __init__(self, symbol: str, status: str = "TRADING", **fields):
+        self.symbol = symbol
+        self.status = status
+        for name in _FIELDS:
+            setattr(self, name, _dec(fields.get(name, "0")))
+
+    @classmethod
+    def from_exchange_info(cls, info: Dict[str, Any]) -> "SymbolFilters":
+        by_type = {f["filterType"]: f for f in info.get("filters", [])}
+        price = by_type.get("PRICE_FILTER", {})
+        lot = by_type.get("LOT_SIZE", {})
+        market = by_type.get("MARKET_LOT_SIZE", lot)
+        notional = by_type.get("MIN_NOTIONAL", {})
+        return cls(
+            info["symbol"], info.get("status", "TRADING"),
+            tick_size=price.get("tickSize", "0"),
+            min_price=price.get("minPrice", "0"),
+            max_price=price.get("maxPrice", "0"),
+            step_size=lot.get("stepSize", "0"),
+            min_qty=lot.get("minQty", "0"),
+            max_qty=lot.get("maxQty", "0"),
+            market_step_size=market.get("stepSize", "0"),
+            market_min_qty=market.get("minQty", "0"),
+            market_max_qty=market.get("maxQty", "0"),
+            # futures use "notional", spot uses "minNotional"
+            min_notional=notional.get("notional", notional.get("minNotional", "0")),
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        out = {"symbol": self.symbol, "status": self.status}
+        out.update({name: str(getattr(self, name)) for name in _FIELDS})
+        return out
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> "SymbolFilters":
+        return cls(**data)
+
+    def round_quantity(self, quantity, market: bool = False) -> Decimal:
+        """
+        Floor to the step size (never trade more than was asked for).
+        """
+        step = self.market_step_size if market and self.market_step_size else self.step_size
+        return _snap(_dec(quantity), step, ROUND_DOWN)
+
+    def round_price(self, price) -> Decimal:
+        """
+        Nearest multiple of the tick size.
+        """
+        return _snap(_dec(price), self.tick_size, ROUND_HALF_UP)
+
+    def check_quantity(self, qty: Decimal, market: bool = False):
+        min_qty = self.market_min_qty if market and self.market_min_qty else self.min_qty
+        max_qty = self.market_max_qty if market and self.market_max_qty else self.max_qty
+        if qty <= 0 or qty < min_qty:
+            raise ValueError(f"quantity must be >= {min_qty} for {self.symbol} (got {qty})")
+        if max_qty and qty > max_qty:
+            raise ValueError(f"quantity must be <= {max_qty} for {self.symbol} (got {qty})")
+
+    def check_slices(self, quantity, intervals: int):
+        """
+        TWAP slices are quantity / intervals floored to the MARKET step
+        (twap_quantities in src/advanced/twap.py): each one has to meet the
+        minimum quantity on its own.
+        """
+        step = self.market_step_size or self.step_size
+        if not step:
+            return
+        smallest = max(_snap(self.market_min_qty or self.min_qty, step, ROUND_UP), step)
+        most = int(self.round_quantity(quantity, market=True) / smallest)
+        if intervals > most:
+            raise ValueError(
+                f"{_dec(quantity).normalize()} {self.symbol} can't be split into {intervals} slices of at "
+                f"least {smallest.normalize()}: use at most {most} interval{'s' if most != 1 else ''}"
+            )
+
+    def check_price(self, price: Decimal, name: str = "price"):
+        if price <= 0 or price < self.min_price:
+            raise ValueError(f"{name} must be >= {self.min_price} for {self.symbol} (got {price})")
+        if self.max_price and price > self.max_price:
+            raise ValueError(f"{name} must be <= {self.max_price} for {self.symbol} (got {price})")
+
+    def apply(self, order_type: str, order: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Round quantity / price / stop_price of a validated order and check
+        them against the filters. Returns only the adjusted fields.
+        Raises ValueError if the order would be rejected by the exchange.
+        """
+        if self.status != "TRADING":
+            raise ValueError(f"{self.symbol} is not trading (status {self.status})")
+
+        market = order_type in _MARKET_TYPES
+        qty = self.round_quantity(order["quantity"], market)
+        self.check_quantity(qty, market)
+        out = {"quantity": _plain(qty)}
+
+        notional_price = None
+        for name in ("price", "stop_price"):
+            if name in order:
+                price = self.round_price(order[name])
+                self.check_price(price, name)
+                out[name] = _plain(price)
+                if notional_price is None:
+                    notional_price = price
+
+        # MARKET notional depends on the mark price, which only the exchange knows
+        if notional_price is not None and self.min_notional:
+            notional = qty * notional_price
+            if notional < self.min_notional:
+                raise ValueError(
+                    f"order value {notional.normalize()} is below the {self.min_notional} "
+                    f"minimum notional for {self.symbol}"
+                )
+        return out
+
+
+class SymbolFilterCache:
+    """
+    Symbol -> SymbolFilters map backed by a JSON file.
+    path=None keeps everything in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = FILTERS_FILE, ttl: Optional[float] = FILTERS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.fetched_at = 0.0
+        self.rate_limits = []
+        self.refreshes = 0
+        self._filters: Dict[str, SymbolFilters] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._loaded = False
+        self._failed_at = None
+
+    def __len__(self):
+        return len(self._filters)
+
+    @property
+    def stale(self) -> bool:
+        return self.ttl is not None and time.time() - self.fetched_at > self.ttl
+
+    def load_exchange_info(self, info: Dict[str, Any], fetched_at: Optional[float] = None):
+        """
+        Replace the cache with the contents of a futures_exchange_info reply.
+        """
+        filters = {}
+        for s in info.get("symbols", []):
+            try:
+                f = SymbolFilters.from_exchange_info(s)
+            except (KeyError, ValueError) as e:
+                log_error("Bad exchange info entry", {"symbol": s.get("symbol"), "error": str(e)})
+                continue
+            filters[f.symbol] = f
+        with self._lock:
+            self._filters = filters
+            self.rate_limits = info.get("rateLimits", [])
+            self.fetched_at = fetched_at if fetched_at is not None else time.time()
+            self._loaded = True
+        self.save()
+
+    def load(self) -> bool:
+        """
+        Read the persisted cache. Returns False if there is none.
+        """
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            filters = {sym: SymbolFilters.from_dict(d) for sym, d in data["symbols"].items()}
+        except Exception as e:
+            log_error("Failed to load symbol filters", {"path": self.path, "error": str(e)})
+            return False
+        with self._lock:
+            self._filters = filters
+            self.rate_limits = data.get("rate_limits", [])
+            self.fetched_at = data.get("fetched_at", 0.0)
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "fetched_at": self.fetched_at,
+                "rate_limits": self.rate_limits,
+                "symbols": {sym: f.to_dict() for sym, f in self._filters.items()},
+            }
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            log_error("Failed to save symbol filters", {"path": self.path, "error": str(e)})
+
+    def refresh(self, client):
+        """
+        One bulk exchange-info call for every symbol.
+        """
+        start = time.perf_counter()
+        try:
+            info = client.futures_exchange_info()
+        except Exception:
+            self._failed_at = time.monotonic()
+            raise
+        self._failed_at = None
+        self.load_exchange_info(info)
+        self.refreshes += 1
+        log_info("Symbol filters refreshed", {
+            "symbols": len(self._filters),
+            "ms": round((time.perf_counter() - start) * 1000, 2),
+        })
+
+    def refresh_async(self, client):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh(client)
+            except Exception as e:
+                log_error("Symbol filter refresh failed", {"error": str(e)})
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="symbol-filters", daemon=True).start()
+
+    def get(self, symbol: str, client=None) -> Optional[SymbolFilters]:
+        """
+        Filters for `symbol`, or None if nothing is known about it.
+        With a client, an empty cache is filled synchronously and a stale
+        one is refreshed in the background (the stale entry is returned).
+        """
+        if not self._loaded:
+            self.load()
+        backing_off = self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_AFTER
+        if client is not None and not backing_off:
+            if not self._filters:
+                try:
+                    self.refresh(client)
+                except Exception as e:
+                    log_error("Symbol filter refresh failed", {"error": str(e)})
+            elif self.stale:
+                self.refresh_async(client)
+        return self._filters.get(symbol)
+
+    def knows_symbols(self) -> bool:
+        return bool(self._filters)
+
+
+_shared: Optional[SymbolFilterCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_filter_cache() -> SymbolFilterCache:
+    """
+    Process-wide filter cache.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SymbolFilterCache()
+        return _shared
@@ -1,8 +1,10 @@
 # /src/validators.py
 
 import math
+import sys
 from typing import Optional, Dict, Any
 from src.logger import log_info, log_error
+from src.symbol_filters import get_filter_cache
 
 
 def _to_float(x, name="value"):
@@ -35,13 +37,72 @@ def _required_fields_for_order_type(order_type: str):
         "stop_limit": ["symbol", "side", "quantity", "stop_price", "price"],
         "oco": ["symbol", "side", "quantity", "price", "stop_price"],
         "twap": ["symbol", "side", "quantity"],
+        "vwap": ["symbol", "side", "quantity"],
+        "grid": ["symbol", "side", "quantity", "grid_lower", "grid_upper", "grid_levels"],
     }
     return mapping.get(order_type, ["symbol", "side", "quantity"])
 
 
-def validate(state: Dict[str, Any]) -> Dict[str, Any]:
+# How far a stop-limit's limit price may sit on the far side of its trigger
+# (below it for a BUY, above it for a SELL) before it is treated as a typo:
+# such an order triggers and then rests unfilled
+STOP_LIMIT_BAND = 0.05
+
+
+def _check_price_relationship(cleaned: Dict[str, Any]):
+    order_type, side = cleaned["order_type"], cleaned["side"]
+    price, stop = cleaned.get("price"), cleaned.get("stop_price")
+    if price is None or stop is None:
+        return
+    if order_type == "oco":
+        # take-profit above the stop-loss for a long (BUY), below it for a short
+        if side == "BUY" and price <= stop:
+            raise ValueError("oco BUY needs take-profit price above stop_price")
+        if side == "SELL" and price >= stop:
+            raise ValueError("oco SELL needs take-profit price below stop_price")
+    elif order_type == "stop_limit":
+        if side == "BUY" and price < stop * (1 - STOP_LIMIT_BAND):
+            raise ValueError(f"stop_limit BUY price more than {STOP_LIMIT_BAND:.0%} below stop_price")
+        if side == "SELL" and price > stop * (1 + STOP_LIMIT_BAND):
+            raise ValueError(f"stop_limit SELL price more than {STOP_LIMIT_BAND:.0%} above stop_price")
+
+
+def _apply_symbol_filters(cleaned: Dict[str, Any], client, filters) -> Dict[str, Any]:
+    # Exchange filters (tick/step size, min qty, min notional) from the
+    # cached exchange info; skipped if no exchange info has ever been loaded
+    if filters is None:
+        filters = get_filter_cache()
+    symbol = cleaned["symbol"]
+    symbol_filters = filters.get(symbol, client)
+    if symbol_filters is None:
+        if filters.knows_symbols():
+            raise ValueError(f"Unknown symbol: {symbol}")
+        return {}
+
+    adjusted = symbol_filters.apply(cleaned["order_type"], cleaned)
+    changed = {k: (cleaned[k], v) for k, v in adjusted.items() if cleaned[k] != v}
+    if changed:
+        log_info("Order rounded to symbol filters", {"symbol": symbol, "changed": changed})
+    return adjusted
+
+
+def _check_twap_slices(cleaned: Dict[str, Any], client, filters):
+    # Each slice is sent as its own MARKET order, so it must meet the
+    # symbol's minimum quantity (5 intervals is the executor's default)
+    if filters is None:
+        filters = get_filter_cache()
+    symbol_filters = filters.get(cleaned["symbol"], client)
+    if symbol_filters is not None:
+        symbol_filters.check_slices(cleaned["quantity"], cleaned.get("twap_intervals", 5))
+
+
+def validate(state: Dict[str, Any], filters=None) -> Dict[str, Any]:
     # Validate user input
     # Converts values to correct types and ensures required fields exist
+    # Checks take-profit / stop-loss sides for oco and the stop-limit band
+    # Rounds and checks quantity/price against the symbol's exchange filters
+    # (and, for a TWAP, every slice's quantity)
+    # (validate_batch below does the same for columns of orders)
 
     if not isinstance(state, dict):
         raise ValueError("State must be a dictionary")
@@ -88,6 +149,63 @@ def validate(state: Dict[str, Any]) -> Dict[str, Any]:
             raise ValueError("stop_price must be > 0")
         cleaned["stop_price"] = stop
 
+    # TWAP schedule
+    if "twap_intervals" in state:
+        intervals = _to_float(state["twap_intervals"], "twap_intervals")
+        if intervals <= 0 or intervals != int(intervals):
+            raise ValueError("twap_intervals must be a positive whole number")
+        cleaned["twap_intervals"] = int(intervals)
+
+    if "twap_delay" in state:
+        delay = _to_float(state["twap_delay"], "twap_delay")
+        if delay < 0:
+            raise ValueError("twap_delay must be >= 0")
+        cleaned["twap_delay"] = delay
+
+    # VWAP cap on each slice's share of the expected market volume
+    if "participation" in state:
+        participation = _to_float(state["participation"], "participation")
+        if not 0 < participation <= 1:
+            raise ValueError("participation must be > 0 and <= 1 (a fraction of market volume)")
+        cleaned["participation"] = participation
+
+    # Grid ladder (quantity is per order; levels are checked when the
+    # ladder is built, see src/advanced/grid_strategy.py)
+    if "grid_lower" in state or "grid_upper" in state:
+        for name in ("grid_lower", "grid_upper"):
+            value = _to_float(state.get(name), name)
+            if value <= 0:
+                raise ValueError(f"{name} must be > 0")
+            cleaned[name] = value
+        if cleaned["grid_lower"] >= cleaned["grid_upper"]:
+            raise ValueError("grid_lower must be below grid_upper")
+
+    if "grid_levels" in state:
+        levels = _to_float(state["grid_levels"], "grid_levels")
+        if levels < 2 or levels != int(levels):
+            raise ValueError("grid_levels must be a whole number >= 2")
+        cleaned["grid_levels"] = int(levels)
+
+    if "grid_mode" in state:
+        mode = str(state["grid_mode"] or "arithmetic").strip().lower()
+        if mode not in ("arithmetic", "geometric"):
+            raise ValueError("grid_mode must be 'arithmetic' or 'geometric'")
+        cleaned["grid_mode"] = mode
+
+    _check_price_relationship(cleaned)
+
+    cleaned.update(_apply_symbol_filters(cleaned, state.get("client"), filters))
+
+    # Slippage guard on the mirrored order book. order_book (and NumPy) is
+    # only loaded by repl / serve when BOT_BOOK_SYMBOLS is set, so a one-shot
+    # command never pays for it
+    order_book = sys.modules.get("src.order_book")
+    if order_book is not None:
+        cleaned.update(order_book.slippage_guard(cleaned, filters=filters))
+
+    if cleaned["order_type"] == "twap":
+        _check_twap_slices(cleaned, state.get("client"), filters)
+
     # Other fields
     for k, v in state.items():
         if k not in cleaned:
@@ -100,3 +218,12 @@ def validate(state: Dict[str, Any]) -> Dict[str, Any]:
     })
 
     return cleaned
+
+
+def validate_batch(*args, **kwargs):
+    """
+    Columnar, NumPy version of validate for large order sets; see
+    src/batch_validation.py. Imported on use so validate() stays light.
+    """
+    from src.batch_validation import validate_batch as _validate_batch
+    return _validate_batch(*args, **kwargs)